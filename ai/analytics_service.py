@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 import logging
 from typing import Any, Dict, Optional
 
-from sqlalchemy import String, and_, case, cast, func, select
+from sqlalchemy import ColumnElement, String, and_, case, cast, func, or_, select
 
 from homepot.app.models.AnalyticsModel import (
     DeviceMetrics,
@@ -18,10 +18,28 @@ from homepot.app.models.AnalyticsModel import (
     SiteOperatingSchedule,
 )
 from homepot.database import get_database_service
-from homepot.models import Device
+from homepot.models import Device, Job, Site
 
 logger = logging.getLogger(__name__)
 
+# Most frequent failure reasons reported by get_job_outcome_patterns.
+FAILURE_PATTERN_LIMIT = 20
+
+
+def _job_outcome_site_filter(site_id: str) -> ColumnElement[bool]:
+    """Match job outcomes for a site's devices or for jobs targeting the site.
+
+    ``job_outcomes`` has no site column: per-device outcomes carry the public
+    device id, and orchestrator outcomes without a device carry the job id.
+    """
+    site_pk = select(Site.id).where(Site.site_id == site_id).scalar_subquery()
+    return or_(
+        JobOutcome.device_id.in_(
+            select(Device.device_id).where(Device.site_id == site_pk)
+        ),
+        JobOutcome.job_id.in_(select(Job.job_id).where(Job.site_id == site_pk)),
+    )
+
 
 class AIAnalyticsService:
     """Service for aggregating analytics data for AI/ML features."""
@@ -183,9 +201,7 @@ class AIAnalyticsService:
                 # Base query conditions
                 conditions = [PushNotificationLog.sent_at >= cutoff_date]
                 if device_id:
-                    # Device filtering disabled due to schema mismatch
-                    # conditions.append(PushNotificationLog.device_id == device_id)
-                    pass
+                    conditions.append(PushNotificationLog.device_id == device_id)
 
                 # 1. Overall Stats
                 stats_query = select(
@@ -363,41 +379,43 @@ class AIAnalyticsService:
             async with db_service.get_session() as session:
                 cutoff_date = datetime.utcnow() - timedelta(days=days)
 
-                # Build query
-                query = select(JobOutcome).where(JobOutcome.timestamp >= cutoff_date)
-                # if site_id:
-                #     query = query.where(JobOutcome.site_id == site_id)
+                filters = [JobOutcome.timestamp >= cutoff_date]
+                if site_id:
+                    filters.append(_job_outcome_site_filter(site_id))
 
-                result = await session.execute(query)
-                outcomes = result.scalars().all()
+                # Success counts per hour of day, aggregated in the database
+                hour = func.extract("hour", JobOutcome.timestamp)
+                hourly_rows = await session.execute(
+                    select(
+                        hour,
+                        func.count(),
+                        func.sum(case((JobOutcome.status == "completed", 1), else_=0)),
+                    )
+                    .where(and_(*filters))
+                    .group_by(hour)
+                )
+                hourly_success = {
+                    int(row[0]): {"total": int(row[1]), "success": int(row[2] or 0)}
+                    for row in hourly_rows.all()
+                }
 
-                if not outcomes:
+                if not hourly_success:
                     return {"status": "no_data", "message": "No job outcomes available"}
 
                 # Calculate success rate
-                total_jobs = len(outcomes)
-                successful_jobs = sum(1 for o in outcomes if o.status == "completed")
+                total_jobs = sum(h["total"] for h in hourly_success.values())
+                successful_jobs = sum(h["success"] for h in hourly_success.values())
                 success_rate = (successful_jobs / total_jobs) * 100
 
-                # Analyze by hour of day
-                hourly_success = {}
-                for outcome in outcomes:
-                    hour = outcome.timestamp.hour
-                    if hour not in hourly_success:
-                        hourly_success[hour] = {"total": 0, "success": 0}
-                    hourly_success[hour]["total"] += 1
-                    if outcome.status == "completed":
-                        hourly_success[hour]["success"] += 1
-
                 # Find optimal hours (>90% success rate, minimum 5 jobs)
                 optimal_hours = []
-                for hour, stats in hourly_success.items():
+                for hour_of_day, stats in hourly_success.items():
                     if stats["total"] >= 5:
                         rate = (stats["success"] / stats["total"]) * 100
                         if rate >= 90:
                             optimal_hours.append(
                                 {
-                                    "hour": hour,
+                                    "hour": hour_of_day,
                                     "success_rate": round(rate, 2),
                                     "sample_size": stats["total"],
                                 }
@@ -405,12 +423,19 @@ class AIAnalyticsService:
 
                 optimal_hours.sort(key=lambda x: x["success_rate"], reverse=True)
 
-                # Analyze failure reasons
-                failed_jobs = [o for o in outcomes if o.status == "failed"]
-                failure_patterns: Dict[str, int] = {}
-                for job in failed_jobs:
-                    reason = str(job.error_message or "unknown")
-                    failure_patterns[reason] = failure_patterns.get(reason, 0) + 1
+                # Most frequent failure reasons
+                reason = func.coalesce(JobOutcome.error_message, "unknown")
+                failure_count = func.count().label("failures")
+                failure_rows = await session.execute(
+                    select(reason, failure_count)
+                    .where(and_(*filters, JobOutcome.status == "failed"))
+                    .group_by(reason)
+                    .order_by(failure_count.desc())
+                    .limit(FAILURE_PATTERN_LIMIT)
+                )
+                failure_patterns: Dict[str, int] = {
+                    str(row[0]): int(row[1]) for row in failure_rows.all()
+                }
 
                 return {
                     "site_id": site_id,
@@ -569,41 +594,25 @@ class AIAnalyticsService:
 
                 filters = [ErrorLog.timestamp >= cutoff_date]
                 if device_id:
-                    quoted_id = f'"{device_id}"'
+                    # original_device_id may be stored JSON-quoted or not
+                    original_id = cast(ErrorLog.context["original_device_id"], String)
                     filters.append(
-                        cast(ErrorLog.context["original_device_id"], String)
-                        == quoted_id
+                        or_(original_id == f'"{device_id}"', original_id == device_id)
                     )
 
                 result = await session.execute(
-                    select(ErrorLog)
-                    .where(and_(*filters))
-                    .order_by(ErrorLog.timestamp.desc())
+                    select(func.count(ErrorLog.id)).where(and_(*filters))
                 )
-                errors = result.scalars().all()
-
-                if device_id and not errors:
-                    # Fallback for unquoted ID
-                    filters_fallback = [ErrorLog.timestamp >= cutoff_date]
-                    filters_fallback.append(
-                        cast(ErrorLog.context["original_device_id"], String)
-                        == device_id
-                    )
-                    result = await session.execute(
-                        select(ErrorLog)
-                        .where(and_(*filters_fallback))
-                        .order_by(ErrorLog.timestamp.desc())
-                    )
-                    errors = result.scalars().all()
+                total_errors = int(result.scalar() or 0)
 
-                if not errors:
+                if not total_errors:
                     return {"status": "no_errors", "error_rate_per_day": 0}
 
-                error_rate = len(errors) / days
+                error_rate = total_errors / days
 
                 return {
                     "error_rate_per_day": round(error_rate, 2),
-                    "total_errors": len(errors),
+                    "total_errors": total_errors,
                     "period_days": days,
                 }
         except Exception as e:
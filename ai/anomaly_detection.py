@@ -1,7 +1,10 @@
 """Module for detecting anomalies in device metrics."""
 
+from dataclasses import dataclass
 import logging
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Union
+
+import numpy as np
 
 from .config import load_ai_config
 
@@ -18,6 +21,117 @@ DEFAULT_NETWORK_LATENCY_MS = 200.0
 DEFAULT_MAX_FLAPPING_COUNT = 5
 DEFAULT_CONSECUTIVE_FAILURES = 3
 
+# Bit flags reported per sample by ``check_anomaly_batch``; one per signal.
+FLAG_FLAPPING = 1 << 0
+FLAG_CONSECUTIVE_FAILURES = 1 << 1
+FLAG_ERROR_RATE = 1 << 2
+FLAG_NETWORK_LATENCY = 1 << 3
+FLAG_CPU = 1 << 4
+FLAG_MEMORY = 1 << 5
+FLAG_DISK = 1 << 6
+
+
+class _Rule(NamedTuple):
+    metric: str
+    flag: int
+    weight: float
+    inclusive: bool
+    describe: Callable[[Any], str]
+
+
+# Scoring rules in evaluation order. Both the scalar and the batch path walk
+# this table, so their scores (including float summation order) and
+# description strings stay identical.
+_RULES = (
+    # 1. Critical Stability Checks (High Impact)
+    _Rule(
+        "flapping_count",
+        FLAG_FLAPPING,
+        0.6,
+        False,
+        lambda v: f"High Instability: {v} state changes/hr",
+    ),
+    _Rule(
+        "consecutive_failures",
+        FLAG_CONSECUTIVE_FAILURES,
+        0.8,
+        True,
+        lambda v: f"System Failure: {v} consecutive health check failures",
+    ),
+    _Rule(
+        "error_rate",
+        FLAG_ERROR_RATE,
+        0.5,
+        False,
+        lambda v: f"High Error Rate: {v:.1%}",
+    ),
+    _Rule(
+        "network_latency_ms",
+        FLAG_NETWORK_LATENCY,
+        0.4,
+        False,
+        lambda v: f"High Latency: {v}ms",
+    ),
+    # 2. Resource Usage Checks (Lower Impact - Warning Signs)
+    _Rule("cpu_percent", FLAG_CPU, 0.2, False, lambda v: f"High CPU: {v}%"),
+    _Rule(
+        "memory_percent",
+        FLAG_MEMORY,
+        0.2,
+        False,
+        lambda v: f"High Memory: {v}%",
+    ),
+    _Rule(
+        "disk_percent",
+        FLAG_DISK,
+        0.2,
+        False,
+        lambda v: f"High Disk Usage: {v}%",
+    ),
+)
+
+METRIC_NAMES = tuple(rule.metric for rule in _RULES)
+
+ColumnarMetrics = Union[Mapping[str, Any], np.ndarray]
+
+
+@dataclass(frozen=True)
+class AnomalyBatchResult:
+    """Scores and per-signal flags for a batch of samples.
+
+    ``flags`` holds one ``FLAG_*`` bit per triggered rule. Description strings
+    are only built on request (``descriptions(i)``), since most callers of the
+    batch path only need the numbers.
+    """
+
+    scores: np.ndarray
+    flags: np.ndarray
+    _columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        """Return the number of samples in the batch."""
+        return len(self.scores)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of triggered rules per sample (``len`` of the scalar list)."""
+        counts: np.ndarray = np.unpackbits(self.flags[:, None], axis=1).sum(axis=1)
+        return counts
+
+    def descriptions(self, index: int) -> List[str]:
+        """Return the anomaly descriptions for sample ``index``."""
+        mask = int(self.flags[index])
+        return [
+            rule.describe(self._columns[rule.metric][index].item())
+            for rule in _RULES
+            if mask & rule.flag
+        ]
+
+    def iter_descriptions(self) -> Iterator[List[str]]:
+        """Yield the anomaly descriptions for every sample in order."""
+        for index in range(len(self)):
+            yield self.descriptions(index)
+
 
 class AnomalyDetector:
     """Detects anomalies in device metrics using rule-based thresholds."""
@@ -81,56 +195,14 @@ class AnomalyDetector:
         anomalies = []
 
         try:
-            # 1. Critical Stability Checks (High Impact)
-
-            # Check Flapping (State Changes)
-            flapping = metrics.get("flapping_count")
-            if flapping is not None and flapping > self.thresholds["flapping_count"]:
-                score += 0.6  # High impact
-                anomalies.append(f"High Instability: {flapping} state changes/hr")
-
-            # Check Consecutive Failures
-            failures = metrics.get("consecutive_failures")
-            if (
-                failures is not None
-                and failures >= self.thresholds["consecutive_failures"]
-            ):
-                score += 0.8  # Very High impact
-                anomalies.append(
-                    f"System Failure: {failures} consecutive health check failures"
-                )
-
-            # Check Error Rate
-            err = metrics.get("error_rate")
-            if err is not None and err > self.thresholds["error_rate"]:
-                score += 0.5
-                anomalies.append(f"High Error Rate: {err:.1%}")
-
-            # Check Latency
-            lat = metrics.get("network_latency_ms")
-            if lat is not None and lat > self.thresholds["network_latency_ms"]:
-                score += 0.4
-                anomalies.append(f"High Latency: {lat}ms")
-
-            # 2. Resource Usage Checks (Lower Impact - Warning Signs)
-
-            # Check CPU
-            cpu = metrics.get("cpu_percent")
-            if cpu is not None and cpu > self.thresholds["cpu_percent"]:
-                score += 0.2
-                anomalies.append(f"High CPU: {cpu}%")
-
-            # Check Memory
-            mem = metrics.get("memory_percent")
-            if mem is not None and mem > self.thresholds["memory_percent"]:
-                score += 0.2
-                anomalies.append(f"High Memory: {mem}%")
-
-            # Check Disk
-            disk = metrics.get("disk_percent")
-            if disk is not None and disk > self.thresholds["disk_percent"]:
-                score += 0.2
-                anomalies.append(f"High Disk Usage: {disk}%")
+            for rule in _RULES:
+                value = metrics.get(rule.metric)
+                if value is None:
+                    continue
+                limit = self.thresholds[rule.metric]
+                if value >= limit if rule.inclusive else value > limit:
+                    score += rule.weight
+                    anomalies.append(rule.describe(value))
 
             # Cap score at 1.0 and scale by sensitivity. A lower sensitivity
             # reports a smaller anomaly score (more conservative), so a
@@ -148,3 +220,61 @@ class AnomalyDetector:
         except Exception as e:
             logger.error(f"Error checking anomalies: {e}")
             return 0.0, []
+
+    def check_anomaly_batch(self, metrics: ColumnarMetrics) -> AnomalyBatchResult:
+        """Score many samples in one vectorized pass.
+
+        Semantics match :meth:`check_anomaly` sample by sample: a missing
+        column, ``None`` or ``NaN`` means "not reported" and never triggers a
+        rule, and ``scores[i]`` equals the scalar score for sample ``i``.
+
+        Args:
+            metrics: Columnar metrics, either a mapping of metric name to a
+                     1-D array-like or a NumPy structured array with named
+                     fields. Columns must share the same length.
+
+        Returns:
+            AnomalyBatchResult with ``scores`` (float64) and ``flags``
+            (uint8 bitmask of ``FLAG_*`` values) arrays.
+        """
+        fields = getattr(getattr(metrics, "dtype", None), "names", None)
+        available = fields if fields is not None else metrics.keys()  # type: ignore[union-attr]
+
+        columns: Dict[str, np.ndarray] = {}
+        for name in METRIC_NAMES:
+            if name in available:
+                column = np.asarray(metrics[name])
+                if column.dtype == object:
+                    column = column.astype(float)
+                columns[name] = column
+
+        lengths = {column.shape for column in columns.values()}
+        if len(lengths) > 1 or any(len(shape) != 1 for shape in lengths):
+            raise ValueError("metric columns must be 1-D arrays of equal length")
+        if lengths:
+            size = lengths.pop()[0]
+        elif fields is not None:
+            size = len(metrics)
+        else:
+            size = len(next(iter(metrics.values()), ()))  # type: ignore[union-attr]
+
+        score = np.zeros(size, dtype=np.float64)
+        flags = np.zeros(size, dtype=np.uint8)
+        for rule in _RULES:
+            values = columns.get(rule.metric)
+            if values is None:
+                continue
+            limit = self.thresholds[rule.metric]
+            # NaN compares False, matching the scalar path's "None" skip.
+            hit = values >= limit if rule.inclusive else values > limit
+            score += np.where(hit, rule.weight, 0.0)
+            flags |= np.where(hit, rule.flag, 0).astype(np.uint8)
+
+        final = np.minimum(np.minimum(score, 1.0) * self.sensitivity, 1.0)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Scored {size} samples, {int(np.count_nonzero(final))} anomalous"
+            )
+
+        return AnomalyBatchResult(scores=final, flags=flags, _columns=columns)
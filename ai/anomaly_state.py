@@ -0,0 +1,394 @@
+"""Incremental per-device anomaly state, fed by a micro-batch consumer.
+
+``GET /api/v1/ai/anomalies`` used to load every active device and every
+active alert on each call. It then ran window-function queries over
+``device_metrics`` and ``health_checks`` for the whole monitored fleet and
+scored the results in Python, so its cost grew with fleet size.
+
+:class:`AnomalyStateUpdater` moves that work to ingestion time. Each tick it
+reads only the ``device_metrics`` and ``health_checks`` rows added since the
+last tick (by ascending id), folds them into one ``device_anomaly_state`` row
+per device, and rescores just the touched devices with
+:meth:`~ai.anomaly_detection.AnomalyDetector.check_anomaly_batch`. Each state
+row holds:
+
+- the latest metric snapshot;
+- consecutive health-check failures;
+- the number of healthy/unhealthy transitions in the last
+  ``flapping_window_seconds`` (the detector's ``flapping_count``);
+- the resulting score, severity and reasons.
+
+The device online/offline sync that the endpoint used to do as a side effect
+also happens here. :func:`top_anomalies` is then a single indexed read.
+
+Each state row records the newest metric and health-check id applied to it,
+so re-reading rows is idempotent. Every tick re-reads a small overlap of ids
+below the cursor. That picks up rows whose transaction committed after a
+higher id was already visible, unless the device already has a newer row
+applied, in which case the straggler is older information anyway.
+"""
+
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any, Dict, Iterable, List, Optional, cast
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homepot.app.models.AnalyticsModel import Alert, DeviceAnomalyState, DeviceMetrics
+from homepot.models import Device, HealthCheck
+
+from .anomaly_detection import AnomalyDetector
+from .config import load_ai_config
+
+logger = logging.getLogger(__name__)
+
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_INTERVAL_SECONDS = 10.0
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_FLAPPING_WINDOW_SECONDS = 3600
+
+# Consecutive failed health checks after which a device is marked offline.
+OFFLINE_AFTER_FAILURES = 3
+
+# Ids re-read below each cursor to catch late-committing transactions.
+_CURSOR_OVERLAP = 200
+
+_METRIC_COLUMNS = (
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "network_latency_ms",
+    "error_rate",
+)
+
+
+def _naive_utc(value: Optional[datetime]) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def severity_for(score: float) -> Optional[str]:
+    """Map an anomaly score to the severity label used by the dashboard."""
+    if score >= 0.8:
+        return "critical"
+    if score > 0:
+        return "warning"
+    return None
+
+
+class AnomalyStateUpdater:
+    """Fold new telemetry and health checks into ``device_anomaly_state``."""
+
+    def __init__(
+        self,
+        detector: Optional[AnomalyDetector] = None,
+        batch_size: Optional[int] = None,
+        interval_seconds: Optional[float] = None,
+        flapping_window_seconds: Optional[float] = None,
+    ) -> None:
+        """Initialize the updater, reading unset values from ai/config.yaml."""
+        section = load_ai_config().get("anomaly_state", {}) or {}
+        self.detector = detector or AnomalyDetector()
+        self.batch_size = int(
+            batch_size
+            if batch_size is not None
+            else section.get("batch_size", DEFAULT_BATCH_SIZE)
+        )
+        self.interval = float(
+            interval_seconds
+            if interval_seconds is not None
+            else section.get("interval_seconds", DEFAULT_INTERVAL_SECONDS)
+        )
+        self.flapping_window = timedelta(
+            seconds=float(
+                flapping_window_seconds
+                if flapping_window_seconds is not None
+                else section.get(
+                    "flapping_window_seconds", DEFAULT_FLAPPING_WINDOW_SECONDS
+                )
+            )
+        )
+        self._metric_cursor: Optional[int] = None
+        self._health_cursor: Optional[int] = None
+
+    async def _load_cursors(self, session: AsyncSession) -> None:
+        # Resume from the newest rows already folded in (0 on a fresh table).
+        row = (
+            await session.execute(
+                select(
+                    func.max(DeviceAnomalyState.last_metric_id),
+                    func.max(DeviceAnomalyState.last_health_check_id),
+                )
+            )
+        ).one()
+        self._metric_cursor = int(row[0] or 0)
+        self._health_cursor = int(row[1] or 0)
+
+    async def process_pending(self, session: AsyncSession) -> int:
+        """Process batches until caught up; return the source rows read."""
+        total = 0
+        while True:
+            processed = await self.process_batch(session)
+            total += processed
+            if processed < self.batch_size:
+                return total
+
+    async def process_batch(self, session: AsyncSession) -> int:
+        """Fold at most ``batch_size`` new rows of each source; commit.
+
+        Returns:
+            int: The larger of the metric and health-check rows read, so
+            ``< batch_size`` means both sources are caught up.
+        """
+        if self._metric_cursor is None or self._health_cursor is None:
+            await self._load_cursors(session)
+        assert self._metric_cursor is not None and self._health_cursor is not None
+
+        metric_rows = (
+            await session.execute(
+                select(
+                    DeviceMetrics.id,
+                    DeviceMetrics.device_id,
+                    DeviceMetrics.timestamp,
+                    *(getattr(DeviceMetrics, c) for c in _METRIC_COLUMNS),
+                )
+                .where(DeviceMetrics.id > self._metric_cursor - _CURSOR_OVERLAP)
+                .order_by(DeviceMetrics.id)
+                .limit(self.batch_size + _CURSOR_OVERLAP)
+            )
+        ).all()
+        health_rows = (
+            await session.execute(
+                select(
+                    HealthCheck.id,
+                    HealthCheck.device_id,
+                    HealthCheck.is_healthy,
+                    HealthCheck.timestamp,
+                )
+                .where(HealthCheck.id > self._health_cursor - _CURSOR_OVERLAP)
+                .order_by(HealthCheck.id)
+                .limit(self.batch_size + _CURSOR_OVERLAP)
+            )
+        ).all()
+
+        new_metrics = [r for r in metric_rows if r.id > self._metric_cursor]
+        new_health = [r for r in health_rows if r.id > self._health_cursor]
+        device_ids = {r.device_id for r in metric_rows} | {
+            r.device_id for r in health_rows
+        }
+        if not device_ids:
+            return 0
+
+        states: Dict[int, DeviceAnomalyState] = {
+            cast(int, s.device_id): s
+            for s in (
+                await session.execute(
+                    select(DeviceAnomalyState).where(
+                        DeviceAnomalyState.device_id.in_(device_ids)
+                    )
+                )
+            ).scalars()
+        }
+
+        touched: Dict[int, DeviceAnomalyState] = {}
+
+        def state_for(device_id: int) -> DeviceAnomalyState:
+            state = states.get(device_id)
+            if state is None:
+                state = DeviceAnomalyState(
+                    device_id=device_id,
+                    score=0.0,
+                    consecutive_failures=0,
+                    flapping_count=0,
+                    transitions=[],
+                )
+                session.add(state)
+                states[device_id] = state
+            return state
+
+        for row in health_rows:
+            state = states.get(row.device_id)
+            if state is not None and (state.last_health_check_id or 0) >= row.id:
+                continue  # already applied (cursor overlap)
+            state = state_for(row.device_id)
+            self._apply_health_check(state, row)
+            touched[row.device_id] = state
+
+        for row in metric_rows:
+            state = states.get(row.device_id)
+            if state is not None and (state.last_metric_id or 0) >= row.id:
+                continue
+            state = state_for(row.device_id)
+            state.metrics = {  # type: ignore[assignment]
+                c: getattr(row, c) for c in _METRIC_COLUMNS
+            }
+            state.last_metric_id = row.id
+            touched[row.device_id] = state
+
+        if touched:
+            self._rescore(touched.values())
+            await self._sync_device_status(session, touched.values())
+
+        await session.commit()
+
+        if metric_rows:
+            self._metric_cursor = max(self._metric_cursor, metric_rows[-1].id)
+        if health_rows:
+            self._health_cursor = max(self._health_cursor, health_rows[-1].id)
+
+        logger.debug(
+            f"Anomaly state: {len(new_metrics)} metrics, {len(new_health)} "
+            f"health checks, {len(touched)} devices rescored"
+        )
+        return max(len(new_metrics), len(new_health))
+
+    def _apply_health_check(self, state: DeviceAnomalyState, row: Any) -> None:
+        at = _naive_utc(row.timestamp)
+        transitions = [
+            t
+            for t in cast(List[str], state.transitions or [])
+            if datetime.fromisoformat(t) > at - self.flapping_window
+        ]
+        if state.last_healthy is not None and state.last_healthy != row.is_healthy:
+            transitions.append(at.isoformat())
+
+        failures = 0 if row.is_healthy else (state.consecutive_failures or 0) + 1
+        state.consecutive_failures = failures  # type: ignore[assignment]
+        state.last_healthy = row.is_healthy
+        state.transitions = transitions  # type: ignore[assignment]
+        state.flapping_count = len(transitions)  # type: ignore[assignment]
+        state.last_health_check_id = row.id
+
+    def _rescore(self, states: Iterable[DeviceAnomalyState]) -> None:
+        states = list(states)
+
+        def column(values: List[Any]) -> np.ndarray:
+            return np.array(
+                [np.nan if v is None else float(v) for v in values], dtype=np.float64
+            )
+
+        snapshots = [dict(s.metrics or {}) for s in states]
+        columns = {c: column([m.get(c) for m in snapshots]) for c in _METRIC_COLUMNS}
+        columns["consecutive_failures"] = column(
+            [s.consecutive_failures for s in states]
+        )
+        columns["flapping_count"] = column([s.flapping_count for s in states])
+        result = self.detector.check_anomaly_batch(columns)
+
+        now = _naive_utc(None)
+        for i, state in enumerate(states):
+            score = float(result.scores[i])
+            state.score = score  # type: ignore[assignment]
+            state.severity = severity_for(score)  # type: ignore[assignment]
+            state.reasons = result.descriptions(i)  # type: ignore[assignment]
+            state.metrics = {  # type: ignore[assignment]
+                **snapshots[i],
+                "flapping_count": float(state.flapping_count or 0),
+                "consecutive_failures": float(state.consecutive_failures or 0),
+            }
+            state.updated_at = now  # type: ignore[assignment]
+
+    async def _sync_device_status(
+        self, session: AsyncSession, states: Iterable[DeviceAnomalyState]
+    ) -> None:
+        """Mark devices offline after repeated failures, online on recovery."""
+        offline, recovered = [], []
+        for state in states:
+            if state.last_health_check_id is None:
+                continue
+            if state.consecutive_failures >= OFFLINE_AFTER_FAILURES:
+                offline.append(state.device_id)
+            elif state.consecutive_failures == 0:
+                recovered.append(state.device_id)
+        if offline:
+            await session.execute(
+                update(Device)
+                .where(Device.id.in_(offline), Device.status != "offline")
+                .values(status="offline")
+            )
+        if recovered:
+            await session.execute(
+                update(Device)
+                .where(Device.id.in_(recovered), Device.status == "offline")
+                .values(status="online")
+            )
+
+
+async def top_anomalies(session: AsyncSession, limit: int = 5) -> List[Dict[str, Any]]:
+    """Return the highest-scoring active alerts and device anomalies.
+
+    Persistent alerts come first in priority (they carry IDs the dashboard
+    and chat can reference). Devices that already have an active alert are
+    not reported twice.
+    """
+    anomalies: List[Dict[str, Any]] = []
+
+    # Alerts without an AI confidence are reported at 0.8.
+    alert_score = func.coalesce(Alert.ai_confidence, 0.8)
+    alerts = (
+        await session.execute(
+            select(Alert, Device.name)
+            .outerjoin(
+                Device,
+                (Device.device_id == Alert.device_id) & Device.is_active.is_(True),
+            )
+            .where(Alert.status == "active")
+            .order_by(alert_score.desc(), Alert.id.desc())
+            .limit(limit)
+        )
+    ).all()
+    for alert, device_name in alerts:
+        anomalies.append(
+            {
+                "id": alert.id,
+                "device_id": alert.device_id,
+                "device_name": device_name or "Unknown Device",
+                "score": round(alert.ai_confidence or 0.8, 2),
+                "reasons": [alert.title, alert.description],
+                "severity": alert.severity,
+                "metrics": {"source": "persistent_alert", "category": alert.category},
+                "timestamp": (
+                    alert.timestamp.isoformat()
+                    if alert.timestamp
+                    else datetime.utcnow().isoformat()
+                ),
+            }
+        )
+
+    alerted = select(Alert.device_id).where(
+        Alert.status == "active", Alert.device_id.is_not(None)
+    )
+    rows = (
+        await session.execute(
+            select(DeviceAnomalyState, Device.device_id, Device.name)
+            .join(Device, Device.id == DeviceAnomalyState.device_id)
+            .where(
+                DeviceAnomalyState.score > 0,
+                Device.is_active.is_(True),
+                Device.is_monitored.is_(True),
+                Device.device_id.not_in(alerted),
+            )
+            .order_by(DeviceAnomalyState.score.desc())
+            .limit(limit)
+        )
+    ).all()
+    for state, device_id, device_name in rows:
+        anomalies.append(
+            {
+                "device_id": device_id,
+                "device_name": device_name,
+                "score": round(state.score, 2),
+                "reasons": state.reasons or [],
+                "severity": state.severity,
+                "metrics": state.metrics or {},
+                "timestamp": state.updated_at.isoformat(),
+            }
+        )
+
+    anomalies.sort(key=lambda a: float(a["score"]), reverse=True)
+    return anomalies[:limit]
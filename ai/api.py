@@ -1,12 +1,24 @@
 """FastAPI application for the AI service."""
 
 import asyncio
+from contextlib import asynccontextmanager
+import json
 import logging
 import os
-from typing import Any, Dict
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 import uuid
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import and_, select
 import yaml
@@ -17,12 +29,14 @@ from homepot.models import Device
 
 from .analysis_modes import ModeManager
 from .anomaly_detection import AnomalyDetector
+from .context_assembly import ContextAssembler, ContextSection, SectionFactory
 from .context_builder import ContextBuilder
 from .device_memory import DeviceMemory
 from .device_resolver import DeviceResolver
 from .event_store import EventStore
 from .failure_predictor import FailurePredictor
 from .llm import LLMService
+from .llm_gateway import LLMGateway, LLMGatewayBusy
 from .prompts import PromptManager
 
 logger = logging.getLogger(__name__)
@@ -32,7 +46,20 @@ config_path = os.path.join(os.path.dirname(__file__), "config.yaml")
 with open(config_path, "r") as f:
     config = yaml.safe_load(f)
 
-app = FastAPI(title=config["app"]["name"], version=config["app"]["version"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Persist queued events and memories before the service stops."""
+    yield
+    if event_store is not None:
+        await event_store.drain()
+    if memory_service is not None:
+        await memory_service.drain()
+
+
+app = FastAPI(
+    title=config["app"]["name"], version=config["app"]["version"], lifespan=lifespan
+)
 
 
 # ---------------------------------------------------------------------------
@@ -47,19 +74,25 @@ app = FastAPI(title=config["app"]["name"], version=config["app"]["version"])
 # ``None`` sentinel with the real singleton on the first call.
 
 llm_service: Any = None
+llm_gateway: Any = None
 memory_service: Any = None
 anomaly_detector: Any = None
 event_store: Any = None
 mode_manager: Any = None
 failure_predictor: Any = None
 context_builder: Any = None
+context_assembler: Any = None
 
 
 def _ensure_services() -> None:
     global llm_service, memory_service, anomaly_detector, event_store  # noqa: PLW0603
     global mode_manager, failure_predictor, context_builder  # noqa: PLW0603
+    global context_assembler, llm_gateway  # noqa: PLW0603
     if llm_service is None:
         llm_service = LLMService()
+    if llm_gateway is None:
+        # Resolved per request so the gateway always uses the current service.
+        llm_gateway = LLMGateway(lambda: llm_service)
     if memory_service is None:
         memory_service = DeviceMemory()
     if anomaly_detector is None:
@@ -72,6 +105,8 @@ def _ensure_services() -> None:
         failure_predictor = FailurePredictor(event_store)
     if context_builder is None:
         context_builder = ContextBuilder()
+    if context_assembler is None:
+        context_assembler = ContextAssembler()
 
 
 class ChatMessage(BaseModel):
@@ -103,14 +138,100 @@ class ModeRequest(BaseModel):
     mode: str
 
 
+def _live_context_sections(
+    request: QueryRequest, device_int_id: int | None
+) -> List[ContextSection]:
+    """Return the live-context sections for a query.
+
+    Every section receives its own session from the assembler; device-scoped
+    sections reuse the already-resolved ``device_int_id``.
+    """
+    cb: ContextBuilder = context_builder
+    device_id = request.device_id
+    user_id = request.user_id
+
+    async def _user(session: Any) -> str:
+        if not user_id:
+            return ""
+        return await cb.get_user_context(user_id=user_id, session=session)
+
+    sections = [
+        ContextSection(
+            "alert",
+            lambda s: cb.get_alert_context(device_id=device_id, session=s),
+        ),
+        ContextSection("api", lambda s: cb.get_api_context(session=s)),
+        ContextSection("user", _user),
+        ContextSection("tenant", lambda s: cb.get_tenant_context(session=s)),
+        ContextSection(
+            "tenant_membership", lambda s: cb.get_tenant_membership_context(session=s)
+        ),
+        ContextSection(
+            "site_membership", lambda s: cb.get_site_membership_context(session=s)
+        ),
+        ContextSection(
+            "enrolment_intent", lambda s: cb.get_enrolment_intent_context(session=s)
+        ),
+    ]
+    if not device_id:
+        # Global/Dashboard View Context
+        return sections
+
+    # Builders that accept the resolved integer device ID.
+    by_int_id: Dict[str, Callable[..., Awaitable[str]]] = {
+        "error": cb.get_error_context,
+        "config": cb.get_config_context,
+        "audit": cb.get_audit_context,
+        "site": cb.get_site_context,
+        "metadata": cb.get_metadata_context,
+        "metrics": cb.get_metrics_context,
+        "lifecycle_epoch": cb.get_lifecycle_epoch_context,
+        "device_credential": cb.get_device_credential_context,
+        "device_command": cb.get_device_command_context,
+        "device_assignment": cb.get_device_assignment_context,
+        "device_lifecycle_event": cb.get_device_lifecycle_event_context,
+        "jobs": cb.get_jobs_context,
+    }
+    # Builders keyed by the public device ID only.
+    by_device_id: Dict[str, Callable[..., Awaitable[str]]] = {
+        "state": cb.get_state_context,
+        "push": cb.get_push_context,
+    }
+
+    def _with_int_id(build: Callable[..., Awaitable[str]]) -> SectionFactory:
+        async def section(session: Any) -> str:
+            return await build(
+                device_id=device_id, session=session, device_int_id=device_int_id
+            )
+
+        return section
+
+    def _with_device_id(build: Callable[..., Awaitable[str]]) -> SectionFactory:
+        async def section(session: Any) -> str:
+            return await build(device_id=device_id, session=session)
+
+        return section
+
+    sections.append(ContextSection("job", lambda s: cb.get_job_context(session=s)))
+    sections.extend(
+        ContextSection(name, _with_int_id(build)) for name, build in by_int_id.items()
+    )
+    sections.extend(
+        ContextSection(name, _with_device_id(build))
+        for name, build in by_device_id.items()
+    )
+    return sections
+
+
 @app.get("/health")
 async def health_check() -> Dict[str, Any]:
     """Check service health."""
     _ensure_services()
-    llm_health = llm_service.check_health()
+    llm_health = await llm_gateway.check_health()
     return {
         "status": "healthy",
         "llm_connected": llm_health,
+        "llm_gateway": llm_gateway.stats(),
         "version": config["app"]["version"],
         "mode": mode_manager.current_mode.value,
     }
@@ -124,242 +245,179 @@ async def set_mode(request: ModeRequest) -> Dict[str, str]:
     return {"status": "success", "mode": mode_manager.current_mode.value}
 
 
+async def _resolve_device(device_id: str) -> Optional[int]:
+    """Return the integer ID of ``device_id`` (None if unknown)."""
+    db_service = await get_database_service()
+    async with db_service.get_session() as session:
+        return await DeviceResolver(session).resolve(device_id)
+
+
+async def _predict_within_budget(device_id: str) -> Optional[Dict[str, Any]]:
+    """Predict failure for ``device_id``, or None if it misses the budget."""
+    try:
+        return await asyncio.wait_for(
+            failure_predictor.predict_device_failure(device_id),
+            context_assembler.budget,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Failure prediction for {device_id} timed out")
+        return None
+
+
+async def _build_query_context(request: QueryRequest) -> Tuple[str, Dict[str, Any]]:
+    """Assemble the full LLM context for a query.
+
+    Returns:
+        tuple: (full context text, ``context_used`` summary for the response).
+    """
+    # 1. Retrieve Long-Term Context from Vector Memory
+    context_memories = await asyncio.to_thread(
+        memory_service.query_similar, request.query
+    )
+    long_term_context = "\n".join([m["content"] for m in context_memories])
+
+    # 2. Construct Short-Term Context from Conversation History
+    short_term_context = "\n".join(
+        [f"{msg.role}: {msg.content}" for msg in request.history[-5:]]
+    )
+
+    # 3. Retrieve Real-Time Device Context (The "Senses")
+    # Resolve the device once, then build every section concurrently on
+    # its own session (see ai/context_assembly.py).
+    context_data: Dict[str, str] = {}
+    section_report: Dict[str, Any] = {}
+    prediction = None
+    risk_factors = None
+    recent_events = None
+    live_context_injected = False
+    try:
+        device_int_id = None
+        if request.device_id:
+            # Bounded like the sections: a stalled pool must not hold the query.
+            device_int_id = await asyncio.wait_for(
+                _resolve_device(request.device_id), context_assembler.budget
+            )
+
+        sections = _live_context_sections(request, device_int_id)
+
+        if request.device_id:
+            (context_data, outcomes), prediction = await asyncio.gather(
+                context_assembler.assemble(sections),
+                _predict_within_budget(request.device_id),
+            )
+
+            # Get recent raw events
+            recent_events = event_store.get_recent_events(request.device_id, limit=5)
+
+            if prediction is not None:
+                risk_factors = [
+                    f.get("name", "Unknown") for f in prediction.get("risk_factors", [])
+                ]
+        else:
+            context_data, outcomes = await context_assembler.assemble(sections)
+
+        section_report = {name: o.as_dict() for name, o in outcomes.items()}
+        live_context_injected = True
+    except Exception as e:
+        logger.warning(f"Failed to fetch live context: {e}")
+
+    # 4. Combine Contexts, ranked against the question and fitted to the
+    # model's context window (see ai/context_packer.py)
+    full_context, packing = PromptManager.build_packed_prompt(
+        request.device_id,
+        prediction,
+        risk_factors,
+        recent_events,
+        context_data,
+        long_term_context,
+        short_term_context,
+        query=request.query,
+    )
+
+    return full_context, {
+        "long_term_memories": len(context_memories),
+        "short_term_messages": len(request.history),
+        "live_context_injected": live_context_injected,
+        "live_context_sections": section_report,
+        "context_packing": packing,
+    }
+
+
+def _llm_busy(e: LLMGatewayBusy) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+
 @app.post("/api/ai/query")
 async def query_ai(request: QueryRequest) -> Dict[str, Any]:
     """Ask a natural language question about devices with context."""
     _ensure_services()
     try:
-        # 1. Retrieve Long-Term Context from Vector Memory
-        context_memories = memory_service.query_similar(request.query)
-        long_term_context = "\n".join([m["content"] for m in context_memories])
+        full_context, context_used = await _build_query_context(request)
 
-        # 2. Construct Short-Term Context from Conversation History
-        short_term_context = "\n".join(
-            [f"{msg.role}: {msg.content}" for msg in request.history[-5:]]
+        # 5. Generate response (off the event loop; see ai/llm_gateway.py)
+        response = await llm_gateway.generate(
+            request.query,
+            context=full_context,
+            system_prompt=mode_manager.get_system_prompt(),
         )
 
-        # 3. Retrieve Real-Time Device Context (The "Senses")
-        live_context = ""
-        try:
-            db_service = await get_database_service()
-            async with db_service.get_session() as session:
-                # Always Fetch Alert Context (Global or Device-Specific)
-                alert_context = await context_builder.get_alert_context(
-                    device_id=request.device_id, session=session
-                )
-
-                context_data = {"alert": alert_context}
-
-                prediction = None
-                risk_factors = None
-                recent_events = None
-
-                if request.device_id:
-                    # Resolve Device ID
-                    resolver = DeviceResolver(session)
-                    device_int_id = await resolver.resolve(request.device_id)
-
-                    # Get failure prediction
-                    prediction = await failure_predictor.predict_device_failure(
-                        request.device_id
-                    )
-
-                    # Get recent raw events
-                    recent_events = event_store.get_recent_events(
-                        request.device_id, limit=5
-                    )
-
-                    risk_factors = [
-                        f.get("name", "Unknown")
-                        for f in prediction.get("risk_factors", [])
-                    ]
-
-                    (
-                        job_context,
-                        error_context,
-                        config_context,
-                        audit_context,
-                        api_context,
-                        state_context,
-                        push_context,
-                        site_context,
-                        metadata_context,
-                        metrics_context,
-                        user_context,
-                        tenant_context,
-                        tenant_membership_context,
-                        site_membership_context,
-                        enrolment_intent_context,
-                        lifecycle_epoch_context,
-                        device_credential_context,
-                        device_command_context,
-                        device_assignment_context,
-                        device_lifecycle_event_context,
-                        jobs_context,
-                    ) = await asyncio.gather(
-                        context_builder.get_job_context(session=session),
-                        context_builder.get_error_context(
-                            device_id=request.device_id,
-                            session=session,
-                            device_int_id=device_int_id,
-                        ),
-                        context_builder.get_config_context(
-                            device_id=request.device_id,
-                            session=session,
-                            device_int_id=device_int_id,
-                        ),
-                        context_builder.get_audit_context(
-                            device_id=request.device_id,
-                            session=session,
-                            device_int_id=device_int_id,
-                        ),
-                        context_builder.get_api_context(session=session),
-                        context_builder.get_state_context(
-                            device_id=request.device_id, session=session
-                        ),
-                        context_builder.get_push_context(
-                            device_id=request.device_id, session=session
-                        ),
-                        context_builder.get_site_context(
-                            device_id=request.device_id,
-                            session=session,
-                            device_int_id=device_int_id,
-                        ),
-                        context_builder.get_metadata_context(
-                            device_id=request.device_id,
-                            session=session,
-                            device_int_id=device_int_id,
-                        ),
-                        context_builder.get_metrics_context(
-                            device_id=request.device_id,
-                            session=session,
-                            device_int_id=device_int_id,
-                        ),
-                        (
-                            context_builder.get_user_context(
-                                user_id=request.user_id, session=session
-                            )
-                            if request.user_id
-                            else asyncio.sleep(0, result="")
-                        ),
-                        context_builder.get_tenant_context(session=session),
-                        context_builder.get_tenant_membership_context(session=session),
-                        context_builder.get_site_membership_context(session=session),
-                        context_builder.get_enrolment_intent_context(session=session),
-                        context_builder.get_lifecycle_epoch_context(
-                            device_id=request.device_id, session=session
-                        ),
-                        context_builder.get_device_credential_context(
-                            device_id=request.device_id, session=session
-                        ),
-                        context_builder.get_device_command_context(
-                            device_id=request.device_id, session=session
-                        ),
-                        context_builder.get_device_assignment_context(
-                            device_id=request.device_id, session=session
-                        ),
-                        context_builder.get_device_lifecycle_event_context(
-                            device_id=request.device_id, session=session
-                        ),
-                        context_builder.get_jobs_context(
-                            device_id=request.device_id, session=session
-                        ),
-                    )
+        return {"response": response, "context_used": context_used}
+    except LLMGatewayBusy as e:
+        raise _llm_busy(e)
+    except Exception as e:
+        logger.error(f"Query failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-                    context_data.update(
-                        {
-                            "job": job_context,
-                            "error": error_context,
-                            "config": config_context,
-                            "audit": audit_context,
-                            "api": api_context,
-                            "state": state_context,
-                            "push": push_context,
-                            "site": site_context,
-                            "metadata": metadata_context,
-                            "metrics": metrics_context,
-                            "user": user_context,
-                            "tenant": tenant_context,
-                            "tenant_membership": tenant_membership_context,
-                            "site_membership": site_membership_context,
-                            "enrolment_intent": enrolment_intent_context,
-                            "lifecycle_epoch": lifecycle_epoch_context,
-                            "device_credential": device_credential_context,
-                            "device_command": device_command_context,
-                            "device_assignment": device_assignment_context,
-                            "device_lifecycle_event": device_lifecycle_event_context,
-                            "jobs": jobs_context,
-                        }
-                    )
 
-                else:
-                    # Global/Dashboard View Context
-                    (
-                        api_context,
-                        user_context,
-                        tenant_context,
-                        tenant_membership_context,
-                        site_membership_context,
-                        enrolment_intent_context,
-                    ) = await asyncio.gather(
-                        context_builder.get_api_context(session=session),
-                        (
-                            context_builder.get_user_context(
-                                user_id=request.user_id, session=session
-                            )
-                            if request.user_id
-                            else asyncio.sleep(0, result="")
-                        ),
-                        context_builder.get_tenant_context(session=session),
-                        context_builder.get_tenant_membership_context(session=session),
-                        context_builder.get_site_membership_context(session=session),
-                        context_builder.get_enrolment_intent_context(session=session),
-                    )
-                    context_data.update(
-                        {
-                            "api": api_context,
-                            "user": user_context,
-                            "tenant": tenant_context,
-                            "tenant_membership": tenant_membership_context,
-                            "site_membership": site_membership_context,
-                            "enrolment_intent": enrolment_intent_context,
-                        }
-                    )
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-                live_context = PromptManager.build_live_context(
-                    request.device_id,
-                    prediction,
-                    risk_factors,
-                    recent_events,
-                    context_data,
-                )
-        except Exception as e:
-            logger.warning(f"Failed to fetch live context: {e}")
 
-        # 4. Combine Contexts
-        full_context = PromptManager.build_full_prompt(
-            live_context, long_term_context, short_term_context
-        )
+@app.post("/api/ai/query/stream")
+async def query_ai_stream(request: QueryRequest) -> StreamingResponse:
+    """Stream the answer to a query as Server-Sent Events.
 
-        # 5. Generate response
-        response = llm_service.generate_response(
+    Emits ``context`` (the ``context_used`` summary) once, then one ``token``
+    event per generated chunk, then ``done`` -- or ``error`` if generation
+    fails part-way.
+    """
+    _ensure_services()
+    try:
+        full_context, context_used = await _build_query_context(request)
+        tokens = llm_gateway.stream(
             request.query,
             context=full_context,
             system_prompt=mode_manager.get_system_prompt(),
         )
-
-        return {
-            "response": response,
-            "context_used": {
-                "long_term_memories": len(context_memories),
-                "short_term_messages": len(request.history),
-                "live_context_injected": bool(live_context),
-            },
-        }
+        # Start the generation now so a full queue is reported as a 503
+        # rather than as an error event inside a 200 stream.
+        first = await tokens.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except LLMGatewayBusy as e:
+        raise _llm_busy(e)
     except Exception as e:
         logger.error(f"Query failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    async def events() -> AsyncIterator[str]:
+        yield _sse("context", context_used)
+        try:
+            if first:
+                yield _sse("token", {"text": first})
+            async for chunk in tokens:
+                yield _sse("token", {"text": chunk})
+            yield _sse("done", {})
+        except Exception as e:
+            logger.error(f"Streaming query failed: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @app.post("/api/ai/analyze")
 async def analyze_device(request: AnalysisRequest) -> Dict[str, Any]:
@@ -451,7 +509,7 @@ async def analyze_device(request: AnalysisRequest) -> Dict[str, Any]:
             f"Recent Events Context:\n{recent_events_summary}\n"
             f"Task: Explain any anomalies found and recommend actions."
         )
-        analysis = llm_service.generate_response(
+        analysis = await llm_gateway.generate(
             prompt, system_prompt=mode_manager.get_system_prompt()
         )
 
@@ -475,6 +533,8 @@ async def analyze_device(request: AnalysisRequest) -> Dict[str, Any]:
             "analysis": analysis,
             "status": status,
         }
+    except LLMGatewayBusy as e:
+        raise _llm_busy(e)
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
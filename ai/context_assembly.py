@@ -0,0 +1,182 @@
+"""Bounded-concurrency assembly of live AI context sections.
+
+``query_ai`` pulls about twenty independent context sections (jobs, errors,
+audit, metrics, ...) from :class:`~ai.context_builder.ContextBuilder`. An
+``AsyncSession`` cannot run statements concurrently, so gathering every
+builder on one shared session serialised them (or failed intermittently), and
+the live context took as long as all sections added together.
+
+:class:`ContextAssembler` runs each section on its own pooled session:
+
+- at most ``max_concurrency`` sections hold a connection at once, so one
+  query cannot exhaust the pool;
+- each section has its own timeout, and the whole assembly has a budget,
+  both covering the wait for a pooled connection. A section that misses
+  either is dropped (rendered as ``""``) instead of stalling the answer;
+- per-section latency and outcome are returned alongside the text.
+
+Live-context latency is then bounded by the slowest section (and the budget),
+not by the sum of all of them.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import logging
+import time
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+)
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homepot.database import get_database_service
+
+from .config import load_ai_config
+
+logger = logging.getLogger(__name__)
+
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_MAX_CONCURRENCY = 6
+DEFAULT_SECTION_TIMEOUT_SECONDS = 3.0
+DEFAULT_BUDGET_SECONDS = 8.0
+
+SectionFactory = Callable[[AsyncSession], Awaitable[str]]
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+@dataclass(frozen=True)
+class ContextSection:
+    """One independently-built piece of live context."""
+
+    name: str
+    build: SectionFactory
+    timeout: Optional[float] = None
+
+
+@dataclass
+class SectionOutcome:
+    """How a section fared during assembly."""
+
+    status: str  # "ok", "timeout" or "error"
+    latency_ms: float
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a JSON-friendly representation."""
+        return {"status": self.status, "latency_ms": round(self.latency_ms, 1)}
+
+
+@asynccontextmanager
+async def _pooled_session() -> AsyncIterator[AsyncSession]:
+    db_service = await get_database_service()
+    async with db_service.get_session() as session:
+        yield session
+
+
+class ContextAssembler:
+    """Build context sections concurrently on separate sessions."""
+
+    def __init__(
+        self,
+        session_factory: Optional[SessionFactory] = None,
+        max_concurrency: Optional[int] = None,
+        section_timeout: Optional[float] = None,
+        budget: Optional[float] = None,
+    ) -> None:
+        """Initialize the assembler, reading unset limits from ai/config.yaml.
+
+        Args:
+            session_factory: Returns an async context manager yielding a
+                fresh session; defaults to the shared database service.
+            max_concurrency: Maximum sections running at once.
+            section_timeout: Default per-section timeout in seconds.
+            budget: Overall time budget for one :meth:`assemble` call.
+        """
+        section = load_ai_config().get("context_assembly", {}) or {}
+        self.session_factory = session_factory or _pooled_session
+        self.max_concurrency = max(
+            1,
+            (
+                max_concurrency
+                if max_concurrency is not None
+                else section.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+            ),
+        )
+        self.section_timeout = (
+            section_timeout
+            if section_timeout is not None
+            else section.get("section_timeout_seconds", DEFAULT_SECTION_TIMEOUT_SECONDS)
+        )
+        self.budget = (
+            budget
+            if budget is not None
+            else section.get("budget_seconds", DEFAULT_BUDGET_SECONDS)
+        )
+
+    async def _build(self, section: ContextSection) -> str:
+        """Open a session and build ``section`` in it."""
+        async with self.session_factory() as session:
+            return await section.build(session)
+
+    async def _run(
+        self,
+        section: ContextSection,
+        semaphore: asyncio.Semaphore,
+        deadline: float,
+        report: Dict[str, SectionOutcome],
+    ) -> str:
+        async with semaphore:
+            started = time.perf_counter()
+            # Time spent queued on the semaphore counts against the budget.
+            remaining = deadline - time.monotonic()
+            timeout = min(section.timeout or self.section_timeout, remaining)
+            try:
+                if timeout <= 0:
+                    raise asyncio.TimeoutError
+                # Waiting for a pooled connection counts against the timeout.
+                text = await asyncio.wait_for(self._build(section), timeout)
+                status = "ok"
+            except asyncio.TimeoutError:
+                text, status = "", "timeout"
+            except Exception as e:
+                logger.warning(f"Context section '{section.name}' failed: {e}")
+                text, status = "", "error"
+            report[section.name] = SectionOutcome(
+                status, (time.perf_counter() - started) * 1000
+            )
+            return text
+
+    async def assemble(
+        self, sections: Iterable[ContextSection]
+    ) -> Tuple[Dict[str, str], Dict[str, SectionOutcome]]:
+        """Build ``sections`` concurrently.
+
+        Returns:
+            tuple: (section text keyed by name, outcome keyed by name).
+            Sections that time out or raise map to ``""``.
+        """
+        sections = list(sections)
+        report: Dict[str, SectionOutcome] = {}
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        deadline = time.monotonic() + self.budget
+
+        results = await asyncio.gather(
+            *(self._run(s, semaphore, deadline, report) for s in sections)
+        )
+
+        dropped = [name for name, o in report.items() if o.status != "ok"]
+        if dropped:
+            logger.warning(f"Dropped context sections: {', '.join(dropped)}")
+        logger.debug(
+            "Context section latency: "
+            + ", ".join(f"{n}={o.latency_ms:.0f}ms" for n, o in report.items())
+        )
+        return {s.name: text for s, text in zip(sections, results)}, report
@@ -43,6 +43,18 @@ logger = logging.getLogger(__name__)
 class ContextBuilder:
     """Service to aggregate context from multiple data sources for the LLM."""
 
+    @staticmethod
+    async def _lookup_device_pk(
+        session: AsyncSession, device_id: Optional[str]
+    ) -> Optional[int]:
+        """Look up ``Device.id`` for callers that did not pass ``device_int_id``."""
+        if not device_id:
+            return None
+        result = await session.execute(
+            select(Device.id).where(Device.device_id == device_id)
+        )
+        return result.scalar_one_or_none()
+
     @staticmethod
     async def get_job_context(
         job_id: Optional[str] = None,
@@ -720,18 +732,19 @@ class ContextBuilder:
         device_id: Optional[str] = None,
         limit: int = 10,
         session: Optional[AsyncSession] = None,
+        device_int_id: Optional[int] = None,
     ) -> str:
         """Retrieve lifecycle epochs."""
         try:
             if session:
                 return await ContextBuilder._get_lifecycle_epoch_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
             db_service = await get_database_service()
             async with db_service.get_session() as session:
                 return await ContextBuilder._get_lifecycle_epoch_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
         except Exception as e:
@@ -743,13 +756,14 @@ class ContextBuilder:
         session: AsyncSession,
         device_id: Optional[str],
         limit: int,
+        device_int_id: Optional[int] = None,
     ) -> str:
         stmt = select(LifecycleEpoch).order_by(LifecycleEpoch.created_at.desc())
 
-        if device_id:
-            dev_stmt = select(Device.id).where(Device.device_id == device_id)
-            dev_result = await session.execute(dev_stmt)
-            dev_pk = dev_result.scalar_one_or_none()
+        if device_id or device_int_id:
+            dev_pk = device_int_id or await ContextBuilder._lookup_device_pk(
+                session, device_id
+            )
             if dev_pk:
                 stmt = stmt.where(LifecycleEpoch.device_id == dev_pk)
 
@@ -774,18 +788,19 @@ class ContextBuilder:
         device_id: Optional[str] = None,
         limit: int = 10,
         session: Optional[AsyncSession] = None,
+        device_int_id: Optional[int] = None,
     ) -> str:
         """Retrieve device credentials."""
         try:
             if session:
                 return await ContextBuilder._get_device_credential_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
             db_service = await get_database_service()
             async with db_service.get_session() as session:
                 return await ContextBuilder._get_device_credential_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
         except Exception as e:
@@ -797,13 +812,14 @@ class ContextBuilder:
         session: AsyncSession,
         device_id: Optional[str],
         limit: int,
+        device_int_id: Optional[int] = None,
     ) -> str:
         stmt = select(DeviceCredential).order_by(DeviceCredential.created_at.desc())
 
-        if device_id:
-            dev_stmt = select(Device.id).where(Device.device_id == device_id)
-            dev_result = await session.execute(dev_stmt)
-            dev_pk = dev_result.scalar_one_or_none()
+        if device_id or device_int_id:
+            dev_pk = device_int_id or await ContextBuilder._lookup_device_pk(
+                session, device_id
+            )
             if dev_pk:
                 stmt = stmt.where(DeviceCredential.device_id == dev_pk)
 
@@ -829,18 +845,19 @@ class ContextBuilder:
         device_id: Optional[str] = None,
         limit: int = 10,
         session: Optional[AsyncSession] = None,
+        device_int_id: Optional[int] = None,
     ) -> str:
         """Retrieve recent device commands."""
         try:
             if session:
                 return await ContextBuilder._get_device_command_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
             db_service = await get_database_service()
             async with db_service.get_session() as session:
                 return await ContextBuilder._get_device_command_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
         except Exception as e:
@@ -852,13 +869,14 @@ class ContextBuilder:
         session: AsyncSession,
         device_id: Optional[str],
         limit: int,
+        device_int_id: Optional[int] = None,
     ) -> str:
         stmt = select(DeviceCommand).order_by(DeviceCommand.created_at.desc())
 
-        if device_id:
-            dev_stmt = select(Device.id).where(Device.device_id == device_id)
-            dev_result = await session.execute(dev_stmt)
-            dev_pk = dev_result.scalar_one_or_none()
+        if device_id or device_int_id:
+            dev_pk = device_int_id or await ContextBuilder._lookup_device_pk(
+                session, device_id
+            )
             if dev_pk:
                 stmt = stmt.where(DeviceCommand.device_id == dev_pk)
 
@@ -883,18 +901,19 @@ class ContextBuilder:
         device_id: Optional[str] = None,
         limit: int = 10,
         session: Optional[AsyncSession] = None,
+        device_int_id: Optional[int] = None,
     ) -> str:
         """Retrieve device assignment history."""
         try:
             if session:
                 return await ContextBuilder._get_device_assignment_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
             db_service = await get_database_service()
             async with db_service.get_session() as session:
                 return await ContextBuilder._get_device_assignment_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
         except Exception as e:
@@ -906,13 +925,14 @@ class ContextBuilder:
         session: AsyncSession,
         device_id: Optional[str],
         limit: int,
+        device_int_id: Optional[int] = None,
     ) -> str:
         stmt = select(DeviceAssignment).order_by(DeviceAssignment.created_at.desc())
 
-        if device_id:
-            dev_stmt = select(Device.id).where(Device.device_id == device_id)
-            dev_result = await session.execute(dev_stmt)
-            dev_pk = dev_result.scalar_one_or_none()
+        if device_id or device_int_id:
+            dev_pk = device_int_id or await ContextBuilder._lookup_device_pk(
+                session, device_id
+            )
             if dev_pk:
                 stmt = stmt.where(DeviceAssignment.device_id == dev_pk)
 
@@ -938,18 +958,19 @@ class ContextBuilder:
         device_id: Optional[str] = None,
         limit: int = 10,
         session: Optional[AsyncSession] = None,
+        device_int_id: Optional[int] = None,
     ) -> str:
         """Retrieve device lifecycle events."""
         try:
             if session:
                 return await ContextBuilder._get_device_lifecycle_event_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
             db_service = await get_database_service()
             async with db_service.get_session() as session:
                 return await ContextBuilder._get_device_lifecycle_event_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
         except Exception as e:
@@ -961,15 +982,16 @@ class ContextBuilder:
         session: AsyncSession,
         device_id: Optional[str],
         limit: int,
+        device_int_id: Optional[int] = None,
     ) -> str:
         stmt = select(DeviceLifecycleEvent).order_by(
             DeviceLifecycleEvent.created_at.desc()
         )
 
-        if device_id:
-            dev_stmt = select(Device.id).where(Device.device_id == device_id)
-            dev_result = await session.execute(dev_stmt)
-            dev_pk = dev_result.scalar_one_or_none()
+        if device_id or device_int_id:
+            dev_pk = device_int_id or await ContextBuilder._lookup_device_pk(
+                session, device_id
+            )
             if dev_pk:
                 stmt = stmt.where(DeviceLifecycleEvent.device_id == dev_pk)
 
@@ -993,18 +1015,19 @@ class ContextBuilder:
         device_id: Optional[str] = None,
         limit: int = 10,
         session: Optional[AsyncSession] = None,
+        device_int_id: Optional[int] = None,
     ) -> str:
         """Retrieve recent device management jobs."""
         try:
             if session:
                 return await ContextBuilder._get_jobs_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
             db_service = await get_database_service()
             async with db_service.get_session() as session:
                 return await ContextBuilder._get_jobs_context_impl(
-                    session, device_id, limit
+                    session, device_id, limit, device_int_id
                 )
 
         except Exception as e:
@@ -1016,13 +1039,14 @@ class ContextBuilder:
         session: AsyncSession,
         device_id: Optional[str],
         limit: int,
+        device_int_id: Optional[int] = None,
     ) -> str:
         stmt = select(Job).order_by(Job.created_at.desc())
 
-        if device_id:
-            dev_stmt = select(Device.id).where(Device.device_id == device_id)
-            dev_result = await session.execute(dev_stmt)
-            dev_pk = dev_result.scalar_one_or_none()
+        if device_id or device_int_id:
+            dev_pk = device_int_id or await ContextBuilder._lookup_device_pk(
+                session, device_id
+            )
             if dev_pk:
                 stmt = stmt.where(Job.device_id == dev_pk)
 
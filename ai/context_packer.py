@@ -0,0 +1,287 @@
+"""Token-budgeted packing of prompt context sections.
+
+A query prompt is assembled from many independent sections (live context,
+vector memories, conversation history). Concatenated as-is they routinely
+exceed the local model's ``context_window`` (``num_ctx``): the runtime then
+silently drops the start of the prompt, and every surplus token still costs
+prefill time. :class:`ContextPacker` fits the sections to a token budget
+before the prompt is sent:
+
+1. Each section's size is estimated at ``chars_per_token`` characters per
+   token (the same heuristic Gate C uses for ``max_context_chars``).
+2. Sections are ranked by a base priority, boosted when a word of the
+   question starts with one of the section's keywords (``cpu`` -> metrics,
+   ``failed`` -> errors, ...) or the section mentions the focus device.
+3. In rank order, every section that fits is kept whole. The sections that
+   did not fit are then, again in rank order, cut at a line boundary to the
+   remaining budget (with a marker saying how much was left out); once fewer
+   than ``min_section_tokens`` remain, the rest are dropped. Short,
+   high-signal blocks therefore survive even when one bulky section would
+   fill the window on its own.
+
+Truncated renderings are cached by section name, content hash and limit, so
+sections that have not changed between questions are not re-cut.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .config import load_ai_config
+
+logger = logging.getLogger(__name__)
+
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_CONTEXT_WINDOW = 4096
+DEFAULT_RESERVE_TOKENS = 1024  # system prompt, question and the answer
+DEFAULT_CHARS_PER_TOKEN = 4.0
+DEFAULT_MIN_SECTION_TOKENS = 48
+DEFAULT_CACHE_MAX_ENTRIES = 256
+
+# Base priority and question keywords per section. Unknown sections get
+# UNLISTED_PRIORITY and no keywords.
+SECTION_PRIORITIES: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "conversation": (0.95, ("earlier", "said", "again", "above")),
+    "alert": (0.9, ("alert", "alarm", "critical", "warning", "incident")),
+    "metrics": (0.8, ("cpu", "memory", "disk", "latency", "metric", "slow")),
+    "error": (0.8, ("error", "fail", "crash", "exception", "broken")),
+    "state": (0.7, ("state", "online", "offline", "status", "down")),
+    "long_term": (0.6, ("before", "history", "previous", "similar", "usual")),
+    "job": (0.55, ("job", "deploy", "update", "schedule", "rollout")),
+    "jobs": (0.55, ("job", "deploy", "update", "schedule", "rollout")),
+    "config": (0.5, ("config", "setting", "firmware", "version")),
+    "site": (0.5, ("site", "location", "store", "branch")),
+    "metadata": (0.45, ("hardware", "model", "ip", "os", "peripheral")),
+    "device_command": (0.45, ("command", "restart", "reboot", "executed")),
+    "device_lifecycle_event": (0.4, ("lifecycle", "suspend", "unpair", "retire")),
+    "audit": (0.4, ("audit", "who", "changed", "modified")),
+    "api": (0.35, ("api", "request", "endpoint", "http")),
+    "push": (0.35, ("push", "notification", "notify")),
+    "device_credential": (0.3, ("credential", "key", "certificate", "auth")),
+    "lifecycle_epoch": (0.3, ("enrol", "enroll", "epoch", "paired")),
+    "device_assignment": (0.3, ("assign", "owner", "responsible")),
+    "enrolment_intent": (0.25, ("enrol", "enroll", "onboard", "pending")),
+    "user": (0.25, ("my", "user", "account")),
+    "tenant": (0.2, ("tenant", "organisation", "organization", "customer")),
+    "tenant_membership": (0.2, ("tenant", "member", "team")),
+    "site_membership": (0.2, ("site", "member", "access")),
+}
+UNLISTED_PRIORITY = 0.2
+KEYWORD_BOOST = 1.0
+DEVICE_BOOST = 0.1
+
+
+@dataclass(frozen=True)
+class PromptSection:
+    """One named block of prompt text competing for the token budget."""
+
+    name: str
+    text: str
+    priority: float = UNLISTED_PRIORITY
+    keywords: Tuple[str, ...] = ()
+
+
+@dataclass
+class PackedSection:
+    """How one section was fitted into the budget."""
+
+    name: str
+    status: str  # "full", "truncated", "dropped" or "empty"
+    tokens: int
+    original_tokens: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a JSON-friendly representation."""
+        return {
+            "status": self.status,
+            "tokens": self.tokens,
+            "original_tokens": self.original_tokens,
+        }
+
+
+class ContextPacker:
+    """Fit prompt sections into the model's context budget by priority."""
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        chars_per_token: Optional[float] = None,
+        min_section_tokens: Optional[int] = None,
+        cache_max_entries: Optional[int] = None,
+    ) -> None:
+        """Initialize the packer, reading unset limits from ai/config.yaml.
+
+        Args:
+            max_tokens: Tokens available to context sections. Defaults to
+                ``llm.context_window`` minus ``context_packing.reserve_tokens``.
+            chars_per_token: Characters per estimated token.
+            min_section_tokens: Smallest useful truncated section.
+            cache_max_entries: Truncated renderings kept in the LRU cache.
+        """
+        config = load_ai_config()
+        section = config.get("context_packing", {}) or {}
+        if max_tokens is None:
+            context_window = int(
+                (config.get("llm", {}) or {}).get(
+                    "context_window", DEFAULT_CONTEXT_WINDOW
+                )
+            )
+            reserve = int(section.get("reserve_tokens", DEFAULT_RESERVE_TOKENS))
+            max_tokens = context_window - reserve
+        self.max_tokens = max(0, max_tokens)
+        self.chars_per_token = float(
+            chars_per_token
+            if chars_per_token is not None
+            else section.get("chars_per_token", DEFAULT_CHARS_PER_TOKEN)
+        )
+        self.min_section_tokens = int(
+            min_section_tokens
+            if min_section_tokens is not None
+            else section.get("min_section_tokens", DEFAULT_MIN_SECTION_TOKENS)
+        )
+        self.cache_max_entries = int(
+            cache_max_entries
+            if cache_max_entries is not None
+            else section.get("cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES)
+        )
+        self._rendered: "OrderedDict[Tuple[str, int, int], Tuple[str, int]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+
+    def estimate_tokens(self, text: str) -> int:
+        """Estimate the number of tokens in ``text``."""
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    @staticmethod
+    def section(name: str, text: str) -> PromptSection:
+        """Build a section with the default priority and keywords for ``name``."""
+        priority, keywords = SECTION_PRIORITIES.get(name, (UNLISTED_PRIORITY, ()))
+        return PromptSection(name, text or "", priority, keywords)
+
+    def rank(
+        self,
+        sections: Sequence[PromptSection],
+        query: str = "",
+        device_id: Optional[str] = None,
+    ) -> List[PromptSection]:
+        """Order sections by priority plus relevance to the query and device."""
+        words = re.findall(r"[a-z0-9]+", query.lower())
+
+        def score(s: PromptSection) -> float:
+            value = s.priority
+            # Keywords match whole words or word prefixes ("fail" -> "failed").
+            if any(w.startswith(k) for k in s.keywords for w in words):
+                value += KEYWORD_BOOST
+            if device_id and device_id in s.text:
+                value += DEVICE_BOOST
+            return value
+
+        # sorted() is stable, so equal scores keep their original order.
+        return sorted(sections, key=score, reverse=True)
+
+    def pack(
+        self,
+        sections: Sequence[PromptSection],
+        query: str = "",
+        device_id: Optional[str] = None,
+        fixed_tokens: int = 0,
+    ) -> Tuple[Dict[str, str], Dict[str, PackedSection]]:
+        """Fit ``sections`` into the budget left after ``fixed_tokens``.
+
+        Returns:
+            tuple: (packed text keyed by section name, in input order; how
+            each section was packed, keyed by name). Dropped sections map
+            to ``""``.
+        """
+        remaining = self.max_tokens - fixed_tokens
+        packed: Dict[str, str] = {}
+        report: Dict[str, PackedSection] = {}
+        ranked = self.rank(sections, query, device_id)
+
+        # Pass 1: keep every section that fits whole, best-ranked first.
+        oversized: List[PromptSection] = []
+        for s in ranked:
+            tokens = self.estimate_tokens(s.text)
+            if not tokens:
+                packed[s.name] = ""
+                report[s.name] = PackedSection(s.name, "empty", 0, 0)
+            elif tokens <= remaining:
+                packed[s.name] = s.text
+                report[s.name] = PackedSection(s.name, "full", tokens, tokens)
+                remaining -= tokens
+            else:
+                oversized.append(s)
+
+        # Pass 2: cut the rest, best-ranked first, into what is left.
+        for s in oversized:
+            tokens = self.estimate_tokens(s.text)
+            if remaining >= self.min_section_tokens:
+                packed[s.name], used = self._truncate(s, remaining)
+                report[s.name] = PackedSection(s.name, "truncated", used, tokens)
+                remaining -= used
+            else:
+                packed[s.name] = ""
+                report[s.name] = PackedSection(s.name, "dropped", 0, tokens)
+
+        cut = [n for n, r in report.items() if r.status in ("truncated", "dropped")]
+        if cut:
+            logger.info(
+                f"Context packed into {self.max_tokens - remaining}/"
+                f"{self.max_tokens} tokens; cut: {', '.join(cut)}"
+            )
+        return {s.name: packed[s.name] for s in sections}, report
+
+    def _truncate(self, section: PromptSection, limit: int) -> Tuple[str, int]:
+        key = (section.name, hash(section.text), limit)
+        with self._lock:
+            cached = self._rendered.get(key)
+            if cached is not None:
+                self._rendered.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+
+        lines = section.text.splitlines()
+        budget = int(limit * self.chars_per_token)
+        kept: List[str] = []
+        size = 0
+        for line in lines:
+            marker = self._marker(len(lines) - len(kept))
+            if size + len(line) + 1 + len(marker) > budget:
+                break
+            kept.append(line)
+            size += len(line) + 1
+        if not kept:
+            # Not even one whole line fits: cut the first line itself.
+            marker = self._marker(len(lines) - 1)
+            kept = [lines[0][: max(0, budget - len(marker) - 1)]]
+        else:
+            marker = self._marker(len(lines) - len(kept))
+        text = "\n".join(kept + [marker])
+        rendered = (text, self.estimate_tokens(text))
+
+        with self._lock:
+            self._rendered[key] = rendered
+            while len(self._rendered) > self.cache_max_entries:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    @staticmethod
+    def _marker(omitted: int) -> str:
+        return f"... [{omitted} more line(s) omitted to fit the context budget]"
+
+
+_context_packer: Optional[ContextPacker] = None
+
+
+def get_context_packer() -> ContextPacker:
+    """Return the shared packer configured from ai/config.yaml."""
+    global _context_packer
+    if _context_packer is None:
+        _context_packer = ContextPacker()
+    return _context_packer
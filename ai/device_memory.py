@@ -1,19 +1,82 @@
-"""Module for managing device memory using ChromaDB."""
+"""Module for managing device memory using ChromaDB.
 
+Writes are batched (:mod:`write_behind`): ``add_memory`` only queues a
+document. A background task embeds queued documents with one embedding-model
+call per batch and stores them with one ``collection.add``, in a worker
+thread. If that add fails (a duplicate or invalid id, say), the batch's
+memories are added one by one so the rest are not lost. Call
+:meth:`DeviceMemory.drain` on shutdown to write what is left.
+
+Searches are cached by normalized query text: the query embedding is kept in
+an LRU (it never changes), and the top-k result for ``cache_ttl_seconds`` or
+until the next batch is written, whichever comes first.
+
+``query_similar`` and ``get_memory_stats`` block; async callers run them with
+``asyncio.to_thread``.
+"""
+
+from collections import OrderedDict
 import logging
 import os
-from typing import Any, Dict, List
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import chromadb  # type: ignore
+from chromadb.api.types import PyEmbedding  # type: ignore
 import yaml
 
+from .write_behind import WriteBehindQueue
+
 logger = logging.getLogger(__name__)
 
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+DEFAULT_CACHE_MAX_ENTRIES = 256
+DEFAULT_CACHE_TTL_SECONDS = 300.0
+
+EmbeddingFunction = Callable[[List[str]], Sequence[Iterable[float]]]
+_CachedResult = Tuple[float, List[Dict[str, Any]]]
+# (document, metadata, memory id)
+_Memory = Tuple[str, Dict[str, Any], str]
+
+
+def normalize_query(text: str) -> str:
+    """Collapse case and whitespace so equivalent questions share a cache key."""
+    return " ".join(text.lower().split())
+
+
+class _LatencyStats:
+    """Count, mean and max of an operation's latency in milliseconds."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, started: float) -> None:
+        elapsed = (time.perf_counter() - started) * 1000
+        self.count += 1
+        self.total_ms += elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+        }
+
 
 class DeviceMemory:
     """Vector memory for device logs and patterns using ChromaDB."""
 
-    def __init__(self, config_path: str | None = None) -> None:
+    def __init__(
+        self,
+        config_path: str | None = None,
+        embedding_function: Optional[EmbeddingFunction] = None,
+    ) -> None:
         """Initialize the DeviceMemory with configuration."""
         if config_path is None:
             config_path = os.path.join(os.path.dirname(__file__), "config.yaml")
@@ -21,33 +84,130 @@ class DeviceMemory:
             self.config = yaml.safe_load(f)
 
         # Resolve chroma_path relative to the config file location
+        section = self.config["memory"]
         base_dir = os.path.dirname(os.path.abspath(config_path))
-        raw_path = self.config["memory"]["chroma_path"]
+        raw_path = section["chroma_path"]
         self.chroma_path = os.path.join(base_dir, raw_path)
 
-        self.collection_name = self.config["memory"]["collection_name"]
+        self.collection_name = section["collection_name"]
+        self.cache_max_entries = int(
+            section.get("cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES)
+        )
+        self.cache_ttl = float(
+            section.get("cache_ttl_seconds", DEFAULT_CACHE_TTL_SECONDS)
+        )
 
         # Initialize ChromaDB
         self.client = chromadb.PersistentClient(path=self.chroma_path)
         self.collection = self.client.get_or_create_collection(
             name=self.collection_name
         )
+        # Embeddings are computed here and passed to Chroma explicitly, so
+        # batches and cached query vectors use a single model invocation.
+        if embedding_function is None:
+            from chromadb.utils import embedding_functions  # type: ignore
+
+            self.embed: EmbeddingFunction = (
+                embedding_functions.DefaultEmbeddingFunction()
+            )
+        else:
+            self.embed = embedding_function
+
+        self._writer: WriteBehindQueue[_Memory] = WriteBehindQueue(
+            self._write_batch,
+            batch_size=int(section.get("batch_size", DEFAULT_BATCH_SIZE)),
+            flush_interval=float(
+                section.get("flush_interval_seconds", DEFAULT_FLUSH_INTERVAL_SECONDS)
+            ),
+        )
+        self.failed_writes = 0
+
+        self._cache_lock = threading.Lock()
+        self._embeddings: "OrderedDict[str, PyEmbedding]" = OrderedDict()
+        self._results: "OrderedDict[Tuple[str, int], _CachedResult]" = OrderedDict()
+        self._ingest = _LatencyStats()
+        self._search = _LatencyStats()
+        self._embedding_hits = 0
+        self._result_hits = 0
         logger.info(f"Device Memory initialized at {self.chroma_path}")
 
     def add_memory(self, text: str, metadata: Dict[str, Any], memory_id: str) -> None:
-        """Add a memory (log entry) to the vector store."""
+        """Queue a memory (log entry) for the vector store."""
+        self._writer.put((text, metadata, memory_id))
+
+    def _add(self, batch: List[_Memory]) -> None:
+        documents = [text for text, _, _ in batch]
+        embeddings: List[PyEmbedding] = [list(e) for e in self.embed(documents)]
+        self.collection.add(
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=[metadata for _, metadata, _ in batch],
+            ids=[memory_id for _, _, memory_id in batch],
+        )
+
+    def _write_batch(self, batch: List[_Memory]) -> int:
+        """Embed and store one batch; return the number of memories stored."""
+        started = time.perf_counter()
         try:
-            self.collection.add(documents=[text], metadatas=[metadata], ids=[memory_id])
+            self._add(batch)
+            stored = len(batch)
         except Exception as e:
-            logger.error(f"Failed to add memory: {e}")
+            logger.warning(
+                f"Failed to add {len(batch)} memories ({e}); adding one by one"
+            )
+            stored = 0
+            for memory in batch:
+                try:
+                    self._add([memory])
+                    stored += 1
+                except Exception as item_error:
+                    self.failed_writes += 1
+                    logger.error(f"Failed to add memory {memory[2]}: {item_error}")
+        self._ingest.record(started)
+        if stored:
+            # New documents can change any top-k result
+            with self._cache_lock:
+                self._results.clear()
+        return stored
+
+    def flush(self) -> int:
+        """Embed and store all queued memories now; return the number stored."""
+        return self._writer.flush()
+
+    async def drain(self) -> None:
+        """Wait for the background writer and store anything still queued."""
+        await self._writer.drain()
+
+    def _query_embedding(self, key: str) -> PyEmbedding:
+        with self._cache_lock:
+            cached = self._embeddings.get(key)
+            if cached is not None:
+                self._embeddings.move_to_end(key)
+                self._embedding_hits += 1
+                return cached
+        embedding: PyEmbedding = list(self.embed([key])[0])
+        with self._cache_lock:
+            self._embeddings[key] = embedding
+            while len(self._embeddings) > self.cache_max_entries:
+                self._embeddings.popitem(last=False)
+        return embedding
 
     def query_similar(
         self, query_text: str, n_results: int = 5
     ) -> List[Dict[str, Any]]:
         """Find similar memories (patterns) from history."""
+        key = normalize_query(query_text)
+        started = time.perf_counter()
+        with self._cache_lock:
+            cached = self._results.get((key, n_results))
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self._results.move_to_end((key, n_results))
+                self._result_hits += 1
+                return list(cached[1])
+
         try:
             results = self.collection.query(
-                query_texts=[query_text], n_results=n_results
+                query_embeddings=[self._query_embedding(key)], n_results=n_results
             )
 
             # Format results
@@ -65,19 +225,34 @@ class DeviceMemory:
                             ),
                         }
                     )
-            return memories
         except Exception as e:
             logger.error(f"Memory query failed: {e}")
             return []
 
+        self._search.record(started)
+        if self.cache_ttl > 0:
+            with self._cache_lock:
+                self._results[(key, n_results)] = (time.monotonic(), memories)
+                while len(self._results) > self.cache_max_entries:
+                    self._results.popitem(last=False)
+        return list(memories)
+
     def get_memory_stats(self) -> Dict[str, Any]:
-        """Get statistics about the stored memories."""
+        """Get statistics about the stored memories and memory latency."""
         try:
             count = self.collection.count()
             return {
                 "total_memories": count,
                 "collection_name": self.collection_name,
                 "status": "active",
+                "pending_writes": len(self._writer),
+                "failed_writes": self.failed_writes,
+                "ingest": self._ingest.as_dict(),
+                "search": {
+                    **self._search.as_dict(),
+                    "result_cache_hits": self._result_hits,
+                    "embedding_cache_hits": self._embedding_hits,
+                },
             }
         except Exception as e:
             logger.error(f"Failed to get memory stats: {e}")
@@ -1,9 +1,18 @@
-"""Event Store module for caching and retrieving device events."""
+"""Event Store module for caching and retrieving device events.
 
-from datetime import datetime
+Recent events are kept per device in a fixed-size ring (``deque(maxlen)``),
+so appending never copies the history. Metrics events are persisted
+write-behind (:mod:`write_behind`): ``add_event`` only queues them, and a
+background task writes the queue to ``device_metrics`` with one multi-row
+INSERT per batch, off the event loop. Call :meth:`EventStore.drain` on
+shutdown to write what is left.
+"""
+
+from collections import deque
+from datetime import datetime, timezone
 import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Deque, Dict, List, Optional
 
 from sqlalchemy import (
     Column,
@@ -19,8 +28,39 @@ from sqlalchemy import (
 from sqlalchemy.engine import Engine
 import yaml
 
+from .write_behind import WriteBehindQueue
+
 logger = logging.getLogger(__name__)
 
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_CACHE_LIMIT = 100
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_MAX_PENDING = 10000
+
+_INSERT_METRICS = text("""
+    INSERT INTO device_metrics (
+        device_id, timestamp, cpu_percent, memory_percent,
+        disk_percent, network_latency_ms, error_rate
+    ) VALUES (
+        :device_id, :timestamp, :cpu, :memory, :disk, :latency, :error_rate
+    )
+""")
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Return ``value`` as a naive-UTC datetime, or None if it is not one."""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 
 class EventStore:
     """Manages storage and retrieval of device events."""
@@ -42,9 +82,32 @@ class EventStore:
             except Exception as e:
                 logger.error(f"Failed to connect to database: {e}")
 
-        # In-memory cache for recent events: {device_id: [events]}
-        self.cache: Dict[str, List[Dict[str, Any]]] = {}
-        self.cache_limit = 100
+        section = self.config.get("event_store", {}) or {}
+        # In-memory ring of recent events per device: {device_id: deque}
+        self.cache: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._cache_limit = int(section.get("cache_limit", DEFAULT_CACHE_LIMIT))
+
+        # Write-behind queue of metrics events not yet persisted. When it is
+        # full (database down or far behind), the oldest events are dropped.
+        self._writer: WriteBehindQueue[Dict[str, Any]] = WriteBehindQueue(
+            self._write_batch,
+            batch_size=int(section.get("batch_size", DEFAULT_BATCH_SIZE)),
+            flush_interval=float(
+                section.get("flush_interval_seconds", DEFAULT_FLUSH_INTERVAL_SECONDS)
+            ),
+            max_pending=int(section.get("max_pending", DEFAULT_MAX_PENDING)),
+        )
+
+    @property
+    def cache_limit(self) -> int:
+        """Number of recent events kept in memory per device."""
+        return self._cache_limit
+
+    @cache_limit.setter
+    def cache_limit(self, value: int) -> None:
+        self._cache_limit = value
+        for device_id, events in self.cache.items():
+            self.cache[device_id] = deque(events, maxlen=value)
 
     def _init_db(self) -> None:
         """Initialize database tables if they don't exist."""
@@ -78,58 +141,55 @@ class EventStore:
             return {}
 
     def add_event(self, event: Dict[str, Any]) -> None:
-        """Add an event to the store and cache."""
+        """Add an event to the cache and queue metrics for persistence."""
         device_id = event.get("device_id")
         if not device_id:
             logger.warning("Event missing device_id, skipping.")
             return
 
-        # Add to cache
-        if device_id not in self.cache:
-            self.cache[device_id] = []
-
         # Add timestamp if missing
         if "timestamp" not in event:
             event["timestamp"] = datetime.now().isoformat()
 
-        self.cache[device_id].append(event)
+        events = self.cache.get(device_id)
+        if events is None:
+            events = self.cache[device_id] = deque(maxlen=self._cache_limit)
+        events.append(event)
 
-        # Trim cache
-        if len(self.cache[device_id]) > self.cache_limit:
-            self.cache[device_id] = self.cache[device_id][-self.cache_limit :]
+        # Only metrics updates map onto the device_metrics table
+        if self.engine and isinstance(event.get("value"), dict):
+            self._writer.put(event)
 
-        # Persist to DB (Optional/Async in real impl)
-        if self.engine:
-            self._persist_event(event)
+    def _write_batch(self, events: List[Dict[str, Any]]) -> int:
+        """Persist one queued batch; return the number of events written."""
+        written = len(events) if self._persist_events(events) else 0
+        if self._writer.dropped:
+            logger.warning(
+                f"Event write-behind queue overflowed; "
+                f"dropped {self._writer.dropped} events"
+            )
+            self._writer.dropped = 0
+        return written
 
-    def _persist_event(self, event: Dict[str, Any]) -> None:
-        """Persist event to database."""
-        if not self.engine:
-            return
+    def flush(self) -> int:
+        """Persist all queued metrics events now; return the number written."""
+        return self._writer.flush()
 
-        try:
-            # We map the generic 'event' to the 'device_metrics' table structure
-            # Assuming 'value' contains the metrics dict
-            metrics = event.get("value", {})
-            if not isinstance(metrics, dict):
-                # If value is not a dict, we might be storing a different type of event
-                # For now, we only support metrics updates in this table
-                return
-
-            query = text(
-                """
-                INSERT INTO device_metrics (
-                    device_id, timestamp, cpu_percent, memory_percent,
-                    disk_percent, network_latency_ms, error_rate
-                ) VALUES (
-                    :device_id, :timestamp, :cpu, :memory, :disk, :latency, :error_rate
-                )
-            """
-            )
+    async def drain(self) -> None:
+        """Wait for the background writer and persist anything still queued."""
+        await self._writer.drain()
 
-            with self.engine.connect() as conn:
-                conn.execute(
-                    query,
+    def _persist_events(self, events: List[Dict[str, Any]]) -> bool:
+        """Persist metrics events with one multi-row INSERT."""
+        if not self.engine or not events:
+            return False
+
+        try:
+            params = []
+            for event in events:
+                # 'value' holds the metrics dict of a metrics_update event
+                metrics = event.get("value", {})
+                params.append(
                     {
                         "device_id": event.get("device_id"),
                         "timestamp": event.get("timestamp"),
@@ -138,64 +198,86 @@ class EventStore:
                         "disk": metrics.get("disk_percent"),
                         "latency": metrics.get("network_latency_ms"),
                         "error_rate": metrics.get("error_rate"),
-                    },
+                    }
                 )
-                conn.commit()
+
+            with self.engine.begin() as conn:
+                conn.execute(_INSERT_METRICS, params)
+            return True
         except Exception as e:
-            logger.error(f"Failed to persist event: {e}")
+            logger.error(f"Failed to persist {len(events)} events: {e}")
+            return False
+
+    def _fetch_recent_events(self, device_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Read the newest ``limit`` persisted events, in chronological order."""
+        if not self.engine:
+            return []
+
+        try:
+            query = text("""
+                SELECT * FROM device_metrics
+                WHERE device_id = :device_id
+                ORDER BY timestamp DESC
+                LIMIT :limit
+            """)
+            with self.engine.connect() as conn:
+                result = conn.execute(query, {"device_id": device_id, "limit": limit})
+                events = []
+                for row in result:
+                    # Handle timestamp that might be string or datetime
+                    ts = row.timestamp
+                    if hasattr(ts, "isoformat"):
+                        ts_str = ts.isoformat()
+                    else:
+                        ts_str = str(ts) if ts else None
+
+                    events.append(
+                        {
+                            "device_id": row.device_id,
+                            "timestamp": ts_str,
+                            "event": "metrics_update",
+                            "value": {
+                                "cpu_percent": row.cpu_percent,
+                                "memory_percent": row.memory_percent,
+                                "disk_percent": row.disk_percent,
+                                "network_latency_ms": row.network_latency_ms,
+                                "error_rate": row.error_rate,
+                            },
+                        }
+                    )
+                # Reverse to chronological order
+                return events[::-1]
+        except Exception as e:
+            logger.error(f"Failed to fetch events from DB: {e}")
+            return []
 
     def get_recent_events(
         self, device_id: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
-        """Get recent events for a device."""
-        # Try cache first
-        if device_id in self.cache and self.cache[device_id]:
-            return self.cache[device_id][-limit:]
+        """Get the newest ``limit`` events for a device, oldest first.
 
-        # Fallback to DB if cache empty
-        if self.engine:
-            try:
-                query = text(
-                    """
-                    SELECT * FROM device_metrics
-                    WHERE device_id = :device_id
-                    ORDER BY timestamp DESC
-                    LIMIT :limit
-                """
-                )
-                with self.engine.connect() as conn:
-                    result = conn.execute(
-                        query, {"device_id": device_id, "limit": limit}
-                    )
-                    events = []
-                    for row in result:
-                        # Handle timestamp that might be string or datetime
-                        ts = row.timestamp
-                        if hasattr(ts, "isoformat"):
-                            ts_str = ts.isoformat()
-                        else:
-                            ts_str = str(ts) if ts else None
-
-                        events.append(
-                            {
-                                "device_id": row.device_id,
-                                "timestamp": ts_str,
-                                "event": "metrics_update",
-                                "value": {
-                                    "cpu_percent": row.cpu_percent,
-                                    "memory_percent": row.memory_percent,
-                                    "disk_percent": row.disk_percent,
-                                    "network_latency_ms": row.network_latency_ms,
-                                    "error_rate": row.error_rate,
-                                },
-                            }
-                        )
-                    # Reverse to chronological order
-                    return events[::-1]
-            except Exception as e:
-                logger.error(f"Failed to fetch events from DB: {e}")
+        Served from the cache alone when it holds ``limit`` events; otherwise
+        older persisted events are read from the database and put in front.
+        """
+        events = self.cache.get(device_id)
+        cached = list(events)[-limit:] if events else []
+        if len(cached) >= limit or not self.engine:
+            return cached
 
-        return []
+        stored = self._fetch_recent_events(device_id, limit)
+        if cached:
+            # Queued and persisted cache entries are already in ``cached``.
+            # Compare as datetimes: the database may return "YYYY-MM-DD
+            # HH:MM:SS" where the cache holds isoformat() strings.
+            oldest = _parse_timestamp(cached[0].get("timestamp"))
+            if oldest is None:
+                return cached
+            stored = [
+                e
+                for e in stored
+                if (_parse_timestamp(e.get("timestamp")) or oldest) < oldest
+            ]
+        return (stored + cached)[-limit:]
 
     def get_events_summary(self, device_id: str) -> str:
         """Generate a text summary of recent events for LLM context."""
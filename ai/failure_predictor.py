@@ -8,7 +8,20 @@ from datetime import datetime, timedelta
 import logging
 from typing import Any, Dict, List, Optional
 
+import numpy as np
+from sqlalchemy import case, func, select
+
+from homepot.app.models.AnalyticsModel import DeviceStateHistory
+from homepot.database import get_database_service
+from homepot.models import Device, HealthCheck
+
 from .analytics_service import AIAnalyticsService
+from .fleet_risk import (
+    describe_flags,
+    get_fleet_risk_sweep,
+    score_health_checks,
+    score_state_changes,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -162,14 +175,65 @@ class FailurePredictor:
             return {"score": 0.0, "factors": []}
 
     async def _analyze_state_stability(self, device_id: str) -> Dict[str, Any]:
-        """Analyze state changes."""
-        # Simplified implementation
-        return {"score": 0.0, "factors": []}
+        """Analyze state changes, with the thresholds of the fleet sweep."""
+        try:
+            window_days = get_fleet_risk_sweep().window_days
+            cutoff = datetime.utcnow() - timedelta(days=window_days)
+            db_service = await get_database_service()
+            async with db_service.get_session() as session:
+                changes = (
+                    await session.execute(
+                        select(func.count())
+                        .select_from(DeviceStateHistory)
+                        .join(Device, Device.id == DeviceStateHistory.device_id)
+                        .where(Device.device_id == device_id)
+                        .where(DeviceStateHistory.timestamp >= cutoff)
+                    )
+                ).scalar()
+
+            score, flags = score_state_changes(
+                {"state_changes": np.array([float(changes or 0)])}, window_days
+            )
+            return {"score": float(score[0]), "factors": describe_flags(int(flags[0]))}
+        except Exception:
+            return {"score": 0.0, "factors": []}
 
     async def _analyze_health_trend(self, device_id: str) -> Dict[str, Any]:
-        """Analyze health score trend."""
-        # Simplified implementation
-        return {"score": 0.0, "factors": []}
+        """Analyze health check failures, with the thresholds of the fleet sweep."""
+        try:
+            now = datetime.utcnow()
+            cutoff = now - timedelta(days=get_fleet_risk_sweep().window_days)
+            failed: Any = HealthCheck.is_healthy.is_(False)
+            recent: Any = HealthCheck.timestamp >= now - timedelta(days=1)
+            db_service = await get_database_service()
+            async with db_service.get_session() as session:
+                row = (
+                    await session.execute(
+                        select(
+                            func.count(),
+                            func.sum(case((failed, 1), else_=0)),
+                            func.sum(case((recent, 1), else_=0)),
+                            func.sum(case((failed & recent, 1), else_=0)),
+                        )
+                        .select_from(HealthCheck)
+                        .join(Device, Device.id == HealthCheck.device_id)
+                        .where(Device.device_id == device_id)
+                        .where(HealthCheck.timestamp >= cutoff)
+                    )
+                ).one()
+
+            names = (
+                "health_checks",
+                "health_failures",
+                "recent_health_checks",
+                "recent_health_failures",
+            )
+            score, flags = score_health_checks(
+                {name: np.array([float(value or 0)]) for name, value in zip(names, row)}
+            )
+            return {"score": float(score[0]), "factors": describe_flags(int(flags[0]))}
+        except Exception:
+            return {"score": 0.0, "factors": []}
 
     def _determine_risk_level(self, probability: float) -> str:
         if probability > 0.8:
@@ -212,21 +276,56 @@ class FailurePredictor:
         self,
         site_id: Optional[str] = None,
         min_risk_level: str = "medium",
+        tenant_id: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Identify all devices currently at risk of failure.
 
+        Scores every active device in scope at once with
+        :class:`~ai.fleet_risk.FleetRiskSweep` (grouped queries, cached per
+        scope for a few seconds) rather than one prediction per device.
+
         Args:
             site_id: Optional site filter
             min_risk_level: Minimum risk level to include
+            tenant_id: Optional tenant filter
 
         Returns:
-            Dict containing list of at-risk devices
+            Dict containing list of at-risk devices, riskiest first
         """
-        # TODO: Implement actual identification logic
+        db_service = await get_database_service()
+        async with db_service.get_session() as session:
+            result = await get_fleet_risk_sweep().sweep(
+                session, site_id=site_id, tenant_id=tenant_id
+            )
+
+        devices = []
+        for i in result.at_or_above(min_risk_level):
+            probability = float(result.probabilities[i])
+            risk_level = self._determine_risk_level(probability)
+            factors = result.factors(i)
+            devices.append(
+                {
+                    "device_id": result.device_ids[i],
+                    "device_name": result.device_names[i],
+                    "site_id": result.site_ids[i],
+                    "failure_probability": round(probability, 3),
+                    "risk_level": risk_level,
+                    "confidence": self._calculate_confidence(factors),
+                    "risk_factors": factors,
+                    "recommendations": self._generate_recommendations(
+                        risk_level, factors
+                    ),
+                }
+            )
+
         return {
             "site_id": site_id,
+            "tenant_id": tenant_id,
             "min_risk_level": min_risk_level,
-            "at_risk_count": 0,
-            "devices": [],
-            "generated_at": datetime.utcnow().isoformat(),
+            "window_days": result.window_days,
+            "total_devices_analyzed": len(result),
+            "at_risk_count": len(devices),
+            "risk_distribution": result.distribution(),
+            "devices": devices,
+            "generated_at": result.generated_at.isoformat(),
         }
@@ -0,0 +1,434 @@
+"""Fleet-wide failure risk sweep for a site, a tenant or the whole estate.
+
+:meth:`ai.failure_predictor.FailurePredictor.predict_device_failure` scores
+one device with several analytics queries. Calling it once per device would
+cost thousands of round trips for a large site, so ``/ai/health-forecast``
+and ``/ai/predictions/at-risk-devices`` use :class:`FleetRiskSweep` instead.
+It reads every device in scope with five grouped queries:
+
+- devices in scope;
+- average CPU and memory from ``device_metrics``;
+- error count from ``error_logs``, keyed by ``context.original_device_id``;
+- transition count from ``device_state_history``;
+- failed and total ``health_checks``, overall and for the last 24 hours.
+
+:func:`score_fleet` then scores all four risk factors with numpy, using the
+same weights and thresholds as the per-device predictor; the state and
+health factors are scored by the same functions for both.
+
+Results are cached per scope for ``cache_ttl_seconds``. The endpoints filter
+the cached snapshot by risk level, so repeated calls within the TTL run no
+queries at all.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homepot.app.models.AnalyticsModel import (
+    DeviceMetrics,
+    DeviceStateHistory,
+    ErrorLog,
+)
+from homepot.models import Device, HealthCheck, Site
+
+from .config import load_ai_config
+
+logger = logging.getLogger(__name__)
+
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_WINDOW_DAYS = 3
+DEFAULT_CACHE_TTL_SECONDS = 30.0
+DEFAULT_CACHE_MAX_ENTRIES = 64
+
+# Factor weights, as in FailurePredictor.predict_device_failure.
+RESOURCE_WEIGHT = 0.35
+ERROR_WEIGHT = 0.30
+STATE_WEIGHT = 0.20
+HEALTH_WEIGHT = 0.15
+
+RISK_LEVELS = ("low", "medium", "high", "critical")
+# Lower bounds (exclusive) of medium, high and critical.
+_LEVEL_THRESHOLDS = np.array([0.2, 0.5, 0.8])
+
+# One bit per risk factor; ``FleetRiskResult.factors`` expands them.
+FLAG_HIGH_CPU = 1 << 0
+FLAG_HIGH_MEMORY = 1 << 1
+FLAG_CRITICAL_ERRORS = 1 << 2
+FLAG_HIGH_ERRORS = 1 << 3
+FLAG_UNSTABLE_STATE = 1 << 4
+FLAG_FREQUENT_STATE_CHANGES = 1 << 5
+FLAG_FAILING_HEALTH = 1 << 6
+FLAG_DEGRADED_HEALTH = 1 << 7
+FLAG_WORSENING_HEALTH = 1 << 8
+
+_FACTORS = (
+    (FLAG_HIGH_CPU, "resource", "High CPU Usage", 0.8),
+    (FLAG_HIGH_MEMORY, "resource", "High Memory Usage", 0.9),
+    (FLAG_CRITICAL_ERRORS, "error", "Critical Error Rate", 1.0),
+    (FLAG_HIGH_ERRORS, "error", "High Error Rate", 0.6),
+    (FLAG_UNSTABLE_STATE, "state", "Unstable State", 0.8),
+    (FLAG_FREQUENT_STATE_CHANGES, "state", "Frequent State Changes", 0.5),
+    (FLAG_FAILING_HEALTH, "health", "Failing Health Checks", 0.9),
+    (FLAG_DEGRADED_HEALTH, "health", "Degraded Health Checks", 0.6),
+    (FLAG_WORSENING_HEALTH, "health", "Worsening Health Trend", 0.5),
+)
+
+_COLUMNS = (
+    "avg_cpu_percent",
+    "avg_memory_percent",
+    "error_count",
+    "state_changes",
+    "health_checks",
+    "health_failures",
+    "recent_health_checks",
+    "recent_health_failures",
+)
+
+_ScopeKey = Tuple[Optional[str], Optional[int]]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    ratio: np.ndarray = np.divide(
+        numerator,
+        denominator,
+        out=np.zeros_like(numerator, dtype=float),
+        where=denominator > 0,
+    )
+    return ratio
+
+
+def describe_flags(mask: int) -> List[Dict[str, Any]]:
+    """Return the risk factors of a ``FLAG_*`` bit mask, most severe first."""
+    found = [
+        {"type": kind, "name": name, "severity": severity}
+        for flag, kind, name, severity in _FACTORS
+        if mask & flag
+    ]
+    return sorted(found, key=lambda f: f["severity"], reverse=True)
+
+
+@dataclass
+class FleetRiskResult:
+    """Risk scores for every device in one scope.
+
+    Arrays are aligned with ``device_ids``. ``flags`` holds one ``FLAG_*`` bit
+    per triggered factor; factor dicts are only built for the devices a
+    caller actually returns (``factors(i)``).
+    """
+
+    device_ids: List[str]
+    device_names: List[str]
+    site_ids: List[str]
+    probabilities: np.ndarray
+    levels: np.ndarray
+    flags: np.ndarray
+    window_days: int
+    generated_at: datetime = field(default_factory=datetime.utcnow)
+
+    def __len__(self) -> int:
+        """Return the number of devices scored."""
+        return len(self.device_ids)
+
+    def factors(self, index: int) -> List[Dict[str, Any]]:
+        """Return the risk factors of device ``index``, most severe first."""
+        return describe_flags(int(self.flags[index]))
+
+    def distribution(self) -> Dict[str, int]:
+        """Count devices per risk level."""
+        counts = np.bincount(self.levels, minlength=len(RISK_LEVELS))
+        return {level: int(counts[i]) for i, level in enumerate(RISK_LEVELS)}
+
+    def at_or_above(self, min_risk_level: str) -> np.ndarray:
+        """Return indices of devices at ``min_risk_level`` or worse, riskiest first."""
+        selected = np.flatnonzero(self.levels >= RISK_LEVELS.index(min_risk_level))
+        order = np.argsort(-self.probabilities[selected], kind="stable")
+        return selected[order]
+
+
+def score_state_changes(
+    columns: Dict[str, np.ndarray], window_days: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score state-change frequency; return (score, flags).
+
+    More than 12 (4) state changes per day score 1.0 (0.5).
+    """
+    change_rate = columns["state_changes"] / float(max(1, window_days))
+    flags = np.zeros(len(change_rate), dtype=np.uint16)
+    unstable = change_rate > 12
+    frequent = (change_rate > 4) & ~unstable
+    flags[unstable] |= FLAG_UNSTABLE_STATE
+    flags[frequent] |= FLAG_FREQUENT_STATE_CHANGES
+    score: np.ndarray = np.where(unstable, 1.0, np.where(frequent, 0.5, 0.0))
+    return score, flags
+
+
+def score_health_checks(
+    columns: Dict[str, np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score health check failures and their trend; return (score, flags).
+
+    Over half (a fifth) of health checks failing scores 1.0 (0.5). A failure
+    ratio in the last 24 hours more than 0.2 above the rest of the window
+    adds 0.3.
+    """
+    checks = columns["health_checks"]
+    recent_checks = columns["recent_health_checks"]
+    failure_ratio = _ratio(columns["health_failures"], checks)
+    recent_ratio = _ratio(columns["recent_health_failures"], recent_checks)
+    earlier_ratio = _ratio(
+        columns["health_failures"] - columns["recent_health_failures"],
+        checks - recent_checks,
+    )
+    flags = np.zeros(len(checks), dtype=np.uint16)
+    failing = failure_ratio > 0.5
+    degraded = (failure_ratio > 0.2) & ~failing
+    worsening = (
+        (recent_checks > 0)
+        & (checks > recent_checks)
+        & (recent_ratio - earlier_ratio > 0.2)
+    )
+    flags[failing] |= FLAG_FAILING_HEALTH
+    flags[degraded] |= FLAG_DEGRADED_HEALTH
+    flags[worsening] |= FLAG_WORSENING_HEALTH
+    score: np.ndarray = np.minimum(
+        1.0, np.where(failing, 1.0, np.where(degraded, 0.5, 0.0)) + 0.3 * worsening
+    )
+    return score, flags
+
+
+def score_fleet(
+    columns: Dict[str, np.ndarray], window_days: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score aggregated per-device columns; return (probability, level, flags).
+
+    ``columns`` holds equal-length arrays named as in ``_COLUMNS``; missing
+    data is 0. Resource and error thresholds match the per-device predictor:
+    average CPU above 80% or memory above 85% add 0.5 each, and more than 10
+    (5) errors per day score 1.0 (0.6). State and health factors are scored
+    by :func:`score_state_changes` and :func:`score_health_checks`, which the
+    per-device predictor calls as well.
+    """
+    days = float(max(1, window_days))
+    flags = np.zeros(len(columns["avg_cpu_percent"]), dtype=np.uint16)
+
+    def flag(condition: np.ndarray, bit: int) -> np.ndarray:
+        flags[condition] |= bit
+        return condition
+
+    high_cpu = flag(columns["avg_cpu_percent"] > 80, FLAG_HIGH_CPU)
+    high_memory = flag(columns["avg_memory_percent"] > 85, FLAG_HIGH_MEMORY)
+    resource = 0.5 * high_cpu + 0.5 * high_memory
+
+    error_rate = columns["error_count"] / days
+    critical_errors = flag(error_rate > 10, FLAG_CRITICAL_ERRORS)
+    high_errors = flag((error_rate > 5) & ~critical_errors, FLAG_HIGH_ERRORS)
+    error = np.where(critical_errors, 1.0, np.where(high_errors, 0.6, 0.0))
+
+    state, state_flags = score_state_changes(columns, window_days)
+    health, health_flags = score_health_checks(columns)
+    flags |= state_flags | health_flags
+
+    probability = np.clip(
+        RESOURCE_WEIGHT * resource
+        + ERROR_WEIGHT * error
+        + STATE_WEIGHT * state
+        + HEALTH_WEIGHT * health,
+        0.0,
+        1.0,
+    )
+    # searchsorted with side="left" keeps the thresholds exclusive (> 0.2 ...).
+    levels = np.searchsorted(_LEVEL_THRESHOLDS, probability, side="left")
+    return probability, levels, flags
+
+
+class FleetRiskSweep:
+    """Score all devices of a site or tenant with grouped queries."""
+
+    def __init__(
+        self,
+        window_days: Optional[int] = None,
+        cache_ttl_seconds: Optional[float] = None,
+        cache_max_entries: Optional[int] = None,
+    ) -> None:
+        """Initialize the sweep, reading unset values from ai/config.yaml."""
+        section = load_ai_config().get("failure_prediction", {}) or {}
+
+        def setting(value: Any, key: str, default: Any) -> Any:
+            return value if value is not None else section.get(key, default)
+
+        self.window_days = int(setting(window_days, "window_days", DEFAULT_WINDOW_DAYS))
+        self.cache_ttl = float(
+            setting(cache_ttl_seconds, "cache_ttl_seconds", DEFAULT_CACHE_TTL_SECONDS)
+        )
+        self.cache_max_entries = int(
+            setting(cache_max_entries, "cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES)
+        )
+        self._cache: "OrderedDict[_ScopeKey, Tuple[float, FleetRiskResult]]" = (
+            OrderedDict()
+        )
+
+    def clear_cache(self) -> None:
+        """Drop all cached sweeps."""
+        self._cache.clear()
+
+    async def sweep(
+        self,
+        session: AsyncSession,
+        site_id: Optional[str] = None,
+        tenant_id: Optional[int] = None,
+    ) -> FleetRiskResult:
+        """Return risk scores for the scope, from cache when fresh."""
+        key = (site_id, tenant_id)
+        cached = self._cache.get(key)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.cache_ttl:
+            self._cache.move_to_end(key)
+            return cached[1]
+
+        started = time.perf_counter()
+        result = await self._compute(session, site_id, tenant_id)
+        logger.debug(
+            f"Risk sweep for site={site_id} tenant={tenant_id}: {len(result)} "
+            f"devices in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        if self.cache_ttl > 0:
+            self._cache[key] = (now, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    async def _compute(
+        self,
+        session: AsyncSession,
+        site_id: Optional[str],
+        tenant_id: Optional[int],
+    ) -> FleetRiskResult:
+        scope_query = (
+            select(Device.id, Device.device_id, Device.name, Site.site_id)
+            .join(Site, Site.id == Device.site_id)
+            .where(Device.is_active.is_(True))
+            .order_by(Device.id)
+        )
+        if site_id is not None:
+            scope_query = scope_query.where(Site.site_id == site_id)
+        if tenant_id is not None:
+            scope_query = scope_query.where(Site.tenant_id == tenant_id)
+
+        devices = (await session.execute(scope_query)).all()
+        columns = {name: np.zeros(len(devices)) for name in _COLUMNS}
+        if not devices:
+            return FleetRiskResult(
+                [], [], [], *score_fleet(columns, self.window_days), self.window_days
+            )
+
+        position = {row[0]: i for i, row in enumerate(devices)}
+        by_public_id = {row[1]: i for i, row in enumerate(devices)}
+        scope = scope_query.with_only_columns(Device.id).order_by(None).subquery()
+        public_scope = (
+            scope_query.with_only_columns(Device.device_id).order_by(None).subquery()
+        )
+
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=self.window_days)
+        recent_cutoff = now - timedelta(days=1)
+
+        def fill(rows: Any, index: Dict[Any, int], *names: str) -> None:
+            for row in rows:
+                i = index.get(row[0])
+                if i is None:
+                    continue
+                for name, value in zip(names, row[1:]):
+                    columns[name][i] = float(value or 0)
+
+        # Average of ``value or 0`` per sample, as the per-device trend does.
+        fill(
+            await session.execute(
+                select(
+                    DeviceMetrics.device_id,
+                    func.avg(func.coalesce(DeviceMetrics.cpu_percent, 0.0)),
+                    func.avg(func.coalesce(DeviceMetrics.memory_percent, 0.0)),
+                )
+                .join(scope, scope.c.id == DeviceMetrics.device_id)
+                .where(DeviceMetrics.timestamp >= cutoff)
+                .group_by(DeviceMetrics.device_id)
+            ),
+            position,
+            "avg_cpu_percent",
+            "avg_memory_percent",
+        )
+
+        error_device = ErrorLog.context["original_device_id"].as_string()
+        fill(
+            await session.execute(
+                select(error_device, func.count())
+                .join(public_scope, public_scope.c.device_id == error_device)
+                .where(ErrorLog.timestamp >= cutoff)
+                .group_by(error_device)
+            ),
+            by_public_id,
+            "error_count",
+        )
+
+        fill(
+            await session.execute(
+                select(DeviceStateHistory.device_id, func.count())
+                .join(scope, scope.c.id == DeviceStateHistory.device_id)
+                .where(DeviceStateHistory.timestamp >= cutoff)
+                .group_by(DeviceStateHistory.device_id)
+            ),
+            position,
+            "state_changes",
+        )
+
+        failed = HealthCheck.is_healthy.is_(False)
+        recent = HealthCheck.timestamp >= recent_cutoff
+        fill(
+            await session.execute(
+                select(
+                    HealthCheck.device_id,
+                    func.count(),
+                    func.sum(case((failed, 1), else_=0)),
+                    func.sum(case((recent, 1), else_=0)),
+                    func.sum(case((failed & recent, 1), else_=0)),
+                )
+                .join(scope, scope.c.id == HealthCheck.device_id)
+                .where(HealthCheck.timestamp >= cutoff)
+                .group_by(HealthCheck.device_id)
+            ),
+            position,
+            "health_checks",
+            "health_failures",
+            "recent_health_checks",
+            "recent_health_failures",
+        )
+
+        probabilities, levels, flags = score_fleet(columns, self.window_days)
+        return FleetRiskResult(
+            device_ids=[row[1] for row in devices],
+            device_names=[row[2] for row in devices],
+            site_ids=[row[3] for row in devices],
+            probabilities=probabilities,
+            levels=levels,
+            flags=flags,
+            window_days=self.window_days,
+        )
+
+
+_fleet_risk_sweep: Optional[FleetRiskSweep] = None
+
+
+def get_fleet_risk_sweep() -> FleetRiskSweep:
+    """Return the process-wide sweep, so its cache is shared by requests."""
+    global _fleet_risk_sweep
+    if _fleet_risk_sweep is None:
+        _fleet_risk_sweep = FleetRiskSweep()
+    return _fleet_risk_sweep
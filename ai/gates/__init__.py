@@ -41,6 +41,7 @@ from .base import (
     GateStatus,
     Mode,
 )
+from .cache import GateResultCache, get_gate_result_cache
 from .config import build_envelope_from_config
 from .envelope import EnvelopeResult, ValidationEnvelope, build_default_envelope
 from .gate_a import ContractInfrastructureGate
@@ -67,6 +68,8 @@ __all__ = [
     "ValidationEnvelope",
     "build_default_envelope",
     "build_envelope_from_config",
+    "GateResultCache",
+    "get_gate_result_cache",
     "ContractInfrastructureGate",
     "DataIntegrityGate",
     "ContextReadinessGate",
@@ -24,7 +24,7 @@ from datetime import datetime, timezone
 from enum import Enum
 import logging
 import time
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -175,6 +175,7 @@ class GateResult:
     )
     duration_ms: float = 0.0
     error: Optional[str] = None
+    cached: bool = False  # served from ``GateResultCache`` (see cache.py)
 
     @property
     def score(self) -> float:
@@ -194,6 +195,7 @@ class GateResult:
             "checks": [c.to_dict() for c in self.checks],
             "evaluated_at": self.evaluated_at.isoformat(),
             "duration_ms": round(self.duration_ms, 2),
+            "cached": self.cached,
             "error": self.error,
         }
 
@@ -221,6 +223,10 @@ class GateContext:
 class Gate(ABC):
     """Base class for a single validation gate in the envelope."""
 
+    # Data this gate reads; a write to any of these topics invalidates its
+    # cached results (see cache.py).
+    cache_topics: Tuple[str, ...] = ()
+
     def __init__(
         self, gate_id: str, name: str, failure_mode: Mode, weight: float = 1.0
     ):
@@ -235,6 +241,15 @@ class Gate(ABC):
         """Run all sub-checks for this gate and return a GateResult."""
         raise NotImplementedError
 
+    def cache_key(self, context: GateContext) -> Optional[Tuple[Hashable, ...]]:
+        """Return the context fields this gate's result depends on.
+
+        ``None`` (the default) means the result must never be cached, which
+        is the safe choice for gates whose inputs are not fully described by
+        the key -- e.g. Gate C, which inspects the assembled prompt.
+        """
+        return None
+
     async def run(self, context: GateContext) -> GateResult:
         """Wrap ``evaluate`` with timing and fail-closed error handling.
 
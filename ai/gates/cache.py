@@ -0,0 +1,242 @@
+"""Per-gate result cache for the validation envelope.
+
+Every ``/api/ai/query`` turn runs the full Gate A -> E envelope, yet most of
+what the gates look at changes far less often than users ask questions:
+Gate A's schema/readiness probes only change with a migration, Gate B's
+windowed scans only with new telemetry, Gates D/E only when a device's
+lifecycle, permissions or credentials change.
+
+:class:`GateResultCache` keeps each gate's last :class:`~.base.GateResult`
+keyed on ``(gate, gate.cache_key(context), time bucket)``. The time bucket is
+``floor(now / ttl)`` so a cached result (and Gate B's window start) is never
+older than the gate's TTL. Gates opt in by returning a key from
+``Gate.cache_key`` and name the data they read in ``Gate.cache_topics``; a
+result is also dropped as soon as one of those topics changes:
+
+- ``schema``: ``Base.metadata`` create_all (table creation / migration).
+- ``telemetry``: a committed ``health_checks`` or ``device_metrics`` row.
+- ``lifecycle``: a committed change to a device's lifecycle, activity,
+  health, capability or permission columns, or to its credentials.
+
+:func:`install_invalidation_hooks` registers the SQLAlchemy listeners that
+report these changes to the shared cache. Writes that bypass the ORM unit of
+work (Core bulk inserts, other processes) are only picked up by the TTL.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import replace
+import logging
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from ..config import load_ai_config
+from .base import Gate, GateContext, GateResult
+
+logger = logging.getLogger(__name__)
+
+TOPIC_SCHEMA = "schema"
+TOPIC_TELEMETRY = "telemetry"
+TOPIC_LIFECYCLE = "lifecycle"
+
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_TTL_SECONDS: Dict[str, float] = {"A": 300.0, "B": 30.0, "D": 60.0, "E": 30.0}
+DEFAULT_MAX_ENTRIES = 1024
+
+# Device columns that Gates B/D/E read; updates to other columns (last_seen,
+# status, ...) do not invalidate cached results.
+_DEVICE_GATE_COLUMNS = (
+    "is_active",
+    "lifecycle_state",
+    "health_state",
+    "capabilities",
+    "device_permissions",
+)
+
+_Key = Tuple[Hashable, ...]
+_Entry = Tuple[Tuple[int, ...], GateResult]
+
+
+class GateResultCache:
+    """Bounded LRU of gate results with TTL buckets and topic versions."""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[Dict[str, float]] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        """Configure per-gate TTLs (gates without one are never cached)."""
+        self.ttl_seconds = dict(
+            DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[_Key, _Entry]" = OrderedDict()
+        # Versions per topic: bumped by any change, by topic-wide changes
+        # only, and per device. Fleet-scoped results compare the first,
+        # device-scoped results the other two.
+        self._changes: Dict[str, int] = {}
+        self._epochs: Dict[str, int] = {}
+        self._device_versions: Dict[Tuple[str, int], int] = {}
+        # Invalidations arrive from sync session hooks, possibly off-loop.
+        self._lock = threading.Lock()
+
+    def _key(self, gate: Gate, context: GateContext) -> Optional[_Key]:
+        ttl = self.ttl_seconds.get(gate.gate_id)
+        if not ttl or ttl <= 0:
+            return None
+        parts = gate.cache_key(context)
+        if parts is None:
+            return None
+        return (gate.gate_id, *parts, int(time.time() // ttl))
+
+    def _version(self, gate: Gate, device_int_id: Optional[int]) -> Tuple[int, ...]:
+        if device_int_id is None:
+            return tuple(self._changes.get(t, 0) for t in gate.cache_topics)
+        version: Tuple[int, ...] = ()
+        for topic in gate.cache_topics:
+            version += (
+                self._epochs.get(topic, 0),
+                self._device_versions.get((topic, device_int_id), 0),
+            )
+        return version
+
+    def get(self, gate: Gate, context: GateContext) -> Optional[GateResult]:
+        """Return a copy of the cached result for this gate/context, if still valid."""
+        key = self._key(gate, context)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self._version(gate, context.device_int_id):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return replace(entry[1], cached=True, duration_ms=0.0)
+
+    def put(self, gate: Gate, context: GateContext, result: GateResult) -> None:
+        """Store a freshly evaluated result (errored evaluations are not cached)."""
+        if result.error:
+            return
+        key = self._key(gate, context)
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = (self._version(gate, context.device_int_id), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, topic: str, device_int_id: Optional[int] = None) -> None:
+        """Mark ``topic`` changed for one device, or for every device if ``None``."""
+        with self._lock:
+            self._changes[topic] = self._changes.get(topic, 0) + 1
+            if device_int_id is None:
+                self._epochs[topic] = self._epochs.get(topic, 0) + 1
+            else:
+                key = (topic, device_int_id)
+                self._device_versions[key] = self._device_versions.get(key, 0) + 1
+
+    def invalidate_many(self, changes: Iterable[Tuple[str, Optional[int]]]) -> None:
+        """Apply several ``(topic, device_int_id)`` invalidations."""
+        for topic, device_int_id in changes:
+            self.invalidate(topic, device_int_id)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count and hit/miss counters."""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_gate_result_cache: Optional[GateResultCache] = None
+
+
+def get_gate_result_cache() -> GateResultCache:
+    """Return the process-wide cache, configured from ``validation_gates.cache``."""
+    global _gate_result_cache
+    if _gate_result_cache is None:
+        section = (load_ai_config().get("validation_gates", {}) or {}).get(
+            "cache", {}
+        ) or {}
+        ttl = {**DEFAULT_TTL_SECONDS, **(section.get("ttl_seconds") or {})}
+        if not section.get("enabled", True):
+            ttl = {}
+        _gate_result_cache = GateResultCache(
+            ttl_seconds=ttl,
+            max_entries=int(section.get("max_entries", DEFAULT_MAX_ENTRIES)),
+        )
+        install_invalidation_hooks()
+    return _gate_result_cache
+
+
+_PENDING_KEY = "gate_cache_changes"
+_hooks_installed = False
+
+
+def install_invalidation_hooks() -> None:
+    """Report committed telemetry, lifecycle and schema writes to the shared cache."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    from sqlalchemy import event, inspect
+    from sqlalchemy.orm import Session
+
+    from homepot.app.models.AnalyticsModel import DeviceMetrics
+    from homepot.models import Base, Device, DeviceCredential, HealthCheck
+
+    def collect(session: Session, flush_context: Any) -> None:
+        changes: Set[Tuple[str, Optional[int]]] = session.info.setdefault(
+            _PENDING_KEY, set()
+        )
+
+        def mark(topic: str, device_id: Any) -> None:
+            changes.add((topic, device_id))
+
+        for obj in session.new:
+            if isinstance(obj, (HealthCheck, DeviceMetrics)):
+                mark(TOPIC_TELEMETRY, obj.device_id)
+            elif isinstance(obj, DeviceCredential):
+                mark(TOPIC_LIFECYCLE, obj.device_id)
+            elif isinstance(obj, Device):
+                mark(TOPIC_LIFECYCLE, obj.id)
+        for obj in session.dirty:
+            if isinstance(obj, DeviceCredential):
+                mark(TOPIC_LIFECYCLE, obj.device_id)
+            elif isinstance(obj, Device):
+                attrs = inspect(obj).attrs
+                if any(
+                    attrs[name].history.has_changes() for name in _DEVICE_GATE_COLUMNS
+                ):
+                    mark(TOPIC_LIFECYCLE, obj.id)
+        for obj in session.deleted:
+            if isinstance(obj, Device):
+                mark(TOPIC_LIFECYCLE, obj.id)
+            elif isinstance(obj, DeviceCredential):
+                mark(TOPIC_LIFECYCLE, obj.device_id)
+
+    def publish(session: Session) -> None:
+        changes = session.info.pop(_PENDING_KEY, None)
+        if changes:
+            get_gate_result_cache().invalidate_many(changes)
+
+    def discard(session: Session, *args: Any) -> None:
+        session.info.pop(_PENDING_KEY, None)
+
+    def schema_changed(*args: Any, **kwargs: Any) -> None:
+        get_gate_result_cache().invalidate(TOPIC_SCHEMA)
+
+    event.listen(Session, "after_flush", collect)
+    event.listen(Session, "after_commit", publish)
+    event.listen(Session, "after_rollback", discard)
+    event.listen(Base.metadata, "after_create", schema_changed)
+    logger.info("Validation gate cache invalidation hooks installed")
@@ -58,9 +58,11 @@ def build_envelope_from_config() -> Any:
     """Build the canonical envelope configured from ``ai/config.yaml``.
 
     Returns a ``ValidationEnvelope`` with Gate B/C thresholds resolved from the
-    config file. Imported lazily to avoid a circular import with ``envelope.py``.
+    config file, sharing the process-wide gate result cache. Imported lazily
+    to avoid a circular import with ``envelope.py``.
     """
+    from .cache import get_gate_result_cache
     from .envelope import build_default_envelope
 
-    kwargs = {**gate_b_kwargs(), **gate_c_kwargs()}
+    kwargs = {**gate_b_kwargs(), **gate_c_kwargs(), "cache": get_gate_result_cache()}
     return build_default_envelope(**kwargs)
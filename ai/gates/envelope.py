@@ -5,15 +5,23 @@ failure, matching the paper's control-flow diagram: the first gate to FAIL
 determines the resulting non-actionable Mode, and gates after it are not
 evaluated. New gates (e.g. a future cybersecurity/provenance Gate D) can be
 appended via ``add_gate`` without touching Gate A/B/C.
+
+An envelope built with a :class:`~.cache.GateResultCache` reuses a gate's
+still-valid result instead of re-running its queries; every gate's
+``duration_ms`` and ``cached`` flag are reported in the result and its trace.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 from .base import MODE_GROUNDED, Gate, GateContext, GateResult, GateStatus, Mode
 
+if TYPE_CHECKING:
+    from .cache import GateResultCache
+
 
 @dataclass
 class EnvelopeResult:
@@ -23,6 +31,7 @@ class EnvelopeResult:
     trust_mode: Mode
     trust_score: float
     failed_gate_id: Optional[str]
+    duration_ms: float = 0.0
 
     @property
     def is_actionable(self) -> bool:
@@ -58,6 +67,8 @@ class EnvelopeResult:
                 base_row = {
                     "gate_id": gate.gate_id,
                     "gate_name": gate.name,
+                    "gate_duration_ms": round(gate.duration_ms, 2),
+                    "gate_cached": gate.cached,
                     "check_id": check.check_id,
                     "check_name": check.name,
                     "passed": check.passed,
@@ -80,6 +91,7 @@ class EnvelopeResult:
             "passed_gates": self.passed_gate_ids,
             "failed_gate": self.failed_gate_id,
             "gates": [g.to_dict() for g in self.gate_results],
+            "duration_ms": round(self.duration_ms, 2),
             "summary": self.label(),
         }
 
@@ -87,9 +99,14 @@ class EnvelopeResult:
 class ValidationEnvelope:
     """Runs an ordered, extensible sequence of gates (Gate A -> B -> C -> ...)."""
 
-    def __init__(self, gates: Optional[List[Gate]] = None):
-        """Build an envelope from an optional initial ordered list of gates."""
+    def __init__(
+        self,
+        gates: Optional[List[Gate]] = None,
+        cache: Optional["GateResultCache"] = None,
+    ):
+        """Build an envelope from an optional ordered list of gates and result cache."""
         self._gates: List[Gate] = list(gates or [])
+        self.cache = cache
 
     def add_gate(self, gate: Gate) -> "ValidationEnvelope":
         """Append a new gate (e.g. a future Gate D) to the end of the chain."""
@@ -108,9 +125,10 @@ class ValidationEnvelope:
         gate_results: List[GateResult] = []
         trust_mode: Mode = MODE_GROUNDED
         failed_gate_id: Optional[str] = None
+        start = time.monotonic()
 
         for gate in self._gates:
-            result = await gate.run(context)
+            result = await self._run_gate(gate, context)
             gate_results.append(result)
 
             if result.status == GateStatus.PASS:
@@ -147,13 +165,25 @@ class ValidationEnvelope:
             trust_mode=trust_mode,
             trust_score=trust_score,
             failed_gate_id=failed_gate_id,
+            duration_ms=(time.monotonic() - start) * 1000,
         )
 
+    async def _run_gate(self, gate: Gate, context: GateContext) -> GateResult:
+        if self.cache is None:
+            return await gate.run(context)
+        cached = self.cache.get(gate, context)
+        if cached is not None:
+            return cached
+        result = await gate.run(context)
+        self.cache.put(gate, context, result)
+        return result
+
 
 def build_default_envelope(**overrides: Any) -> ValidationEnvelope:
     """Build the paper's canonical Gate A -> B -> C -> D -> E envelope (Fig. 2).
 
     Additional gates can be appended afterwards via ``envelope.add_gate(...)``.
+    Pass ``cache=`` to reuse gate results across runs (see cache.py).
     """
     from .gate_a import ContractInfrastructureGate
     from .gate_b import DataIntegrityGate
@@ -185,5 +215,6 @@ def build_default_envelope(**overrides: Any) -> ValidationEnvelope:
             ContextReadinessGate(**gate_c_kwargs),
             PermissionCapabilityGate(),
             LifecycleIntegrityGate(),
-        ]
+        ],
+        cache=overrides.get("cache"),
     )
@@ -10,7 +10,7 @@ actions) -- see ``base.MODE_STATUS_ONLY``.
 
 from __future__ import annotations
 
-from typing import Any, List
+from typing import Any, Hashable, List, Optional, Tuple
 
 from sqlalchemy import func, select
 
@@ -23,11 +23,14 @@ from .base import (
     GateResult,
     GateStatus,
 )
+from .cache import TOPIC_SCHEMA
 
 
 class ContractInfrastructureGate(Gate):
     """Gate A: API + schema conformance and DB readiness (Fig. 2)."""
 
+    cache_topics = (TOPIC_SCHEMA,)
+
     def __init__(self) -> None:
         """Configure Gate A with its fixed identity and Mode 1 failure fallback."""
         super().__init__(
@@ -36,6 +39,10 @@ class ContractInfrastructureGate(Gate):
             failure_mode=MODE_STATUS_ONLY,
         )
 
+    def cache_key(self, context: GateContext) -> Optional[Tuple[Hashable, ...]]:
+        """Cache one fleet-wide result; the schema does not vary per device."""
+        return None if context.session is None else ()
+
     async def evaluate(self, context: GateContext) -> GateResult:
         """Verify schema conformance and DB readiness for core telemetry tables."""
         session = context.session
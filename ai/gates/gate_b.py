@@ -28,9 +28,9 @@ stale/incomplete telemetry.
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Any, List, Optional
+from typing import Any, Hashable, List, Optional, Tuple
 
-from sqlalchemy import or_, select
+from sqlalchemy import case, or_, select
 from sqlalchemy.sql import func
 
 from .base import (
@@ -42,6 +42,7 @@ from .base import (
     GateResult,
     GateStatus,
 )
+from .cache import TOPIC_LIFECYCLE, TOPIC_TELEMETRY
 
 # Fallback defaults used when ai/config.yaml does not supply a value (see
 # ai/gates/config.py). Runtime thresholds come from config.yaml.
@@ -54,6 +55,9 @@ DEFAULT_COMPLETENESS_MAX_NULL_RATIO = 0.01  # relaxed for testing; real: 0
 class DataIntegrityGate(Gate):
     """Gate B: completeness, freshness, continuity, gap checks, validity (Fig. 2)."""
 
+    # Lifecycle too: only active devices are scored.
+    cache_topics = (TOPIC_TELEMETRY, TOPIC_LIFECYCLE)
+
     def __init__(
         self,
         freshness_max_age_seconds: int = DEFAULT_FRESHNESS_MAX_AGE_SECONDS,
@@ -70,6 +74,12 @@ class DataIntegrityGate(Gate):
         self.sustained_gap_seconds = sustained_gap_seconds
         self.completeness_max_null_ratio = completeness_max_null_ratio
 
+    def cache_key(self, context: GateContext) -> Optional[Tuple[Hashable, ...]]:
+        """Key results on the device and lookback window being assessed."""
+        if context.session is None:
+            return None
+        return (context.device_int_id, context.device_id, context.window_seconds)
+
     async def evaluate(self, context: GateContext) -> GateResult:
         """Check completeness, freshness, continuity, gaps, and value validity."""
         session = context.session
@@ -253,20 +263,11 @@ class DataIntegrityGate(Gate):
         device_int_id: Optional[int],
         active_pks: list,
     ) -> List[CheckResult]:
-        stmt = (
-            select(HealthCheck.timestamp)
-            .where(
-                HealthCheck.timestamp >= window_start,
-                HealthCheck.device_id.in_(active_pks),
-            )
-            .order_by(HealthCheck.timestamp.asc())
+        device_gaps = await self._device_gaps(
+            session, HealthCheck, window_start, device_int_id, active_pks
         )
-        if device_int_id:
-            stmt = stmt.where(HealthCheck.device_id == device_int_id)
-
-        rows = (await session.execute(stmt)).all()
 
-        if len(rows) < 2:
+        if not device_gaps:
             msg = "Insufficient health_check samples in window to assess continuity."
             return [
                 CheckResult(
@@ -283,18 +284,10 @@ class DataIntegrityGate(Gate):
                 ),
             ]
 
-        max_gap = 0.0
-        worst_ts = None
-        sustained_gaps = 0
-        prev_ts = rows[0][0]
-        for (ts,) in rows[1:]:
-            gap = (ts - prev_ts).total_seconds()
-            if gap > max_gap:
-                max_gap = gap
-                worst_ts = ts
-            if gap > self.sustained_gap_seconds:
-                sustained_gaps += 1
-            prev_ts = ts
+        worst_device, max_gap, worst_ts, _ = max(device_gaps, key=lambda r: r[1])
+        sustained_gaps = sum(r[3] for r in device_gaps)
+        devices_over = sum(1 for r in device_gaps if r[1] > self.continuity_gap_seconds)
+        devices_sustained = sum(1 for r in device_gaps if r[3])
 
         continuity_passed = max_gap <= self.continuity_gap_seconds
         continuity = CheckResult(
@@ -308,7 +301,12 @@ class DataIntegrityGate(Gate):
                     field="timestamp",
                     observed=round(max_gap, 1),
                     threshold=self.continuity_gap_seconds,
-                    extra={"worst_gap_at": worst_ts.isoformat() if worst_ts else None},
+                    extra={
+                        "worst_gap_at": worst_ts.isoformat() if worst_ts else None,
+                        "worst_device_pk": worst_device,
+                        "devices_assessed": len(device_gaps),
+                        "devices_over_threshold": devices_over,
+                    },
                     query_id="B.continuity",
                 )
             ],
@@ -325,12 +323,75 @@ class DataIntegrityGate(Gate):
                     table="health_checks",
                     observed=sustained_gaps,
                     threshold=0,
+                    extra={"devices_with_sustained_gaps": devices_sustained},
                     query_id="B.gap_checks",
                 )
             ],
         )
         return [continuity, gap_checks]
 
+    async def _device_gaps(
+        self,
+        session: Any,
+        HealthCheck: Any,
+        window_start: datetime,
+        device_int_id: Optional[int],
+        active_pks: list,
+    ) -> List[Tuple[int, float, Optional[datetime], int]]:
+        """Return ``(device_pk, max_gap, worst_gap_at, sustained_gaps)`` per device.
+
+        Gaps are measured between consecutive health checks *of the same
+        device* (``LAG`` partitioned by device), so interleaved reports from
+        other devices cannot hide an outage. Only one aggregate row per
+        device with at least two samples leaves the database.
+        """
+        samples = select(
+            HealthCheck.device_id.label("device_id"),
+            HealthCheck.timestamp.label("ts"),
+            func.lag(HealthCheck.timestamp)
+            .over(partition_by=HealthCheck.device_id, order_by=HealthCheck.timestamp)
+            .label("prev_ts"),
+        ).where(
+            HealthCheck.timestamp >= window_start,
+            HealthCheck.device_id.in_(active_pks),
+        )
+        if device_int_id:
+            samples = samples.where(HealthCheck.device_id == device_int_id)
+        samples_sq = samples.subquery()
+
+        gap = _seconds_between(
+            session.get_bind().dialect.name, samples_sq.c.prev_ts, samples_sq.c.ts
+        )
+        gaps_sq = (
+            select(
+                samples_sq.c.device_id,
+                samples_sq.c.ts,
+                gap.label("gap"),
+                func.row_number()
+                .over(
+                    partition_by=samples_sq.c.device_id,
+                    order_by=(gap.desc(), samples_sq.c.ts.desc()),
+                )
+                .label("rank"),
+            )
+            .where(samples_sq.c.prev_ts.is_not(None))
+            .subquery()
+        )
+
+        stmt = select(
+            gaps_sq.c.device_id,
+            func.max(gaps_sq.c.gap),
+            func.max(case((gaps_sq.c.rank == 1, gaps_sq.c.ts))),
+            func.sum(case((gaps_sq.c.gap > self.sustained_gap_seconds, 1), else_=0)),
+        ).group_by(gaps_sq.c.device_id)
+
+        return [
+            (device_pk, float(max_gap or 0.0), worst_ts, int(sustained or 0))
+            for device_pk, max_gap, worst_ts, sustained in (
+                await session.execute(stmt)
+            ).all()
+        ]
+
     async def _check_validity(
         self,
         session: Any,
@@ -376,3 +437,10 @@ class DataIntegrityGate(Gate):
                 )
             ],
         )
+
+
+def _seconds_between(dialect: str, earlier: Any, later: Any) -> Any:
+    """Build a SQL expression for ``later - earlier`` in seconds."""
+    if dialect == "sqlite":
+        return (func.julianday(later) - func.julianday(earlier)) * 86400.0
+    return func.extract("epoch", later - earlier)
@@ -9,7 +9,7 @@ see ``MODE_PERMISSION_GAP`` below.
 
 from __future__ import annotations
 
-from typing import Any, List
+from typing import Any, Hashable, List, Optional, Tuple
 
 from sqlalchemy import select
 
@@ -22,6 +22,7 @@ from .base import (
     GateStatus,
     Mode,
 )
+from .cache import TOPIC_LIFECYCLE
 
 # ---------------------------------------------------------------------------
 # TUNABLE: the ``trust_ceiling`` for MODE_PERMISSION_GAP is set to 0.75
@@ -45,6 +46,8 @@ MODE_PERMISSION_GAP = Mode(
 class PermissionCapabilityGate(Gate):
     """Gate D: validates device permissions are bounded by capabilities."""
 
+    cache_topics = (TOPIC_LIFECYCLE,)
+
     def __init__(self) -> None:
         """Configure Gate D with its fixed identity and Mode 4 failure fallback."""
         super().__init__(
@@ -53,6 +56,12 @@ class PermissionCapabilityGate(Gate):
             failure_mode=MODE_PERMISSION_GAP,
         )
 
+    def cache_key(self, context: GateContext) -> Optional[Tuple[Hashable, ...]]:
+        """Key results on the device whose permissions are checked."""
+        if context.session is None:
+            return None
+        return (context.device_int_id, context.device_id)
+
     async def evaluate(self, context: GateContext) -> GateResult:
         """Check capabilities defined, permissions defined, permissions within capabilities."""
         session = context.session
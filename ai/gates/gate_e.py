@@ -9,7 +9,7 @@ halt, non-actionable) -- see ``MODE_LIFECYCLE_HALT`` below.
 
 from __future__ import annotations
 
-from typing import Any, List
+from typing import Any, Hashable, List, Optional, Tuple
 
 from sqlalchemy import select
 
@@ -22,6 +22,7 @@ from .base import (
     GateStatus,
     Mode,
 )
+from .cache import TOPIC_LIFECYCLE
 
 # ---------------------------------------------------------------------------
 # TUNABLE: the ``trust_ceiling`` for MODE_LIFECYCLE_HALT is set to 0.50
@@ -47,6 +48,8 @@ MODE_LIFECYCLE_HALT = Mode(
 class LifecycleIntegrityGate(Gate):
     """Gate E: validates device lifecycle, credential health, and health state."""
 
+    cache_topics = (TOPIC_LIFECYCLE,)
+
     def __init__(self) -> None:
         """Configure Gate E with its fixed identity and Mode 5 failure fallback."""
         super().__init__(
@@ -55,6 +58,12 @@ class LifecycleIntegrityGate(Gate):
             failure_mode=MODE_LIFECYCLE_HALT,
         )
 
+    def cache_key(self, context: GateContext) -> Optional[Tuple[Hashable, ...]]:
+        """Key results on the device whose lifecycle is checked."""
+        if context.session is None:
+            return None
+        return (context.device_int_id, context.device_id)
+
     async def evaluate(self, context: GateContext) -> GateResult:
         """Check lifecycle state, health state, and credential health."""
         session = context.session
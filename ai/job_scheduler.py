@@ -3,23 +3,60 @@
 This module uses machine learning insights from analytics data to recommend
 optimal times for job execution, maximizing success probability and
 minimizing business disruption.
+
+Site-level inputs (operating hours, peak trading, hour-of-week success rates)
+come from the precomputed :class:`~ai.schedule_model.SiteScheduleModel`, so
+a recommendation is a few array lookups rather than fresh schedule and job
+history queries.
 """
 
 from datetime import datetime, timedelta
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from homepot.database import get_database_service
 
 from .analytics_service import AIAnalyticsService
+from .schedule_model import (
+    DAY_NAMES,
+    HOURS_PER_WEEK,
+    ScheduleModelStore,
+    SiteScheduleModel,
+    get_schedule_model_store,
+)
 
 logger = logging.getLogger(__name__)
 
+# Posterior success rates above this are reported as a positive factor, below
+# the second as a negative one.
+STRONG_SUCCESS_RATE = 0.9
+WEAK_SUCCESS_RATE = 0.6
+# Slots with fewer outcomes than this are mostly estimated from the prior.
+MIN_SLOT_SAMPLES = 5
+
+_Slot = Tuple[datetime, float, float]
+
 
 class PredictiveJobScheduler:
     """AI-powered job scheduler that optimizes execution timing."""
 
-    def __init__(self) -> None:
-        """Initialize the predictive scheduler."""
+    def __init__(self, models: Optional[ScheduleModelStore] = None) -> None:
+        """Initialize the predictive scheduler.
+
+        Args:
+            models: Site model store (default: the shared, cached store)
+        """
         self.analytics = AIAnalyticsService()
+        self.models = models or get_schedule_model_store()
+
+    async def _site_model(self, site_id: str) -> SiteScheduleModel:
+        """Return the site's scheduling model, opening a session only to build it."""
+        model = self.models.peek(site_id)
+        if model is not None:
+            return model
+        db_service = await get_database_service()
+        async with db_service.get_session() as session:
+            return await self.models.get(session, site_id)
 
     async def recommend_execution_time(
         self,
@@ -29,6 +66,11 @@ class PredictiveJobScheduler:
     ) -> Dict[str, Any]:
         """Recommend optimal execution time for a job.
 
+        Critical jobs take the first open hour; other priorities take the
+        open hour with the best load-adjusted success probability within
+        their horizon (``job_scheduling.horizon_hours``), with the next-best
+        hours as alternatives.
+
         Args:
             site_id: Target site identifier
             job_priority: Job priority (low, medium, high, critical)
@@ -41,12 +83,9 @@ class PredictiveJobScheduler:
             earliest_start = datetime.utcnow()
 
         try:
-            # Get site operating schedule
-            scheduling_windows = await self.analytics.get_optimal_scheduling_windows(
-                site_id
-            )
+            model = await self._site_model(site_id)
 
-            if scheduling_windows.get("status") == "no_schedule":
+            if not model.has_schedule:
                 # No schedule data - recommend immediate execution for critical jobs
                 if job_priority == "critical":
                     return {
@@ -67,77 +106,50 @@ class PredictiveJobScheduler:
                         "alternative_times": [],
                     }
 
-            # Get historical job patterns
-            job_patterns = await self.analytics.get_job_outcome_patterns(
-                site_id, days=30
+            horizons = self.models.horizon_hours
+            horizon = int(horizons.get(job_priority, horizons["medium"]))
+            # The best slots also supply the alternatives to the first open one.
+            slots = model.best_slots(
+                earliest_start,
+                horizon,
+                count=self.models.alternatives + 1,
+                spacing_hours=self.models.alternative_spacing_hours,
             )
 
-            # Find optimal windows
-            recommendations = scheduling_windows.get("recommendations", [])
-            current_day = earliest_start.weekday()  # 0=Monday
-
             # Priority-based scheduling strategy
             if job_priority == "critical":
                 # Critical jobs: Execute ASAP, avoid only closed hours
-                for rec in recommendations:
-                    if rec["day_of_week"] == current_day and rec["status"] == "open":
-                        return {
-                            "recommended_time": earliest_start.isoformat(),
-                            "confidence": 0.9,
-                            "reasoning": "Critical priority - executing immediately during open hours",
-                            "site_status": rec,
-                            "alternative_times": [],
-                        }
-                # If today is closed, find next open day
-                return await self._find_next_open_slot(
-                    recommendations, earliest_start, "Critical priority"
-                )
-
-            elif job_priority == "high":
-                # High priority: Execute within 4 hours, prefer off-peak
-                target_day_rec = next(
-                    (r for r in recommendations if r["day_of_week"] == current_day),
-                    None,
-                )
-
-                if target_day_rec and target_day_rec.get("optimal_windows"):
-                    # Try to fit in optimal window today
-                    optimal = target_day_rec["optimal_windows"][0]
-                    recommended_time = self._parse_optimal_window_time(
-                        earliest_start, optimal["start"]
+                first = model.first_open_slot(earliest_start, horizon)
+                if first is None:
+                    return self._no_open_slot(earliest_start)
+                if first[0] == earliest_start:
+                    reasoning = (
+                        "Critical priority - executing immediately during open hours"
                     )
-
-                    # If window is within 4 hours, use it
-                    if recommended_time < earliest_start + timedelta(hours=4):
-                        return {
-                            "recommended_time": recommended_time.isoformat(),
-                            "confidence": 0.85,
-                            "reasoning": f"High priority - optimal window: {optimal['reason']}",
-                            "site_status": target_day_rec,
-                            "alternative_times": self._get_alternative_times(
-                                target_day_rec, earliest_start
-                            ),
-                        }
-
-                # No optimal window soon - execute in 2 hours
-                return {
-                    "recommended_time": (
-                        earliest_start + timedelta(hours=2)
-                    ).isoformat(),
-                    "confidence": 0.7,
-                    "reasoning": "High priority - executing within 2 hours",
-                    "alternative_times": [],
-                }
-
-            else:  # medium or low priority
-                # Find best optimal window in next 7 days
-                best_recommendation = await self._find_best_window_in_week(
-                    recommendations,
-                    earliest_start,
-                    job_patterns,
+                else:
+                    reasoning = f"Critical priority - next open hour is {self._describe(model, first[0])}"
+                return self._recommendation(model, first, slots, reasoning)
+
+            if not slots:
+                # Nothing open within the horizon: take the next open hour.
+                first = model.first_open_slot(earliest_start, HOURS_PER_WEEK)
+                if first is None:
+                    return self._no_open_slot(earliest_start)
+                return self._recommendation(
+                    model,
+                    first,
+                    [],
+                    f"{job_priority.capitalize()} priority - site closed for the next "
+                    f"{horizon} hours; next open hour is {self._describe(model, first[0])}",
                 )
 
-                return best_recommendation
+            return self._recommendation(
+                model,
+                slots[0],
+                slots,
+                f"{job_priority.capitalize()} priority - highest expected success within "
+                f"{horizon} hours: {self._describe(model, slots[0][0])}",
+            )
 
         except Exception as e:
             logger.error(f"Failed to recommend execution time: {e}", exc_info=True)
@@ -190,86 +202,54 @@ class PredictiveJobScheduler:
                     }
                 )
 
-            # Factor 2: Historical success rate at this hour (30% weight)
-            job_patterns = await self.analytics.get_job_outcome_patterns(
-                site_id, days=30
-            )
-
-            if job_patterns.get("status") != "error":
-                hour = scheduled_time.hour
-                optimal_hours = job_patterns.get("optimal_hours", [])
-                hour_data = next((h for h in optimal_hours if h["hour"] == hour), None)
-
-                if hour_data:
-                    hour_success = hour_data["success_rate"] / 100
-                    probability *= 0.7 + 0.3 * hour_success
-                    factors.append(
-                        {
-                            "factor": "historical_success_rate",
-                            "weight": 0.3,
-                            "score": hour_success,
-                            "impact": "positive" if hour_success > 0.9 else "neutral",
-                        }
-                    )
-                else:
-                    # Unknown hour - neutral
-                    probability *= 0.85
-                    factors.append(
-                        {
-                            "factor": "historical_success_rate",
-                            "weight": 0.3,
-                            "score": 0.85,
-                            "impact": "neutral",
-                            "note": "Limited historical data for this hour",
-                        }
-                    )
-
-            # Factor 3: Site operating schedule (20% weight)
+            # Factors 2 and 3 come from the site's hour-of-week model.
+            model = await self._site_model(site_id)
             day_of_week = scheduled_time.weekday()
-            scheduling = await self.analytics.get_optimal_scheduling_windows(
-                site_id, day_of_week
-            )
+            hour = scheduled_time.hour
 
-            if scheduling.get("status") != "error":
-                recs = scheduling.get("recommendations", [])
-                day_rec = next(
-                    (r for r in recs if r["day_of_week"] == day_of_week), None
+            # Factor 2: Historical success rate at this hour (30% weight)
+            hour_success = float(model.success[day_of_week, hour])
+            sample_size = int(model.samples[day_of_week, hour])
+            probability *= 0.7 + 0.3 * hour_success
+            history_factor: Dict[str, Any] = {
+                "factor": "historical_success_rate",
+                "weight": 0.3,
+                "score": round(hour_success, 3),
+                "impact": (
+                    "positive"
+                    if hour_success > STRONG_SUCCESS_RATE
+                    else "negative" if hour_success < WEAK_SUCCESS_RATE else "neutral"
+                ),
+                "sample_size": sample_size,
+            }
+            if sample_size < MIN_SLOT_SAMPLES:
+                history_factor["note"] = (
+                    "Limited historical data for this hour - "
+                    "estimated from the site's hourly and overall rates"
                 )
+            factors.append(history_factor)
 
-                if day_rec:
-                    if day_rec["status"] == "closed":
-                        probability *= 0.3  # Major penalty for closed days
-                        factors.append(
-                            {
-                                "factor": "site_schedule",
-                                "weight": 0.2,
-                                "score": 0.3,
-                                "impact": "negative",
-                                "note": "Site is closed",
-                            }
-                        )
-                    elif day_rec.get("is_maintenance_window"):
-                        probability *= 0.5  # Penalty for maintenance
-                        factors.append(
-                            {
-                                "factor": "site_schedule",
-                                "weight": 0.2,
-                                "score": 0.5,
-                                "impact": "negative",
-                                "note": "Maintenance window",
-                            }
-                        )
-                    elif day_rec.get("optimal_windows"):
-                        probability *= 1.0  # Neutral/positive for open days
-                        factors.append(
-                            {
-                                "factor": "site_schedule",
-                                "weight": 0.2,
-                                "score": 1.0,
-                                "impact": "positive",
-                                "note": "Within operating hours",
-                            }
-                        )
+            # Factor 3: Site operating schedule (20% weight)
+            if model.scheduled_days[day_of_week]:
+                schedule_score = float(model.schedule_factor[day_of_week, hour])
+                probability *= schedule_score
+                if not model.open_mask[day_of_week, hour]:
+                    impact, note = "negative", "Site is closed"
+                elif model.maintenance_days[day_of_week]:
+                    impact, note = "negative", "Maintenance window"
+                elif model.peak_mask[day_of_week, hour]:
+                    impact, note = "neutral", "Within operating hours (peak trading)"
+                else:
+                    impact, note = "positive", "Within operating hours"
+                factors.append(
+                    {
+                        "factor": "site_schedule",
+                        "weight": 0.2,
+                        "score": schedule_score,
+                        "impact": impact,
+                        "note": note,
+                    }
+                )
 
             # Factor 4: Recent error rate (10% weight)
             errors = await self.analytics.get_error_frequency_analysis(
@@ -311,86 +291,43 @@ class PredictiveJobScheduler:
             logger.error(f"Failed to calculate success probability: {e}", exc_info=True)
             return {"probability": 0.5, "error": str(e)}
 
-    async def _find_next_open_slot(
+    def _recommendation(
         self,
-        recommendations: List[Dict[str, Any]],
-        start_time: datetime,
-        reason_prefix: str,
+        model: SiteScheduleModel,
+        slot: _Slot,
+        ranked: List[_Slot],
+        reasoning: str,
     ) -> Dict[str, Any]:
-        """Find the next available open slot in the schedule."""
-        current_day = start_time.weekday()
-
-        # Check next 7 days
-        for i in range(1, 8):
-            next_day_idx = (current_day + i) % 7
-            day_rec = next(
-                (r for r in recommendations if r["day_of_week"] == next_day_idx), None
-            )
-
-            if day_rec and day_rec["status"] == "open":
-                # Found an open day
-                next_date = start_time + timedelta(days=i)
-
-                # Use first optimal window if available, else 9 AM
-                if day_rec.get("optimal_windows"):
-                    optimal = day_rec["optimal_windows"][0]
-                    start_str = optimal["start"]
-                    hour = int(start_str.split(":")[0])
-                    next_time = next_date.replace(hour=hour, minute=0, second=0)
-                else:
-                    next_time = next_date.replace(hour=9, minute=0, second=0)
-
-                return {
-                    "recommended_time": next_time.isoformat(),
-                    "confidence": 0.8,
-                    "reasoning": f"{reason_prefix} - next open day is {day_rec['day']}",
-                    "site_status": day_rec,
-                    "alternative_times": [],
-                }
+        """Build a recommendation for ``slot``; other ``ranked`` slots are alternatives."""
+        when, probability, _ = slot
+        return {
+            "recommended_time": when.isoformat(),
+            "confidence": round(probability, 2),
+            "reasoning": reasoning,
+            "site_status": model.day_status(when.weekday()),
+            "alternative_times": [t.isoformat() for t, _, _ in ranked if t != when][
+                : self.models.alternatives
+            ],
+        }
 
-        # Fallback if no open days found (unlikely)
+    @staticmethod
+    def _describe(model: SiteScheduleModel, when: datetime) -> str:
+        """Summarise a slot for the recommendation's reasoning."""
+        day, hour = when.weekday(), when.hour
+        traffic = "peak" if model.peak_mask[day, hour] else "off-peak"
+        samples = int(model.samples[day, hour])
+        return (
+            f"{DAY_NAMES[day]} {when:%H:%M} ({traffic}, "
+            f"{model.success[day, hour]:.0%} expected job success, "
+            f"{samples} past job(s) in this hour)"
+        )
+
+    @staticmethod
+    def _no_open_slot(start_time: datetime) -> Dict[str, Any]:
+        """Fallback when the site has no open hour in the coming week."""
         return {
             "recommended_time": (start_time + timedelta(days=1)).isoformat(),
             "confidence": 0.5,
             "reasoning": "Could not find open slot - defaulting to tomorrow",
             "alternative_times": [],
         }
-
-    def _parse_optimal_window_time(
-        self, base_date: datetime, time_str: str
-    ) -> datetime:
-        """Parse time string (HH:MM) and apply to base date."""
-        hour = int(time_str.split(":")[0])
-        minute = int(time_str.split(":")[1]) if ":" in time_str else 0
-        return base_date.replace(hour=hour, minute=minute, second=0)
-
-    def _get_alternative_times(
-        self, day_rec: Dict[str, Any], base_date: datetime
-    ) -> List[str]:
-        """Get alternative times from optimal windows."""
-        alternatives = []
-        if day_rec.get("optimal_windows"):
-            for window in day_rec["optimal_windows"][1:]:  # Skip first one
-                time_obj = self._parse_optimal_window_time(base_date, window["start"])
-                alternatives.append(time_obj.isoformat())
-        return alternatives
-
-    async def _find_best_window_in_week(
-        self,
-        recommendations: List[Dict[str, Any]],
-        start_time: datetime,
-        job_patterns: Dict[str, Any],
-    ) -> Dict[str, Any]:
-        """Find the best execution window in the upcoming week."""
-        # Implementation simplified for brevity - looks for highest success probability
-
-        # Default to tomorrow morning if complex logic fails
-        tomorrow = start_time + timedelta(days=1)
-        return {
-            "recommended_time": tomorrow.replace(
-                hour=10, minute=0, second=0
-            ).isoformat(),
-            "confidence": 0.7,
-            "reasoning": "Standard scheduling - next business day",
-            "alternative_times": [],
-        }
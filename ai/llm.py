@@ -2,7 +2,7 @@
 
 import logging
 import os
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 import ollama  # type: ignore
 import yaml
@@ -11,19 +11,31 @@ import yaml
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Returned instead of a generation when Ollama cannot be reached.
+LLM_UNAVAILABLE_MESSAGE = (
+    "I apologize, but I'm currently unable to connect to my AI brain "
+    "(Ollama). Please ensure the Ollama service is running."
+)
+
 
 class LLMService:
     """Service for interacting with local LLM via Ollama."""
 
-    def __init__(self, config_path: str | None = None) -> None:
-        """Initialize the LLMService with configuration."""
+    def __init__(
+        self, config_path: str | None = None, base_url: str | None = None
+    ) -> None:
+        """Initialize the LLMService with configuration.
+
+        ``base_url`` overrides ``llm.base_url`` from the config file (e.g. to
+        target ``ai/utils/fake_ollama.py``).
+        """
         if config_path is None:
             config_path = os.path.join(os.path.dirname(__file__), "config.yaml")
         with open(config_path, "r") as f:
             self.config = yaml.safe_load(f)
 
         self.model = self.config["llm"]["model"]
-        self.base_url = self.config["llm"]["base_url"]
+        self.base_url = base_url or self.config["llm"]["base_url"]
 
         # Initialize Ollama client
         self.client = ollama.Client(host=self.base_url)
@@ -37,43 +49,68 @@ class LLMService:
         except Exception:
             return False
 
-    def generate_response(
+    def _messages(
         self,
         prompt: str,
         context: Optional[str] = None,
         system_prompt: Optional[str] = None,
-    ) -> str:
-        """Generate a response from the LLM."""
-        try:
-            messages = []
+    ) -> List[Dict[str, str]]:
+        messages = []
 
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
 
-            full_prompt = prompt
-            if context:
-                full_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
+        full_prompt = prompt
+        if context:
+            full_prompt = f"Context:\n{context}\n\nQuestion: {prompt}"
 
-            messages.append({"role": "user", "content": full_prompt})
+        messages.append({"role": "user", "content": full_prompt})
+        return messages
 
-            # Extract options from config with type safety
-            temperature = float(self.config["llm"].get("temperature", 0.7))
-            context_window = int(self.config["llm"].get("context_window", 4096))
+    def _options(self) -> Dict[str, Any]:
+        # Extract options from config with type safety
+        return {
+            "temperature": float(self.config["llm"].get("temperature", 0.7)),
+            "num_ctx": int(self.config["llm"].get("context_window", 4096)),
+        }
 
+    def generate_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """Generate a response from the LLM."""
+        try:
             response = self.client.chat(
                 model=self.model,
-                messages=messages,
-                options={
-                    "temperature": temperature,
-                    "num_ctx": context_window,
-                },
+                messages=self._messages(prompt, context, system_prompt),
+                options=self._options(),
             )
 
             return str(response["message"]["content"])
 
         except Exception as e:
             logger.error(f"Failed to generate LLM response: {e}")
-            return (
-                "I apologize, but I'm currently unable to connect to my AI brain "
-                "(Ollama). Please ensure the Ollama service is running."
-            )
+            return LLM_UNAVAILABLE_MESSAGE
+
+    def stream_response(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Yield the response text chunk by chunk as the LLM generates it.
+
+        Unlike :meth:`generate_response`, connection and model errors are
+        raised to the caller (see ``ai/llm_gateway.py``).
+        """
+        for chunk in self.client.chat(
+            model=self.model,
+            messages=self._messages(prompt, context, system_prompt),
+            options=self._options(),
+            stream=True,
+        ):
+            content = chunk["message"]["content"]
+            if content:
+                yield str(content)
@@ -0,0 +1,298 @@
+"""Non-blocking gateway in front of the synchronous LLM service.
+
+:class:`~ai.llm.LLMService` talks to Ollama through the blocking
+``ollama.Client``. The async request handlers used to call it directly, so
+a multi-second generation froze the event loop and stalled every other
+request on the server (health checks, context assembly, other users' chats).
+
+:class:`LLMGateway` sits between the handlers and the service:
+
+- generations run on a bounded thread pool (``workers``). Up to ``max_queue``
+  more requests may wait for a worker; beyond that :class:`LLMGatewayBusy` is
+  raised so callers can answer 503 instead of piling up work Ollama cannot
+  serve;
+- identical in-flight requests (same model, system prompt, context and prompt)
+  are coalesced onto one generation;
+- completed responses are cached by a content hash of the request for
+  ``cache_ttl_seconds``, so repeat analyses return immediately. The
+  "Ollama unavailable" fallback text is never cached;
+- :meth:`LLMGateway.stream` yields text chunks as Ollama produces them, for
+  SSE endpoints.
+
+Unset limits are read from the ``llm_gateway`` section of ai/config.yaml.
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from .config import load_ai_config
+from .llm import LLM_UNAVAILABLE_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_QUEUE = 8
+DEFAULT_CACHE_TTL_SECONDS = 300.0
+DEFAULT_CACHE_MAX_ENTRIES = 256
+
+
+class LLMGatewayBusy(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class LLMGateway:
+    """Run LLM generations off the event loop with coalescing and caching."""
+
+    def __init__(
+        self,
+        service_provider: Callable[[], Any],
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        cache_ttl_seconds: Optional[float] = None,
+        cache_max_entries: Optional[int] = None,
+    ) -> None:
+        """Initialize the gateway, reading unset limits from ai/config.yaml.
+
+        Args:
+            service_provider: Returns the :class:`~ai.llm.LLMService` to use.
+                It is called per request, so the service can be created
+                lazily (or swapped in tests).
+            workers: Generations allowed to run at once.
+            max_queue: Generations allowed to wait for a worker.
+            cache_ttl_seconds: Lifetime of a cached response; ``0`` disables
+                the cache.
+            cache_max_entries: Cached responses kept (least recently used
+                are evicted first).
+        """
+        section = load_ai_config().get("llm_gateway", {}) or {}
+
+        def pick(value: Any, key: str, default: Any) -> Any:
+            return value if value is not None else section.get(key, default)
+
+        self.service_provider = service_provider
+        self.workers = max(1, int(pick(workers, "workers", DEFAULT_WORKERS)))
+        self.max_queue = max(0, int(pick(max_queue, "max_queue", DEFAULT_MAX_QUEUE)))
+        self.cache_ttl = float(
+            pick(cache_ttl_seconds, "cache_ttl_seconds", DEFAULT_CACHE_TTL_SECONDS)
+        )
+        self.cache_max_entries = int(
+            pick(cache_max_entries, "cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES)
+        )
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="llm-gateway"
+        )
+        self._cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
+        # Generations admitted to the pool (running or queued). Released when
+        # the worker thread finishes, not when the caller stops waiting.
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    # -- helpers -----------------------------------------------------------
+
+    @staticmethod
+    def cache_key(
+        service: Any,
+        prompt: str,
+        context: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """Return the content hash identifying a generation request."""
+        payload = json.dumps(
+            [getattr(service, "model", None), system_prompt, context, prompt],
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at <= time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def _cache_put(self, key: str, text: str) -> None:
+        if self.cache_ttl <= 0 or text == LLM_UNAVAILABLE_MESSAGE:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    def _admit(self) -> None:
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise LLMGatewayBusy(
+                f"LLM queue full ({self._pending} generations pending)"
+            )
+        self._pending += 1
+
+    def _release(self, _: Any = None) -> None:
+        self._pending -= 1
+
+    # -- public API --------------------------------------------------------
+
+    async def generate(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """Return the full response, without blocking the event loop.
+
+        Raises:
+            LLMGatewayBusy: If the request would exceed the queue limit.
+        """
+        service = self.service_provider()
+        key = self.cache_key(service, prompt, context, system_prompt)
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            self._admit()
+            loop = asyncio.get_running_loop()
+            work = loop.run_in_executor(
+                self._executor,
+                functools.partial(
+                    service.generate_response,
+                    prompt,
+                    context=context,
+                    system_prompt=system_prompt,
+                ),
+            )
+            work.add_done_callback(self._release)
+            task = asyncio.ensure_future(self._settle(key, work))
+            self._inflight[key] = task
+
+        # Shielded so one caller going away does not cancel the generation
+        # for the others waiting on it.
+        return await asyncio.shield(task)
+
+    async def _settle(self, key: str, work: "asyncio.Future[str]") -> str:
+        try:
+            text = await work
+            self._cache_put(key, text)
+            return text
+        finally:
+            self._inflight.pop(key, None)
+
+    async def stream(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the response in chunks as the LLM generates it.
+
+        A cached response is yielded as a single chunk. Streams are not
+        coalesced (each listener needs its own chunk sequence), but a
+        completed stream populates the cache for later requests.
+
+        Raises:
+            LLMGatewayBusy: If the request would exceed the queue limit.
+        """
+        service = self.service_provider()
+        key = self.cache_key(service, prompt, context, system_prompt)
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.hits += 1
+            yield cached
+            return
+
+        self.misses += 1
+        self._admit()
+        loop = asyncio.get_running_loop()
+        queue: "asyncio.Queue[Tuple[Optional[str], Optional[BaseException]]]"
+        queue = asyncio.Queue()
+        abandoned = threading.Event()
+
+        def put(item: Tuple[Optional[str], Optional[BaseException]]) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # loop closed after the consumer went away
+                abandoned.set()
+
+        def produce() -> None:
+            try:
+                for chunk in service.stream_response(
+                    prompt, context=context, system_prompt=system_prompt
+                ):
+                    if abandoned.is_set():
+                        return
+                    put((chunk, None))
+            except Exception as e:
+                put((None, e))
+            else:
+                put((None, None))
+
+        work = loop.run_in_executor(self._executor, produce)
+        work.add_done_callback(self._release)
+
+        parts = []
+        try:
+            while True:
+                chunk, error = await queue.get()
+                if chunk is None:
+                    break
+                parts.append(chunk)
+                yield chunk
+            if error is not None:
+                logger.error(f"Failed to stream LLM response: {error}")
+                if not parts:
+                    yield LLM_UNAVAILABLE_MESSAGE
+            else:
+                self._cache_put(key, "".join(parts))
+        finally:
+            # Stops the worker at its next chunk if the client disconnected.
+            abandoned.set()
+
+    async def check_health(self) -> bool:
+        """Check Ollama reachability without waiting behind generations."""
+        return bool(await asyncio.to_thread(self.service_provider().check_health))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue, coalescing and cache counters."""
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "in_flight": len(self._inflight),
+            "cache_entries": len(self._cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+    def clear_cache(self) -> None:
+        """Drop every cached response."""
+        self._cache.clear()
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, abandoning queued generations."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,23 @@
 """Prompt templates and formatting logic for the AI service."""
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from .context_packer import ContextPacker, get_context_packer
+
+# Live-context sections rendered, in order, below the alert block.
+DEVICE_SECTIONS = (
+    "job",
+    "error",
+    "config",
+    "audit",
+    "api",
+    "state",
+    "push",
+    "site",
+    "metadata",
+    "user",
+    "metrics",
+)
 
 
 class PromptManager:
@@ -13,21 +30,15 @@ class PromptManager:
         risk_factors: List[str] | None,
         recent_events: List[Any] | None,
         context_data: Dict[str, str],
+        include_unlisted: bool = False,
     ) -> str:
-        """Construct the live context section of the prompt."""
-        # Unpack context data with defaults
-        job_ctx = context_data.get("job", "")
-        error_ctx = context_data.get("error", "")
-        config_ctx = context_data.get("config", "")
-        audit_ctx = context_data.get("audit", "")
-        api_ctx = context_data.get("api", "")
-        state_ctx = context_data.get("state", "")
-        push_ctx = context_data.get("push", "")
-        site_ctx = context_data.get("site", "")
-        meta_ctx = context_data.get("metadata", "")
-        user_ctx = context_data.get("user", "")
-        metrics_ctx = context_data.get("metrics", "")
+        """Construct the live context section of the prompt.
+
+        Device views render the ``DEVICE_SECTIONS`` of ``context_data``;
+        with ``include_unlisted`` any other sections follow them.
+        """
         alert_ctx = context_data.get("alert", "")
+        api_ctx = context_data.get("api", "")
 
         if not device_id:
             # Global/Dashboard View Context
@@ -38,6 +49,11 @@ class PromptManager:
                 f"----------------------------------------\n"
             )
 
+        names: List[str] = list(DEVICE_SECTIONS)
+        if include_unlisted:
+            names += [n for n in context_data if n != "alert" and n not in names]
+        body = "".join(f"{context_data.get(name, '')}\n" for name in names)
+
         # Device-Specific View Context
         return (
             f"\n[CURRENT SYSTEM STATUS]\n"
@@ -47,17 +63,7 @@ class PromptManager:
             f"Risk Factors: {', '.join(risk_factors or [])}\n"
             f"Recent Events: {recent_events}\n"
             f"\n{alert_ctx}\n\n"
-            f"{job_ctx}\n"
-            f"{error_ctx}\n"
-            f"{config_ctx}\n"
-            f"{audit_ctx}\n"
-            f"{api_ctx}\n"
-            f"{state_ctx}\n"
-            f"{push_ctx}\n"
-            f"{site_ctx}\n"
-            f"{meta_ctx}\n"
-            f"{user_ctx}\n"
-            f"{metrics_ctx}\n"
+            f"{body}"
             f"----------------------------------------\n"
         )
 
@@ -71,3 +77,63 @@ class PromptManager:
             f"Relevant History:\n{long_term_context}\n\n"
             f"Current Conversation:\n{short_term_context}"
         )
+
+    @staticmethod
+    def build_packed_prompt(
+        device_id: str | None,
+        prediction: Dict[str, Any] | None,
+        risk_factors: List[str] | None,
+        recent_events: List[Any] | None,
+        context_data: Dict[str, str],
+        long_term_context: str,
+        short_term_context: str,
+        query: str = "",
+        packer: Optional[ContextPacker] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build the full prompt with every section fitted to the token budget.
+
+        The device header and layout are always kept; the live-context
+        sections, memories and conversation are ranked against ``query`` and
+        packed by :class:`~ai.context_packer.ContextPacker`.
+
+        Returns:
+            tuple: (prompt text, packing report for ``context_used``).
+        """
+        packer = packer or get_context_packer()
+        rendered = (
+            context_data
+            if device_id
+            else {k: v for k, v in context_data.items() if k in ("alert", "api")}
+        )
+        frame = PromptManager.build_full_prompt(
+            PromptManager.build_live_context(
+                device_id, prediction, risk_factors, recent_events, {}
+            ),
+            "",
+            "",
+        )
+        fixed_tokens = packer.estimate_tokens(frame)
+
+        sections = [packer.section(name, text) for name, text in rendered.items()]
+        sections.append(packer.section("long_term", long_term_context))
+        sections.append(packer.section("conversation", short_term_context))
+        packed, report = packer.pack(
+            sections, query=query, device_id=device_id, fixed_tokens=fixed_tokens
+        )
+
+        live_context = PromptManager.build_live_context(
+            device_id,
+            prediction,
+            risk_factors,
+            recent_events,
+            {name: packed[name] for name in rendered},
+            include_unlisted=True,
+        )
+        prompt = PromptManager.build_full_prompt(
+            live_context, packed["long_term"], packed["conversation"]
+        )
+        return prompt, {
+            "budget_tokens": packer.max_tokens,
+            "estimated_tokens": packer.estimate_tokens(prompt),
+            "sections": {name: r.as_dict() for name, r in report.items()},
+        }
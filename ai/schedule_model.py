@@ -0,0 +1,448 @@
+"""Precomputed per-site scheduling model for the predictive job scheduler.
+
+:class:`~ai.job_scheduler.PredictiveJobScheduler` used to re-read a site's
+operating schedule and its 30-day job outcome history on every
+recommendation, then fell back to "tomorrow at 10:00" for medium and low
+priority jobs. :class:`ScheduleModelStore` instead builds one
+:class:`SiteScheduleModel` per site with two grouped queries and keeps it for
+``refresh_seconds``. The model is a set of 7x24 arrays indexed by
+``(weekday, hour)`` (0 = Monday):
+
+- ``success``: job success rate per hour of the week. Sparse history is
+  smoothed towards the site's hour-of-day rate, and that towards the site's
+  overall rate (itself smoothed towards ``prior_success``), each step adding
+  ``prior_strength`` pseudo-jobs (a Beta prior).
+- ``samples``: job outcomes observed in each slot.
+- ``open_mask`` / ``peak_mask``: hours the site is open and in peak trading,
+  from ``site_operating_schedules`` (days without a row are unscheduled).
+- ``load``: expected traffic, 0 when closed, 0.5 when open and 1.0 at peak,
+  scaled by the day's ``expected_transaction_volume`` relative to the busiest
+  day.
+- ``schedule_factor``: the success multiplier for the site's state: 0.3
+  closed, 0.5 during a maintenance day, 1.0 otherwise.
+
+A slot's success probability is ``(0.7 + 0.3 * success) * schedule_factor``,
+the same factors ``calculate_success_probability`` has always used, and its
+score discounts that by ``load_weight * load``. "Best slot in the next N
+hours" is then an argmax over a slice of the flattened arrays, and the
+alternatives are the next-best slots at least ``alternative_spacing_hours``
+apart.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homepot.app.models.AnalyticsModel import JobOutcome, SiteOperatingSchedule
+from homepot.models import Site
+
+from .analytics_service import _job_outcome_site_filter
+from .config import load_ai_config
+
+logger = logging.getLogger(__name__)
+
+DAYS_PER_WEEK = 7
+HOURS_PER_DAY = 24
+HOURS_PER_WEEK = DAYS_PER_WEEK * HOURS_PER_DAY
+DAY_NAMES = (
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+)
+
+# Fallback defaults used when ai/config.yaml does not supply a value.
+DEFAULT_REFRESH_SECONDS = 900.0
+DEFAULT_HISTORY_DAYS = 30
+DEFAULT_PRIOR_SUCCESS = 0.85
+DEFAULT_PRIOR_STRENGTH = 5.0
+DEFAULT_LOAD_WEIGHT = 0.2
+DEFAULT_ALTERNATIVES = 3
+DEFAULT_ALTERNATIVE_SPACING_HOURS = 3
+DEFAULT_CACHE_MAX_ENTRIES = 256
+# How far ahead each job priority may be scheduled.
+DEFAULT_HORIZON_HOURS: Dict[str, int] = {
+    "critical": HOURS_PER_WEEK,
+    "high": 4,
+    "medium": HOURS_PER_WEEK,
+    "low": HOURS_PER_WEEK,
+}
+
+# Hours assumed when a schedule row leaves a time unset, as in
+# AIAnalyticsService.get_optimal_scheduling_windows.
+DEFAULT_OPEN_HOUR = 8
+DEFAULT_CLOSE_HOUR = 22
+DEFAULT_PEAK_START_HOUR = 12
+DEFAULT_PEAK_END_HOUR = 14
+
+# Success multipliers for the site's state during a slot.
+CLOSED_FACTOR = 0.3
+MAINTENANCE_FACTOR = 0.5
+
+OPEN_LOAD = 0.5
+PEAK_LOAD = 1.0
+
+
+def _hours(start: int, end: int) -> np.ndarray:
+    """Return a 24-hour mask for ``[start, end)``, wrapping past midnight."""
+    hours = np.arange(HOURS_PER_DAY)
+    if start == end:
+        return np.zeros(HOURS_PER_DAY, dtype=bool)
+    if start < end:
+        return (hours >= start) & (hours < end)
+    return (hours >= start) | (hours < end)
+
+
+def smooth_success(
+    successes: np.ndarray,
+    totals: np.ndarray,
+    prior_success: float = DEFAULT_PRIOR_SUCCESS,
+    prior_strength: float = DEFAULT_PRIOR_STRENGTH,
+) -> np.ndarray:
+    """Return posterior success rates for 7x24 success/total counts.
+
+    Each level is the Beta posterior mean with ``prior_strength`` pseudo-jobs
+    at the rate of the level above: site overall, then hour of day, then hour
+    of week.
+    """
+    k = max(0.0, prior_strength)
+
+    def posterior(s: np.ndarray, n: np.ndarray, prior: Any) -> np.ndarray:
+        prior = np.broadcast_to(prior, np.shape(n))
+        rate: np.ndarray = np.divide(
+            s + k * prior,
+            n + k,
+            out=np.array(prior, dtype=float),
+            where=(n + k) > 0,
+        )
+        return rate
+
+    overall = posterior(successes.sum(), totals.sum(), prior_success)
+    by_hour = posterior(successes.sum(axis=0), totals.sum(axis=0), overall)
+    return posterior(successes, totals, by_hour[np.newaxis, :])
+
+
+@dataclass
+class SiteScheduleModel:
+    """Hour-of-week success, load and opening arrays for one site."""
+
+    site_id: str
+    success: np.ndarray
+    samples: np.ndarray
+    open_mask: np.ndarray
+    peak_mask: np.ndarray
+    load: np.ndarray
+    schedule_factor: np.ndarray
+    scheduled_days: np.ndarray
+    maintenance_days: np.ndarray
+    load_weight: float = DEFAULT_LOAD_WEIGHT
+    generated_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def has_schedule(self) -> bool:
+        """Return whether any day has an operating schedule."""
+        return bool(self.scheduled_days.any())
+
+    @property
+    def total_samples(self) -> int:
+        """Return the number of job outcomes the model was built from."""
+        return int(self.samples.sum())
+
+    @property
+    def probability(self) -> np.ndarray:
+        """Return the 7x24 success probability of a job started in each slot."""
+        probability: np.ndarray = (0.7 + 0.3 * self.success) * self.schedule_factor
+        return probability
+
+    @property
+    def score(self) -> np.ndarray:
+        """Return the 7x24 ranking score: probability discounted by load."""
+        return self.probability * (1.0 - self.load_weight * self.load)
+
+    def day_status(self, day_of_week: int) -> Dict[str, Any]:
+        """Describe one weekday's schedule, as reported in ``site_status``."""
+        status = {
+            "day": DAY_NAMES[day_of_week],
+            "day_of_week": day_of_week,
+        }
+        if not self.scheduled_days[day_of_week]:
+            return {**status, "status": "unscheduled"}
+        open_hours = np.flatnonzero(self.open_mask[day_of_week])
+        if not len(open_hours):
+            return {**status, "status": "closed"}
+        peak_hours = np.flatnonzero(self.peak_mask[day_of_week])
+        return {
+            **status,
+            "status": "open",
+            "open_hours": [int(h) for h in open_hours],
+            "peak_hours": [int(h) for h in peak_hours],
+            "is_maintenance_window": bool(self.maintenance_days[day_of_week]),
+        }
+
+    def slot_times(self, start: datetime, horizon_hours: int) -> List[datetime]:
+        """Return ``start`` followed by each whole hour up to ``horizon_hours``."""
+        base = start.replace(minute=0, second=0, microsecond=0)
+        return [start] + [
+            base + timedelta(hours=k) for k in range(1, horizon_hours + 1)
+        ]
+
+    def slot_indices(self, start: datetime, horizon_hours: int) -> np.ndarray:
+        """Return flat hour-of-week indices matching :meth:`slot_times`."""
+        first = start.weekday() * HOURS_PER_DAY + start.hour
+        return (first + np.arange(horizon_hours + 1)) % HOURS_PER_WEEK
+
+    def best_slots(
+        self,
+        start: datetime,
+        horizon_hours: int,
+        count: int = 3,
+        spacing_hours: int = DEFAULT_ALTERNATIVE_SPACING_HOURS,
+        open_only: bool = True,
+    ) -> List[Tuple[datetime, float, float]]:
+        """Return up to ``count`` best slots from ``start`` within the horizon.
+
+        Slots are ranked by :attr:`score` (earlier first on ties) and kept at
+        least ``spacing_hours`` apart. With ``open_only`` only open hours are
+        considered.
+
+        Returns:
+            list: ``(time, probability, score)`` tuples, best first.
+        """
+        index = self.slot_indices(start, horizon_hours)
+        scores = self.score.ravel()[index]
+        candidates = np.arange(len(index))
+        if open_only:
+            candidates = candidates[self.open_mask.ravel()[index]]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        times = self.slot_times(start, horizon_hours)
+        probability = self.probability.ravel()
+        chosen: List[int] = []
+        for k in order:
+            if all(abs(int(k) - c) >= spacing_hours for c in chosen):
+                chosen.append(int(k))
+                if len(chosen) >= count:
+                    break
+        return [
+            (times[k], float(probability[index[k]]), float(scores[k])) for k in chosen
+        ]
+
+    def first_open_slot(
+        self, start: datetime, horizon_hours: int
+    ) -> Optional[Tuple[datetime, float, float]]:
+        """Return the earliest open slot from ``start``, if any."""
+        index = self.slot_indices(start, horizon_hours)
+        open_now = np.flatnonzero(self.open_mask.ravel()[index])
+        if not len(open_now):
+            return None
+        k = int(open_now[0])
+        return (
+            self.slot_times(start, horizon_hours)[k],
+            float(self.probability.ravel()[index[k]]),
+            float(self.score.ravel()[index[k]]),
+        )
+
+
+class ScheduleModelStore:
+    """Build and cache a :class:`SiteScheduleModel` per site."""
+
+    def __init__(
+        self,
+        refresh_seconds: Optional[float] = None,
+        history_days: Optional[int] = None,
+        prior_success: Optional[float] = None,
+        prior_strength: Optional[float] = None,
+        load_weight: Optional[float] = None,
+        alternatives: Optional[int] = None,
+        alternative_spacing_hours: Optional[int] = None,
+        cache_max_entries: Optional[int] = None,
+    ) -> None:
+        """Initialize the store, reading unset values from ai/config.yaml."""
+        section = load_ai_config().get("job_scheduling", {}) or {}
+
+        def setting(value: Any, key: str, default: Any) -> Any:
+            return value if value is not None else section.get(key, default)
+
+        self.refresh_seconds = float(
+            setting(refresh_seconds, "refresh_seconds", DEFAULT_REFRESH_SECONDS)
+        )
+        self.history_days = int(
+            setting(history_days, "history_days", DEFAULT_HISTORY_DAYS)
+        )
+        self.prior_success = float(
+            setting(prior_success, "prior_success", DEFAULT_PRIOR_SUCCESS)
+        )
+        self.prior_strength = float(
+            setting(prior_strength, "prior_strength", DEFAULT_PRIOR_STRENGTH)
+        )
+        self.load_weight = float(
+            setting(load_weight, "load_weight", DEFAULT_LOAD_WEIGHT)
+        )
+        self.alternatives = int(
+            setting(alternatives, "alternatives", DEFAULT_ALTERNATIVES)
+        )
+        self.alternative_spacing_hours = int(
+            setting(
+                alternative_spacing_hours,
+                "alternative_spacing_hours",
+                DEFAULT_ALTERNATIVE_SPACING_HOURS,
+            )
+        )
+        self.horizon_hours = {
+            **DEFAULT_HORIZON_HOURS,
+            **(section.get("horizon_hours") or {}),
+        }
+        self.cache_max_entries = int(
+            setting(cache_max_entries, "cache_max_entries", DEFAULT_CACHE_MAX_ENTRIES)
+        )
+        self.builds = 0
+        self._cache: "OrderedDict[str, Tuple[float, SiteScheduleModel]]" = OrderedDict()
+
+    def invalidate(self, site_id: Optional[str] = None) -> None:
+        """Drop the cached model of one site, or of every site."""
+        if site_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(site_id, None)
+
+    def peek(self, site_id: str) -> Optional[SiteScheduleModel]:
+        """Return the site's cached model if it is still fresh."""
+        cached = self._cache.get(site_id)
+        if cached is None or time.monotonic() - cached[0] >= self.refresh_seconds:
+            return None
+        self._cache.move_to_end(site_id)
+        return cached[1]
+
+    async def get(self, session: AsyncSession, site_id: str) -> SiteScheduleModel:
+        """Return the site's model, rebuilding it once ``refresh_seconds`` pass."""
+        cached = self.peek(site_id)
+        if cached is not None:
+            return cached
+
+        now = time.monotonic()
+
+        started = time.perf_counter()
+        model = await self.build(session, site_id)
+        logger.debug(
+            f"Schedule model for site {site_id}: {model.total_samples} outcomes "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        if self.refresh_seconds > 0:
+            self._cache[site_id] = (now, model)
+            self._cache.move_to_end(site_id)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+        return model
+
+    async def build(self, session: AsyncSession, site_id: str) -> SiteScheduleModel:
+        """Build a site's model from its schedule and job outcome history."""
+        self.builds += 1
+        shape = (DAYS_PER_WEEK, HOURS_PER_DAY)
+        open_mask = np.zeros(shape, dtype=bool)
+        peak_mask = np.zeros(shape, dtype=bool)
+        volume = np.ones(DAYS_PER_WEEK)
+        scheduled = np.zeros(DAYS_PER_WEEK, dtype=bool)
+        maintenance = np.zeros(DAYS_PER_WEEK, dtype=bool)
+
+        schedules = (
+            (
+                await session.execute(
+                    select(SiteOperatingSchedule)
+                    .join(Site, Site.id == SiteOperatingSchedule.site_id)
+                    .where(Site.site_id == site_id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        volumes: Dict[int, float] = {}
+        for row in schedules:
+            day = int(row.day_of_week)
+            if not 0 <= day < DAYS_PER_WEEK:
+                continue
+            scheduled[day] = True
+            if row.is_closed:
+                continue
+            open_hour = row.open_time.hour if row.open_time else DEFAULT_OPEN_HOUR
+            close_hour = row.close_time.hour if row.close_time else DEFAULT_CLOSE_HOUR
+            peak_start = (
+                row.peak_hours_start.hour
+                if row.peak_hours_start
+                else DEFAULT_PEAK_START_HOUR
+            )
+            peak_end = (
+                row.peak_hours_end.hour if row.peak_hours_end else DEFAULT_PEAK_END_HOUR
+            )
+            open_mask[day] = _hours(open_hour, close_hour)
+            peak_mask[day] = _hours(peak_start, peak_end) & open_mask[day]
+            maintenance[day] = bool(row.is_maintenance_window)
+            if row.expected_transaction_volume:
+                volumes[day] = float(row.expected_transaction_volume)
+        if volumes:
+            busiest = max(volumes.values())
+            for day, value in volumes.items():
+                volume[day] = value / busiest
+
+        load = np.where(peak_mask, PEAK_LOAD, np.where(open_mask, OPEN_LOAD, 0.0))
+        load *= volume[:, np.newaxis]
+
+        schedule_factor = np.ones(shape)
+        schedule_factor[maintenance] = MAINTENANCE_FACTOR
+        schedule_factor[scheduled[:, np.newaxis] & ~open_mask] = CLOSED_FACTOR
+
+        # extract("dow") is 0 = Sunday on SQLite and PostgreSQL alike.
+        dow = func.extract("dow", JobOutcome.timestamp)
+        hour = func.extract("hour", JobOutcome.timestamp)
+        cutoff = datetime.utcnow() - timedelta(days=self.history_days)
+        rows = await session.execute(
+            select(
+                dow,
+                hour,
+                func.count(),
+                func.sum(case((JobOutcome.status == "completed", 1), else_=0)),
+            )
+            .where(JobOutcome.timestamp >= cutoff, _job_outcome_site_filter(site_id))
+            .group_by(dow, hour)
+        )
+        totals = np.zeros(shape)
+        successes = np.zeros(shape)
+        for day, hour_of_day, total, success in rows.all():
+            slot = ((int(day) + 6) % DAYS_PER_WEEK, int(hour_of_day))
+            totals[slot] = int(total)
+            successes[slot] = int(success or 0)
+
+        return SiteScheduleModel(
+            site_id=site_id,
+            success=smooth_success(
+                successes, totals, self.prior_success, self.prior_strength
+            ),
+            samples=totals.astype(int),
+            open_mask=open_mask,
+            peak_mask=peak_mask,
+            load=load,
+            schedule_factor=schedule_factor,
+            scheduled_days=scheduled,
+            maintenance_days=maintenance,
+            load_weight=self.load_weight,
+        )
+
+
+_schedule_model_store: Optional[ScheduleModelStore] = None
+
+
+def get_schedule_model_store() -> ScheduleModelStore:
+    """Return the process-wide store, so models are shared by requests."""
+    global _schedule_model_store
+    if _schedule_model_store is None:
+        _schedule_model_store = ScheduleModelStore()
+    return _schedule_model_store
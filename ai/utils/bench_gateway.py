@@ -0,0 +1,137 @@
+"""Benchmark the LLM gateway against a (fake) Ollama server.
+
+Fires a burst of concurrent requests -- with repeated prompts, as happens when
+several operators ask about the same device -- and reports, for the old direct
+call and for :class:`ai.llm_gateway.LLMGateway`:
+
+  wall       total time for the burst
+  p50 / p95  per-request latency
+  loop lag   worst delay seen by a 10 ms ticker on the same event loop; this is
+             how long every other request on the server would have stalled
+  backend    generations the Ollama server actually ran
+
+By default an in-process ``ai/utils/fake_ollama.py`` server is started, so no
+GPU is needed. Pass ``--url`` to target a running server instead.
+
+Run from repo root: python ai/utils/bench_gateway.py [--requests 16] [--distinct 4]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from ai.llm import LLMService  # noqa: E402
+from ai.llm_gateway import LLMGateway  # noqa: E402
+from ai.utils.fake_ollama import FakeOllamaSettings, create_app  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def start_fake_ollama(settings: FakeOllamaSettings) -> tuple[str, Any]:
+    """Serve the fake Ollama app on a background thread; return (url, app)."""
+    import uvicorn
+
+    app = create_app(settings)
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", app
+
+
+async def run_burst(
+    call: Callable[[str], Awaitable[str]], prompts: List[str]
+) -> Dict[str, float]:
+    """Run ``prompts`` concurrently through ``call`` while sampling loop lag."""
+    lag = 0.0
+    stop = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal lag
+        while not stop.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - before - 0.01)
+
+    async def timed(prompt: str) -> float:
+        started = time.perf_counter()
+        await call(prompt)
+        return time.perf_counter() - started
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(timed(p) for p in prompts)))
+    wall = time.perf_counter() - started
+    stop.set()
+    await tick
+    return {
+        "wall_s": wall,
+        "p50_s": latencies[len(latencies) // 2],
+        "p95_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "loop_lag_ms": lag * 1000,
+    }
+
+
+def main() -> None:
+    """Compare direct LLM calls with the gateway."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Ollama server (default: in-process fake)")
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=4, help="distinct prompts")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    args = parser.parse_args()
+
+    app = None
+    url = args.url
+    if url is None:
+        url, app = start_fake_ollama(
+            FakeOllamaSettings(
+                ttft_ms=args.ttft_ms,
+                tokens=args.tokens,
+                tokens_per_second=args.tokens_per_second,
+                parallel=args.workers,
+            )
+        )
+
+    service = LLMService(base_url=url)
+    prompts = [f"Status of pos-{i % args.distinct:03d}?" for i in range(args.requests)]
+
+    async def direct(prompt: str) -> str:
+        # The pre-gateway behaviour: a blocking call on the event loop.
+        return service.generate_response(prompt)
+
+    gateway = LLMGateway(lambda: service, workers=args.workers, max_queue=args.requests)
+
+    print(f"{args.requests} requests, {args.distinct} distinct prompts, url {url}")
+    for name, call in (("direct", direct), ("gateway", gateway.generate)):
+        before = app.state.generations if app is not None else 0
+        r = asyncio.run(run_burst(call, prompts))
+        ran = (app.state.generations - before) if app is not None else "n/a"
+        print(
+            f"  {name:8s} | wall {r['wall_s']:6.2f} s | p50 {r['p50_s']:6.2f} s | "
+            f"p95 {r['p95_s']:6.2f} s | loop lag {r['loop_lag_ms']:8.1f} ms | "
+            f"backend {ran}"
+        )
+    print(f"  gateway stats: {gateway.stats()}")
+    gateway.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Local stand-in for the Ollama HTTP API, for benchmarks and tests.
+
+Serves the subset of the API that ``ai/llm.py`` uses (``/api/chat``,
+streaming and not, plus ``/api/tags`` for health checks) with synthetic,
+deterministic output and configurable timing:
+
+  --ttft-ms            delay before the first token (prompt ingestion)
+  --tokens-per-second  decode speed once generation starts
+  --tokens             tokens per response
+  --parallel           generations served at once (like OLLAMA_NUM_PARALLEL);
+                       further requests wait, as they do on a real server
+
+The same prompt always yields the same text, so response caching is visible.
+
+Run from repo root: python ai/utils/fake_ollama.py --port 11435
+then point ``llm.base_url`` in ai/config.yaml (or ``bench_gateway.py --url``)
+at it.
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hashlib
+import json
+import time
+from typing import Any, AsyncIterator, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+WORDS = (
+    "device cpu memory latency heartbeat site alert restart network check "
+    "telemetry stable degraded recommend monitor disk error rate operator"
+).split()
+
+
+@dataclass
+class FakeOllamaSettings:
+    """Timing profile of the simulated model."""
+
+    model: str = "llama3.2"
+    ttft_ms: float = 300.0
+    tokens_per_second: float = 20.0
+    tokens: int = 40
+    parallel: int = 1
+
+
+def fake_tokens(prompt: str, count: int) -> list[str]:
+    """Return ``count`` deterministic words derived from ``prompt``."""
+    digest = hashlib.sha256(prompt.encode()).digest()
+    return [WORDS[digest[i % len(digest)] % len(WORDS)] + " " for i in range(count)]
+
+
+def create_app(settings: FakeOllamaSettings | None = None) -> FastAPI:
+    """Build the fake Ollama application."""
+    settings = settings or FakeOllamaSettings()
+    app = FastAPI(title="Fake Ollama")
+    slots = asyncio.Semaphore(max(1, settings.parallel))
+
+    def chunk(content: str, done: bool, **extra: Any) -> Dict[str, Any]:
+        return {
+            "model": settings.model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+            **extra,
+        }
+
+    async def generate(prompt: str) -> AsyncIterator[str]:
+        async with slots:
+            started = time.perf_counter_ns()
+            await asyncio.sleep(settings.ttft_ms / 1000)
+            tokens = fake_tokens(prompt, settings.tokens)
+            for token in tokens:
+                await asyncio.sleep(1 / settings.tokens_per_second)
+                yield token
+            yield ""  # end-of-generation marker
+            app.state.generations += 1
+            app.state.last_duration_ns = time.perf_counter_ns() - started
+
+    @app.get("/api/tags")
+    async def tags() -> Dict[str, Any]:
+        return {"models": [{"name": settings.model, "model": settings.model}]}
+
+    @app.post("/api/chat", response_model=None)
+    async def chat(request: Request) -> Any:
+        body = await request.json()
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        done_extra = {"done_reason": "stop", "eval_count": settings.tokens}
+
+        if body.get("stream", True):
+
+            async def lines() -> AsyncIterator[str]:
+                async for token in generate(prompt):
+                    if token:
+                        yield json.dumps(chunk(token, False)) + "\n"
+                yield json.dumps(chunk("", True, **done_extra)) + "\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+        text = "".join([token async for token in generate(prompt)])
+        return chunk(text.strip(), True, **done_extra)
+
+    app.state.generations = 0
+    app.state.last_duration_ns = 0
+    return app
+
+
+def main() -> None:
+    """Serve the fake Ollama API."""
+    import uvicorn
+
+    defaults = FakeOllamaSettings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", default=defaults.model)
+    parser.add_argument("--ttft-ms", type=float, default=defaults.ttft_ms)
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=defaults.tokens_per_second
+    )
+    parser.add_argument("--tokens", type=int, default=defaults.tokens)
+    parser.add_argument("--parallel", type=int, default=defaults.parallel)
+    args = parser.parse_args()
+
+    settings = FakeOllamaSettings(
+        model=args.model,
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        tokens=args.tokens,
+        parallel=args.parallel,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
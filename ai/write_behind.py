@@ -0,0 +1,101 @@
+"""Write-behind queue shared by the AI stores.
+
+Callers ``put`` items on the request path; a background task hands them to a
+``write_batch`` callback a batch at a time, whenever a batch fills or
+``flush_interval`` elapses, in a worker thread so the blocking write never
+runs on the event loop. Outside an event loop (scripts, sync tests) items are
+written immediately. Call :meth:`WriteBehindQueue.drain` on shutdown to
+write what is left.
+"""
+
+import asyncio
+from collections import deque
+import threading
+from typing import Callable, Deque, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class WriteBehindQueue(Generic[T]):
+    """Queue of items written in batches off the caller's path."""
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[T]], int],
+        batch_size: int,
+        flush_interval: float,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        """Initialize the queue.
+
+        Args:
+            write_batch: Writes one batch (blocking) and returns how many of
+                its items were stored.
+            batch_size: Most items passed to one ``write_batch`` call.
+            flush_interval: Longest time, in seconds, a queued item waits.
+            max_pending: Items held before the oldest are dropped (unbounded
+                when None).
+        """
+        self.write_batch = write_batch
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.pending: Deque[T] = deque(maxlen=max_pending)
+        self.dropped = 0
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of items not yet written."""
+        return len(self.pending)
+
+    def put(self, item: T) -> None:
+        """Queue ``item`` and make sure it will be written."""
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+        self.pending.append(item)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to write behind on: write synchronously.
+            self.flush()
+            return
+
+        if self._task is None or self._task.done():
+            self._batch_ready = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        elif len(self.pending) >= self.batch_size and self._batch_ready:
+            self._batch_ready.set()
+
+    async def _run(self) -> None:
+        """Flush the queue whenever a batch fills or the interval elapses."""
+        while self.pending:
+            if len(self.pending) < self.batch_size and self._batch_ready:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._batch_ready.wait(), self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            await asyncio.to_thread(self.flush)
+
+    def flush(self) -> int:
+        """Write all queued items now; return the number stored."""
+        written = 0
+        with self._lock:
+            while self.pending:
+                batch = [
+                    self.pending.popleft()
+                    for _ in range(min(self.batch_size, len(self.pending)))
+                ]
+                written += self.write_batch(batch)
+        return written
+
+    async def drain(self) -> None:
+        """Wait for the background writer and write anything still queued."""
+        if self._task is not None and not self._task.done():
+            if self._batch_ready:
+                self._batch_ready.set()
+            await self._task
+        await asyncio.to_thread(self.flush)
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from homepot.agent.utils.device_dna import collect_device_dna
 from homepot.app.auth_utils import API_KEY_HEADER_NAME, authenticate_device_credentials
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_db
 from homepot.models import Site
 
@@ -27,7 +28,10 @@ class DeviceRegister(BaseModel):
     api_key: str
 
 
-@router.post("/register")
+@router.post(
+    "/register",
+    dependencies=[Depends(rate_limit("registration", per_device=False))],
+)
 async def register_and_collect_device_dna(
     payload: DeviceRegister, db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -42,6 +42,7 @@ from homepot.agent.utils.log_setup import (
 )
 from homepot.agent.utils.proxy_settings import build_httpx_proxy_kwargs
 from homepot.agent.utils.push_listener import create_push_listener
+from homepot.agent.utils.rate_limit_backoff import rate_limit_backoff
 from homepot.agent.utils.real_device_discovery import get_connected_peripherals
 from homepot.agent.utils.retry_queue import RetryQueue
 from homepot.agent.utils.submission_log import SubmissionLog
@@ -102,6 +103,7 @@ def load_agent_config() -> Dict[str, Any]:
     data.setdefault("telemetry_interval_seconds", 30)
     data.setdefault("retry_flush_interval_seconds", 60)
     data.setdefault("command_poll_interval_seconds", 60)
+    data.setdefault("command_long_poll_seconds", 25)
     data.setdefault("ipc_enabled", True)
     data.setdefault("ipc_host", "127.0.0.1")
     data.setdefault("ipc_port", 8765)
@@ -141,13 +143,21 @@ async def post_json(
     When ``submission_log`` is provided, the attempt (endpoint, payload
     sample timestamp, HTTP status, and acceptance) is appended to the
     agent submission log so PF-01 ingestion success can be computed.
+
+    While the backend's ``Retry-After`` backoff is in effect nothing is sent
+    and False is returned, so callers queue the payload for later.
     """
+    if rate_limit_backoff.remaining():
+        logger.debug("POST deferred by rate limit backoff url=%s", url)
+        return False
+
     accepted = False
     status_code: Optional[int] = None
     try:
         response = await client.post(
             url, json=payload, headers=headers, timeout=timeout
         )
+        rate_limit_backoff.observe(response)
         response.raise_for_status()
         accepted = True
         status_code = response.status_code
@@ -173,10 +183,16 @@ async def get_json(
     client: httpx.AsyncClient,
     url: str,
     headers: Dict[str, str],
+    *,
+    timeout: float = 10.0,
 ) -> Any:
     """Send GET request to backend and return parsed JSON on success, or ``None``."""
+    if rate_limit_backoff.remaining():
+        logger.debug("GET deferred by rate limit backoff url=%s", url)
+        return None
     try:
-        response = await client.get(url, headers=headers, timeout=10.0)
+        response = await client.get(url, headers=headers, timeout=timeout)
+        rate_limit_backoff.observe(response)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -184,6 +200,39 @@ async def get_json(
         return None
 
 
+async def long_poll_pending_commands(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Dict[str, str],
+    wait_seconds: int,
+) -> tuple[Any, bool]:
+    """Long-poll ``GET /api/v1/devices/pending/wait`` for queued commands.
+
+    The backend holds the request for up to ``wait_seconds`` until a command
+    is queued, and claims the commands it returns (see ``pending_commands_loop``).
+    Returns ``(data, supported)``: ``data`` is the parsed JSON or
+    ``None`` on failure, and ``supported`` is ``False`` when the backend has
+    no long-poll endpoint (HTTP 404) so the caller can fall back to polling.
+    """
+    if rate_limit_backoff.remaining():
+        return (None, True)
+    try:
+        response = await client.get(
+            f"{url}/wait",
+            params={"timeout": wait_seconds, "claim": "true"},
+            headers=headers,
+            timeout=wait_seconds + 10.0,
+        )
+        rate_limit_backoff.observe(response)
+        if response.status_code == 404:
+            return (None, False)
+        response.raise_for_status()
+        return (response.json(), True)
+    except Exception as e:
+        logger.warning("Long-poll failed url=%s error=%s", url, e)
+        return (None, True)
+
+
 async def update_command_status(
     client: httpx.AsyncClient,
     config: Dict[str, Any],
@@ -216,10 +265,13 @@ async def ack_command_backend(
         f"{config['backend_url'].rstrip('/')}/api/v1/devices/"
         f"{device_id}/commands/{command_id}/ack"
     )
+    if rate_limit_backoff.remaining():
+        return False
     try:
         response = await client.post(
             url, headers=get_auth_headers(config), timeout=10.0
         )
+        rate_limit_backoff.observe(response)
         response.raise_for_status()
         return True
     except Exception as e:
@@ -269,11 +321,18 @@ async def pending_commands_loop(
     ipc_server: Server | None,
     wake_event: asyncio.Event,
 ) -> None:
-    """Poll for pending commands, ACK them, and route to IPC or process locally.
-
-    Polls ``GET /api/v1/devices/pending`` at a fixed interval.  Each command
-    is acknowledged first (``POST …/ack``), then either exposed via IPC for
-    the real device to execute or processed locally by the agent.
+    """Fetch pending commands, ACK them, and route to IPC or process locally.
+
+    When ``command_long_poll_seconds`` is positive the agent holds a long-poll
+    request on ``GET /api/v1/devices/pending/wait`` so queued commands are
+    delivered immediately; otherwise (or when the backend has no long-poll
+    endpoint) it polls ``GET /api/v1/devices/pending`` every
+    ``command_poll_interval_seconds``, waking early on push notifications.
+    Commands are fetched with ``claim=true``, which marks them SENT as they
+    are returned; commands still PENDING (from a backend without claiming)
+    are acknowledged first (``POST …/ack``). Each command is then either
+    exposed via IPC for the real device to execute or processed locally by
+    the agent.
 
     Before processing privileged commands the agent fetches current
     ``device_permissions`` from the backend and refuses commands that
@@ -281,22 +340,41 @@ async def pending_commands_loop(
     """
     url = f"{config['backend_url'].rstrip('/')}/api/v1/devices/pending"
     interval = int(config["command_poll_interval_seconds"])
+    long_poll_seconds = int(config.get("command_long_poll_seconds", 0))
     device_id = str(config["device_id"])
     ipc_available = ipc_server is not None
     cached_permissions: Optional[Dict[str, bool]] = None
     while True:
+        held = False
         try:
-            # Refresh permission cache on each poll cycle
             headers = get_auth_headers(config)
-            fresh_perms = await fetch_device_permissions(client, config, headers)
-            if fresh_perms is not None:
-                cached_permissions = fresh_perms
-
-            data = await get_json(client, url, headers)
+            if long_poll_seconds > 0:
+                data, supported = await long_poll_pending_commands(
+                    client, url, headers, long_poll_seconds
+                )
+                if not supported:
+                    logger.info(
+                        "Backend has no long-poll endpoint; "
+                        "falling back to interval polling"
+                    )
+                    long_poll_seconds = 0
+                    data = await get_json(client, f"{url}?claim=true", headers)
+                held = data is not None and long_poll_seconds > 0
+            else:
+                data = await get_json(client, f"{url}?claim=true", headers)
             commands = parse_pending_commands(data)
+
+            # Refresh the permission cache only when there is work to gate,
+            # so idle cycles cost a single request.
+            if commands:
+                fresh_perms = await fetch_device_permissions(client, config, headers)
+                if fresh_perms is not None:
+                    cached_permissions = fresh_perms
+
             for command in commands:
                 cid = command.get("command_id", "")
                 if command.get("command_type") == "request_permission":
+                    held = False
                     continue
                 # 1. Permission gate before ACK
                 from homepot.agent.utils.command_poller import _check_permission
@@ -335,9 +413,13 @@ async def pending_commands_loop(
                         )
                     continue
 
-                # 2. Ack to backend
-                acked = await ack_command_backend(client, config, device_id, cid)
+                # 2. Ack to backend, unless the fetch already claimed it
+                claimed = command.get("status") == "sent"
+                acked = claimed or await ack_command_backend(
+                    client, config, device_id, cid
+                )
                 if not acked:
+                    held = False
                     retry_queue.enqueue(
                         {
                             "url": (
@@ -393,8 +475,17 @@ async def pending_commands_loop(
                         )
         except Exception as e:
             logger.error("Pending commands loop error: %s", e, exc_info=True)
+        if held:
+            # The backend paced this cycle and nothing was left pending, so
+            # re-arm the long-poll immediately. Commands left pending (not
+            # ACKed) would return straight away, so those cycles fall through
+            # to the interval wait instead of spinning.
+            continue
+        try:
+            await asyncio.wait_for(wake_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
         wake_event.clear()
-        await asyncio.sleep(interval)
 
 
 async def command_result_loop(
@@ -667,11 +758,15 @@ async def retry_flush_loop(
 
     Uses :meth:`~RetryQueue.dequeue_ready` so that each item respects
     exponential backoff.  Items that still fail are re-enqueued with an
-    incremented retry count via :meth:`~RetryQueue.requeue`.
+    incremented retry count via :meth:`~RetryQueue.requeue`.  Nothing is
+    flushed while the backend's rate limit backoff is in effect.
     """
     interval = int(config["retry_flush_interval_seconds"])
     while True:
         try:
+            if rate_limit_backoff.remaining():
+                await asyncio.sleep(interval)
+                continue
             queued_items = retry_queue.dequeue_ready()
             for item in queued_items:
                 ok = await post_json(
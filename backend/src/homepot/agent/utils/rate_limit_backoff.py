@@ -0,0 +1,64 @@
+"""Pause backend calls while the backend reports this agent as rate limited.
+
+Agent endpoints answer over-budget requests with HTTP 429 and a
+``Retry-After`` header. Retrying sooner only spends the next token as well,
+so the agent stops calling the backend until the hint has passed; payloads
+that could not be sent meanwhile go to the retry queue as usual.
+"""
+
+from email.utils import parsedate_to_datetime
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_RETRY_AFTER = 60.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds of a ``Retry-After`` header, if valid.
+
+    Accepts both forms of the header: delay-seconds and an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RateLimitBackoff:
+    """Deadline before which the agent should not call the backend."""
+
+    def __init__(self) -> None:
+        """Initialize with no backoff in effect."""
+        self._until = 0.0
+
+    def observe(self, response: httpx.Response) -> None:
+        """Start backing off if ``response`` is a 429."""
+        if response.status_code != 429:
+            return
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = _DEFAULT_RETRY_AFTER
+        self._until = max(self._until, time.monotonic() + delay)
+        logger.warning("Rate limited by backend; backing off for %.0fs", delay)
+
+    def remaining(self) -> float:
+        """Return the seconds left before the backend may be called again."""
+        return max(0.0, self._until - time.monotonic())
+
+    def reset(self) -> None:
+        """Lift any backoff in effect."""
+        self._until = 0.0
+
+
+rate_limit_backoff = RateLimitBackoff()
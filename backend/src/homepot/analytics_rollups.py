@@ -0,0 +1,640 @@
+"""Incrementally maintained rollups of the request, error and job logs.
+
+The metrics routes (``/metrics/api-performance``, ``/metrics/error-trends``
+and ``/metrics/job-outcomes``) used to aggregate raw log rows when called,
+so every dashboard refresh rescanned a window of ``api_request_logs``, which
+holds every request served, and got slower as traffic grew. Log rows are now
+counted into rollup tables as they are written: an ``after_flush`` hook (as
+for ``audit_event_hourly_counts``) upserts the counts on the flushing
+session's connection, so they commit or roll back with the log rows,
+whichever sink wrote them. The routes read a number of rollup rows that
+depends on the window and the number of endpoints, not on traffic.
+
+API requests are bucketed per minute and per hour, per endpoint, method and
+latency bin. The bins form a log-scale histogram whose bins are each
+``GROWTH`` times wider than the previous one, so the histograms of any set
+of buckets merge by adding counts, and percentiles of the merged histogram
+are accurate to within one bin (10%). Errors and job outcomes are bucketed
+per hour.
+
+A window of ``hours`` reads its whole hours from the hourly rollups and its
+leading partial hour from the per-minute request rollup, or from the raw
+rows for errors and jobs (which are few and indexed by time).
+"""
+
+from datetime import datetime, timedelta, timezone
+import logging
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from homepot.app.models.AnalyticsModel import (
+    APIRequestHourly,
+    APIRequestLog,
+    APIRequestMinutely,
+    ErrorLog,
+    ErrorLogHourly,
+    JobOutcome,
+    JobOutcomeHourly,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bin i holds latencies in (GROWTH ** (i - 1), GROWTH ** i] ms; bin 0 is <= 1ms
+GROWTH = 1.1
+MAX_LATENCY_BIN = math.ceil(math.log(600_000) / math.log(GROWTH))  # 10 minutes
+
+_REQUEST_MEASURES = {
+    "request_count": "sum",
+    "error_count": "sum",
+    "total_response_time_ms": "sum",
+    "min_response_time_ms": "min",
+    "max_response_time_ms": "max",
+}
+_ERROR_MEASURES = {"count": "sum"}
+_JOB_MEASURES = {"count": "sum", "timed_count": "sum", "total_duration_ms": "sum"}
+
+# Raw log columns the rollup rows are aggregated from
+_REQUEST_COLUMNS = (
+    APIRequestLog.timestamp,
+    APIRequestLog.endpoint,
+    APIRequestLog.method,
+    APIRequestLog.status_code,
+    APIRequestLog.response_time_ms,
+)
+_JOB_COLUMNS = (
+    JobOutcome.timestamp,
+    JobOutcome.job_type,
+    JobOutcome.status,
+    JobOutcome.duration_ms,
+)
+
+
+def latency_bin(response_time_ms: Optional[float]) -> int:
+    """Return the histogram bin of a response time."""
+    if response_time_ms is None or response_time_ms <= 1:
+        return 0
+    bin_ = math.ceil(math.log(response_time_ms) / math.log(GROWTH))
+    return min(MAX_LATENCY_BIN, bin_)
+
+
+def percentiles(
+    bins: Dict[int, int],
+    quantiles: Sequence[float] = (0.5, 0.95, 0.99),
+    lowest: Optional[float] = None,
+    highest: Optional[float] = None,
+) -> Dict[float, Optional[float]]:
+    """Estimate latency percentiles from a merged histogram.
+
+    Each estimate is the upper bound of the bin holding that rank, clamped
+    to the observed ``lowest`` and ``highest`` latency when known.
+
+    Returns:
+        Estimated milliseconds per quantile; None if ``bins`` is empty.
+    """
+    total = sum(bins.values())
+    if not total:
+        return {q: None for q in quantiles}
+    ordered = sorted(bins.items())
+    estimates: Dict[float, Optional[float]] = {}
+    for q in quantiles:
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for bin_, count in ordered:
+            seen += count
+            if seen >= rank:
+                break
+        estimate = GROWTH**bin_ if bin_ else 1.0
+        if highest is not None:
+            estimate = min(estimate, highest)
+        if lowest is not None:
+            estimate = max(estimate, lowest)
+        estimates[q] = estimate
+    return estimates
+
+
+def _merged(current: Any, new: Any, how: str) -> Any:
+    """Return the expression combining a stored rollup value with a new one."""
+    if how == "sum":
+        return current + new
+    better = new < current if how == "min" else new > current
+    return case((or_(current.is_(None), better), new), else_=current)
+
+
+def upsert_merge(
+    connection: Any,
+    table: Any,
+    keys: Sequence[str],
+    rows: List[Dict[str, Any]],
+    measures: Dict[str, str],
+) -> None:
+    """Insert ``rows`` into a rollup, merging them into rows with equal keys.
+
+    ``measures`` maps each value column to how it merges: ``"sum"``,
+    ``"min"`` or ``"max"``.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert: Any
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(rows)
+        connection.execute(
+            stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={
+                    column: _merged(table.c[column], stmt.excluded[column], how)
+                    for column, how in measures.items()
+                },
+            )
+        )
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(*[table.c[key] == row[key] for key in keys])
+            .values(
+                {
+                    column: _merged(table.c[column], row[column], how)
+                    for column, how in measures.items()
+                }
+            )
+        )
+        if not result.rowcount:
+            connection.execute(insert(table).values(row))
+
+
+def _naive_utc(value: Optional[datetime]) -> datetime:
+    """Return ``value`` (default now) as a naive UTC datetime."""
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _hour(value: datetime) -> datetime:
+    """Return the start of the hour containing ``value``."""
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _request_rows(
+    logs: Sequence[Any],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Aggregate request logs into per-minute and per-hour rollup rows."""
+    minutes: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    hours: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for log in logs:
+        timestamp = _naive_utc(log.timestamp)
+        ms = float(log.response_time_ms or 0.0)
+        bin_ = latency_bin(ms)
+        for buckets, column, start in (
+            (minutes, "minute_start", timestamp.replace(second=0, microsecond=0)),
+            (hours, "hour_start", _hour(timestamp)),
+        ):
+            key = (start, log.endpoint, log.method, bin_)
+            row = buckets.get(key)
+            if row is None:
+                row = buckets[key] = {
+                    column: start,
+                    "endpoint": log.endpoint,
+                    "method": log.method,
+                    "latency_bin": bin_,
+                    "request_count": 0,
+                    "error_count": 0,
+                    "total_response_time_ms": 0.0,
+                    "min_response_time_ms": ms,
+                    "max_response_time_ms": ms,
+                }
+            row["request_count"] += 1
+            row["error_count"] += 1 if (log.status_code or 0) >= 400 else 0
+            row["total_response_time_ms"] += ms
+            row["min_response_time_ms"] = min(row["min_response_time_ms"], ms)
+            row["max_response_time_ms"] = max(row["max_response_time_ms"], ms)
+    return list(minutes.values()), list(hours.values())
+
+
+def _error_rows(logs: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Aggregate error logs into hourly rollup rows."""
+    rows: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for log in logs:
+        hour = _hour(_naive_utc(log.timestamp))
+        key = (hour, log.category, log.severity)
+        row = rows.setdefault(
+            key,
+            {
+                "hour_start": hour,
+                "category": log.category,
+                "severity": log.severity,
+                "count": 0,
+            },
+        )
+        row["count"] += 1
+    return list(rows.values())
+
+
+def _job_rows(logs: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Aggregate job outcomes into hourly rollup rows."""
+    rows: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for log in logs:
+        hour = _hour(_naive_utc(log.timestamp))
+        key = (hour, log.job_type, log.status)
+        row = rows.setdefault(
+            key,
+            {
+                "hour_start": hour,
+                "job_type": log.job_type,
+                "status": log.status,
+                "count": 0,
+                "timed_count": 0,
+                "total_duration_ms": 0.0,
+            },
+        )
+        row["count"] += 1
+        if log.duration_ms is not None:
+            row["timed_count"] += 1
+            row["total_duration_ms"] += log.duration_ms
+    return list(rows.values())
+
+
+def write_rollups(
+    connection: Any,
+    requests: Sequence[Any] = (),
+    errors: Sequence[Any] = (),
+    jobs: Sequence[Any] = (),
+) -> None:
+    """Count request, error and job log rows into their rollups.
+
+    The rows may be ORM objects or result rows with the same attributes.
+    """
+    if requests:
+        minute_rows, hour_rows = _request_rows(requests)
+        upsert_merge(
+            connection,
+            APIRequestMinutely.__table__,
+            ("minute_start", "endpoint", "method", "latency_bin"),
+            minute_rows,
+            _REQUEST_MEASURES,
+        )
+        upsert_merge(
+            connection,
+            APIRequestHourly.__table__,
+            ("hour_start", "endpoint", "method", "latency_bin"),
+            hour_rows,
+            _REQUEST_MEASURES,
+        )
+    if errors:
+        upsert_merge(
+            connection,
+            ErrorLogHourly.__table__,
+            ("hour_start", "category", "severity"),
+            _error_rows(errors),
+            _ERROR_MEASURES,
+        )
+    if jobs:
+        upsert_merge(
+            connection,
+            JobOutcomeHourly.__table__,
+            ("hour_start", "job_type", "status"),
+            _job_rows(jobs),
+            _JOB_MEASURES,
+        )
+
+
+def _subtract(
+    connection: Any,
+    table: Any,
+    keys: Sequence[str],
+    rows: List[Dict[str, Any]],
+    measures: Dict[str, str],
+    fallback: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Subtract ``rows`` from a rollup's summed measures.
+
+    Buckets whose first measure (their row count) drops to zero are deleted.
+    A row whose bucket does not exist is subtracted from the bucket with the
+    ``fallback`` key values instead, if given, and is otherwise skipped.
+    """
+    summed = [column for column, how in measures.items() if how == "sum"]
+    for row in rows:
+        for values in (row, {**row, **(fallback or {})}):
+            match = [table.c[key] == values[key] for key in keys]
+            result = connection.execute(
+                update(table)
+                .where(*match)
+                .values({column: table.c[column] - row[column] for column in summed})
+            )
+            if result.rowcount or not fallback:
+                break
+        connection.execute(delete(table).where(*match, table.c[summed[0]] <= 0))
+
+
+def delete_logs(session: Session, model: Any, *criteria: Any) -> int:
+    """Delete request or job log rows and take them out of their rollups.
+
+    For purges, which unlike retention must not leave the deleted rows
+    counted. Counts and totals are subtracted; the minimum and maximum
+    latency of a bucket cannot be unmerged and keep their values, which
+    only bound its percentile estimates. Requests rolled up before latencies
+    were binned are subtracted from their hour's bin -1.
+
+    Returns:
+        The number of log rows deleted.
+    """
+    connection = session.connection()
+    if model is APIRequestLog:
+        requests = session.execute(select(*_REQUEST_COLUMNS).where(*criteria)).all()
+        minute_rows, hour_rows = _request_rows(requests)
+        _subtract(
+            connection,
+            APIRequestMinutely.__table__,
+            ("minute_start", "endpoint", "method", "latency_bin"),
+            minute_rows,
+            _REQUEST_MEASURES,
+        )
+        _subtract(
+            connection,
+            APIRequestHourly.__table__,
+            ("hour_start", "endpoint", "method", "latency_bin"),
+            hour_rows,
+            _REQUEST_MEASURES,
+            fallback={"latency_bin": -1},
+        )
+    elif model is JobOutcome:
+        jobs = session.execute(select(*_JOB_COLUMNS).where(*criteria)).all()
+        _subtract(
+            connection,
+            JobOutcomeHourly.__table__,
+            ("hour_start", "job_type", "status"),
+            _job_rows(jobs),
+            _JOB_MEASURES,
+        )
+    else:
+        raise ValueError(f"{model.__name__} has no rollups to maintain")
+    result = session.execute(delete(model).where(*criteria))
+    return int(getattr(result, "rowcount", 0) or 0)
+
+
+_hooks_installed = False
+
+
+def install_rollup_hooks() -> None:
+    """Count every flushed request, error and job log into the rollups."""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    from sqlalchemy import event
+
+    def roll_up(session: Session, flush_context: Any) -> None:
+        requests, errors, jobs = [], [], []
+        for obj in session.new:
+            if isinstance(obj, APIRequestLog):
+                requests.append(obj)
+            elif isinstance(obj, ErrorLog):
+                errors.append(obj)
+            elif isinstance(obj, JobOutcome):
+                jobs.append(obj)
+        if requests or errors or jobs:
+            write_rollups(session.connection(), requests, errors, jobs)
+
+    event.listen(Session, "after_flush", roll_up)
+
+
+install_rollup_hooks()
+
+
+def _window(hours: int, now: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """Return the naive-UTC start of a window and its first whole hour."""
+    since = _naive_utc(now) - timedelta(hours=hours)
+    first_hour = _hour(since)
+    if first_hour < since:
+        first_hour += timedelta(hours=1)
+    return since, first_hour
+
+
+def api_performance(
+    session: Session,
+    hours: int,
+    endpoint: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Return request counts, errors and latency per endpoint over a window.
+
+    Returns:
+        One dict per endpoint with request and error counts, average,
+        minimum and maximum latency and p50/p95/p99 estimates (ms).
+    """
+    since, first_hour = _window(hours, now)
+    measures = (
+        func.sum(APIRequestHourly.request_count),
+        func.sum(APIRequestHourly.error_count),
+        func.sum(APIRequestHourly.total_response_time_ms),
+        func.min(APIRequestHourly.min_response_time_ms),
+        func.max(APIRequestHourly.max_response_time_ms),
+    )
+    hourly = select(
+        APIRequestHourly.endpoint, APIRequestHourly.latency_bin, *measures
+    ).where(APIRequestHourly.hour_start >= first_hour)
+    minutely = select(
+        APIRequestMinutely.endpoint,
+        APIRequestMinutely.latency_bin,
+        func.sum(APIRequestMinutely.request_count),
+        func.sum(APIRequestMinutely.error_count),
+        func.sum(APIRequestMinutely.total_response_time_ms),
+        func.min(APIRequestMinutely.min_response_time_ms),
+        func.max(APIRequestMinutely.max_response_time_ms),
+    ).where(
+        APIRequestMinutely.minute_start >= since.replace(second=0, microsecond=0),
+        APIRequestMinutely.minute_start < first_hour,
+    )
+    if endpoint:
+        hourly = hourly.where(APIRequestHourly.endpoint == endpoint)
+        minutely = minutely.where(APIRequestMinutely.endpoint == endpoint)
+    hourly = hourly.group_by(APIRequestHourly.endpoint, APIRequestHourly.latency_bin)
+    minutely = minutely.group_by(
+        APIRequestMinutely.endpoint, APIRequestMinutely.latency_bin
+    )
+
+    totals: Dict[str, Dict[str, Any]] = {}
+    for query in (minutely, hourly):
+        for name, bin_, count, errors, total_ms, low, high in session.execute(query):
+            entry = totals.setdefault(
+                name,
+                {
+                    "count": 0,
+                    "errors": 0,
+                    "total_ms": 0.0,
+                    "min": None,
+                    "max": None,
+                    "bins": {},
+                },
+            )
+            entry["count"] += count or 0
+            entry["errors"] += errors or 0
+            entry["total_ms"] += total_ms or 0.0
+            if low is not None:
+                entry["min"] = low if entry["min"] is None else min(entry["min"], low)
+            if high is not None:
+                entry["max"] = high if entry["max"] is None else max(entry["max"], high)
+            if bin_ >= 0:
+                entry["bins"][bin_] = entry["bins"].get(bin_, 0) + (count or 0)
+
+    metrics = []
+    for name, entry in sorted(totals.items()):
+        if not entry["count"]:
+            continue
+        estimates = percentiles(
+            entry["bins"], lowest=entry["min"], highest=entry["max"]
+        )
+        metrics.append(
+            {
+                "endpoint": name,
+                "request_count": entry["count"],
+                "error_count": entry["errors"],
+                "avg_response_time_ms": round(entry["total_ms"] / entry["count"], 2),
+                "max_response_time_ms": entry["max"],
+                "min_response_time_ms": entry["min"],
+                "p50_response_time_ms": estimates[0.5],
+                "p95_response_time_ms": estimates[0.95],
+                "p99_response_time_ms": estimates[0.99],
+            }
+        )
+    return metrics
+
+
+def error_trends(
+    session: Session,
+    hours: int,
+    category: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Return error counts per category and severity over a window."""
+    since, first_hour = _window(hours, now)
+    hourly = select(
+        ErrorLogHourly.category, ErrorLogHourly.severity, func.sum(ErrorLogHourly.count)
+    ).where(ErrorLogHourly.hour_start >= first_hour)
+    raw = select(ErrorLog.category, ErrorLog.severity, func.count(ErrorLog.id)).where(
+        ErrorLog.timestamp >= since, ErrorLog.timestamp < first_hour
+    )
+    if category:
+        hourly = hourly.where(ErrorLogHourly.category == category)
+        raw = raw.where(ErrorLog.category == category)
+    hourly = hourly.group_by(ErrorLogHourly.category, ErrorLogHourly.severity)
+    raw = raw.group_by(ErrorLog.category, ErrorLog.severity)
+
+    counts: Dict[Tuple[str, str], int] = {}
+    for query in (raw, hourly):
+        for name, severity, count in session.execute(query):
+            counts[(name, severity)] = counts.get((name, severity), 0) + (count or 0)
+    return [
+        {"category": name, "severity": severity, "count": count}
+        for (name, severity), count in sorted(counts.items())
+    ]
+
+
+def job_outcomes(
+    session: Session,
+    hours: int,
+    job_type: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Return job outcome counts and average durations over a window."""
+    since, first_hour = _window(hours, now)
+    hourly = select(
+        JobOutcomeHourly.job_type,
+        JobOutcomeHourly.status,
+        func.sum(JobOutcomeHourly.count),
+        func.sum(JobOutcomeHourly.timed_count),
+        func.sum(JobOutcomeHourly.total_duration_ms),
+    ).where(JobOutcomeHourly.hour_start >= first_hour)
+    raw = select(
+        JobOutcome.job_type,
+        JobOutcome.status,
+        func.count(JobOutcome.id),
+        func.count(JobOutcome.duration_ms),
+        func.sum(JobOutcome.duration_ms),
+    ).where(JobOutcome.timestamp >= since, JobOutcome.timestamp < first_hour)
+    if job_type:
+        hourly = hourly.where(JobOutcomeHourly.job_type == job_type)
+        raw = raw.where(JobOutcome.job_type == job_type)
+    hourly = hourly.group_by(JobOutcomeHourly.job_type, JobOutcomeHourly.status)
+    raw = raw.group_by(JobOutcome.job_type, JobOutcome.status)
+
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    for query in (raw, hourly):
+        for name, status, count, timed, total_ms in session.execute(query):
+            entry = totals.setdefault((name, status), [0, 0, 0.0])
+            entry[0] += count or 0
+            entry[1] += timed or 0
+            entry[2] += total_ms or 0.0
+    return [
+        {
+            "job_type": name,
+            "status": status,
+            "count": int(count),
+            "avg_duration_ms": round(total_ms / timed, 2) if timed else None,
+        }
+        for (name, status), (count, timed, total_ms) in sorted(totals.items())
+    ]
+
+
+def rebuild_rollups(
+    session: Session, hours: int, now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Recompute the rollups of the closed hours in a window from raw rows.
+
+    For log rows written before the rollups were maintained. The current
+    hour is left alone, as rows are still being counted into it. Hours whose
+    raw rows have already expired lose their rollups, so keep ``hours``
+    within the retention windows. Commit the session afterwards.
+
+    Returns:
+        Raw rows counted per log table.
+    """
+    end = _hour(_naive_utc(now))
+    sources = (
+        (
+            "requests",
+            APIRequestLog,
+            _REQUEST_COLUMNS,
+            ((APIRequestMinutely, "minute_start"), (APIRequestHourly, "hour_start")),
+        ),
+        (
+            "errors",
+            ErrorLog,
+            (ErrorLog.timestamp, ErrorLog.category, ErrorLog.severity),
+            ((ErrorLogHourly, "hour_start"),),
+        ),
+        (
+            "jobs",
+            JobOutcome,
+            _JOB_COLUMNS,
+            ((JobOutcomeHourly, "hour_start"),),
+        ),
+    )
+    counted: Dict[str, int] = {}
+    for kind, model, columns, rollups in sources:
+        counted[model.__tablename__] = 0
+        # One hour of raw rows in memory at a time
+        for hour in range(hours, 0, -1):
+            start = end - timedelta(hours=hour)
+            stop = start + timedelta(hours=1)
+            for rollup, column in rollups:
+                bucket = getattr(rollup, column)
+                session.execute(delete(rollup).where(bucket >= start, bucket < stop))
+            rows = session.execute(
+                select(*columns).where(model.timestamp >= start, model.timestamp < stop)
+            ).all()
+            write_rollups(session.connection(), **{kind: rows})
+            counted[model.__tablename__] += len(rows)
+    logger.info(f"Rebuilt {hours} hour(s) of rollups before {end}: {counted}")
+    return counted
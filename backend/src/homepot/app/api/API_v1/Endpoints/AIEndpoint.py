@@ -3,6 +3,7 @@
 Provides REST API access to AI-powered analytics, predictions, and recommendations.
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 import logging
 import os
@@ -31,7 +32,7 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 from ai.analytics_service import AIAnalyticsService  # noqa: E402
-from ai.anomaly_detection import AnomalyDetector  # noqa: E402
+from ai.anomaly_state import top_anomalies  # noqa: E402
 from ai.context_builder import ContextBuilder  # noqa: E402
 from ai.device_memory import DeviceMemory  # noqa: E402
 from ai.device_resolver import DeviceResolver  # noqa: E402
@@ -45,16 +46,14 @@ from ai.gates import (  # noqa: E402
 from ai.gates import EnvelopeResult  # noqa: E402
 from ai.job_scheduler import PredictiveJobScheduler  # noqa: E402
 from ai.llm import LLMService  # noqa: E402
+from ai.llm_gateway import LLMGateway, LLMGatewayBusy  # noqa: E402
 from ai.system_knowledge import SystemKnowledge  # noqa: E402
 
-from homepot.app.models.AnalyticsModel import (  # noqa: E402
-    DeviceMetrics,
-    PushNotificationLog,
-)
+from homepot.app.models.AnalyticsModel import PushNotificationLog  # noqa: E402
 from homepot.app.models.AnalyticsModel import Alert  # noqa: E402
 from homepot.audit import AuditEventType, get_audit_logger  # noqa: E402
 from homepot.database import get_database_service, get_db  # noqa: E402
-from homepot.models import Device, HealthCheck, Site, User  # noqa: E402
+from homepot.models import Device, Site, User  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
@@ -184,190 +183,16 @@ class AIQueryRequest(BaseModel):
 
 @router.get("/anomalies", tags=["AI Insights"])
 async def get_system_anomalies() -> Dict[str, Any]:
-    """Detect system-wide anomalies using AI heuristics."""
-    try:
-        detector = AnomalyDetector()
-        anomalies = []
+    """Return the top system-wide anomalies.
 
+    Reads the incrementally maintained ``device_anomaly_state`` table (see
+    ``ai/anomaly_state.py``) plus active alerts, so the cost does not grow
+    with fleet size.
+    """
+    try:
         db_service = await get_database_service()
         async with db_service.get_session() as session:
-            # 1. Get active devices for mapping (only live, non-archived devices)
-            all_devices_result = await session.execute(
-                select(Device).where(Device.is_active.is_(True))
-            )
-            all_devices = all_devices_result.scalars().all()
-            device_map = {d.device_id: d.name for d in all_devices}
-
-            # 2. Fetch Active Alerts from Database (Persistent Context) FIRST
-            # We want to prioritize persistent alerts which have IDs.
-            alerts_result = await session.execute(
-                select(Alert).where(Alert.status == "active")
-            )
-            active_alerts = alerts_result.scalars().all()
-
-            # Track which devices have active alerts to avoid duplication
-            alerted_devices = set()
-
-            for alert in active_alerts:
-                alerted_devices.add(alert.device_id)
-                anomalies.append(
-                    {
-                        "id": alert.id,
-                        "device_id": alert.device_id,
-                        "device_name": device_map.get(
-                            alert.device_id, "Unknown Device"
-                        ),
-                        "score": round(alert.ai_confidence or 0.8, 2),
-                        "reasons": [alert.title, alert.description],
-                        "severity": alert.severity,
-                        "metrics": {
-                            "source": "persistent_alert",
-                            "category": alert.category,
-                        },
-                        "timestamp": (
-                            alert.timestamp.isoformat()
-                            if alert.timestamp
-                            else datetime.utcnow().isoformat()
-                        ),
-                    }
-                )
-
-            # Filter for monitored devices to run active detection
-            monitored_devices = [d for d in all_devices if d.is_monitored]
-            devices_to_check = [
-                d for d in monitored_devices if d.device_id not in alerted_devices
-            ]
-            device_ids_to_check = [d.id for d in devices_to_check]
-
-            # Batch query DeviceMetrics and HealthCheck to eliminate N+1 queries
-            latest_metrics_by_device: Dict[Any, Any] = {}
-            health_checks_by_device: Dict[Any, Any] = {}
-
-            if device_ids_to_check:
-                from sqlalchemy.orm import aliased
-
-                # 1. Batch fetch latest metrics
-                metrics_subq = (
-                    select(
-                        DeviceMetrics,
-                        func.row_number()
-                        .over(
-                            partition_by=DeviceMetrics.device_id,
-                            order_by=DeviceMetrics.timestamp.desc(),
-                        )
-                        .label("rn"),
-                    )
-                    .where(DeviceMetrics.device_id.in_(device_ids_to_check))
-                    .subquery()
-                )
-                metrics_alias = aliased(DeviceMetrics, metrics_subq)
-                metrics_result = await session.execute(
-                    select(metrics_alias).where(metrics_subq.c.rn == 1)
-                )
-                for metric in metrics_result.scalars().all():
-                    latest_metrics_by_device[metric.device_id] = metric
-
-                # 2. Batch fetch last 5 health checks
-                health_subq = (
-                    select(
-                        HealthCheck,
-                        func.row_number()
-                        .over(
-                            partition_by=HealthCheck.device_id,
-                            order_by=HealthCheck.timestamp.desc(),
-                        )
-                        .label("rn"),
-                    )
-                    .where(HealthCheck.device_id.in_(device_ids_to_check))
-                    .subquery()
-                )
-                health_alias = aliased(HealthCheck, health_subq)
-                health_result = await session.execute(
-                    select(health_alias).where(health_subq.c.rn <= 5)
-                )
-                for hc in health_result.scalars().all():
-                    health_checks_by_device.setdefault(hc.device_id, []).append(hc)
-
-                # Ensure order is sorted by timestamp descending
-                for dev_id, checks in health_checks_by_device.items():
-                    checks.sort(key=lambda x: x.timestamp, reverse=True)
-
-            devices_status_updated = False
-            for device in devices_to_check:
-                device_metrics: Dict[str, Any] = {}
-
-                # 3. Get latest metrics from pre-fetched dict
-                latest_metric = latest_metrics_by_device.get(device.id)
-                if latest_metric:
-                    device_metrics.update(
-                        {
-                            "cpu_percent": latest_metric.cpu_percent,
-                            "memory_percent": latest_metric.memory_percent,
-                            "disk_percent": latest_metric.disk_percent,
-                            "network_latency_ms": latest_metric.network_latency_ms,
-                            "error_rate": latest_metric.error_rate,
-                        }
-                    )
-
-                # 4. Get Flapping Count (last 1 hour)
-                device_metrics["flapping_count"] = 0.0
-
-                # 5. Get Consecutive Failures from pre-fetched dict
-                checks = health_checks_by_device.get(device.id, [])
-                consecutive_failures = 0
-                for check in checks:
-                    if not check.is_healthy:
-                        consecutive_failures += 1
-                    else:
-                        break
-                device_metrics["consecutive_failures"] = float(consecutive_failures)
-
-                # Sync Device Status with Health & Generate Offline Alert
-                try:
-                    status_changed = False
-                    if consecutive_failures >= 3:
-                        if device.status != "offline":
-                            device.status = "offline"  # type: ignore
-                            status_changed = True
-
-                    elif consecutive_failures == 0 and device.status == "offline":
-                        # Recover from offline
-                        device.status = "online"  # type: ignore
-                        status_changed = True
-
-                    if status_changed:
-                        session.add(device)
-                        devices_status_updated = True
-                except Exception as e:
-                    logger.error(f"Failed to sync device status: {e}")
-
-                # 6. Run Detection
-                score, reasons = detector.check_anomaly(device_metrics)
-
-                if score > 0:
-                    anomalies.append(
-                        {
-                            "device_id": device.device_id,
-                            "device_name": device.name,
-                            "score": round(score, 2),
-                            "reasons": reasons,
-                            "severity": "critical" if score >= 0.8 else "warning",
-                            "metrics": device_metrics,
-                            "timestamp": datetime.utcnow().isoformat(),
-                        }
-                    )
-
-            if devices_status_updated:
-                try:
-                    await session.commit()
-                except Exception as e:
-                    logger.error(f"Failed to commit device status changes: {e}")
-
-        # Sort by score descending
-        anomalies.sort(key=lambda x: float(str(x["score"])), reverse=True)
-
-        # Limit to top 5 anomalies
-        anomalies = anomalies[:5]
+            anomalies = await top_anomalies(session, limit=5)
 
         return {"count": len(anomalies), "anomalies": anomalies}
 
@@ -430,6 +255,17 @@ def get_ai_services() -> Any:
     return _ai_services["llm"], _ai_services["knowledge"], _ai_services["memory"]
 
 
+_llm_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the gateway that runs LLM generations off the event loop."""
+    global _llm_gateway  # noqa: PLW0603
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway(lambda: get_ai_services()[0])
+    return _llm_gateway
+
+
 @router.post("/query", tags=["AI Chat"])
 async def query_ai(
     request: AIQueryRequest,
@@ -444,7 +280,7 @@ async def query_ai(
     )
     try:
         # Use singletons for heavy services
-        llm, knowledge, memory = get_ai_services()
+        _, knowledge, memory = get_ai_services()
         # ContextBuilder is lightweight
         context_builder = ContextBuilder()
 
@@ -464,14 +300,16 @@ async def query_ai(
         long_term_context = ""
         try:
             # Get Memory Stats (Self-Awareness)
-            mem_stats = memory.get_memory_stats()
+            mem_stats = await asyncio.to_thread(memory.get_memory_stats)
             long_term_context = (
                 f"\n[MEMORY SYSTEM STATUS]\n"
                 f"Total Memories Stored: {mem_stats['total_memories']}\n"
             )
 
             # Get Similar Memories
-            similar_memories = memory.query_similar(request.query)
+            similar_memories = await asyncio.to_thread(
+                memory.query_similar, request.query
+            )
             if similar_memories:
                 long_term_context += "\n[RELEVANT MEMORIES]\n"
                 long_term_context += "\n".join(
@@ -780,7 +618,7 @@ async def query_ai(
         # Get static system knowledge (no DB access needed beyond this point)
         system_knowledge = knowledge.get_full_system_context()
 
-        response = llm.generate_response(
+        response = await get_llm_gateway().generate(
             prompt=request.query,
             context=full_context,
             system_prompt=(
@@ -867,6 +705,10 @@ async def query_ai(
             "timestamp": datetime.utcnow().isoformat(),
             "trust": trust.to_dict(),
         }
+    except LLMGatewayBusy as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
     except Exception as e:
         logger.error(f"AI query failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1103,6 +945,7 @@ async def get_at_risk_devices(
         pattern="^(low|medium|high|critical)$",
         description="Minimum risk level to include",
     ),
+    tenant_id: Optional[int] = Query(None, description="Optional tenant filter"),
 ) -> Dict[str, Any]:
     """Identify all devices currently at risk of failure.
 
@@ -1110,7 +953,9 @@ async def get_at_risk_devices(
     """
     try:
         predictor = FailurePredictor()
-        at_risk = await predictor.identify_at_risk_devices(site_id, min_risk_level)
+        at_risk = await predictor.identify_at_risk_devices(
+            site_id, min_risk_level, tenant_id=tenant_id
+        )
 
         return at_risk
 
@@ -1235,6 +1080,7 @@ async def get_health_forecast(
     forecast_hours: int = Query(
         default=24, ge=1, le=168, description="Forecast period in hours"
     ),
+    tenant_id: Optional[int] = Query(None, description="Optional tenant filter"),
 ) -> Dict[str, Any]:
     """Get health forecast for site or all devices.
 
@@ -1243,9 +1089,9 @@ async def get_health_forecast(
     try:
         predictor = FailurePredictor()
 
-        # Get all at-risk devices
+        # Devices at medium risk or above; the distribution covers all devices
         at_risk = await predictor.identify_at_risk_devices(
-            site_id, min_risk_level="low"
+            site_id, min_risk_level="medium", tenant_id=tenant_id
         )
 
         # Analyze overall health trend
@@ -1283,7 +1129,7 @@ async def get_health_forecast(
             "healthy_devices": total_devices - at_risk_count,
             "at_risk_devices": at_risk_count,
             "risk_distribution": risk_dist,
-            "top_concerns": at_risk.get("at_risk_devices", [])[:5],  # Top 5
+            "top_concerns": at_risk.get("devices", [])[:5],  # Top 5
             "generated_at": datetime.utcnow().isoformat(),
         }
 
@@ -11,6 +11,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from homepot.app.auth_utils import get_current_device
 from homepot.app.schemas.agent import AgentAuditRequest
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_database_service
 from homepot.models import Device
 
@@ -18,7 +19,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/audit", tags=["Agent"])
+@router.post("/audit", tags=["Agent"], dependencies=[Depends(rate_limit("reports"))])
 async def report_audit_event(
     payload: AgentAuditRequest,
     current_device: Device = Depends(get_current_device),
@@ -14,6 +14,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from homepot.app.auth_utils import get_current_device
 from homepot.app.models.AnalyticsModel import ConfigurationHistory
 from homepot.app.schemas.agent import AgentConfigHistoryRequest
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_database_service
 from homepot.models import Device, derive_provenance
 
@@ -21,7 +22,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/config-history", tags=["Agent"])
+@router.post(
+    "/config-history", tags=["Agent"], dependencies=[Depends(rate_limit("reports"))]
+)
 async def report_config_history(
     payload: AgentConfigHistoryRequest,
     current_device: Device = Depends(get_current_device),
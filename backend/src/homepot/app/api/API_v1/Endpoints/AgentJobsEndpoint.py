@@ -12,6 +12,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from homepot.app.auth_utils import get_current_device
 from homepot.app.schemas.agent import AgentJobRequest, AgentJobUpdateRequest
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_database_service
 from homepot.models import Device, Job, JobStatus
 
@@ -32,7 +33,7 @@ def _valid_update_status(status: str) -> Optional[JobStatus]:
     return None
 
 
-@router.post("/jobs", tags=["Agent"])
+@router.post("/jobs", tags=["Agent"], dependencies=[Depends(rate_limit("jobs"))])
 async def report_job(
     payload: AgentJobRequest,
     current_device: Device = Depends(get_current_device),
@@ -73,7 +74,9 @@ async def report_job(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.put("/jobs/{job_id}", tags=["Agent"])
+@router.put(
+    "/jobs/{job_id}", tags=["Agent"], dependencies=[Depends(rate_limit("jobs"))]
+)
 async def update_job(
     job_id: str,
     payload: AgentJobUpdateRequest,
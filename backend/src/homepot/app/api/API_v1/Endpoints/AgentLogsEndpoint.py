@@ -17,6 +17,7 @@ from sqlalchemy import desc, select
 from homepot.app.auth_utils import get_current_device
 from homepot.app.models.AnalyticsModel import ErrorLog
 from homepot.app.schemas.agent import AgentLogRequest
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_database_service
 from homepot.error_logger import log_error
 from homepot.models import Device
@@ -35,7 +36,7 @@ _SEVERITY_ALIASES = {
 }
 
 
-@router.post("/logs", tags=["Agent"])
+@router.post("/logs", tags=["Agent"], dependencies=[Depends(rate_limit("reports"))])
 async def report_log(
     payload: AgentLogRequest,
     current_device: Device = Depends(get_current_device),
@@ -84,7 +85,9 @@ def _iso(value: Any) -> Any:
     return value.isoformat() if value is not None else None
 
 
-@router.get("/{device_id}/logs", tags=["Agent"])
+@router.get(
+    "/{device_id}/logs", tags=["Agent"], dependencies=[Depends(rate_limit("reads"))]
+)
 async def get_device_logs(
     device_id: str,
     limit: int = DEFAULT_LIMIT,
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from homepot.app.auth_utils import get_current_device
 from homepot.app.schemas.agent import AgentRegisterRequest
 from homepot.app.services.agent_service import AgentService
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_db
 from homepot.models import Device
 
@@ -16,7 +17,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/device-dna", tags=["Agent"])
+@router.post(
+    "/device-dna", tags=["Agent"], dependencies=[Depends(rate_limit("registration"))]
+)
 def register_and_update_device_dna(
     payload: AgentRegisterRequest,
     current_device: Device = Depends(get_current_device),
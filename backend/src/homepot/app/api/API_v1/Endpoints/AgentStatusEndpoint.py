@@ -7,13 +7,18 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from homepot.app.services.agent_service import AgentService
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_db
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.get("/{device_id}/status", tags=["Agent"])
+@router.get(
+    "/{device_id}/status",
+    tags=["Agent"],
+    dependencies=[Depends(rate_limit("reads", per_device=False))],
+)
 def get_device_status(device_id: str, db: Session = Depends(get_db)) -> Dict[str, Any]:
     """Return computed ONLINE or OFFLINE status for a device."""
     logger.info("Agent status request received for device_id=%s", device_id)
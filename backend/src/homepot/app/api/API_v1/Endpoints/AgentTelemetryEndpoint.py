@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from homepot.app.auth_utils import get_current_device
 from homepot.app.schemas.agent import AgentTelemetryRequest
 from homepot.app.services.agent_service import AgentService
+from homepot.app.utils.limiter import rate_limit
 from homepot.database import get_db
 from homepot.models import Device
 
@@ -16,7 +17,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/telemetry", tags=["Agent"])
+@router.post(
+    "/telemetry", tags=["Agent"], dependencies=[Depends(rate_limit("telemetry"))]
+)
 def save_telemetry(
     payload: Union[AgentTelemetryRequest, List[AgentTelemetryRequest]],
     current_device: Device = Depends(get_current_device),
@@ -64,7 +67,9 @@ def save_telemetry(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/{device_id}/metrics", tags=["Agent"])
+@router.get(
+    "/{device_id}/metrics", tags=["Agent"], dependencies=[Depends(rate_limit("reads"))]
+)
 def get_latest_metrics(
     device_id: str,
     current_device: Device = Depends(get_current_device),
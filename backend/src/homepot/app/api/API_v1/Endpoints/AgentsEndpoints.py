@@ -219,6 +219,10 @@ async def send_push_notification(
         sync_db.commit()
     except Exception as e:
         logger.warning(f"Failed to persist push log for {device_id}: {e}")
+    else:
+        from homepot.notification_hub import PUSH_CHANNEL, get_notification_hub
+
+        get_notification_hub().notify(PUSH_CHANNEL, device_id)
 
     try:
         from homepot.agents import get_agent_manager
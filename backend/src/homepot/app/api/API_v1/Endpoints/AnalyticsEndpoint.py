@@ -1,16 +1,17 @@
 """API endpoints for analytics data collection and querying."""
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from homepot import analytics_rollups as rollups
 from homepot.app.auth_utils import TokenData, get_current_device, get_current_user
 from homepot.app.models import AnalyticsModel as models
-from homepot.app.utils.smart_filter import SmartDataFilter
+from homepot.app.utils.smart_filter import SqlFilterStore, get_smart_filter
 from homepot.database import get_db
 from homepot.models import Device, derive_provenance
 
@@ -19,9 +20,14 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize Smart Filter
-# In a real production app with multiple workers, this should be a Redis-backed service
-smart_filter = SmartDataFilter(snapshot_interval=300, change_threshold=0.05)
+
+async def _filter_decision(
+    smart_filter: Any, decide: Callable[..., bool], *args: Any
+) -> bool:
+    """Run a smart filter decision, off the event loop if its store is the DB."""
+    if isinstance(smart_filter.store, SqlFilterStore):
+        return await asyncio.to_thread(decide, *args)
+    return decide(*args)
 
 
 # ==================== Data Collection Endpoints ====================
@@ -96,8 +102,17 @@ async def log_error(
         error_message = error.get("error_message", "unknown")
 
         # Only filter if we have a device_id (system errors might not have one)
-        if device_id and not smart_filter.should_store_error(
-            device_id, str(error_code), str(error_message)
+        smart_filter = get_smart_filter()
+        if (
+            device_id
+            and smart_filter is not None
+            and not await _filter_decision(
+                smart_filter,
+                smart_filter.should_store_error,
+                device_id,
+                str(error_code),
+                str(error_message),
+            )
         ):
             return {
                 "success": True,
@@ -201,7 +216,14 @@ async def log_device_metrics(
                 }
 
         # Smart Filtering
-        if device_id_input and not smart_filter.should_store(device_id_input, metrics):
+        smart_filter = get_smart_filter()
+        if (
+            device_id_input
+            and smart_filter is not None
+            and not await _filter_decision(
+                smart_filter, smart_filter.should_store, device_id_input, metrics
+            )
+        ):
             return {
                 "success": True,
                 "message": "Metrics filtered (no significant change)",
@@ -460,36 +482,16 @@ async def get_api_performance(
     db: Session = Depends(get_db),
     current_user: TokenData = Depends(get_current_user),
 ) -> Dict[str, Any]:
-    """Get API performance metrics."""
-    try:
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-
-        query = db.query(
-            models.APIRequestLog.endpoint,
-            func.count(models.APIRequestLog.id).label("request_count"),
-            func.avg(models.APIRequestLog.response_time_ms).label("avg_response_time"),
-            func.max(models.APIRequestLog.response_time_ms).label("max_response_time"),
-            func.min(models.APIRequestLog.response_time_ms).label("min_response_time"),
-        ).filter(models.APIRequestLog.timestamp >= cutoff_time)
-
-        if endpoint:
-            query = query.filter(models.APIRequestLog.endpoint == endpoint)
-
-        results = query.group_by(models.APIRequestLog.endpoint).all()
+    """Get API performance metrics.
 
+    Read from the request rollups, so the cost does not grow with traffic.
+    Percentiles are estimated from latency histograms to within 10%.
+    """
+    try:
         return {
             "success": True,
             "time_range_hours": hours,
-            "metrics": [
-                {
-                    "endpoint": r.endpoint,
-                    "request_count": r.request_count,
-                    "avg_response_time_ms": round(r.avg_response_time, 2),
-                    "max_response_time_ms": r.max_response_time,
-                    "min_response_time_ms": r.min_response_time,
-                }
-                for r in results
-            ],
+            "metrics": rollups.api_performance(db, hours, endpoint=endpoint),
         }
     except Exception as e:
         logger.error(f"Error fetching API performance: {str(e)}")
@@ -505,36 +507,10 @@ async def get_job_outcomes(
 ) -> Dict[str, Any]:
     """Get job outcome statistics."""
     try:
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-
-        query = db.query(
-            models.JobOutcome.job_type,
-            models.JobOutcome.status,
-            func.count(models.JobOutcome.id).label("count"),
-            func.avg(models.JobOutcome.duration_ms).label("avg_duration"),
-        ).filter(models.JobOutcome.timestamp >= cutoff_time)
-
-        if job_type:
-            query = query.filter(models.JobOutcome.job_type == job_type)
-
-        results = query.group_by(
-            models.JobOutcome.job_type, models.JobOutcome.status
-        ).all()
-
         return {
             "success": True,
             "time_range_hours": hours,
-            "outcomes": [
-                {
-                    "job_type": r.job_type,
-                    "status": r.status,
-                    "count": r.count,
-                    "avg_duration_ms": (
-                        round(r.avg_duration, 2) if r.avg_duration else None
-                    ),
-                }
-                for r in results
-            ],
+            "outcomes": rollups.job_outcomes(db, hours, job_type=job_type),
         }
     except Exception as e:
         logger.error(f"Error fetching job outcomes: {str(e)}")
@@ -550,32 +526,10 @@ async def get_error_trends(
 ) -> Dict[str, Any]:
     """Get error trend statistics."""
     try:
-        cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
-
-        query = db.query(
-            models.ErrorLog.category,
-            models.ErrorLog.severity,
-            func.count(models.ErrorLog.id).label("count"),
-        ).filter(models.ErrorLog.timestamp >= cutoff_time)
-
-        if category:
-            query = query.filter(models.ErrorLog.category == category)
-
-        results = query.group_by(
-            models.ErrorLog.category, models.ErrorLog.severity
-        ).all()
-
         return {
             "success": True,
             "time_range_hours": hours,
-            "errors": [
-                {
-                    "category": r.category,
-                    "severity": r.severity,
-                    "count": r.count,
-                }
-                for r in results
-            ],
+            "errors": rollups.error_trends(db, hours, category=category),
         }
     except Exception as e:
         logger.error(f"Error fetching error trends: {str(e)}")
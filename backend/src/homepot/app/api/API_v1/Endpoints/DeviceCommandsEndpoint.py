@@ -3,7 +3,7 @@
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, cast
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy.orm import Session as SASession
 
@@ -16,11 +16,18 @@ from homepot.app.auth_utils import (
     get_current_device,
     require_user,
     verify_device_belongs_to_user,
+    verify_site_access_for_user,
 )
-from homepot.app.utils.limiter import limiter
+from homepot.app.utils.limiter import limiter, rate_limit
 from homepot.audit import AuditEventType, get_audit_logger
+from homepot.config import get_settings
 from homepot.database import get_database_service, get_db
-from homepot.models import CommandStatus, Device, User
+from homepot.models import CommandStatus, Device, DeviceCommand, Site, User
+from homepot.notification_hub import (
+    COMMANDS_CHANNEL,
+    MAX_LONG_POLL_SECONDS,
+    get_notification_hub,
+)
 
 router = APIRouter()
 
@@ -32,6 +39,15 @@ class CreateCommandRequest(BaseModel):
     payload: Optional[Dict[str, Any]] = None
 
 
+class BulkCommandRequest(BaseModel):
+    """Request model for queuing one command on many devices of a site."""
+
+    command_type: str
+    payload: Optional[Dict[str, Any]] = None
+    device_type: Optional[str] = None
+    device_ids: Optional[List[str]] = None
+
+
 class CommandHistoryResponse(BaseModel):
     """Response model for command history listing."""
 
@@ -67,6 +83,42 @@ class CommandResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BulkCommandResponse(BaseModel):
+    """Response model for a bulk command, with the queued commands per device."""
+
+    queued: int
+    commands: Dict[str, CommandResponse]
+    skipped_device_ids: List[str]
+    not_found_device_ids: List[str]
+
+
+def _command_response(command: DeviceCommand) -> CommandResponse:
+    """Build the response model of a command."""
+    return CommandResponse(
+        command_id=command.command_id,  # type: ignore
+        command_type=command.command_type,  # type: ignore
+        payload=command.payload,  # type: ignore
+        status=command.status,  # type: ignore
+        created_at=command.created_at.isoformat(),  # type: ignore
+    )
+
+
+async def _audit_claimed(device: Device, commands: List[DeviceCommand]) -> None:
+    """Record the delivery of commands claimed on fetch."""
+    if not commands:
+        return
+    command_ids = [str(command.command_id) for command in commands]
+    await get_audit_logger().log_event(
+        AuditEventType.COMMAND_SENT,
+        f"Device '{device.device_id}' claimed {len(commands)} command(s)",
+        device_id=device.id,  # type: ignore
+        new_values={
+            "command_ids": command_ids,
+            "sent_at": commands[0].sent_at.isoformat(),  # type: ignore
+        },
+    )
+
+
 # 1. Queue Command (Requires user with operator access to the device's site)
 @router.post(
     "/{device_id}/commands",
@@ -143,41 +195,177 @@ async def queue_command(
         },
     )
 
-    return CommandResponse(
-        command_id=command.command_id,  # type: ignore
-        command_type=command.command_type,  # type: ignore
-        payload=command.payload,  # type: ignore
-        status=command.status,  # type: ignore
-        created_at=command.created_at.isoformat(),  # type: ignore
+    return _command_response(command)
+
+
+# 1b. Queue Command on many devices of a site (operator access to the site)
+@router.post(
+    "/sites/{site_id}/commands",
+    response_model=BulkCommandResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+@limiter.limit("30/minute")
+async def queue_bulk_command(
+    site_id: str,
+    command_request: BulkCommandRequest,
+    request: Request,
+    sync_db: SASession = Depends(get_db),
+    current_user: UserDict = Depends(require_user()),
+) -> BulkCommandResponse:
+    """Queue a command for every active device of a site.
+
+    ``device_type`` and ``device_ids`` narrow the target set, e.g. "restart
+    all POS terminals at site X". Targets are resolved and their commands
+    inserted in one transaction. Devices whose owner has not granted the
+    command's required permissions are skipped and listed in the response.
+
+    Requires operator-level access on the site.
+    """
+    db_user = cast(
+        User, sync_db.query(User).filter(User.email == current_user["email"]).first()
+    )
+    verify_site_access_for_user(db_user, site_id, sync_db, minimum_role="operator")
+    site = sync_db.query(Site).filter(Site.site_id == site_id).first()
+    if not site:
+        raise HTTPException(status_code=404, detail="Site not found")
+
+    command_type = command_request.command_type.strip().lower()
+    if command_type not in COMMAND_TYPES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unsupported command type: {command_request.command_type}",
+        )
+
+    db = await get_database_service()
+    commands, skipped = await db.create_device_commands_bulk(
+        site_id=cast(int, site.id),
+        command_type=command_type,
+        payload=command_request.payload,
+        device_type=command_request.device_type,
+        device_ids=command_request.device_ids,
+        required_permissions=required_permissions_for_command(
+            command_type, command_request.payload
+        ),
+    )
+    not_found = sorted(
+        set(command_request.device_ids or []) - set(commands) - set(skipped)
+    )
+
+    audit_logger = get_audit_logger()
+    await audit_logger.log_event(
+        AuditEventType.COMMAND_QUEUED,
+        f"User '{current_user['email']}' queued {command_type} "
+        f"command for {len(commands)} device(s) at site '{site_id}'",
+        user_id=db_user.id,  # type: ignore
+        site_id=site.id,  # type: ignore
+        new_values={
+            "command_ids": {
+                device_id: str(command.command_id)
+                for device_id, command in commands.items()
+            },
+            "command_type": command_type,
+            "payload": command_request.payload,
+            "skipped_device_ids": skipped,
+        },
+    )
+
+    return BulkCommandResponse(
+        queued=len(commands),
+        commands={
+            device_id: _command_response(command)
+            for device_id, command in commands.items()
+        },
+        skipped_device_ids=skipped,
+        not_found_device_ids=not_found,
     )
 
 
 # 2. Get Pending Commands (Device only)
-@router.get("/pending", response_model=List[CommandResponse])
+@router.get(
+    "/pending",
+    response_model=List[CommandResponse],
+    dependencies=[Depends(rate_limit("commands"))],
+)
 async def get_pending_commands(
+    claim: bool = Query(
+        False,
+        description="Mark the returned commands SENT, so they need no ack",
+    ),
     current_device: Device = Depends(get_current_device),
 ) -> List[CommandResponse]:
-    """Get all pending commands for the authenticated device."""
+    """Get all pending commands for the authenticated device.
+
+    With ``claim`` the commands are returned as SENT, claimed in the same
+    statement that reads them.
+    """
     db = await get_database_service()
-    commands = await db.get_pending_commands_for_device(
-        current_device.id  # type: ignore
+    device_pk = cast(int, current_device.id)
+    if claim:
+        commands = await db.claim_pending_commands_for_device(device_pk)
+        await _audit_claimed(current_device, commands)
+    else:
+        commands = await db.get_pending_commands_for_device(device_pk)
+    return [_command_response(cmd) for cmd in commands]
+
+
+# 2b. Long-poll Pending Commands (Device only)
+@router.get(
+    "/pending/wait",
+    response_model=List[CommandResponse],
+    dependencies=[Depends(rate_limit("commands"))],
+)
+async def wait_for_pending_commands(
+    timeout: Optional[float] = Query(
+        None,
+        ge=0,
+        le=MAX_LONG_POLL_SECONDS,
+        description="Seconds to hold the request open when nothing is pending",
+    ),
+    claim: bool = Query(
+        False,
+        description="Mark the returned commands SENT, so they need no ack",
+    ),
+    current_device: Device = Depends(get_current_device),
+    sync_db: SASession = Depends(get_db),
+) -> List[CommandResponse]:
+    """Long-poll variant of ``GET /pending`` for the authenticated device.
+
+    Returns immediately when commands are pending; otherwise holds the request
+    until a command is queued for the device or ``timeout`` elapses, then
+    returns whatever is pending (possibly an empty list). ``claim`` works as
+    on ``GET /pending``.
+    """
+    device_pk = cast(int, current_device.id)
+    wait_seconds = (
+        timeout if timeout is not None else get_settings().devices.long_poll_timeout
     )
-    return [
-        CommandResponse(
-            command_id=cmd.command_id,  # type: ignore
-            command_type=cmd.command_type,  # type: ignore
-            payload=cmd.payload,  # type: ignore
-            status=cmd.status,  # type: ignore
-            created_at=cmd.created_at.isoformat(),  # type: ignore
-        )
-        for cmd in commands
-    ]
+    # Release the auth session's connection before parking the request so an
+    # idle long-poll never pins a pooled connection (or a SQLite read lock).
+    sync_db.close()
+
+    db = await get_database_service()
+    fetch = (
+        db.claim_pending_commands_for_device
+        if claim
+        else db.get_pending_commands_for_device
+    )
+    hub = get_notification_hub()
+    with hub.subscribe(COMMANDS_CHANNEL, device_pk) as woken:
+        commands = await fetch(device_pk)
+        if not commands and wait_seconds > 0:
+            await hub.wait(woken, wait_seconds)
+            commands = await fetch(device_pk)
+
+    if claim:
+        await _audit_claimed(current_device, commands)
+    return [_command_response(cmd) for cmd in commands]
 
 
 # 3. Ack Command (Device only)
 @router.post(
     "/{device_id}/commands/{command_id}/ack",
     response_model=CommandResponse,
+    dependencies=[Depends(rate_limit("commands"))],
 )
 async def ack_command(
     device_id: str,
@@ -214,17 +402,15 @@ async def ack_command(
         },
     )
 
-    return CommandResponse(
-        command_id=updated.command_id,  # type: ignore
-        command_type=updated.command_type,  # type: ignore
-        payload=updated.payload,  # type: ignore
-        status=updated.status,  # type: ignore
-        created_at=updated.created_at.isoformat(),  # type: ignore
-    )
+    return _command_response(updated)
 
 
 # 4. Update Command Status (Device only)
-@router.put("/{command_id}/status", response_model=CommandResponse)
+@router.put(
+    "/{command_id}/status",
+    response_model=CommandResponse,
+    dependencies=[Depends(rate_limit("commands"))],
+)
 async def update_command_status(
     command_id: str,
     request: UpdateCommandStatusRequest,
@@ -275,13 +461,7 @@ async def update_command_status(
             },
         )
 
-    return CommandResponse(
-        command_id=updated_command.command_id,  # type: ignore
-        command_type=updated_command.command_type,  # type: ignore
-        payload=updated_command.payload,  # type: ignore
-        status=updated_command.status,  # type: ignore
-        created_at=updated_command.created_at.isoformat(),  # type: ignore
-    )
+    return _command_response(updated_command)
 
 
 # 5. Get Device Command History (User-facing)
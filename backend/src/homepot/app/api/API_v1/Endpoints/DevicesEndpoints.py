@@ -5,11 +5,13 @@ import logging
 from typing import Any, Dict, List, Optional, cast
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.security import HTTPAuthorizationCredentials
 import jwt
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import desc, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session as SASession
 from sqlalchemy.orm import joinedload
 
@@ -29,10 +31,20 @@ from homepot.app.auth_utils import (
 )
 from homepot.app.models import AnalyticsModel as analytics_models
 from homepot.app.schemas.permissions import os_family
+from homepot.app.utils.pagination import (
+    before_cursor,
+    jsonable,
+    next_cursor,
+    set_next_cursor,
+)
 from homepot.audit import AuditEventType, get_audit_logger
 from homepot.canonical_ids import generate_device_id
 from homepot.client import HomepotClient
-from homepot.database import get_database_service, get_db
+from homepot.database import (
+    get_database_service,
+    get_db,
+    is_device_name_conflict,
+)
 from homepot.models import (
     AuditLog,
     CommandStatus,
@@ -201,6 +213,18 @@ async def create_device(
 
     except HTTPException:
         raise
+    except IntegrityError as e:
+        if not is_device_name_conflict(e):
+            logger.error(f"Failed to create device: {e}", exc_info=True)
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to create device. Please check server logs.",
+            )
+        raise HTTPException(
+            status_code=409,
+            detail=f"Device name '{device_request.name}' is already in use in site "
+            f"'{device_request.site_id}'",
+        )
     except Exception as e:
         logger.error(f"Failed to create device: {e}", exc_info=True)
         raise HTTPException(
@@ -296,6 +320,16 @@ async def register_device_to_site(
         }
     except HTTPException:
         raise
+    except IntegrityError as e:
+        if not is_device_name_conflict(e):
+            raise HTTPException(
+                status_code=500, detail=f"Failed to register device: {str(e)}"
+            )
+        raise HTTPException(
+            status_code=409,
+            detail=f"Device name '{device_request.name}' is already in use in site "
+            f"'{site_id}'",
+        )
     except Exception as e:
         logger.error(f"Error registering device to site {site_id}: {str(e)}")
         raise HTTPException(
@@ -653,6 +687,8 @@ async def update_device(
 
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to update device {device_id}: {e}", exc_info=True)
         raise HTTPException(
@@ -866,40 +902,43 @@ async def unpair_device(
         device.is_active = False  # type: ignore[assignment]
         device.api_key_hash = None  # type: ignore[assignment]
         device.status = DeviceStatus.OFFLINE.value  # type: ignore[assignment]
-        # The device was loaded via get_device_by_device_id, whose session is
-        # already closed; merge the changes back into a fresh session so the
-        # state transition actually persists.
-        await db_service.persist_device(device)
 
         # ----- Audit event -----
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
 
         audit_logger = get_audit_logger()
-        await audit_logger.log_event(
-            AuditEventType.DEVICE_UNPAIRED,
-            f"Device '{device.name}' ({device.device_id}) unpaired by "
-            f"{current_user['email']}"
-            + (f" — {payload.reason}" if payload.reason else ""),
-            device_id=int(device.id),
-            site_id=int(device.site_id) if device.site_id else None,
-            user_id=int(db_user.id),
-            ip_address=ip_address,
-            user_agent=user_agent,
-            old_values={
-                "lifecycle_state": current_lifecycle,
-                "is_active": True,
-            },
-            new_values={
-                "lifecycle_state": LifecycleState.UNPAIRED.value,
-                "is_active": False,
-                "reason": payload.reason,
-            },
-            event_metadata={
-                "idempotency_key": payload.idempotency_key,
-                "unpair_endpoint": "POST /device/{device_id}/unpair",
-            },
-        )
+
+        # The device was loaded via get_device_by_device_id, whose session is
+        # already closed; merge the changes back into a fresh session, with
+        # the audit row, so the transition and its record commit as one.
+        async with db_service.get_session() as session:
+            await session.merge(device)
+            await audit_logger.log_event(
+                AuditEventType.DEVICE_UNPAIRED,
+                f"Device '{device.name}' ({device.device_id}) unpaired by "
+                f"{current_user['email']}"
+                + (f" — {payload.reason}" if payload.reason else ""),
+                device_id=int(device.id),
+                site_id=int(device.site_id) if device.site_id else None,
+                user_id=int(db_user.id),
+                ip_address=ip_address,
+                user_agent=user_agent,
+                old_values={
+                    "lifecycle_state": current_lifecycle,
+                    "is_active": True,
+                },
+                new_values={
+                    "lifecycle_state": LifecycleState.UNPAIRED.value,
+                    "is_active": False,
+                    "reason": payload.reason,
+                },
+                event_metadata={
+                    "idempotency_key": payload.idempotency_key,
+                    "unpair_endpoint": "POST /device/{device_id}/unpair",
+                },
+                session=session,
+            )
 
         logger.info(
             "Device unpaired: %s by %s (reason=%s)",
@@ -927,7 +966,7 @@ async def unpair_device(
 
 
 async def _record_lifecycle_event(
-    db_service: Any,
+    session: AsyncSession,
     device: Device,
     from_state: Optional[str],
     to_state: str,
@@ -936,20 +975,36 @@ async def _record_lifecycle_event(
     idempotency_key: Optional[str] = None,
     epoch_id: Optional[int] = None,
 ) -> None:
-    """Persist a DeviceLifecycleEvent row."""
-    async with db_service.get_session() as session:
-        event = DeviceLifecycleEvent(
-            event_id=str(uuid.uuid4()),
-            device_id=device.id,
-            epoch_id=epoch_id,
-            from_state=from_state,
-            to_state=to_state,
-            triggered_by_user_id=triggered_by_user_id,
-            reason=reason,
-            idempotency_key=idempotency_key,
+    """Add a DeviceLifecycleEvent row to the caller's transaction."""
+    event = DeviceLifecycleEvent(
+        event_id=str(uuid.uuid4()),
+        device_id=device.id,
+        epoch_id=epoch_id,
+        from_state=from_state,
+        to_state=to_state,
+        triggered_by_user_id=triggered_by_user_id,
+        reason=reason,
+        idempotency_key=idempotency_key,
+    )
+    session.add(event)
+    await session.flush()
+
+
+async def _merge_device(session: AsyncSession, device: Device) -> Device:
+    """Merge and flush ``device``, answering 409 if its name is taken."""
+    try:
+        # Flush explicitly below; merge's own autoflush would escape the check.
+        with session.no_autoflush:
+            merged = await session.merge(device)
+        await session.flush()
+    except IntegrityError as e:
+        if not is_device_name_conflict(e):
+            raise
+        raise HTTPException(
+            status_code=409,
+            detail=f"Device name '{device.name}' is already in use in this site",
         )
-        session.add(event)
-        await session.commit()
+    return merged
 
 
 class LifecycleTransitionRequest(BaseModel):
@@ -1050,38 +1105,40 @@ async def suspend_device(
         device.is_active = False  # type: ignore[assignment]
         device.status = DeviceStatus.OFFLINE.value  # type: ignore[assignment]
 
-        await db_service.persist_device(device)
-
-        await _record_lifecycle_event(
-            db_service,
-            device,
-            from_state=str(current_lifecycle),
-            to_state=LifecycleState.SUSPENDED.value,
-            triggered_by_user_id=int(db_user.id),
-            reason=payload.reason,
-            idempotency_key=payload.idempotency_key,
-        )
-
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
         audit_logger = get_audit_logger()
-        await audit_logger.log_event(
-            AuditEventType.DEVICE_SUSPENDED,
-            f"Device '{device.name}' ({device.device_id}) suspended by "
-            f"{current_user['email']}"
-            + (f" — {payload.reason}" if payload.reason else ""),
-            device_id=int(device.id),
-            site_id=int(device.site_id) if device.site_id else None,
-            user_id=int(db_user.id),
-            ip_address=ip_address,
-            user_agent=user_agent,
-            old_values={"lifecycle_state": current_lifecycle},
-            new_values={
-                "lifecycle_state": LifecycleState.SUSPENDED.value,
-                "reason": payload.reason,
-            },
-            event_metadata={"idempotency_key": payload.idempotency_key},
-        )
+
+        # The transition, its lifecycle event and its audit row commit together
+        async with db_service.get_session() as session:
+            await session.merge(device)
+            await _record_lifecycle_event(
+                session,
+                device,
+                from_state=str(current_lifecycle),
+                to_state=LifecycleState.SUSPENDED.value,
+                triggered_by_user_id=int(db_user.id),
+                reason=payload.reason,
+                idempotency_key=payload.idempotency_key,
+            )
+            await audit_logger.log_event(
+                AuditEventType.DEVICE_SUSPENDED,
+                f"Device '{device.name}' ({device.device_id}) suspended by "
+                f"{current_user['email']}"
+                + (f" — {payload.reason}" if payload.reason else ""),
+                device_id=int(device.id),
+                site_id=int(device.site_id) if device.site_id else None,
+                user_id=int(db_user.id),
+                ip_address=ip_address,
+                user_agent=user_agent,
+                old_values={"lifecycle_state": current_lifecycle},
+                new_values={
+                    "lifecycle_state": LifecycleState.SUSPENDED.value,
+                    "reason": payload.reason,
+                },
+                event_metadata={"idempotency_key": payload.idempotency_key},
+                session=session,
+            )
 
         logger.info("Device suspended: %s by %s", device_id, current_user["email"])
 
@@ -1154,38 +1211,41 @@ async def resume_device(
         device.is_active = True  # type: ignore[assignment]
         device.status = DeviceStatus.ONLINE.value  # type: ignore[assignment]
 
-        await db_service.persist_device(device)
-
-        await _record_lifecycle_event(
-            db_service,
-            device,
-            from_state=str(current_lifecycle),
-            to_state=LifecycleState.ACTIVE.value,
-            triggered_by_user_id=int(db_user.id),
-            reason=payload.reason,
-            idempotency_key=payload.idempotency_key,
-        )
-
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
         audit_logger = get_audit_logger()
-        await audit_logger.log_event(
-            AuditEventType.DEVICE_RESUMED,
-            f"Device '{device.name}' ({device.device_id}) resumed by "
-            f"{current_user['email']}"
-            + (f" — {payload.reason}" if payload.reason else ""),
-            device_id=int(device.id),
-            site_id=int(device.site_id) if device.site_id else None,
-            user_id=int(db_user.id),
-            ip_address=ip_address,
-            user_agent=user_agent,
-            old_values={"lifecycle_state": current_lifecycle},
-            new_values={
-                "lifecycle_state": LifecycleState.ACTIVE.value,
-                "reason": payload.reason,
-            },
-            event_metadata={"idempotency_key": payload.idempotency_key},
-        )
+
+        # The transition, its lifecycle event and its audit row commit together
+        async with db_service.get_session() as session:
+            # Another live device may have taken the name while this was unpaired
+            await _merge_device(session, device)
+            await _record_lifecycle_event(
+                session,
+                device,
+                from_state=str(current_lifecycle),
+                to_state=LifecycleState.ACTIVE.value,
+                triggered_by_user_id=int(db_user.id),
+                reason=payload.reason,
+                idempotency_key=payload.idempotency_key,
+            )
+            await audit_logger.log_event(
+                AuditEventType.DEVICE_RESUMED,
+                f"Device '{device.name}' ({device.device_id}) resumed by "
+                f"{current_user['email']}"
+                + (f" — {payload.reason}" if payload.reason else ""),
+                device_id=int(device.id),
+                site_id=int(device.site_id) if device.site_id else None,
+                user_id=int(db_user.id),
+                ip_address=ip_address,
+                user_agent=user_agent,
+                old_values={"lifecycle_state": current_lifecycle},
+                new_values={
+                    "lifecycle_state": LifecycleState.ACTIVE.value,
+                    "reason": payload.reason,
+                },
+                event_metadata={"idempotency_key": payload.idempotency_key},
+                session=session,
+            )
 
         logger.info("Device resumed: %s by %s", device_id, current_user["email"])
 
@@ -1255,10 +1315,16 @@ async def retire_device(
         device.api_key_hash = None  # type: ignore[assignment]
         device.status = DeviceStatus.OFFLINE.value  # type: ignore[assignment]
 
-        await db_service.persist_device(device)
+        ip_address = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+        audit_logger = get_audit_logger()
 
-        # Revoke active credentials
+        # Device, credentials, commands, epoch, lifecycle event and audit row
+        # all change in one transaction
         async with db_service.get_session() as session:
+            await session.merge(device)
+
+            # Revoke active credentials
             cred_result = await session.execute(
                 select(DeviceCredential).where(
                     DeviceCredential.device_id == device.id,
@@ -1269,8 +1335,7 @@ async def retire_device(
                 cred.is_active = False  # type: ignore[assignment]
                 cred.revoked_at = now  # type: ignore[assignment]
 
-        # Expire pending commands
-        async with db_service.get_session() as session:
+            # Expire pending commands
             cmd_result = await session.execute(
                 select(DeviceCommand).where(
                     DeviceCommand.device_id == device.id,
@@ -1282,9 +1347,8 @@ async def retire_device(
             for cmd in cmd_result.scalars().all():
                 cmd.status = CommandStatus.EXPIRED.value  # type: ignore[assignment]
 
-        # Close current epoch if open
-        if device.lifecycle_epoch_id:
-            async with db_service.get_session() as session:
+            # Close current epoch if open
+            if device.lifecycle_epoch_id:
                 epoch_result = await session.execute(
                     select(LifecycleEpoch).where(
                         LifecycleEpoch.id == device.lifecycle_epoch_id
@@ -1294,37 +1358,34 @@ async def retire_device(
                 if epoch and not epoch.ended_at:
                     epoch.ended_at = now  # type: ignore[assignment]
 
-        await _record_lifecycle_event(
-            db_service,
-            device,
-            from_state=str(current_lifecycle),
-            to_state=LifecycleState.UNPAIRED.value,
-            triggered_by_user_id=int(db_user.id),
-            reason=payload.reason,
-            idempotency_key=payload.idempotency_key,
-        )
-
-        ip_address = request.client.host if request.client else None
-        user_agent = request.headers.get("user-agent")
-        audit_logger = get_audit_logger()
-        await audit_logger.log_event(
-            AuditEventType.DEVICE_UNPAIRED,
-            f"Device '{device.name}' ({device.device_id}) unpaired by "
-            f"{current_user['email']}"
-            + (f" — {payload.reason}" if payload.reason else ""),
-            device_id=int(device.id),
-            site_id=int(device.site_id) if device.site_id else None,
-            user_id=int(db_user.id),
-            ip_address=ip_address,
-            user_agent=user_agent,
-            old_values={"lifecycle_state": current_lifecycle, "is_active": True},
-            new_values={
-                "lifecycle_state": LifecycleState.UNPAIRED.value,
-                "is_active": False,
-                "reason": payload.reason,
-            },
-            event_metadata={"idempotency_key": payload.idempotency_key},
-        )
+            await _record_lifecycle_event(
+                session,
+                device,
+                from_state=str(current_lifecycle),
+                to_state=LifecycleState.UNPAIRED.value,
+                triggered_by_user_id=int(db_user.id),
+                reason=payload.reason,
+                idempotency_key=payload.idempotency_key,
+            )
+            await audit_logger.log_event(
+                AuditEventType.DEVICE_UNPAIRED,
+                f"Device '{device.name}' ({device.device_id}) unpaired by "
+                f"{current_user['email']}"
+                + (f" — {payload.reason}" if payload.reason else ""),
+                device_id=int(device.id),
+                site_id=int(device.site_id) if device.site_id else None,
+                user_id=int(db_user.id),
+                ip_address=ip_address,
+                user_agent=user_agent,
+                old_values={"lifecycle_state": current_lifecycle, "is_active": True},
+                new_values={
+                    "lifecycle_state": LifecycleState.UNPAIRED.value,
+                    "is_active": False,
+                    "reason": payload.reason,
+                },
+                event_metadata={"idempotency_key": payload.idempotency_key},
+                session=session,
+            )
 
         logger.info("Device unpaired: %s by %s", device_id, current_user["email"])
 
@@ -1398,10 +1459,24 @@ async def reenrol_device(
 
         now = datetime.now(timezone.utc)
 
-        # If the device is being re-enrolled to a different site, close
-        # the old assignment and create a new one
-        if device.site_id != site.id:
-            async with db_service.get_session() as session:
+        # Hash the new credential before the write transaction starts
+        import secrets
+
+        from homepot.app.auth_utils import hash_password
+
+        new_api_key = secrets.token_urlsafe(32)
+        new_key_hash = hash_password(new_api_key)
+
+        ip_address = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+        audit_logger = get_audit_logger()
+
+        # Assignment, device, epoch, credential, lifecycle event and audit row
+        # commit together, so a rejected name leaves nothing half-applied.
+        async with db_service.get_session() as session:
+            # If the device is being re-enrolled to a different site, close
+            # the old assignment and create a new one
+            if device.site_id != site.id:
                 old_assignment_result = await session.execute(
                     select(DeviceAssignment).where(
                         DeviceAssignment.device_id == device.id,
@@ -1423,15 +1498,18 @@ async def reenrol_device(
                 )
                 session.add(new_assignment)
 
-        # Update device
-        device.site_id = int(site.id)  # type: ignore[assignment]
-        if payload.device_name:
-            device.name = payload.device_name  # type: ignore[assignment]
-        device.lifecycle_state = LifecycleState.ACTIVE.value  # type: ignore[assignment]
-        device.is_active = True  # type: ignore[assignment]
+            # Update device
+            device.site_id = int(site.id)  # type: ignore[assignment]
+            if payload.device_name:
+                device.name = payload.device_name  # type: ignore[assignment]
+            device.lifecycle_state = (
+                LifecycleState.ACTIVE.value  # type: ignore[assignment]
+            )
+            device.is_active = True  # type: ignore[assignment]
+            device.api_key_hash = new_key_hash  # type: ignore[assignment]
+            device = await _merge_device(session, device)
 
-        # Create new lifecycle epoch
-        async with db_service.get_session() as session:
+            # Create new lifecycle epoch
             new_epoch = LifecycleEpoch(
                 epoch_id=str(uuid.uuid4()),
                 device_id=device.id,
@@ -1443,57 +1521,44 @@ async def reenrol_device(
             await session.flush()
             device.lifecycle_epoch_id = new_epoch.id  # type: ignore[assignment]
 
-        # Issue new credential
-        import secrets
-
-        from homepot.app.auth_utils import hash_password
-
-        new_api_key = secrets.token_urlsafe(32)
-        new_key_hash = hash_password(new_api_key)
-
-        async with db_service.get_session() as session:
-            new_credential = DeviceCredential(
-                credential_id=str(uuid.uuid4()),
-                device_id=device.id,
-                key_hash=new_key_hash,
-                is_active=True,
+            # Issue new credential
+            session.add(
+                DeviceCredential(
+                    credential_id=str(uuid.uuid4()),
+                    device_id=device.id,
+                    key_hash=new_key_hash,
+                    is_active=True,
+                )
             )
-            session.add(new_credential)
-        device.api_key_hash = new_key_hash  # type: ignore[assignment]
-
-        await db_service.persist_device(device)
-
-        await _record_lifecycle_event(
-            db_service,
-            device,
-            from_state=str(current_lifecycle),
-            to_state=LifecycleState.ACTIVE.value,
-            triggered_by_user_id=int(db_user.id),
-            reason=payload.reason or "re-enrolment",
-            idempotency_key=payload.idempotency_key,
-        )
 
-        ip_address = request.client.host if request.client else None
-        user_agent = request.headers.get("user-agent")
-        audit_logger = get_audit_logger()
-        await audit_logger.log_event(
-            AuditEventType.DEVICE_RE_ENROLLED,
-            f"Device '{device.name}' ({device.device_id}) re-enrolled to site "
-            f"'{payload.site_id}' by {current_user['email']}"
-            + (f" — {payload.reason}" if payload.reason else ""),
-            device_id=int(device.id),
-            site_id=int(site.id),
-            user_id=int(db_user.id),
-            ip_address=ip_address,
-            user_agent=user_agent,
-            old_values={"lifecycle_state": current_lifecycle},
-            new_values={
-                "lifecycle_state": LifecycleState.ACTIVE.value,
-                "site_id": payload.site_id,
-                "reason": payload.reason,
-            },
-            event_metadata={"idempotency_key": payload.idempotency_key},
-        )
+            await _record_lifecycle_event(
+                session,
+                device,
+                from_state=str(current_lifecycle),
+                to_state=LifecycleState.ACTIVE.value,
+                triggered_by_user_id=int(db_user.id),
+                reason=payload.reason or "re-enrolment",
+                idempotency_key=payload.idempotency_key,
+            )
+            await audit_logger.log_event(
+                AuditEventType.DEVICE_RE_ENROLLED,
+                f"Device '{device.name}' ({device.device_id}) re-enrolled to site "
+                f"'{payload.site_id}' by {current_user['email']}"
+                + (f" — {payload.reason}" if payload.reason else ""),
+                device_id=int(device.id),
+                site_id=int(site.id),
+                user_id=int(db_user.id),
+                ip_address=ip_address,
+                user_agent=user_agent,
+                old_values={"lifecycle_state": current_lifecycle},
+                new_values={
+                    "lifecycle_state": LifecycleState.ACTIVE.value,
+                    "site_id": payload.site_id,
+                    "reason": payload.reason,
+                },
+                event_metadata={"idempotency_key": payload.idempotency_key},
+                session=session,
+            )
 
         logger.info(
             "Device re-enrolled: %s -> site %s by %s",
@@ -1586,8 +1651,23 @@ async def transfer_device(
 
         now = datetime.now(timezone.utc)
 
-        # Close current assignment
+        # Hash the new credential before the write transaction starts
+        import secrets
+
+        from homepot.app.auth_utils import hash_password
+
+        new_api_key = secrets.token_urlsafe(32)
+        new_key_hash = hash_password(new_api_key)
+
+        ip_address = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+        audit_logger = get_audit_logger()
+        old_site_id = str(device.site_id)
+
+        # Assignments, epochs, credentials, device, lifecycle event and audit
+        # row commit together, so a rejected name leaves nothing half-applied.
         async with db_service.get_session() as session:
+            # Close current assignment
             current_assignment_result = await session.execute(
                 select(DeviceAssignment).where(
                     DeviceAssignment.device_id == device.id,
@@ -1610,9 +1690,8 @@ async def transfer_device(
             )
             session.add(new_assignment)
 
-        # Close current epoch
-        if device.lifecycle_epoch_id:
-            async with db_service.get_session() as session:
+            # Close current epoch
+            if device.lifecycle_epoch_id:
                 epoch_result = await session.execute(
                     select(LifecycleEpoch).where(
                         LifecycleEpoch.id == device.lifecycle_epoch_id
@@ -1622,14 +1701,16 @@ async def transfer_device(
                 if current_epoch and not current_epoch.ended_at:
                     current_epoch.ended_at = now  # type: ignore[assignment]
 
-        # Update device
-        old_site_id = str(device.site_id)
-        device.site_id = int(target_site.id)  # type: ignore[assignment]
-        device.lifecycle_state = LifecycleState.ACTIVE.value  # type: ignore[assignment]
-        device.is_active = True  # type: ignore[assignment]
+            # Update device
+            device.site_id = int(target_site.id)  # type: ignore[assignment]
+            device.lifecycle_state = (
+                LifecycleState.ACTIVE.value  # type: ignore[assignment]
+            )
+            device.is_active = True  # type: ignore[assignment]
+            device.api_key_hash = new_key_hash  # type: ignore[assignment]
+            device = await _merge_device(session, device)
 
-        # Create new epoch
-        async with db_service.get_session() as session:
+            # Create new epoch
             new_epoch = LifecycleEpoch(
                 epoch_id=str(uuid.uuid4()),
                 device_id=device.id,
@@ -1641,8 +1722,7 @@ async def transfer_device(
             await session.flush()
             device.lifecycle_epoch_id = new_epoch.id  # type: ignore[assignment]
 
-        # Revoke old credentials
-        async with db_service.get_session() as session:
+            # Revoke old credentials
             cred_result = await session.execute(
                 select(DeviceCredential).where(
                     DeviceCredential.device_id == device.id,
@@ -1653,61 +1733,48 @@ async def transfer_device(
                 cred.is_active = False  # type: ignore[assignment]
                 cred.revoked_at = now  # type: ignore[assignment]
 
-        # Issue new credential
-        import secrets
-
-        from homepot.app.auth_utils import hash_password
-
-        new_api_key = secrets.token_urlsafe(32)
-        new_key_hash = hash_password(new_api_key)
-
-        async with db_service.get_session() as session:
-            new_credential = DeviceCredential(
-                credential_id=str(uuid.uuid4()),
-                device_id=device.id,
-                key_hash=new_key_hash,
-                is_active=True,
+            # Issue new credential
+            session.add(
+                DeviceCredential(
+                    credential_id=str(uuid.uuid4()),
+                    device_id=device.id,
+                    key_hash=new_key_hash,
+                    is_active=True,
+                )
             )
-            session.add(new_credential)
-        device.api_key_hash = new_key_hash  # type: ignore[assignment]
-
-        await db_service.persist_device(device)
-
-        await _record_lifecycle_event(
-            db_service,
-            device,
-            from_state=str(current_lifecycle),
-            to_state=LifecycleState.ACTIVE.value,
-            triggered_by_user_id=int(db_user.id),
-            reason=payload.reason or "transfer",
-            idempotency_key=payload.idempotency_key,
-        )
 
-        ip_address = request.client.host if request.client else None
-        user_agent = request.headers.get("user-agent")
-        audit_logger = get_audit_logger()
-        await audit_logger.log_event(
-            AuditEventType.DEVICE_TRANSFERRED,
-            f"Device '{device.name}' ({device.device_id}) transferred from site "
-            f"'{old_site_id}' to '{payload.target_site_id}' by "
-            f"{current_user['email']}"
-            + (f" — {payload.reason}" if payload.reason else ""),
-            device_id=int(device.id),
-            site_id=int(target_site.id),
-            user_id=int(db_user.id),
-            ip_address=ip_address,
-            user_agent=user_agent,
-            old_values={
-                "lifecycle_state": current_lifecycle,
-                "site_id": old_site_id,
-            },
-            new_values={
-                "lifecycle_state": LifecycleState.ACTIVE.value,
-                "site_id": payload.target_site_id,
-                "reason": payload.reason,
-            },
-            event_metadata={"idempotency_key": payload.idempotency_key},
-        )
+            await _record_lifecycle_event(
+                session,
+                device,
+                from_state=str(current_lifecycle),
+                to_state=LifecycleState.ACTIVE.value,
+                triggered_by_user_id=int(db_user.id),
+                reason=payload.reason or "transfer",
+                idempotency_key=payload.idempotency_key,
+            )
+            await audit_logger.log_event(
+                AuditEventType.DEVICE_TRANSFERRED,
+                f"Device '{device.name}' ({device.device_id}) transferred from site "
+                f"'{old_site_id}' to '{payload.target_site_id}' by "
+                f"{current_user['email']}"
+                + (f" — {payload.reason}" if payload.reason else ""),
+                device_id=int(device.id),
+                site_id=int(target_site.id),
+                user_id=int(db_user.id),
+                ip_address=ip_address,
+                user_agent=user_agent,
+                old_values={
+                    "lifecycle_state": current_lifecycle,
+                    "site_id": old_site_id,
+                },
+                new_values={
+                    "lifecycle_state": LifecycleState.ACTIVE.value,
+                    "site_id": payload.target_site_id,
+                    "reason": payload.reason,
+                },
+                event_metadata={"idempotency_key": payload.idempotency_key},
+                session=session,
+            )
 
         logger.info(
             "Device transferred: %s -> site %s by %s",
@@ -1942,11 +2009,20 @@ async def get_device_metrics(
 @router.get("/device/{device_id}/audit-logs", tags=["Devices"])
 async def get_device_audit_logs(
     device_id: str,
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    event_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: SASession = Depends(get_db),
     current_user: UserDict = Depends(require_user()),
 ) -> List[Dict[str, Any]]:
-    """Get audit logs for a specific device."""
+    """Get audit logs for a specific device, newest first.
+
+    When more rows exist, the cursor of the next page is returned in the
+    ``X-Next-Cursor`` header; pass it back as ``cursor``.
+    """
     try:
         db_user = cast(
             User, db.query(User).filter(User.email == current_user["email"]).first()
@@ -1962,26 +2038,37 @@ async def get_device_audit_logs(
                 raise HTTPException(status_code=404, detail="Device not found")
             verify_device_belongs_to_user(db_user, device, db)
 
+            conditions = [AuditLog.device_id == device.id]
+            if event_type:
+                conditions.append(AuditLog.event_type == event_type)
+            if since:
+                conditions.append(AuditLog.created_at >= since)
+            if until:
+                conditions.append(AuditLog.created_at < until)
+            keyset = before_cursor(AuditLog.created_at, AuditLog.id, cursor)
+            if keyset is not None:
+                conditions.append(keyset)
+
             # Fetch logs
             logs_result = await session.execute(
-                select(AuditLog)
-                .where(AuditLog.device_id == device.id)
-                .order_by(desc(AuditLog.created_at))
+                select(
+                    AuditLog.id,
+                    AuditLog.event_type,
+                    AuditLog.description,
+                    AuditLog.created_at,
+                    AuditLog.user_id,
+                    AuditLog.ip_address,
+                )
+                .where(*conditions)
+                .order_by(desc(AuditLog.created_at), desc(AuditLog.id))
                 .limit(limit)
             )
-            logs = logs_result.scalars().all()
+            logs = [dict(row) for row in logs_result.mappings()]
 
-            return [
-                {
-                    "id": log.id,
-                    "event_type": log.event_type,
-                    "description": log.description,
-                    "created_at": log.created_at.isoformat(),
-                    "user_id": log.user_id,
-                    "ip_address": log.ip_address,
-                }
-                for log in logs
-            ]
+        set_next_cursor(response, next_cursor(logs, limit, "created_at", "id"))
+        return [jsonable(log) for log in logs]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
 
@@ -2040,11 +2127,18 @@ async def get_device_jobs(
 @router.get("/device/{device_id}/error-logs", tags=["Devices"])
 async def get_device_error_logs(
     device_id: str,
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
     db: SASession = Depends(get_db),
     current_user: UserDict = Depends(require_user()),
 ) -> List[Dict[str, Any]]:
-    """Get error logs for a specific device."""
+    """Get error logs for a specific device, newest first.
+
+    Paginated like the device audit logs (``cursor`` / ``X-Next-Cursor``).
+    """
     try:
         from sqlalchemy import String as SA_String
         from sqlalchemy import cast as sa_cast
@@ -2055,6 +2149,16 @@ async def get_device_error_logs(
         if not db_user_opt:
             raise HTTPException(status_code=403, detail="User not found")
         db_user: User = db_user_opt  # type: ignore[assignment]
+        ErrorLog = analytics_models.ErrorLog
+        conditions = []
+        if since:
+            conditions.append(ErrorLog.timestamp >= since)
+        if until:
+            conditions.append(ErrorLog.timestamp < until)
+        keyset = before_cursor(ErrorLog.timestamp, ErrorLog.id, cursor)
+        if keyset is not None:
+            conditions.append(keyset)
+
         db_service = await get_database_service()
         async with db_service.get_session() as session:
             dev_result = await session.execute(
@@ -2064,94 +2168,120 @@ async def get_device_error_logs(
             if dev:
                 verify_device_belongs_to_user(db_user, dev, db)
 
-            # Query using the context JSON column since device_id column was removed
-            errors_result = await session.execute(
-                select(analytics_models.ErrorLog)
-                .where(
-                    sa_cast(
-                        analytics_models.ErrorLog.context["original_device_id"],
-                        SA_String,
-                    )
-                    == f'"{device_id}"'
-                )
-                .order_by(desc(analytics_models.ErrorLog.timestamp))
-                .limit(limit)
-            )
-            # Fallback: check unquoted match if the cast result doesn't include quotes
-            errors = errors_result.scalars().all()
-            if not errors:
+            async def fetch(match: str) -> List[Dict[str, Any]]:
+                # Query using the context JSON column since device_id column was removed
                 errors_result = await session.execute(
-                    select(analytics_models.ErrorLog)
+                    select(
+                        ErrorLog.id,
+                        ErrorLog.timestamp,
+                        ErrorLog.category,
+                        ErrorLog.severity,
+                        ErrorLog.error_code,
+                        ErrorLog.error_message,
+                        ErrorLog.resolved,
+                        ErrorLog.context,
+                    )
                     .where(
-                        sa_cast(
-                            analytics_models.ErrorLog.context["original_device_id"],
-                            SA_String,
-                        )
-                        == device_id
+                        sa_cast(ErrorLog.context["original_device_id"], SA_String)
+                        == match,
+                        *conditions,
                     )
-                    .order_by(desc(analytics_models.ErrorLog.timestamp))
+                    .order_by(desc(ErrorLog.timestamp), desc(ErrorLog.id))
                     .limit(limit)
                 )
-                errors = errors_result.scalars().all()
+                return [dict(row) for row in errors_result.mappings()]
 
-            return [
-                {
-                    "timestamp": e.timestamp.isoformat(),
-                    "category": e.category,
-                    "severity": e.severity,
-                    "error_code": e.error_code,
-                    "error_message": e.error_message,
-                    "resolved": e.resolved,
-                    "context": e.context,
-                }
-                for e in errors
-            ]
+            errors = await fetch(f'"{device_id}"')
+            # Fallback: check unquoted match if the cast result doesn't include quotes
+            if not errors:
+                errors = await fetch(device_id)
+
+        set_next_cursor(response, next_cursor(errors, limit, "timestamp", "id"))
+        return [jsonable(error) for error in errors]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get error logs for {device_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
 @router.get("/device/{device_id}/push-logs", tags=["Devices"])
-async def get_device_push_logs(device_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-    """Get push notification delivery logs for a specific device."""
-    try:
-        from sqlalchemy import select
+async def get_device_push_logs(
+    device_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Get push notification delivery logs for a specific device, newest first.
 
+    Paginated like the device audit logs (``cursor`` / ``X-Next-Cursor``).
+    """
+    try:
         from homepot.app.models.AnalyticsModel import PushNotificationLog
 
+        conditions = [PushNotificationLog.device_id == device_id]
+        if since:
+            conditions.append(PushNotificationLog.sent_at >= since)
+        if until:
+            conditions.append(PushNotificationLog.sent_at < until)
+        keyset = before_cursor(
+            PushNotificationLog.sent_at, PushNotificationLog.id, cursor
+        )
+        if keyset is not None:
+            conditions.append(keyset)
+
         db_service = await get_database_service()
         async with db_service.get_session() as session:
             logs_result = await session.execute(
-                select(PushNotificationLog)
-                .where(PushNotificationLog.device_id == device_id)
-                .order_by(PushNotificationLog.sent_at.desc())
+                select(
+                    PushNotificationLog.id,
+                    PushNotificationLog.message_id,
+                    PushNotificationLog.provider,
+                    PushNotificationLog.status,
+                    PushNotificationLog.payload,
+                    PushNotificationLog.sent_at,
+                    PushNotificationLog.received_at,
+                    PushNotificationLog.latency_ms,
+                    PushNotificationLog.error_message,
+                )
+                .where(*conditions)
+                .order_by(
+                    PushNotificationLog.sent_at.desc(), PushNotificationLog.id.desc()
+                )
                 .limit(limit)
             )
-            logs = logs_result.scalars().all()
+            logs = [dict(row) for row in logs_result.mappings()]
 
+        set_next_cursor(response, next_cursor(logs, limit, "sent_at", "id"))
         return [
             {
-                "message_id": log.message_id,
-                "provider": log.provider,
-                "status": log.status,
+                "message_id": log["message_id"],
+                "provider": log["provider"],
+                "status": log["status"],
                 "title": payload.get("title", ""),
                 "body": payload.get("body", ""),
-                "sent_at": log.sent_at.isoformat() if log.sent_at else None,
+                "sent_at": log["sent_at"].isoformat() if log["sent_at"] else None,
                 "received_at": (
-                    log.received_at.isoformat() if log.received_at else None
+                    log["received_at"].isoformat() if log["received_at"] else None
                 ),
-                "latency_ms": log.latency_ms,
-                "error_message": log.error_message,
+                "latency_ms": log["latency_ms"],
+                "error_message": log["error_message"],
             }
             for log in logs
             for payload in [
                 (
-                    log.payload
-                    if isinstance(log.payload, dict)
-                    else ({} if log.payload is None else {"data": log.payload})
+                    log["payload"]
+                    if isinstance(log["payload"], dict)
+                    else ({} if log["payload"] is None else {"data": log["payload"]})
                 )
             ]
         ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to get push logs for {device_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal Server Error")
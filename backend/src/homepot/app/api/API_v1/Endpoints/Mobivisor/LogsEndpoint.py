@@ -1,14 +1,16 @@
 """Mobivisor Logs endpoint.
 
 Proxies the Mobivisor debug logs endpoint (`/debuglogs`) so internal
-clients can request diagnostic log dumps for troubleshooting.
+clients can request diagnostic log dumps for troubleshooting, and reports
+the proxy's own cache and upstream latency statistics (`/proxy-stats`).
 """
 
 import logging
-from typing import Any
+from typing import Any, Dict
 
 from fastapi import APIRouter, HTTPException
 
+from homepot.app.utils.mobivisor_client import get_mobivisor_client
 from homepot.app.utils.mobivisor_request import (
     _handle_mobivisor_response as handle_mobivisor_response,
 )
@@ -52,3 +54,12 @@ async def fetch_mobivisor_debug_logs() -> Any:
 
     response = await make_mobivisor_request("GET", "debuglogs", config=config)
     return handle_mobivisor_response(response, "fetch debug logs")
+
+
+@router.get("/proxy-stats", tags=["Mobivisor Logs"])
+async def fetch_mobivisor_proxy_stats() -> Dict[str, Any]:
+    """Report the Mobivisor proxy's cache hit rates and upstream latency.
+
+    Served locally; Mobivisor is not contacted.
+    """
+    return get_mobivisor_client().stats()
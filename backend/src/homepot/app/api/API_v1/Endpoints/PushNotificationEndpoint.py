@@ -9,14 +9,21 @@ import logging
 from typing import Any, Dict, List, Optional
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
 
 from homepot.app.auth_utils import get_current_device
 from homepot.app.models.AnalyticsModel import PushNotificationLog
 from homepot.audit import AuditEventType, get_audit_logger
-from homepot.database import get_database_service
+from homepot.config import get_settings
+from homepot.database import get_database_service, get_db
 from homepot.models import Device
+from homepot.notification_hub import (
+    MAX_LONG_POLL_SECONDS,
+    PUSH_CHANNEL,
+    get_notification_hub,
+)
 from homepot.push_notifications.factory import PushNotificationProvider
 
 # Configure logging
@@ -566,6 +573,35 @@ async def acknowledge_push_notification(ack_request: PushAckRequest) -> Dict[str
         }
 
 
+async def _fetch_pending_pushes(device_id: str) -> List[Dict[str, Any]]:
+    """Return undelivered (``sent``) push log entries for ``device_id``."""
+    from sqlalchemy import select
+
+    db_service = await get_database_service()
+    async with db_service.get_session() as session:
+        result = await session.execute(
+            select(PushNotificationLog)
+            .where(
+                PushNotificationLog.device_id == device_id,
+                PushNotificationLog.status == "sent",
+            )
+            .order_by(PushNotificationLog.sent_at.asc())
+            .limit(50)
+        )
+        pushes = result.scalars().all()
+
+    return [
+        {
+            "message_id": p.message_id,
+            "provider": p.provider,
+            "payload": p.payload,
+            "sent_at": p.sent_at.isoformat() if p.sent_at else None,
+            "status": p.status,
+        }
+        for p in pushes
+    ]
+
+
 @router.get("/pending", tags=["Push Notifications"])
 async def get_pending_pushes(
     current_device: Device = Depends(get_current_device),
@@ -576,34 +612,47 @@ async def get_pending_pushes(
     been received/displayed, advancing the delivery lifecycle (sent -> delivered).
     """
     try:
-        from sqlalchemy import select
+        pushes = await _fetch_pending_pushes(current_device.device_id)
+        return {"device_id": current_device.device_id, "pushes": pushes}
+    except Exception as e:
+        logger.error(f"Failed to fetch pending pushes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch pending pushes",
+        )
 
-        db_service = await get_database_service()
-        async with db_service.get_session() as session:
-            result = await session.execute(
-                select(PushNotificationLog)
-                .where(
-                    PushNotificationLog.device_id == current_device.device_id,
-                    PushNotificationLog.status == "sent",
-                )
-                .order_by(PushNotificationLog.sent_at.asc())
-                .limit(50)
-            )
-            pushes = result.scalars().all()
 
-        return {
-            "device_id": current_device.device_id,
-            "pushes": [
-                {
-                    "message_id": p.message_id,
-                    "provider": p.provider,
-                    "payload": p.payload,
-                    "sent_at": p.sent_at.isoformat() if p.sent_at else None,
-                    "status": p.status,
-                }
-                for p in pushes
-            ],
-        }
+@router.get("/pending/wait", tags=["Push Notifications"])
+async def wait_for_pending_pushes(
+    timeout: Optional[float] = Query(
+        None,
+        ge=0,
+        le=MAX_LONG_POLL_SECONDS,
+        description="Seconds to hold the request open when nothing is pending",
+    ),
+    current_device: Device = Depends(get_current_device),
+    sync_db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Long-poll variant of ``GET /pending`` for the authenticated device.
+
+    Returns immediately when pushes are waiting; otherwise holds the request
+    until a push is persisted for the device or ``timeout`` elapses.
+    """
+    device_id = current_device.device_id
+    wait_seconds = (
+        timeout if timeout is not None else get_settings().devices.long_poll_timeout
+    )
+    # Release the auth session's connection before parking the request.
+    sync_db.close()
+
+    hub = get_notification_hub()
+    try:
+        with hub.subscribe(PUSH_CHANNEL, device_id) as woken:
+            pushes = await _fetch_pending_pushes(device_id)
+            if not pushes and wait_seconds > 0:
+                await hub.wait(woken, wait_seconds)
+                pushes = await _fetch_pending_pushes(device_id)
+        return {"device_id": device_id, "pushes": pushes}
     except Exception as e:
         logger.error(f"Failed to fetch pending pushes: {e}")
         raise HTTPException(
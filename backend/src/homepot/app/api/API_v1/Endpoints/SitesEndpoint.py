@@ -9,6 +9,7 @@ from pydantic import BaseModel, ConfigDict
 from sqlalchemy import select
 from sqlalchemy.orm import Session as SASession
 
+from homepot.analytics_rollups import delete_logs
 from homepot.app.auth_utils import (
     UserDict,
     get_accessible_site_ids,
@@ -536,9 +537,9 @@ async def delete_site(
                 )
 
             if device_str_ids:
-                # Job Outcomes (linked to devices)
-                await session.execute(
-                    delete(JobOutcome).where(JobOutcome.device_id.in_(device_str_ids))
+                # Job Outcomes (linked to devices), with their rollup counts
+                await session.run_sync(
+                    delete_logs, JobOutcome, JobOutcome.device_id.in_(device_str_ids)
                 )
                 # Configuration History (linked to devices)
                 await session.execute(
@@ -576,11 +577,11 @@ async def delete_site(
                 )
             )
             # API Request Logs (Best effort: matching endpoint path)
-            # Deletes logs like /api/v1/sites/site-123...
-            await session.execute(
-                delete(APIRequestLog).where(
-                    APIRequestLog.endpoint.like(f"%/{site_str_id}%")
-                )
+            # Deletes logs like /api/v1/sites/site-123... and their rollup counts
+            await session.run_sync(
+                delete_logs,
+                APIRequestLog,
+                APIRequestLog.endpoint.like(f"%/{site_str_id}%"),
             )
 
             # --- PHASE 3: Clean up Core Relational Data ---
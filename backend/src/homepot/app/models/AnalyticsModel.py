@@ -104,6 +104,7 @@ class JobOutcome(Base):
     __table_args__ = (
         Index("idx_job_status", "job_type", "status"),
         Index("idx_timestamp_status", "timestamp", "status"),
+        Index("idx_job_outcome_device_timestamp", "device_id", "timestamp"),
     )
 
 
@@ -208,6 +209,39 @@ class DeviceMetrics(Base):
     )
 
 
+class DeviceAnomalyState(Base):
+    """Latest anomaly score per device, maintained incrementally.
+
+    Written by the micro-batch consumer in ``ai/anomaly_state.py`` as new
+    ``device_metrics`` and ``health_checks`` rows arrive, so reading current
+    anomalies is an indexed lookup instead of a scan over the fleet.
+    """
+
+    __tablename__ = "device_anomaly_state"
+
+    device_id = Column(Integer, ForeignKey("devices.id"), primary_key=True)
+
+    # Current assessment
+    score = Column(Float, nullable=False, default=0.0)
+    severity = Column(String(20), nullable=True)  # critical, warning
+    reasons = Column(JSON, nullable=True)
+    metrics = Column(JSON, nullable=True)  # Inputs the score was computed from
+
+    # Health-check derived signals
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    flapping_count = Column(Integer, nullable=False, default=0)
+    last_healthy = Column(Boolean, nullable=True)
+    # ISO timestamps of healthy/unhealthy transitions inside the window
+    transitions = Column(JSON, nullable=True)
+
+    # Consumer bookkeeping: newest source rows folded into this state
+    last_metric_id = Column(Integer, nullable=True)
+    last_health_check_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=utc_now)
+
+    __table_args__ = (Index("idx_device_anomaly_state_score", "score"),)
+
+
 class ConfigurationHistory(Base):
     """Track configuration changes and their impact for AI learning."""
 
@@ -311,6 +345,8 @@ class PushNotificationLog(Base):
         Index("idx_push_message_id", "message_id"),
         Index("idx_push_device", "device_id"),
         Index("idx_push_status", "status"),
+        Index("idx_push_sent_at_status", "sent_at", "status"),
+        Index("idx_push_device_sent_at", "device_id", "sent_at"),
     )
 
 
@@ -350,3 +386,84 @@ class Alert(Base):
         Index("idx_alert_status_severity", "status", "severity"),
         Index("idx_alert_device", "device_id"),
     )
+
+
+# Rollups of the log tables. The request, error and job rollups are kept up
+# to date as log rows are written (homepot.analytics_rollups); the device
+# state rollup is written by homepot.retention before raw rows expire.
+# hour_start and minute_start are naive UTC.
+
+
+class APIRequestMinutely(Base):
+    """API request counts and latency per endpoint, minute and latency bin.
+
+    ``latency_bin`` indexes a log-scale histogram of response times (see
+    ``homepot.analytics_rollups.latency_bin``).
+    """
+
+    __tablename__ = "api_request_minutely"
+
+    minute_start = Column(DateTime, primary_key=True)
+    endpoint = Column(String(255), primary_key=True)
+    method = Column(String(10), primary_key=True)
+    latency_bin = Column(Integer, primary_key=True)
+    request_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)  # status >= 400
+    total_response_time_ms = Column(Float, nullable=False, default=0.0)
+    min_response_time_ms = Column(Float, nullable=True)
+    max_response_time_ms = Column(Float, nullable=True)
+
+
+class APIRequestHourly(Base):
+    """API request counts and latency per endpoint, hour and latency bin.
+
+    Rows rolled up before request latencies were binned have bin -1.
+    """
+
+    __tablename__ = "api_request_hourly"
+
+    hour_start = Column(DateTime, primary_key=True)
+    endpoint = Column(String(255), primary_key=True)
+    method = Column(String(10), primary_key=True)
+    latency_bin = Column(Integer, primary_key=True)
+    request_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)  # status >= 400
+    total_response_time_ms = Column(Float, nullable=False, default=0.0)
+    min_response_time_ms = Column(Float, nullable=True)
+    max_response_time_ms = Column(Float, nullable=True)
+
+
+class ErrorLogHourly(Base):
+    """Error counts per category, severity and hour."""
+
+    __tablename__ = "error_log_hourly"
+
+    hour_start = Column(DateTime, primary_key=True)
+    category = Column(String(50), primary_key=True)
+    severity = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class JobOutcomeHourly(Base):
+    """Job outcome counts and durations per job type, status and hour."""
+
+    __tablename__ = "job_outcome_hourly"
+
+    hour_start = Column(DateTime, primary_key=True)
+    job_type = Column(String(100), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    # Outcomes with a duration, and their total, for averages
+    timed_count = Column(Integer, nullable=False, default=0)
+    total_duration_ms = Column(Float, nullable=False, default=0.0)
+
+
+class DeviceStateHourly(Base):
+    """Device state transitions per device, new state and hour."""
+
+    __tablename__ = "device_state_hourly"
+
+    hour_start = Column(DateTime, primary_key=True)
+    device_id = Column(Integer, primary_key=True)
+    new_state = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from homepot.app.models.AnalyticsModel import DeviceMetrics
 from homepot.app.schemas.permissions import derive_capabilities
 from homepot.models import (
+    LIVE_LIFECYCLE_STATES,
     ConnectivityState,
     Device,
     HealthState,
@@ -41,16 +42,11 @@ class AgentRepository:
         unpaired devices are excluded so names can be reused after a device
         is decommissioned.
         """
-        active_states = [
-            LifecycleState.PENDING.value,
-            LifecycleState.ACTIVE.value,
-            LifecycleState.SUSPENDED.value,
-        ]
         result = self.db.execute(
             select(Device).where(
                 Device.site_id == site_pk,
                 func.lower(Device.name) == name.strip().lower(),
-                Device.lifecycle_state.in_(active_states),
+                Device.lifecycle_state.in_(LIVE_LIFECYCLE_STATES),
             )
         )
         return result.scalars().first() is not None
@@ -5,6 +5,7 @@ import secrets
 from typing import Any, Dict, Sequence, cast
 import uuid
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from homepot.app.auth_utils import hash_password
@@ -18,9 +19,13 @@ from homepot.app.schemas.bootstrap import BootstrapProvisionRequest
 from homepot.app.schemas.permissions import derive_capabilities, derive_push_channel
 from homepot.app.schemas.provision import DeviceProvisionRequest
 from homepot.app.services.lifecycle_service import LifecycleService
+from homepot.app.utils.smart_filter import get_smart_filter
 from homepot.canonical_ids import generate_device_id
+from homepot.config import get_settings
+from homepot.database import is_device_name_conflict
 from homepot.models import (
     ConnectivityState,
+    Device,
     DeviceCredential,
     EnrollmentMethod,
     HealthState,
@@ -112,7 +117,8 @@ class AgentService:
                 raise LookupError(f"Site '{payload.site_id}' not found")
 
             is_emulator_dna = payload.device_source == "emulator"
-            created = self.repository.create_device(
+            created = self._create_device(
+                payload.site_id,
                 device_id=payload.device_id,
                 name=payload.device_name or payload.device_id,
                 device_type=payload.device_type,
@@ -189,30 +195,11 @@ class AgentService:
     ) -> dict:
         """Store one or many telemetry records for a device."""
         try:
-            if isinstance(payload, AgentTelemetryRequest):
-                device = self.repository.get_device_by_device_id(payload.device_id)
-                if not device or not device.id:
-                    raise LookupError(f"Device '{payload.device_id}' not found")
-
-                provenance = derive_provenance(device)
-                self.repository.save_telemetry_entry(
-                    device_pk=int(device.id),
-                    timestamp=payload.timestamp,
-                    cpu_usage=payload.cpu_usage,
-                    memory_usage=payload.memory_usage,
-                    disk_usage=payload.disk_usage,
-                    uptime_seconds=payload.uptime_seconds,
-                    network_latency_ms=payload.network_latency_ms,
-                    provenance=provenance.value if provenance else None,
-                    collection_interval_seconds=payload.collection_interval_seconds,
-                )
-
-                return {
-                    "device_id": payload.device_id,
-                    "saved_count": 1,
-                }
-
-            entries = list(payload)
+            entries = (
+                [payload]
+                if isinstance(payload, AgentTelemetryRequest)
+                else list(payload)
+            )
             if not entries:
                 raise ValueError("Telemetry payload list cannot be empty")
 
@@ -224,29 +211,73 @@ class AgentService:
             if not device or not device.id:
                 raise LookupError(f"Device '{first_device_id}' not found")
 
-            serialized_entries = [
-                {
-                    "cpu_usage": item.cpu_usage,
-                    "memory_usage": item.memory_usage,
-                    "disk_usage": item.disk_usage,
-                    "uptime_seconds": item.uptime_seconds,
-                    "network_latency_ms": item.network_latency_ms,
-                    "timestamp": item.timestamp,
-                }
-                for item in entries
-            ]
+            # Stable devices mostly resend the same values; keep only samples
+            # that changed significantly or are due as a periodic snapshot.
+            data_filter = get_smart_filter()
+            kept = entries
+            if (
+                data_filter is not None
+                and get_settings().telemetry_filter.agent_telemetry
+            ):
+                keep = data_filter.should_store_batch(
+                    [first_device_id] * len(entries),
+                    [
+                        {
+                            "cpu_percent": item.cpu_usage,
+                            "memory_percent": item.memory_usage,
+                            "disk_percent": item.disk_usage,
+                            "network_latency_ms": item.network_latency_ms,
+                        }
+                        for item in entries
+                    ],
+                    [item.timestamp.timestamp() for item in entries],
+                )
+                kept = [item for item, store in zip(entries, keep) if store]
 
             provenance = derive_provenance(device)
-            self.repository.save_telemetry_bulk(
-                device_pk=int(device.id),
-                entries=serialized_entries,
-                provenance=provenance.value if provenance else None,
-                collection_interval_seconds=entries[0].collection_interval_seconds,
-            )
+            try:
+                if len(kept) == 1:
+                    item = kept[0]
+                    self.repository.save_telemetry_entry(
+                        device_pk=int(device.id),
+                        timestamp=item.timestamp,
+                        cpu_usage=item.cpu_usage,
+                        memory_usage=item.memory_usage,
+                        disk_usage=item.disk_usage,
+                        uptime_seconds=item.uptime_seconds,
+                        network_latency_ms=item.network_latency_ms,
+                        provenance=provenance.value if provenance else None,
+                        collection_interval_seconds=item.collection_interval_seconds,
+                    )
+                elif kept:
+                    self.repository.save_telemetry_bulk(
+                        device_pk=int(device.id),
+                        entries=[
+                            {
+                                "cpu_usage": item.cpu_usage,
+                                "memory_usage": item.memory_usage,
+                                "disk_usage": item.disk_usage,
+                                "uptime_seconds": item.uptime_seconds,
+                                "network_latency_ms": item.network_latency_ms,
+                                "timestamp": item.timestamp,
+                            }
+                            for item in kept
+                        ],
+                        provenance=provenance.value if provenance else None,
+                        collection_interval_seconds=entries[
+                            0
+                        ].collection_interval_seconds,
+                    )
+            except Exception:
+                # The filter already counts these samples as stored.
+                if data_filter is not None:
+                    data_filter.forget([first_device_id])
+                raise
 
             return {
                 "device_id": first_device_id,
-                "saved_count": len(entries),
+                "saved_count": len(kept),
+                "filtered_count": len(entries) - len(kept),
             }
 
         except LookupError:
@@ -274,7 +305,8 @@ class AgentService:
             api_key = secrets.token_urlsafe(32)
             device_token = secrets.token_urlsafe(24)
 
-            created = self.repository.create_device(
+            created = self._create_device(
+                payload.site_id,
                 device_id=device_id,
                 name=payload.device_name or device_id,
                 device_type=payload.device_type,
@@ -364,33 +396,36 @@ class AgentService:
 
         Similar to ``provision_device`` but uses a bootstrap key for
         authentication instead of an SSO user identity.  The device
-        is created directly in ACTIVE state with credentials.
+        is created directly in ACTIVE state with credentials, in one
+        transaction.
         """
         try:
             site = self.repository.get_site_by_site_id(payload.site_id)
             if not site or not site.id:
                 raise LookupError(f"Site '{payload.site_id}' not found")
 
-            device_id = _generate_unique_device_id(self.repository)
+            # The device ID space makes collisions negligible, and a live name
+            # already used in the site is rejected by uq_devices_site_live_name
+            # at insert, so neither is probed for beforehand.
+            device_id = generate_device_id()
             api_key = secrets.token_urlsafe(32)
-
+            api_key_hash = hash_password(api_key)
             requested_name = (payload.device_name or "").strip() or device_id
-            if self.repository.device_name_exists_in_site(int(site.id), requested_name):
-                raise ValueError(
-                    f"Device name '{requested_name}' is already in use in site "
-                    f"'{payload.site_id}'. Choose a different device name."
-                )
 
             is_emulator = payload.provisioning_source == "emulator"
-            created = self.repository.create_device(
+            config: Dict[str, Any] = {
+                "provisioning_method": "bootstrap_key",
+                "os": payload.os_details,
+            }
+            if is_emulator:
+                config["device_source"] = "emulator"
+            created = Device(
                 device_id=device_id,
                 name=requested_name,
                 device_type=payload.device_type,
-                site_pk=int(site.id),
-                mac_address=None,
+                site_id=site.id,
                 os_details=payload.os_details,
-                local_ip=None,
-                wan_ip=None,
+                is_active=True,
                 lifecycle_state=LifecycleState.PENDING.value,
                 enrollment_method=(
                     EnrollmentMethod.EMULATED.value
@@ -398,27 +433,22 @@ class AgentService:
                     else EnrollmentMethod.SELF_ENROLLED.value
                 ),
                 is_simulated=is_emulator,
+                api_key_hash=api_key_hash,
+                capabilities=derive_capabilities(payload.os_details),
+                config=config,
+                last_heartbeat_at=None,
             )
-
-            created_obj = cast(Any, created)
-            created_obj.api_key_hash = hash_password(api_key)
-            created_obj.capabilities = derive_capabilities(payload.os_details)
-
-            existing_config: Dict[str, Any] = dict(
-                cast(Dict[str, Any], created_obj.config or {})
-            )
-            existing_config.update(
-                {
-                    "provisioning_method": "bootstrap_key",
-                    "os": payload.os_details,
-                }
-            )
-            if is_emulator:
-                existing_config["device_source"] = "emulator"
-            created_obj.config = existing_config
-            created_obj.last_heartbeat_at = None
-
-            self.repository.save_device(created)
+            self.db.add(created)
+            try:
+                self.db.flush()
+            except IntegrityError as e:
+                self.db.rollback()
+                if is_device_name_conflict(e):
+                    raise ValueError(
+                        f"Device name '{requested_name}' is already in use in site "
+                        f"'{payload.site_id}'. Choose a different device name."
+                    )
+                raise
 
             epoch_id = str(uuid.uuid4())
             epoch = LifecycleEpoch(
@@ -438,11 +468,12 @@ class AgentService:
             credential = DeviceCredential(
                 credential_id=credential_id,
                 device_id=created.id,
-                key_hash=hash_password(api_key),
+                key_hash=api_key_hash,
                 is_active=True,
             )
             self.db.add(credential)
 
+            # Commits the device, epoch, credential and state history together.
             self.lifecycle.transition(
                 created,
                 LifecycleState.ACTIVE,
@@ -550,3 +581,16 @@ class AgentService:
             raise
         except Exception:
             raise Exception("Failed to fetch device metrics")
+
+    def _create_device(self, site_id: str, **fields: Any) -> Device:
+        """Create a device, rejecting a live name already used in the site."""
+        try:
+            return self.repository.create_device(**fields)
+        except IntegrityError as e:
+            self.db.rollback()
+            if is_device_name_conflict(e):
+                raise ValueError(
+                    f"Device name '{fields['name']}' is already in use in site "
+                    f"'{site_id}'. Choose a different device name."
+                )
+            raise
@@ -1,7 +1,247 @@
-"""Rate Limiting Utilities for the HomePot system."""
+"""Rate Limiting Utilities for the HomePot system.
 
+``limiter`` (slowapi, keyed on the client IP) guards the user-facing routes
+it decorates. Agent routes use ``rate_limit`` instead: agents at one store
+usually share a NAT address, so an IP limit would either throttle a whole
+site or never trigger for a single misbehaving agent. ``rate_limit`` keys a
+token bucket on the authenticated device ID and answers over-budget requests
+with 429 and a ``Retry-After`` hint that the agent honours.
+
+Each route class (telemetry, heartbeat, ...) has its own budget, written
+like slowapi limits: ``"120/minute"`` allows bursts of 120 requests and
+refills at two tokens per second. Buckets live in ``MemoryBucketStore``
+(bounded, per process) or, when several workers must share one budget, in
+the ``rate_limit_buckets`` table via ``SqlBucketStore``.
+"""
+
+from collections import OrderedDict
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple, cast
+
+from fastapi import Depends, HTTPException, Request, status
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from sqlalchemy import Table, case, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from homepot.app.auth_utils import get_current_device
+from homepot.models import Device, RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+# Core table behind the model, for the conditional token updates below.
+_BUCKETS = cast(Table, RateLimitBucket.__table__)
 
 # Initialize the limiter to use the client's IP address
 limiter = Limiter(key_func=get_remote_address)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_budget(budget: str) -> Tuple[float, float]:
+    """Parse ``"N/period"`` into (bucket capacity, tokens refilled per second)."""
+    try:
+        count, period = budget.split("/")
+        capacity = float(count)
+        seconds = _PERIODS[period.strip().rstrip("s")]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit budget '{budget}'")
+    if capacity <= 0:
+        raise ValueError(f"Invalid rate limit budget '{budget}'")
+    return capacity, capacity / seconds
+
+
+class MemoryBucketStore:
+    """Token buckets held in a bounded LRU, private to one process."""
+
+    def __init__(self, max_entries: int = 100000) -> None:
+        """Initialize the store.
+
+        Args:
+            max_entries: Buckets kept at most; evicted ones start full again.
+        """
+        self.max_entries = max_entries
+        # {key: (tokens, updated_at)}
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of tracked buckets."""
+        return len(self._buckets)
+
+    def acquire(
+        self, key: str, capacity: float, rate: float, now: Optional[float] = None
+    ) -> float:
+        """Take one token from ``key``'s bucket.
+
+        Returns:
+            0.0 if the token was taken, else the seconds until one is available.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self) -> None:
+        """Forget all buckets."""
+        with self._lock:
+            self._buckets.clear()
+
+
+class SqlBucketStore:
+    """Token buckets in the ``rate_limit_buckets`` table, shared by all workers.
+
+    Taking a token is one conditional UPDATE that refills and decrements the
+    bucket in the database, so concurrent workers never overspend it. Rows of
+    buckets that have refilled completely carry no information and are
+    deleted every ``prune_every`` calls.
+    """
+
+    def __init__(
+        self, session_factory: Callable[[], Session], prune_every: int = 1000
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            session_factory: Creates sync sessions, e.g. ``SessionLocal``.
+            prune_every: Calls between deletions of full buckets.
+        """
+        self._session_factory = session_factory
+        self.prune_every = prune_every
+        self._calls = 0
+
+    def acquire(
+        self, key: str, capacity: float, rate: float, now: Optional[float] = None
+    ) -> float:
+        """Take one token from ``key``'s bucket.
+
+        Returns:
+            0.0 if the token was taken, else the seconds until one is available.
+        """
+        table = _BUCKETS
+        now = time.time() if now is None else now
+        refilled = table.c.tokens + (now - table.c.updated_at) * rate
+        available = case((refilled > capacity, capacity), else_=refilled)
+        with self._session_factory() as session:
+            self._calls += 1
+            if self._calls % self.prune_every == 0:
+                # A bucket idle for capacity / rate seconds is full again.
+                session.execute(
+                    delete(table).where(table.c.updated_at < now - capacity / rate)
+                )
+            for _ in range(2):
+                result = session.execute(
+                    update(table)
+                    .where(table.c.bucket_key == key, available >= 1)
+                    .values(tokens=available - 1, updated_at=now)
+                )
+                if getattr(result, "rowcount", 0):
+                    session.commit()
+                    return 0.0
+
+                tokens: Optional[float] = session.execute(
+                    select(available).where(table.c.bucket_key == key)
+                ).scalar()
+                if tokens is not None:
+                    session.commit()
+                    return (1 - tokens) / rate
+
+                try:
+                    with session.begin_nested():
+                        session.execute(
+                            insert(table).values(
+                                bucket_key=key, tokens=capacity - 1, updated_at=now
+                            )
+                        )
+                    session.commit()
+                    return 0.0
+                except IntegrityError:
+                    # Another worker created the bucket first; take from it.
+                    continue
+            session.commit()
+            return 1 / rate
+
+    def clear(self) -> None:
+        """Forget all buckets."""
+        with self._session_factory() as session:
+            session.execute(delete(_BUCKETS))
+            session.commit()
+
+
+_bucket_store: Optional[Any] = None
+
+
+def get_bucket_store() -> Any:
+    """Return the process-wide bucket store selected in the settings."""
+    global _bucket_store
+    if _bucket_store is None:
+        from homepot.config import get_settings
+
+        settings = get_settings().rate_limit
+        if settings.backend == "database":
+            from homepot.database import SessionLocal
+
+            _bucket_store = SqlBucketStore(SessionLocal)
+        else:
+            _bucket_store = MemoryBucketStore(max_entries=settings.max_entries)
+    return _bucket_store
+
+
+def reset_bucket_store() -> None:
+    """Discard the process-wide bucket store so the next call rebuilds it."""
+    global _bucket_store
+    _bucket_store = None
+
+
+def _check(route_class: str, key: str) -> None:
+    """Spend one token of ``route_class`` for ``key`` or raise 429."""
+    from homepot.config import get_settings
+
+    settings = get_settings().rate_limit
+    if not settings.enabled or route_class not in settings.budgets:
+        return
+    capacity, rate = parse_budget(settings.budgets[route_class])
+    wait = get_bucket_store().acquire(f"{route_class}:{key}", capacity, rate)
+    if wait:
+        logger.warning(f"Rate limit exceeded for {route_class} by {key}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded for {route_class}",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+
+def rate_limit(route_class: str, per_device: bool = True) -> Callable[..., None]:
+    """Build a route dependency enforcing ``route_class``'s budget.
+
+    With ``per_device`` the bucket belongs to the device authenticated by
+    ``get_current_device`` (resolved once per request, shared with the
+    route); otherwise it belongs to the client IP address.
+
+    Usage::
+
+        @router.post("/telemetry", dependencies=[Depends(rate_limit("telemetry"))])
+    """
+    if per_device:
+
+        def device_dependency(device: Device = Depends(get_current_device)) -> None:
+            _check(route_class, f"device:{device.device_id}")
+
+        return device_dependency
+
+    def ip_dependency(request: Request) -> None:
+        _check(route_class, f"ip:{get_remote_address(request)}")
+
+    return ip_dependency
@@ -0,0 +1,370 @@
+"""Shared, pooled HTTP client and response cache for the Mobivisor proxy.
+
+Every proxied Mobivisor call used to open its own ``httpx.AsyncClient``, paying
+a TCP and TLS handshake per request, and the UI re-fetched mostly static data
+(device details, installed packages, system apps per model/version, policies)
+on every view. :class:`MobivisorClient` keeps one keep-alive client per event
+loop (HTTP/2 when ``h2`` is installed, bounded by ``settings.mobivisor``) and
+puts three things in front of it:
+
+1. **Caching.** GETs are classified by path into endpoint classes
+   (:data:`ENDPOINT_CLASSES`), each with its own freshness TTL. A fresh entry
+   is served without contacting Mobivisor. A stale entry with an ``ETag`` is
+   revalidated with ``If-None-Match``, and a ``304`` renews it. Upstream
+   ``Cache-Control: no-store`` / ``max-age`` are honoured.
+2. **Coalescing.** Identical concurrent GETs share one upstream request.
+3. **Invalidation.** Any write (PUT/POST/DELETE, e.g. ``featureControls``,
+   ``description``, ``actions``) drops the cached entries of the resource it
+   touches, its collection, and the classes listed in
+   :data:`WRITE_INVALIDATES`.
+
+Hit rates and upstream latency per endpoint class are available from
+:meth:`MobivisorClient.stats`.
+"""
+
+import asyncio
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass
+import hashlib
+import importlib.util
+import logging
+import re
+import time
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+from homepot.config import MobivisorClientSettings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Endpoint classes of cacheable GETs, matched in order against the endpoint
+# path. GETs that match none (debug logs, command history) are never cached.
+ENDPOINT_CLASSES: Tuple[Tuple[str, "re.Pattern[str]"], ...] = (
+    ("system_apps", re.compile(r"devices/fetchSystemApps/.+")),
+    (
+        "device_apps",
+        re.compile(r"devices/[^/]+/(allInstalledPackages|managedApps|applications)"),
+    ),
+    ("device_policies", re.compile(r"devices/[^/]+/policies")),
+    ("device_details", re.compile(r"devices/[^/]+(/mdmProfileUrl)?")),
+    ("device_list", re.compile(r"devices")),
+    ("groups", re.compile(r"groups(/[^/]+)?")),
+    ("users", re.compile(r"users(/[^/]+)?")),
+)
+
+# Extra endpoint classes a write to a collection invalidates, beyond the
+# written resource and its collection.
+WRITE_INVALIDATES: Dict[str, Tuple[str, ...]] = {
+    "mobileapps": ("device_apps", "system_apps"),
+    "groups": ("users",),
+    "users": ("groups",),
+}
+
+LATENCY_SAMPLES = 256
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+CacheKey = Tuple[str, str, str, Hashable]
+
+
+@dataclass
+class _CacheEntry:
+    """One cached upstream response."""
+
+    endpoint_class: str
+    path: str
+    response: httpx.Response
+    etag: Optional[str]
+    expires_at: float
+
+
+def classify(endpoint: str) -> Optional[str]:
+    """Return the endpoint class of a GET path, or None if it is uncacheable."""
+    path = endpoint.strip("/")
+    for name, pattern in ENDPOINT_CLASSES:
+        if pattern.fullmatch(path):
+            return name
+    return None
+
+
+def _freshness(response: httpx.Response, ttl: int) -> Optional[int]:
+    """Return seconds ``response`` stays fresh, capped by upstream max-age.
+
+    None means the response must not be stored at all.
+    """
+    cache_control = str(response.headers.get("cache-control", "")).lower()
+    if "no-store" in cache_control:
+        return None
+    max_age = _MAX_AGE.search(cache_control)
+    return min(ttl, int(max_age.group(1))) if max_age else ttl
+
+
+def _freeze(params: Any) -> Hashable:
+    """Return a hashable, order-independent form of query parameters."""
+    if not params:
+        return ()
+    items = params.items() if isinstance(params, dict) else params
+    return tuple(sorted((str(k), str(v)) for k, v in items))
+
+
+class MobivisorClient:
+    """Process-wide keep-alive client with request coalescing and caching."""
+
+    def __init__(
+        self,
+        settings: Optional[MobivisorClientSettings] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        """Initialize the client from ``settings.mobivisor``.
+
+        Args:
+            settings: Pool and cache settings; defaults to the app settings.
+            transport: Transport for the underlying client (tests point this
+                at a local fake Mobivisor).
+        """
+        self.settings = settings or get_settings().mobivisor
+        self.http2 = self.settings.http2 and importlib.util.find_spec("h2") is not None
+        if self.settings.http2 and not self.http2:
+            logger.warning("h2 is not installed; Mobivisor client uses HTTP/1.1")
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cache: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._inflight: "Dict[CacheKey, asyncio.Task[httpx.Response]]" = {}
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "revalidated": 0, "coalesced": 0}
+        )
+        self._latency: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=LATENCY_SAMPLES)
+        )
+        self._upstream: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "errors": 0, "max_ms": 0.0}
+        )
+
+    def _http(self) -> httpx.AsyncClient:
+        """Return the pooled client, creating one for the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Pooled connections belong to the loop that opened them.
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.settings.max_connections,
+                    max_keepalive_connections=self.settings.max_keepalive_connections,
+                    keepalive_expiry=self.settings.keepalive_expiry,
+                ),
+                transport=self._transport,
+            )
+            self._loop = loop
+            self._inflight.clear()
+        return self._client
+
+    async def request(
+        self,
+        method: str,
+        base_url: str,
+        endpoint: str,
+        headers: Dict[str, str],
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request to ``base_url + endpoint`` through the cache.
+
+        Raises:
+            httpx.TimeoutException, httpx.RequestError: As raised by httpx.
+        """
+        method = method.upper()
+        url = f"{base_url}{endpoint}"
+        if method != "GET":
+            try:
+                return await self._send("write", method, url, headers, kwargs)
+            finally:
+                self.invalidate_for_write(endpoint)
+
+        endpoint_class = classify(endpoint) if self.settings.cache_enabled else None
+        ttl = self.settings.cache_ttl_seconds.get(endpoint_class or "", 0)
+        token = headers.get("Authorization", "")
+        key: CacheKey = (
+            base_url,
+            hashlib.sha256(token.encode()).hexdigest()[:16],
+            endpoint,
+            _freeze(kwargs.get("params")),
+        )
+        counters = self._counters[endpoint_class or "uncached"]
+
+        entry = self._cache.get(key) if ttl else None
+        if entry is not None and entry.expires_at > time.monotonic():
+            self._cache.move_to_end(key)
+            counters["hits"] += 1
+            return entry.response
+
+        self._http()  # drop in-flight requests left on a previous loop
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._fetch(key, endpoint_class, ttl, entry, url, headers, kwargs)
+            )
+            self._inflight[key] = task
+
+            def forget(done: "asyncio.Task[httpx.Response]") -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(forget)
+        else:
+            counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self,
+        key: CacheKey,
+        endpoint_class: Optional[str],
+        ttl: int,
+        stale: Optional[_CacheEntry],
+        url: str,
+        headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+    ) -> httpx.Response:
+        """Fetch (or revalidate) one GET and cache the result."""
+        counters = self._counters[endpoint_class or "uncached"]
+        if stale is not None and stale.etag:
+            headers = {**headers, "If-None-Match": stale.etag}
+        response = await self._send(
+            endpoint_class or "uncached", "GET", url, headers, kwargs
+        )
+
+        if stale is not None and response.status_code == 304:
+            counters["revalidated"] += 1
+            stale.expires_at = time.monotonic() + (_freshness(response, ttl) or 0)
+            self._cache.move_to_end(key)
+            return stale.response
+
+        counters["misses"] += 1
+        if ttl and endpoint_class and response.status_code == 200:
+            self._store(key, endpoint_class, response, ttl)
+        return response
+
+    def _store(
+        self, key: CacheKey, endpoint_class: str, response: httpx.Response, ttl: int
+    ) -> None:
+        fresh_for = _freshness(response, ttl)
+        if fresh_for is None:
+            return
+        etag = response.headers.get("etag")
+        self._cache[key] = _CacheEntry(
+            endpoint_class=endpoint_class,
+            path=key[2].strip("/"),
+            response=response,
+            etag=etag if isinstance(etag, str) else None,
+            expires_at=time.monotonic() + fresh_for,
+        )
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.settings.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    async def _send(
+        self,
+        endpoint_class: str,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+    ) -> httpx.Response:
+        upstream = self._upstream[endpoint_class]
+        upstream["requests"] += 1
+        started = time.perf_counter()
+        try:
+            return await self._http().request(
+                method=method, url=url, headers=headers, **kwargs
+            )
+        except Exception:
+            upstream["errors"] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._latency[endpoint_class].append(elapsed_ms)
+            upstream["max_ms"] = max(upstream["max_ms"], elapsed_ms)
+
+    def invalidate_for_write(self, endpoint: str) -> int:
+        """Drop cached entries a write to ``endpoint`` may have changed.
+
+        Returns:
+            Number of entries dropped.
+        """
+        parts = endpoint.strip("/").split("/")
+        collection = parts[0]
+        resource = "/".join(parts[:2])
+        classes = WRITE_INVALIDATES.get(collection, ())
+        stale = [
+            key
+            for key, entry in self._cache.items()
+            if entry.path in (collection, resource)
+            or entry.path.startswith(resource + "/")
+            or entry.endpoint_class in classes
+        ]
+        for key in stale:
+            del self._cache[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache hit rates and upstream latency per endpoint class."""
+        cache: Dict[str, Dict[str, Any]] = {}
+        for name, counters in self._counters.items():
+            lookups = counters["hits"] + counters["revalidated"] + counters["misses"]
+            cache[name] = {
+                **counters,
+                "hit_rate": (
+                    round((counters["hits"] + counters["revalidated"]) / lookups, 3)
+                    if lookups
+                    else None
+                ),
+            }
+        upstream: Dict[str, Dict[str, Any]] = {}
+        for name, totals in self._upstream.items():
+            samples = sorted(self._latency[name])
+            upstream[name] = {
+                "requests": int(totals["requests"]),
+                "errors": int(totals["errors"]),
+                "avg_ms": (round(sum(samples) / len(samples), 1) if samples else None),
+                "p95_ms": (
+                    round(samples[int(0.95 * (len(samples) - 1))], 1)
+                    if samples
+                    else None
+                ),
+                "max_ms": round(totals["max_ms"], 1),
+            }
+        return {
+            "http2": self.http2,
+            "cache_entries": len(self._cache),
+            "cache_max_entries": self.settings.cache_max_entries,
+            "cache": cache,
+            "upstream": upstream,
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        client, self._client = self._client, None
+        if client is not None and self._loop is asyncio.get_running_loop():
+            await client.aclose()
+
+
+_mobivisor_client: Optional[MobivisorClient] = None
+
+
+def get_mobivisor_client() -> MobivisorClient:
+    """Return the process-wide Mobivisor client."""
+    global _mobivisor_client
+    if _mobivisor_client is None:
+        _mobivisor_client = MobivisorClient()
+    return _mobivisor_client
+
+
+async def close_mobivisor_client() -> None:
+    """Close the process-wide Mobivisor client, if one was created."""
+    global _mobivisor_client
+    if _mobivisor_client is not None:
+        await _mobivisor_client.aclose()
+        _mobivisor_client = None
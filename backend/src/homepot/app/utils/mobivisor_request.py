@@ -12,6 +12,7 @@ from urllib.parse import urlparse, urlunparse
 from fastapi import HTTPException
 import httpx
 
+from homepot.app.utils.mobivisor_client import get_mobivisor_client
 import homepot.config as config_module
 
 # Configure logging
@@ -39,6 +40,10 @@ async def _make_mobivisor_request(
 ) -> httpx.Response:
     """Make HTTP request to Mobivisor API with proper authentication.
 
+    Requests go through the shared keep-alive client, so read-mostly GETs may
+    be answered from its cache and writes invalidate what they change (see
+    :mod:`homepot.app.utils.mobivisor_client`).
+
     Args:
         method: HTTP method (GET, POST, DELETE, etc.)
         endpoint: API endpoint path (e.g., "devices" or "devices/123")
@@ -87,11 +92,9 @@ async def _make_mobivisor_request(
     timeout = httpx.Timeout(DEFAULT_TIMEOUT_TOTAL, connect=DEFAULT_TIMEOUT_CONNECT)
 
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.request(
-                method=method, url=upstream_url, headers=headers, **kwargs
-            )
-        return response
+        return await get_mobivisor_client().request(
+            method, base_url, endpoint, headers, timeout=timeout, **kwargs
+        )
 
     except httpx.TimeoutException:
         logger.error(f"Timeout contacting Mobivisor API: {_sanitize_url(upstream_url)}")
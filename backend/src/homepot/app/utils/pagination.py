@@ -0,0 +1,153 @@
+"""Keyset pagination and NDJSON streaming for the append-mostly log tables.
+
+Audit, error and push logs are read newest first. ``OFFSET`` pagination
+makes the database walk and discard every skipped row, so the hundredth page
+of a day of audit history costs a hundred pages. A keyset cursor instead
+remembers the ``(timestamp, id)`` of the last row returned and the next page
+starts right after it, which an index on those columns answers directly no
+matter how deep the page is. ``id`` breaks ties between rows written in the
+same instant.
+
+Cursors are opaque to clients (URL-safe base64 of ``"<iso timestamp>|<id>"``)
+and only valid for the ordering they were issued for.
+"""
+
+import base64
+import binascii
+from datetime import date, datetime
+import json
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Return the cursor pointing just past the row ``(timestamp, row_id)``."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Return the ``(timestamp, id)`` encoded in ``cursor``.
+
+    Raises:
+        ValueError: If ``cursor`` was not produced by ``encode_cursor``.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+def before_cursor(
+    timestamp_column: Any, id_column: Any, cursor: Optional[str]
+) -> Optional[ColumnElement]:
+    """Return the condition selecting rows after ``cursor`` in newest-first order."""
+    if not cursor:
+        return None
+    timestamp, row_id = decode_cursor(cursor)
+    return or_(
+        timestamp_column < timestamp,
+        and_(timestamp_column == timestamp, id_column < row_id),
+    )
+
+
+def select_fields(
+    fields: Optional[str], allowed: Sequence[str], required: Sequence[str]
+) -> List[str]:
+    """Resolve a comma-separated ``fields`` projection against ``allowed``.
+
+    ``required`` fields (those the cursor is built from) are always included.
+
+    Raises:
+        ValueError: If a requested field is not in ``allowed``.
+    """
+    if not fields:
+        return list(allowed)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [name for name in allowed if name in requested or name in required]
+
+
+def next_cursor(
+    rows: Sequence[Dict[str, Any]], limit: int, timestamp_key: str, id_key: str
+) -> Optional[str]:
+    """Return the cursor of the page after ``rows``, or None on the last page."""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last[timestamp_key], last[id_key])
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """Announce the next page of a list response in the ``X-Next-Cursor`` header.
+
+    List endpoints keep their plain JSON array body this way.
+    """
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+        response.headers["Access-Control-Expose-Headers"] = NEXT_CURSOR_HEADER
+
+
+def jsonable(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``row`` with dates as ISO-8601 strings."""
+    return {
+        key: value.isoformat() if isinstance(value, (datetime, date)) else value
+        for key, value in row.items()
+    }
+
+
+async def iter_keyset(
+    fetch_page: Callable[[Optional[str], int], Awaitable[List[Dict[str, Any]]]],
+    timestamp_key: str,
+    id_key: str,
+    page_size: int = 1000,
+    cursor: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every row of a keyset-paginated query, one page in memory at a time.
+
+    ``fetch_page(cursor, limit)`` returns the rows after ``cursor``. Each page
+    is a separate short query, so a long export holds no transaction open.
+    """
+    while True:
+        rows = await fetch_page(cursor, page_size)
+        for row in rows:
+            yield row
+        cursor = next_cursor(rows, page_size, timestamp_key, id_key)
+        if cursor is None:
+            return
+
+
+def ndjson_response(
+    rows: AsyncIterator[Dict[str, Any]], filename: Optional[str] = None
+) -> StreamingResponse:
+    """Stream ``rows`` as newline-delimited JSON."""
+
+    async def body() -> AsyncIterator[bytes]:
+        async for row in rows:
+            yield (json.dumps(jsonable(row), default=str) + "\n").encode()
+
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
@@ -3,14 +3,305 @@
 This module provides logic to filter device metrics before storage,
 ensuring that only significant changes or periodic snapshots are saved.
 This prevents database overload in high-traffic environments.
+
+The last stored values per device live in a state store. The default
+``MemoryFilterStore`` is a bounded LRU private to one process; entries older
+than the snapshot interval are worthless (the next sample is stored anyway),
+so they expire instead of accumulating for every device ever seen. With
+several API workers each process would otherwise keep its own idea of what
+was stored, so ``SqlFilterStore`` keeps the same state in the
+``telemetry_filter_state`` table where all workers see it.
+
+Change detection works on arrays: ``should_store_batch`` evaluates the
+metrics of many devices (or many samples of one device) with a handful of
+numpy operations instead of a Python loop per metric.
 """
 
+from collections import OrderedDict
 import logging
+import threading
 import time
-from typing import Any, Dict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+import numpy as np
+from sqlalchemy import Table, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from homepot.models import TelemetryFilterState
 
 logger = logging.getLogger(__name__)
 
+# Core table behind the model, for the bulk statements below.
+_STATE = cast(Table, TelemetryFilterState.__table__)
+
+# Metrics to monitor for changes
+METRIC_KEYS = (
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "network_latency_ms",
+    "error_rate",
+)
+_ERROR_RATE = METRIC_KEYS.index("error_rate")
+
+# (sample timestamp, values in METRIC_KEYS order with None for missing)
+FilterState = Tuple[float, List[Optional[float]]]
+
+
+def _as_float(value: Any) -> float:
+    """Return ``value`` as a float, or NaN when it is missing or not a number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return np.nan
+
+
+class MemoryFilterStore:
+    """Bounded LRU of filter state, private to one process."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0) -> None:
+        """Initialize the store.
+
+        Args:
+            max_entries: Devices (and error signatures) remembered at most.
+            ttl_seconds: Age after which an entry is forgotten.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # {device_id: (written_at, state)}
+        self._states: "OrderedDict[str, Tuple[float, FilterState]]" = OrderedDict()
+        # {device_id_error_signature: timestamp}
+        self._errors: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of remembered devices."""
+        return len(self._states)
+
+    def load(self, keys: Iterable[str]) -> Dict[str, FilterState]:
+        """Return the unexpired state of ``keys`` that are known."""
+        cutoff = time.time() - self.ttl_seconds
+        states = {}
+        with self._lock:
+            for key in keys:
+                entry = self._states.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= cutoff:
+                    del self._states[key]
+                    continue
+                self._states.move_to_end(key)
+                states[key] = entry[1]
+        return states
+
+    def save(self, states: Dict[str, FilterState]) -> None:
+        """Remember ``states``, evicting the least recently used devices."""
+        now = time.time()
+        with self._lock:
+            for key, state in states.items():
+                self._states[key] = (now, state)
+                self._states.move_to_end(key)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """Drop the state of ``keys`` so their next sample is stored."""
+        with self._lock:
+            for key in keys:
+                self._states.pop(key, None)
+
+    def claim(self, signature: str, interval: float) -> bool:
+        """Record ``signature`` unless it was recorded within ``interval``."""
+        now = time.time()
+        with self._lock:
+            last_time = self._errors.get(signature)
+            if last_time is not None and now - last_time < interval:
+                return False
+            self._errors[signature] = now
+            self._errors.move_to_end(signature)
+            while len(self._errors) > self.max_entries:
+                self._errors.popitem(last=False)
+            return True
+
+    def clear(self) -> None:
+        """Forget everything."""
+        with self._lock:
+            self._states.clear()
+            self._errors.clear()
+
+
+class SqlFilterStore:
+    """Filter state in the ``telemetry_filter_state`` table, shared by all workers.
+
+    Each call uses its own short session, independent of the caller's
+    transaction. Expired rows are ignored on read and deleted every
+    ``prune_every`` saves, which keeps the table bounded by the number of
+    devices active within one snapshot interval.
+    """
+
+    _METRICS = "m:"
+    _ERROR = "e:"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: float = 300.0,
+        prune_every: int = 1000,
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            session_factory: Creates sync sessions, e.g. ``SessionLocal``.
+            ttl_seconds: Age after which an entry is ignored and pruned.
+            prune_every: Saves between deletions of expired rows.
+        """
+        self._session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.prune_every = prune_every
+        self._saves = 0
+
+    def load(self, keys: Iterable[str]) -> Dict[str, FilterState]:
+        """Return the unexpired state of ``keys`` that are known."""
+        table = _STATE
+        prefixed = [self._METRICS + key for key in keys]
+        if not prefixed:
+            return {}
+        with self._session_factory() as session:
+            rows = session.execute(
+                select(table.c.state_key, table.c.sample_time, table.c.metric_values)
+                .where(table.c.state_key.in_(prefixed))
+                .where(table.c.updated_at > time.time() - self.ttl_seconds)
+            )
+            return {
+                key[len(self._METRICS) :]: (sample_time, list(values or []))
+                for key, sample_time, values in rows
+            }
+
+    def save(self, states: Dict[str, FilterState]) -> None:
+        """Upsert ``states`` and periodically prune expired rows."""
+        now = time.time()
+        rows = [
+            {
+                "state_key": self._METRICS + key,
+                "sample_time": sample_time,
+                "updated_at": now,
+                "metric_values": values,
+            }
+            for key, (sample_time, values) in states.items()
+        ]
+        with self._session_factory() as session:
+            self._upsert(session, rows)
+            self._saves += 1
+            if self._saves % self.prune_every == 0:
+                table = _STATE
+                session.execute(
+                    delete(table).where(table.c.updated_at <= now - self.ttl_seconds)
+                )
+            session.commit()
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """Drop the state of ``keys`` so their next sample is stored."""
+        table = _STATE
+        with self._session_factory() as session:
+            session.execute(
+                delete(table).where(
+                    table.c.state_key.in_([self._METRICS + key for key in keys])
+                )
+            )
+            session.commit()
+
+    def claim(self, signature: str, interval: float) -> bool:
+        """Record ``signature`` unless it was recorded within ``interval``.
+
+        The check and the write are one conditional statement, so when two
+        workers see the same error at once exactly one of them claims it.
+        """
+        table = _STATE
+        key = self._ERROR + signature
+        now = time.time()
+        with self._session_factory() as session:
+            dialect = session.get_bind().dialect.name
+            if dialect in ("postgresql", "sqlite"):
+                stmt = self._dialect_insert(dialect)(table).values(
+                    state_key=key, sample_time=now, updated_at=now
+                )
+                result = session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["state_key"],
+                        set_={"sample_time": now, "updated_at": now},
+                        where=table.c.updated_at <= now - interval,
+                    )
+                )
+                claimed: bool = getattr(result, "rowcount", 0) == 1
+            else:
+                result = session.execute(
+                    update(table)
+                    .where(table.c.state_key == key)
+                    .where(table.c.updated_at <= now - interval)
+                    .values(sample_time=now, updated_at=now)
+                )
+                claimed = bool(getattr(result, "rowcount", 0))
+                if not claimed:
+                    try:
+                        with session.begin_nested():
+                            session.execute(
+                                insert(table).values(
+                                    state_key=key, sample_time=now, updated_at=now
+                                )
+                            )
+                        claimed = True
+                    except IntegrityError:
+                        claimed = False
+            session.commit()
+            return claimed
+
+    def clear(self) -> None:
+        """Forget everything."""
+        with self._session_factory() as session:
+            session.execute(delete(_STATE))
+            session.commit()
+
+    @staticmethod
+    def _dialect_insert(dialect: str) -> Any:
+        """Return the ``insert`` construct that supports ``on_conflict``."""
+        dialect_insert: Any
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert
+
+    def _upsert(self, session: Session, rows: List[Dict[str, Any]]) -> None:
+        """Insert ``rows`` or overwrite the ones that already exist."""
+        table = _STATE
+        dialect = session.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            stmt = self._dialect_insert(dialect)(table).values(rows)
+            session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["state_key"],
+                    set_={
+                        "sample_time": stmt.excluded.sample_time,
+                        "updated_at": stmt.excluded.updated_at,
+                        "metric_values": stmt.excluded.metric_values,
+                    },
+                )
+            )
+            return
+
+        for row in rows:
+            session.merge(TelemetryFilterState(**row))
+
 
 class SmartDataFilter:
     """Filters device metrics based on significance and time intervals."""
@@ -19,20 +310,27 @@ class SmartDataFilter:
         self,
         snapshot_interval: int = 300,  # 5 minutes
         change_threshold: float = 0.05,  # 5% change
+        store: Optional[Any] = None,
+        max_entries: int = 10000,
     ) -> None:
         """Initialize the SmartDataFilter.
 
         Args:
             snapshot_interval: Time in seconds to force a new snapshot.
             change_threshold: Percentage change (0.0-1.0) to consider significant.
+            store: State store shared by the filter's callers; defaults to a
+                ``MemoryFilterStore`` expiring entries after ``snapshot_interval``.
+            max_entries: Capacity of the default in-memory store.
         """
         self.snapshot_interval = snapshot_interval
         self.change_threshold = change_threshold
-        # In-memory cache: {device_id: {"timestamp": float, "metrics": dict}}
-        # Note: In a distributed environment, this should be replaced by Redis.
-        self._last_states: Dict[str, Dict[str, Any]] = {}
-        # Error cache: {device_id_error_signature: timestamp}
-        self._last_errors: Dict[str, float] = {}
+        if store is None:
+            store = MemoryFilterStore(
+                max_entries=max_entries, ttl_seconds=snapshot_interval
+            )
+        self.store = store
+        self.stored = 0
+        self.filtered = 0
 
     def should_store(self, device_id: str, metrics: Dict[str, Any]) -> bool:
         """Determine if the given metrics should be stored.
@@ -44,41 +342,98 @@ class SmartDataFilter:
         Returns:
             True if data should be stored, False otherwise.
         """
-        current_time = time.time()
+        return bool(self.should_store_batch([device_id], [metrics])[0])
 
-        # 1. New Device (or first time seeing it since restart)
-        if device_id not in self._last_states:
-            logger.debug(f"Device {device_id}: First data point. Storing.")
-            self._update_state(device_id, metrics, current_time)
-            return True
+    def should_store_batch(
+        self,
+        device_ids: Sequence[str],
+        metrics: Sequence[Dict[str, Any]],
+        timestamps: Optional[Sequence[float]] = None,
+    ) -> np.ndarray:
+        """Decide for many samples at once which ones should be stored.
 
-        last_state = self._last_states[device_id]
-        last_time = last_state["timestamp"]
-        last_metrics = last_state["metrics"]
+        A sample is stored when it is the first one known for its device,
+        when ``snapshot_interval`` has passed since the last stored sample, or
+        when a key metric changed significantly since then. Samples of the
+        same device are evaluated in order, each against the last one kept.
 
-        # 2. Snapshot Interval (Heartbeat)
-        time_diff = current_time - last_time
-        if time_diff >= self.snapshot_interval:
-            logger.debug(
-                f"Device {device_id}: Snapshot interval reached ({time_diff:.1f}s). Storing."
-            )
-            self._update_state(device_id, metrics, current_time)
-            return True
+        Args:
+            device_ids: Device of each sample.
+            metrics: Metric dictionaries, parallel to ``device_ids``.
+            timestamps: Sample times in epoch seconds; defaults to now.
 
-        # 3. Significant Change
-        if self._has_significant_change(last_metrics, metrics):
-            logger.debug(f"Device {device_id}: Significant change detected. Storing.")
-            self._update_state(device_id, metrics, current_time)
-            return True
+        Returns:
+            Boolean array, True for the samples to store.
+        """
+        count = len(device_ids)
+        if timestamps is None:
+            times = np.full(count, time.time())
+        else:
+            times = np.asarray(timestamps, dtype=float)
+        values = np.array(
+            [[_as_float(m.get(key)) for key in METRIC_KEYS] for m in metrics],
+            dtype=float,
+        ).reshape(count, len(METRIC_KEYS))
+
+        # The k-th sample of every device is evaluated in round k, so a batch of
+        # one sample per device is a single vectorized pass.
+        rounds: List[List[int]] = []
+        seen: Dict[str, int] = {}
+        for index, device_id in enumerate(device_ids):
+            occurrence = seen.get(device_id, 0)
+            seen[device_id] = occurrence + 1
+            if occurrence == len(rounds):
+                rounds.append([])
+            rounds[occurrence].append(index)
+
+        states = self.store.load(seen)
+        last_times = np.array(
+            [states[d][0] if d in states else np.nan for d in device_ids]
+        )
+        last_values = np.full((count, len(METRIC_KEYS)), np.nan)
+        for index, device_id in enumerate(device_ids):
+            if device_id in states:
+                last_values[index] = [
+                    np.nan if v is None else v for v in states[device_id][1]
+                ]
+
+        keep = np.zeros(count, dtype=bool)
+        kept: Dict[str, int] = {}
+        for members in rounds:
+            idx = np.asarray(members)
+            for index in members:
+                latest = kept.get(device_ids[index])
+                if latest is not None:
+                    last_times[index] = times[latest]
+                    last_values[index] = values[latest]
+
+            known = ~np.isnan(last_times[idx])
+            due = ~known | (times[idx] - last_times[idx] >= self.snapshot_interval)
+            decision = due | self._significant_changes(last_values[idx], values[idx])
+            keep[idx] = decision
+            for index in idx[decision]:
+                kept[device_ids[index]] = int(index)
+
+        if kept:
+            self.store.save(
+                {
+                    device_id: (
+                        float(times[index]),
+                        [None if np.isnan(v) else float(v) for v in values[index]],
+                    )
+                    for device_id, index in kept.items()
+                }
+            )
 
-        # 4. Error/Anomaly Check (Always store if error_rate is high)
-        if metrics.get("error_rate", 0) > 0.0:
-            # If error rate changed or is non-zero, we might want to store it.
-            # For now, let's rely on significant change, but maybe force store if error > 0?
-            # Let's stick to significant change for error_rate too.
-            pass
+        stored = int(keep.sum())
+        self.stored += stored
+        self.filtered += count - stored
+        logger.debug(f"Smart filter: storing {stored} of {count} samples")
+        return keep
 
-        return False
+    def forget(self, device_ids: Iterable[str]) -> None:
+        """Drop remembered state, e.g. after the kept samples failed to save."""
+        self.store.forget(device_ids)
 
     def should_store_error(
         self, device_id: str, error_code: str, error_message: str
@@ -96,71 +451,61 @@ class SmartDataFilter:
         Returns:
             True if the error should be stored, False if it's a duplicate.
         """
-        current_time = time.time()
         # Create a signature for this specific error on this device
         signature = f"{device_id}:{error_code}:{error_message}"
+        return self.store.claim(signature, self.snapshot_interval)
 
-        last_time = self._last_errors.get(signature)
-
-        # If never seen, or seen longer ago than the interval
-        if last_time is None or (current_time - last_time) >= self.snapshot_interval:
-            self._last_errors[signature] = current_time
-            return True
-
-        return False
+    def stats(self) -> Dict[str, int]:
+        """Return how many samples were stored and filtered out."""
+        return {"stored": self.stored, "filtered": self.filtered}
 
-    def _update_state(
-        self, device_id: str, metrics: Dict[str, Any], timestamp: float
-    ) -> None:
-        """Update the internal state cache."""
-        self._last_states[device_id] = {
-            "timestamp": timestamp,
-            "metrics": metrics.copy(),
-        }
-
-    def _has_significant_change(self, old: Dict[str, Any], new: Dict[str, Any]) -> bool:
-        """Check if any key metric has changed significantly."""
-        # Metrics to monitor for changes
-        keys_to_check = [
-            "cpu_percent",
-            "memory_percent",
-            "disk_percent",
-            "network_latency_ms",
-            "error_rate",
-        ]
+    def _significant_changes(self, old: np.ndarray, new: np.ndarray) -> np.ndarray:
+        """Return, per row, whether any key metric changed significantly.
 
-        for key in keys_to_check:
-            old_val = old.get(key)
-            new_val = new.get(key)
-
-            # If metric was missing and now present (or vice versa), that's a change
-            if (old_val is None) != (new_val is None):
-                return True
-
-            if old_val is None or new_val is None:
-                continue
-
-            # Ensure values are numbers
-            if not isinstance(old_val, (int, float)) or not isinstance(
-                new_val, (int, float)
-            ):
-                continue
-
-            # Absolute difference for small values (like error rate)
-            if key == "error_rate":
-                if abs(new_val - old_val) > 0.01:  # 1% absolute change in error rate
-                    return True
-                continue
-
-            # Relative difference for larger values
-            # Handle zero case
-            if old_val == 0:
-                if abs(new_val) > 1.0:  # If it goes from 0 to > 1, that's significant
-                    return True
-                continue
-
-            change = abs(new_val - old_val) / abs(old_val)
-            if change >= self.change_threshold:
-                return True
-
-        return False
+        Missing values are NaN; a metric appearing or disappearing is a change.
+        """
+        old_missing = np.isnan(old)
+        new_missing = np.isnan(new)
+        diff = np.abs(new - old)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Relative difference for larger values; from zero, > 1 is significant
+            changed = np.where(
+                old == 0, np.abs(new) > 1.0, diff / np.abs(old) >= self.change_threshold
+            )
+        # Absolute difference for small values (1% change in error rate)
+        changed[:, _ERROR_RATE] = diff[:, _ERROR_RATE] > 0.01
+        changed &= ~(old_missing | new_missing)
+        significant: np.ndarray = (changed | (old_missing != new_missing)).any(axis=1)
+        return significant
+
+
+_smart_filter: Optional[SmartDataFilter] = None
+
+
+def get_smart_filter() -> Optional[SmartDataFilter]:
+    """Return the process-wide filter, or None when filtering is disabled."""
+    global _smart_filter
+    from homepot.config import get_settings
+
+    settings = get_settings().telemetry_filter
+    if not settings.enabled:
+        return None
+    if _smart_filter is None:
+        store: Any = None
+        if settings.backend == "database":
+            from homepot.database import SessionLocal
+
+            store = SqlFilterStore(SessionLocal, ttl_seconds=settings.snapshot_interval)
+        _smart_filter = SmartDataFilter(
+            snapshot_interval=settings.snapshot_interval,
+            change_threshold=settings.change_threshold,
+            store=store,
+            max_entries=settings.max_entries,
+        )
+    return _smart_filter
+
+
+def reset_smart_filter() -> None:
+    """Discard the process-wide filter so the next call rebuilds it."""
+    global _smart_filter
+    _smart_filter = None
@@ -3,18 +3,68 @@
 This module provides comprehensive audit logging functionality for tracking
 all system events, user actions, and device interactions for compliance
 and monitoring purposes.
+
+Audit rows are written in one of three ways:
+
+- **Enlisted**: ``log_event(..., session=session)`` adds the row to the
+  caller's session, so it commits (or rolls back) together with the change
+  it describes, in a single commit.
+- **Batched**: event types listed in ``settings.audit.batched_event_types``
+  (``api_access`` by default) are queued in memory and written by a
+  background task, up to ``batch_size`` rows per commit.
+- **Direct**: everything else is written in its own transaction.
+
+Per-hour counts per event type are kept in ``audit_event_hourly_counts`` by a
+flush hook, in the same transaction as the rows they count, so
+:meth:`AuditLogger.get_event_statistics` never scans ``audit_logs``.
 """
 
-from datetime import datetime
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 import logging
-from typing import Any, Dict, List, Optional
-
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, cast
+
+from sqlalchemy import Table, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homepot.app.utils.pagination import (
+    before_cursor,
+    iter_keyset,
+    jsonable,
+    next_cursor,
+    select_fields,
+)
+from homepot.config import get_settings
 from homepot.database import get_database_service
-from homepot.models import AuditLog
+from homepot.models import (
+    AuditEventHourlyCount,
+    AuditLog,
+    Device,
+    Site,
+    utc_now,
+)
 
 logger = logging.getLogger(__name__)
 
+# Columns an audit event query may project, in output order.
+AUDIT_EVENT_FIELDS = (
+    "id",
+    "event_type",
+    "description",
+    "user_id",
+    "job_id",
+    "device_id",
+    "site_id",
+    "old_values",
+    "new_values",
+    "event_metadata",
+    "ip_address",
+    "user_agent",
+    "created_at",
+)
+
 
 class AuditEventType(str, Enum):
     """Audit event types for categorization."""
@@ -80,12 +130,122 @@ class AuditEventType(str, Enum):
     RATE_LIMIT_EXCEEDED = "rate_limit_exceeded"
 
 
+def _hour_start(value: Optional[datetime]) -> datetime:
+    """Return the naive-UTC start of the hour containing ``value``."""
+    value = value or utc_now()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _upsert_hourly_counts(connection: Any, counts: Counter) -> None:
+    """Add ``counts`` (keyed by hour and event type) to the hourly table."""
+    table = cast(Table, AuditEventHourlyCount.__table__)
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert: Any
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(
+            [
+                {"hour_start": hour, "event_type": event_type, "count": n}
+                for (hour, event_type), n in counts.items()
+            ]
+        )
+        connection.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["hour_start", "event_type"],
+                set_={"count": table.c.count + stmt.excluded.count},
+            )
+        )
+        return
+
+    for (hour, event_type), n in counts.items():
+        result = connection.execute(
+            update(table)
+            .where(table.c.hour_start == hour, table.c.event_type == event_type)
+            .values(count=table.c.count + n)
+        )
+        if not result.rowcount:
+            connection.execute(
+                insert(table).values(hour_start=hour, event_type=event_type, count=n)
+            )
+
+
+_hooks_installed = False
+
+
+def install_hourly_count_hook() -> None:
+    """Count every flushed AuditLog into ``audit_event_hourly_counts``.
+
+    The counts are written on the flushing session's connection, so they
+    commit or roll back with the audit rows themselves, whichever path
+    (enlisted, batched, direct or plain ORM) created them.
+    """
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    def count(session: Session, flush_context: Any) -> None:
+        counts: Counter = Counter(
+            (_hour_start(cast(Optional[datetime], obj.created_at)), obj.event_type)
+            for obj in session.new
+            if isinstance(obj, AuditLog)
+        )
+        if counts:
+            _upsert_hourly_counts(session.connection(), counts)
+
+    event.listen(Session, "after_flush", count)
+
+
+install_hourly_count_hook()
+
+
 class AuditLogger:
     """Comprehensive audit logging service."""
 
-    def __init__(self) -> None:
-        """Initialize the audit logger with configured logging."""
+    def __init__(
+        self,
+        batched_event_types: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_seconds: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        """Initialize the audit logger, reading unset limits from settings.
+
+        Args:
+            batched_event_types: Event type values written in batches.
+            batch_size: Maximum rows written per batch commit.
+            flush_interval_seconds: Longest time a batched event waits.
+            max_pending: Batched events held before new ones are dropped.
+        """
         self.logger = logging.getLogger(f"{__name__}.AuditLogger")
+        settings = get_settings().audit
+        self.batched_event_types = set(
+            batched_event_types
+            if batched_event_types is not None
+            else settings.batched_event_types
+        )
+        self.batch_size = batch_size or settings.batch_size
+        self.flush_interval_seconds = (
+            flush_interval_seconds
+            if flush_interval_seconds is not None
+            else settings.flush_interval_seconds
+        )
+        self.max_pending = max_pending or settings.max_pending
+        self._pending: List[AuditLog] = []
+        self._flusher: Optional["asyncio.Task[None]"] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
 
     async def log_event(
         self,
@@ -100,6 +260,7 @@ class AuditLogger:
         event_metadata: Optional[Dict[str, Any]] = None,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
+        session: Optional[AsyncSession] = None,
     ) -> AuditLog:
         """Log an audit event to the database.
 
@@ -115,11 +276,37 @@ class AuditLogger:
             event_metadata: Additional event data
             ip_address: IP address of the request (optional)
             user_agent: User agent string (optional)
+            session: Caller's session to enlist in. The row is flushed but
+                not committed: it commits or rolls back with the caller's
+                transaction.
 
         Returns:
-            Created AuditLog instance
+            Created AuditLog instance (not yet persisted for batched types)
         """
         try:
+            if session is not None or event_type.value in self.batched_event_types:
+                audit_log = AuditLog(
+                    event_type=event_type.value,
+                    description=description,
+                    user_id=user_id,
+                    job_id=job_id,
+                    device_id=device_id,
+                    site_id=site_id,
+                    old_values=old_values,
+                    new_values=new_values,
+                    event_metadata=event_metadata,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                    created_at=utc_now(),
+                )
+                if session is not None:
+                    session.add(audit_log)
+                    await session.flush()
+                else:
+                    self._enqueue(audit_log)
+                self.logger.info(f"AUDIT: {event_type.value} - {description}")
+                return audit_log
+
             db_service = await get_database_service()
 
             # Create audit log entry
@@ -147,6 +334,82 @@ class AuditLogger:
             self.logger.error(f"Failed to log audit event {event_type.value}: {e}")
             raise
 
+    def _enqueue(self, audit_log: AuditLog) -> None:
+        """Queue a batched event and make sure the flusher is running."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            self.logger.warning(
+                f"Audit batch queue full ({self.max_pending}); dropped "
+                f"{audit_log.event_type} event"
+            )
+            return
+        self._pending.append(audit_log)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run_flusher())
+        elif len(self._pending) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run_flusher(self) -> None:
+        """Write queued events every interval, or as soon as a batch is full."""
+        self._wakeup = asyncio.Event()
+        while self._pending:
+            if len(self._pending) < self.batch_size and not self._stopping:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.flush_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all queued events, one commit per batch.
+
+        Returns:
+            Number of events written.
+        """
+        written = 0
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: self.batch_size]
+            try:
+                db_service = await get_database_service()
+                async with db_service.get_session() as session:
+                    session.add_all(batch)
+                written += len(batch)
+                self.written += len(batch)
+            except Exception as e:
+                # Batched types are high-volume telemetry about the API, not
+                # records of state changes: drop the batch rather than retry.
+                self.dropped += len(batch)
+                self.logger.error(f"Failed to write {len(batch)} audit events: {e}")
+            except BaseException:
+                # Cancelled mid-write: put the batch back for the next flush.
+                self._pending[:0] = batch
+                raise
+        return written
+
+    async def drain(self) -> int:
+        """Stop the background flusher and write everything still queued.
+
+        The flusher is told to stop and awaited rather than cancelled, so a
+        batch it is writing is committed instead of lost.
+        """
+        written = self.written
+        flusher = self._flusher
+        if flusher is not None and not flusher.done():
+            self._stopping = True
+            if self._wakeup is not None:
+                self._wakeup.set()
+            try:
+                await flusher
+            finally:
+                self._stopping = False
+        self._flusher = None
+        await self.flush()
+        return self.written - written
+
     async def log_user_action(
         self,
         user_id: Optional[int],
@@ -257,6 +520,69 @@ class AuditLogger:
             user_agent=user_agent,
         )
 
+    def _event_conditions(
+        self,
+        event_types: Optional[Sequence[AuditEventType]] = None,
+        user_id: Optional[int] = None,
+        device_pk: Optional[int] = None,
+        site_pk: Optional[int] = None,
+        device_id: Optional[str] = None,
+        site_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> List[Any]:
+        """Build the WHERE conditions of an audit event query.
+
+        ``device_pk``/``site_pk`` are primary keys; ``device_id``/``site_id``
+        are the public identifiers and are resolved by subquery, so every
+        filter runs in the database.
+        """
+        conditions: List[Any] = []
+        if event_types:
+            conditions.append(AuditLog.event_type.in_([et.value for et in event_types]))
+        if user_id:
+            conditions.append(AuditLog.user_id == user_id)
+        if device_pk:
+            conditions.append(AuditLog.device_id == device_pk)
+        if site_pk:
+            conditions.append(AuditLog.site_id == site_pk)
+        if device_id:
+            conditions.append(
+                AuditLog.device_id.in_(
+                    select(Device.id).where(Device.device_id == device_id)
+                )
+            )
+        if site_id:
+            conditions.append(
+                AuditLog.site_id.in_(select(Site.id).where(Site.site_id == site_id))
+            )
+        if since:
+            conditions.append(AuditLog.created_at >= since)
+        if until:
+            conditions.append(AuditLog.created_at < until)
+        keyset = before_cursor(AuditLog.created_at, AuditLog.id, cursor)
+        if keyset is not None:
+            conditions.append(keyset)
+        return conditions
+
+    async def _fetch_events(
+        self, fields: Sequence[str], conditions: List[Any], limit: int
+    ) -> List[Dict[str, Any]]:
+        """Return ``fields`` of the newest ``limit`` events matching ``conditions``.
+
+        Only the projected columns are selected; no ORM objects are built.
+        """
+        db_service = await get_database_service()
+        async with db_service.get_session() as session:
+            result = await session.execute(
+                select(*(getattr(AuditLog, name) for name in fields))
+                .where(*conditions)
+                .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+                .limit(limit)
+            )
+            return [dict(row) for row in result.mappings()]
+
     async def get_recent_events(
         self,
         limit: int = 50,
@@ -267,101 +593,100 @@ class AuditLogger:
     ) -> List[Dict[str, Any]]:
         """Get recent audit events with optional filtering."""
         try:
-            db_service = await get_database_service()
+            conditions = self._event_conditions(
+                event_types=event_types,
+                user_id=user_id,
+                device_pk=device_id,
+                site_pk=site_id,
+            )
+            rows = await self._fetch_events(AUDIT_EVENT_FIELDS, conditions, limit)
+            return [jsonable(row) for row in rows]
 
-            from sqlalchemy import desc, select
+        except Exception as e:
+            self.logger.error(f"Failed to get recent audit events: {e}")
+            return []
 
-            async with db_service.get_session() as session:
-                query = (
-                    select(AuditLog).order_by(desc(AuditLog.created_at)).limit(limit)
-                )
+    async def get_events_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
+        **filters: Any,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one newest-first page of audit events and the next cursor.
 
-                # Apply filters
-                if event_types:
-                    event_type_values = [et.value for et in event_types]
-                    query = query.where(AuditLog.event_type.in_(event_type_values))
-
-                if user_id:
-                    query = query.where(AuditLog.user_id == user_id)
-
-                if device_id:
-                    query = query.where(AuditLog.device_id == device_id)
-
-                if site_id:
-                    query = query.where(AuditLog.site_id == site_id)
-
-                result = await session.execute(query)
-                audit_logs = result.scalars().all()
-
-                # Convert to dict format
-                events = []
-                for log in audit_logs:
-                    events.append(
-                        {
-                            "id": log.id,
-                            "event_type": log.event_type,
-                            "description": log.description,
-                            "user_id": log.user_id,
-                            "job_id": log.job_id,
-                            "device_id": log.device_id,
-                            "site_id": log.site_id,
-                            "old_values": log.old_values,
-                            "new_values": log.new_values,
-                            "event_metadata": log.event_metadata,
-                            "ip_address": log.ip_address,
-                            "user_agent": log.user_agent,
-                            "created_at": (
-                                log.created_at.isoformat() if log.created_at else None
-                            ),
-                        }
-                    )
+        Args:
+            limit: Rows per page.
+            cursor: ``next_cursor`` of the previous page, None for the first.
+            fields: Comma-separated projection of ``AUDIT_EVENT_FIELDS``;
+                ``id`` and ``created_at`` are always included.
+            **filters: ``event_types``, ``device_id``, ``site_id`` (public
+                identifiers), ``user_id``, ``since`` and ``until``.
+
+        Raises:
+            ValueError: On an invalid cursor or unknown field.
+        """
+        columns = select_fields(fields, AUDIT_EVENT_FIELDS, ("id", "created_at"))
+        conditions = self._event_conditions(cursor=cursor, **filters)
+        rows = await self._fetch_events(columns, conditions, limit)
+        return (
+            [jsonable(row) for row in rows],
+            next_cursor(rows, limit, "created_at", "id"),
+        )
 
-                return events
+    def stream_events(
+        self,
+        fields: Optional[str] = None,
+        page_size: int = 1000,
+        **filters: Any,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over every matching audit event, newest first.
+
+        Pages through the result with the keyset cursor, so memory use does
+        not grow with the number of rows. Arguments are as for
+        :meth:`get_events_page`.
+
+        Raises:
+            ValueError: On an unknown field (before any row is read).
+        """
+        columns = select_fields(fields, AUDIT_EVENT_FIELDS, ("id", "created_at"))
 
-        except Exception as e:
-            self.logger.error(f"Failed to get recent audit events: {e}")
-            return []
+        async def fetch_page(cursor: Optional[str], limit: int) -> List[Dict[str, Any]]:
+            conditions = self._event_conditions(cursor=cursor, **filters)
+            return await self._fetch_events(columns, conditions, limit)
+
+        return iter_keyset(fetch_page, "created_at", "id", page_size=page_size)
 
     async def get_event_statistics(self, hours: int = 24) -> Dict[str, Any]:
-        """Get audit event statistics for the dashboard."""
+        """Get audit event statistics for the dashboard.
+
+        Sums the hourly counts of the current hour and the ``hours - 1``
+        before it, so ``since`` is the start of the oldest hour included.
+        """
         try:
             db_service = await get_database_service()
 
-            from datetime import timedelta
-
-            from sqlalchemy import func, select
-
-            since = datetime.utcnow() - timedelta(hours=hours)
+            since = _hour_start(None) - timedelta(hours=max(hours, 1) - 1)
 
             async with db_service.get_session() as session:
-                # Total events
-                total_result = await session.execute(
-                    select(func.count(AuditLog.id)).where(AuditLog.created_at >= since)
-                )
-                total_events = total_result.scalar()
-
-                # Events by type
-                type_result = await session.execute(
-                    select(AuditLog.event_type, func.count(AuditLog.id))
-                    .where(AuditLog.created_at >= since)
-                    .group_by(AuditLog.event_type)
+                result = await session.execute(
+                    select(
+                        AuditEventHourlyCount.event_type,
+                        func.sum(AuditEventHourlyCount.count),
+                    )
+                    .where(AuditEventHourlyCount.hour_start >= since)
+                    .group_by(AuditEventHourlyCount.event_type)
                 )
                 events_by_type: Dict[str, int] = {
-                    row[0]: row[1] for row in type_result.all()
+                    row[0]: int(row[1]) for row in result.all()
                 }
 
-                # API access count
-                api_result = await session.execute(
-                    select(func.count(AuditLog.id))
-                    .where(AuditLog.created_at >= since)
-                    .where(AuditLog.event_type == AuditEventType.API_ACCESS.value)
-                )
-                api_access_count = api_result.scalar()
-
                 return {
-                    "total_events": total_events,
+                    "total_events": sum(events_by_type.values()),
                     "events_by_type": events_by_type,
-                    "api_access_count": api_access_count,
+                    "api_access_count": events_by_type.get(
+                        AuditEventType.API_ACCESS.value, 0
+                    ),
                     "time_period_hours": hours,
                     "since": since.isoformat(),
                 }
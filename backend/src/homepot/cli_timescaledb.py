@@ -5,17 +5,20 @@ This script provides commands to:
 - Create hypertables
 - Create continuous aggregates
 - Check TimescaleDB status
+- Inspect and run retention of the log tables
 """
 
 import asyncio
 import logging
 import sys
-from typing import Optional
+from typing import Optional, Tuple
 
 import click
 
+from homepot.analytics_rollups import rebuild_rollups
 from homepot.database import get_database_service
 from homepot.migrations.timescaledb_aggregates import setup_timescaledb_aggregates
+from homepot.retention import RETENTION_TABLES, RetentionManager
 from homepot.timescale import TimescaleDBManager
 
 logging.basicConfig(
@@ -231,5 +234,112 @@ def chunks(hypertable: str) -> None:
     asyncio.run(list_chunks())
 
 
+@timescaledb.group()
+def retention() -> None:
+    """Retention and hourly rollup of the log tables."""
+    pass
+
+
+@retention.command(name="status")
+def retention_status() -> None:
+    """Show retention windows and rows due to expire per table."""
+
+    async def show_status() -> None:
+        db_service = await get_database_service()
+        report = await RetentionManager(db_service).status()
+
+        for entry in report:
+            click.echo(f"\n{entry['table']}:")
+            days = entry["retention_days"]
+            click.echo(f"  Keep: {f'{days} days' if days is not None else 'forever'}")
+            click.echo(f"  Rows: {entry['rows']} (oldest: {entry['oldest'] or 'N/A'})")
+            if entry["cutoff"] is not None:
+                click.echo(
+                    f"  Due to expire: {entry['rows_due']} "
+                    f"(before {entry['cutoff']})"
+                )
+            if entry["rollup"]:
+                click.echo(f"  Rollup: {entry['rollup']} ({entry['rollup_rows']} rows)")
+            click.echo(f"  Hypertable: {entry['hypertable']}")
+
+        await db_service.close()
+
+    asyncio.run(show_status())
+
+
+@retention.command(name="run")
+@click.option(
+    "--table",
+    "tables",
+    multiple=True,
+    type=click.Choice(sorted(RETENTION_TABLES)),
+    help="Only expire this table (repeatable)",
+)
+def retention_run(tables: Tuple[str, ...]) -> None:
+    """Roll up and delete log rows past their retention window."""
+
+    async def run_retention() -> None:
+        db_service = await get_database_service()
+        expired = await RetentionManager(db_service).run(tables or None)
+
+        for name, count in expired.items():
+            click.echo(f"  {name}: {count} row(s) expired")
+        click.echo(f"\nExpired {sum(expired.values())} row(s)")
+
+        await db_service.close()
+
+    asyncio.run(run_retention())
+
+
+@retention.command(name="rebuild-rollups")
+@click.option(
+    "--hours",
+    default=168,
+    show_default=True,
+    help="Closed hours before now to recompute from raw log rows",
+)
+def retention_rebuild_rollups(hours: int) -> None:
+    """Recompute the request, error and job rollups from raw log rows."""
+
+    async def run_rebuild() -> None:
+        db_service = await get_database_service()
+        async with db_service.get_session() as session:
+            counted = await session.run_sync(rebuild_rollups, hours)
+
+        for name, count in counted.items():
+            click.echo(f"  {name}: {count} row(s) counted")
+
+        await db_service.close()
+
+    asyncio.run(run_rebuild())
+
+
+@retention.command(name="partition")
+@click.option(
+    "--chunk-interval",
+    default="1 day",
+    show_default=True,
+    help="Time range of each chunk",
+)
+def retention_partition(chunk_interval: str) -> None:
+    """Convert the log tables into hypertables (PostgreSQL + TimescaleDB)."""
+
+    async def run_partition() -> int:
+        db_service = await get_database_service()
+        results = await RetentionManager(db_service).partition(chunk_interval)
+        await db_service.close()
+
+        if not results:
+            click.echo("TimescaleDB not available")
+            return 1
+
+        for name, success in results.items():
+            status = "✓" if success else "✗"
+            click.echo(f"  {status} {name}")
+        return 0 if all(results.values()) else 1
+
+    sys.exit(asyncio.run(run_partition()))
+
+
 if __name__ == "__main__":
     timescaledb()
@@ -101,6 +101,10 @@ class DeviceSettings(BaseSettings):
     max_concurrent_jobs: int = Field(
         default=10, description="Maximum concurrent jobs per device"
     )
+    long_poll_timeout: int = Field(
+        default=25,
+        description="Seconds a device long-poll request is held open when idle",
+    )
 
 
 class WebSocketSettings(BaseSettings):
@@ -137,6 +141,137 @@ class LoggingSettings(BaseSettings):
     )
 
 
+class AuditSettings(BaseSettings):
+    """Audit logging configuration."""
+
+    batched_event_types: List[str] = Field(
+        default=["api_access"],
+        description="Event types written asynchronously in batches",
+    )
+    batch_size: int = Field(
+        default=100, description="Maximum audit rows written per batch commit"
+    )
+    flush_interval_seconds: float = Field(
+        default=1.0, description="Longest time a batched audit event waits"
+    )
+    max_pending: int = Field(
+        default=10000,
+        description="Batched events held in memory before new ones are dropped",
+    )
+
+
+class TelemetryFilterSettings(BaseSettings):
+    """Smart filtering of device telemetry before it is stored."""
+
+    enabled: bool = Field(
+        default=True, description="Drop samples that show no significant change"
+    )
+    agent_telemetry: bool = Field(
+        default=False, description="Also filter agent telemetry uploads"
+    )
+    backend: str = Field(
+        default="memory",
+        description="Filter state store: 'memory' (per process) or 'database'",
+    )
+    snapshot_interval: int = Field(
+        default=300, description="Seconds after which a sample is always stored"
+    )
+    change_threshold: float = Field(
+        default=0.05, description="Relative change (0.0-1.0) that is significant"
+    )
+    max_entries: int = Field(
+        default=10000, description="Devices remembered by the in-memory store"
+    )
+
+
+class RateLimitSettings(BaseSettings):
+    """Per-device token-bucket limits of the agent endpoints."""
+
+    enabled: bool = Field(default=True, description="Enforce agent rate limits")
+    backend: str = Field(
+        default="memory",
+        description="Bucket store: 'memory' (per process) or 'database'",
+    )
+    budgets: Dict[str, str] = Field(
+        default={
+            "telemetry": "120/minute",
+            "heartbeat": "60/minute",
+            "reports": "120/minute",
+            "jobs": "120/minute",
+            "commands": "240/minute",
+            "registration": "10/minute",
+            "reads": "120/minute",
+        },
+        description="Budget per route class; the count is also the burst size",
+    )
+    max_entries: int = Field(
+        default=100000, description="Buckets kept by the in-memory store"
+    )
+
+
+class RetentionSettings(BaseSettings):
+    """Expiry of old log rows after they are rolled up into hourly tables."""
+
+    enabled: bool = Field(
+        default=True, description="Expire old log rows in the background"
+    )
+    interval_seconds: int = Field(
+        default=3600, description="Seconds between background retention passes"
+    )
+    days: Dict[str, int] = Field(
+        default={
+            "api_request_logs": 30,
+            "api_request_minutely": 8,
+            "error_logs": 90,
+            "job_outcomes": 90,
+            "device_state_history": 90,
+        },
+        description=(
+            "Days of raw rows kept per table; tables not listed (audit_logs "
+            "by default) are kept"
+        ),
+    )
+    chunk_minutes: int = Field(
+        default=60,
+        description="Minutes of rows rolled up and deleted per transaction",
+    )
+
+
+class MobivisorClientSettings(BaseSettings):
+    """Connection pool and response cache of the Mobivisor proxy client."""
+
+    http2: bool = Field(
+        default=True, description="Negotiate HTTP/2 (needs the h2 package)"
+    )
+    max_connections: int = Field(
+        default=20, description="Maximum open connections to Mobivisor"
+    )
+    max_keepalive_connections: int = Field(
+        default=10, description="Idle connections kept alive for reuse"
+    )
+    keepalive_expiry: float = Field(
+        default=30.0, description="Seconds an idle connection is kept"
+    )
+    cache_enabled: bool = Field(
+        default=True, description="Cache responses of read-mostly GET endpoints"
+    )
+    cache_max_entries: int = Field(
+        default=1024, description="Maximum cached Mobivisor responses"
+    )
+    cache_ttl_seconds: Dict[str, int] = Field(
+        default={
+            "device_list": 30,
+            "device_details": 60,
+            "device_apps": 300,
+            "device_policies": 300,
+            "system_apps": 3600,
+            "groups": 120,
+            "users": 120,
+        },
+        description="Freshness per endpoint class; 0 disables caching it",
+    )
+
+
 class CorsSettings(BaseSettings):
     """CORS configuration — read from CORS_ORIGINS env var or use defaults."""
 
@@ -194,6 +329,13 @@ class Settings(BaseSettings):
     devices: DeviceSettings = Field(default_factory=DeviceSettings)
     websocket: WebSocketSettings = Field(default_factory=WebSocketSettings)
     logging: LoggingSettings = Field(default_factory=LoggingSettings)
+    audit: AuditSettings = Field(default_factory=AuditSettings)
+    mobivisor: MobivisorClientSettings = Field(default_factory=MobivisorClientSettings)
+    telemetry_filter: TelemetryFilterSettings = Field(
+        default_factory=TelemetryFilterSettings
+    )
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    retention: RetentionSettings = Field(default_factory=RetentionSettings)
 
     # Mobivisor API settings
     mobivisor_api_url: str = Field(
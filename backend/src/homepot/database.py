@@ -9,11 +9,31 @@ from contextlib import asynccontextmanager
 import datetime
 import logging
 from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
+from typing import (
+    Any,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
 import uuid
 
 from fastapi import HTTPException
-from sqlalchemy import Result, create_engine, func, inspect, select, text
+from sqlalchemy import (
+    Result,
+    create_engine,
+    func,
+    insert,
+    inspect,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
@@ -39,6 +59,7 @@ from homepot.models import (
     Site,
     User,
 )
+from homepot.notification_hub import COMMANDS_CHANNEL, get_notification_hub
 
 logger = logging.getLogger(__name__)
 
@@ -47,12 +68,18 @@ logger = logging.getLogger(__name__)
 try:
     from homepot.app.models.AnalyticsModel import (  # noqa: F401
         Alert,
+        APIRequestHourly,
         APIRequestLog,
+        APIRequestMinutely,
         ConfigurationHistory,
+        DeviceAnomalyState,
         DeviceMetrics,
         DeviceStateHistory,
+        DeviceStateHourly,
         ErrorLog,
+        ErrorLogHourly,
         JobOutcome,
+        JobOutcomeHourly,
         PushNotificationLog,
         SiteOperatingSchedule,
         UserActivity,
@@ -177,6 +204,53 @@ def _ensure_push_log_columns(bind: Any) -> None:
             raise
 
 
+DEVICE_NAME_INDEX = "uq_devices_site_live_name"
+
+
+def is_device_name_conflict(error: IntegrityError) -> bool:
+    """Return True if ``error`` reports a live device name already used in its site."""
+    return DEVICE_NAME_INDEX in str(error.orig)
+
+
+def _verify_enrolment_claim(
+    intent: Optional[EnrolmentIntent],
+    claim_token: str,
+    expected_device_identity: Optional[str],
+) -> EnrolmentIntent:
+    """Return ``intent`` if ``claim_token`` may claim it now, else raise ValueError."""
+    from homepot.app.auth_utils import verify_password
+
+    if not intent:
+        raise ValueError("Enrolment intent not found")
+
+    if intent.status != EnrolmentIntentStatus.APPROVED:
+        raise ValueError(
+            f"Intent must be approved before claiming (current: {intent.status})"
+        )
+
+    if intent.expires_at:
+        expires_at = intent.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=datetime.timezone.utc)
+        if expires_at < datetime.datetime.now(datetime.timezone.utc):
+            raise ValueError("Enrolment intent has expired")
+
+    if not intent.claim_token_hash or not verify_password(
+        claim_token, cast(str, intent.claim_token_hash)
+    ):
+        raise ValueError("Invalid claim token")
+
+    if (
+        intent.expected_device_identity
+        and expected_device_identity != intent.expected_device_identity
+    ):
+        raise ValueError(
+            f"Expected device identity '{intent.expected_device_identity}' "
+            f"does not match provided '{expected_device_identity}'"
+        )
+    return intent
+
+
 class DatabaseService:
     """Async database service for HOMEPOT operations."""
 
@@ -218,6 +292,16 @@ class DatabaseService:
         self._initialized = False
         self._timescaledb_enabled = False
 
+        # Keep audit_event_hourly_counts in step with every audit_logs insert.
+        from homepot.audit import install_hourly_count_hook
+
+        install_hourly_count_hook()
+
+        # Keep the request, error and job rollups in step with their logs.
+        from homepot.analytics_rollups import install_rollup_hooks
+
+        install_rollup_hooks()
+
     async def initialize(self) -> None:
         """Initialize database schema."""
         if self._initialized:
@@ -519,7 +603,11 @@ class DatabaseService:
         ip_address: Optional[str] = None,
         config: Optional[dict] = None,
     ) -> Optional[Device]:
-        """Update an existing device."""
+        """Update an existing device.
+
+        Raises:
+            ValueError: If ``name`` is used by another live device of the site.
+        """
         async with self.get_session() as session:
             result = await session.execute(
                 select(Device).where(Device.device_id == device_id)
@@ -542,6 +630,12 @@ class DatabaseService:
                 current_config.update(config)
                 device.config = current_config  # type: ignore
 
+            try:
+                await session.flush()
+            except IntegrityError as e:
+                if not is_device_name_conflict(e):
+                    raise
+                raise ValueError(f"Device name '{name}' is already in use in this site")
             await session.commit()
             await session.refresh(device)
             return device
@@ -594,6 +688,7 @@ class DatabaseService:
         """
         from sqlalchemy import delete, update
 
+        from homepot.analytics_rollups import delete_logs
         from homepot.models import DeviceAssignment, DeviceLifecycleEvent
 
         async with self.get_session() as session:
@@ -646,8 +741,8 @@ class DatabaseService:
 
             # Rows that reference the device by its public string id
             await session.execute(delete(Alert).where(Alert.device_id == device_id))
-            await session.execute(
-                delete(JobOutcome).where(JobOutcome.device_id == device_id)
+            await session.run_sync(
+                delete_logs, JobOutcome, JobOutcome.device_id == device_id
             )
             await session.execute(
                 delete(ConfigurationHistory).where(
@@ -857,7 +952,88 @@ class DatabaseService:
             session.add(command)
             await session.commit()
             await session.refresh(command)
-            return command
+
+        # Wake any long-poll request parked for this device.
+        get_notification_hub().notify(COMMANDS_CHANNEL, device_id)
+        return command
+
+    async def create_device_commands_bulk(
+        self,
+        site_id: int,
+        command_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        device_type: Optional[str] = None,
+        device_ids: Optional[Sequence[str]] = None,
+        required_permissions: Sequence[str] = (),
+    ) -> Tuple[Dict[str, DeviceCommand], List[str]]:
+        """Queue the same command for every active device of a site.
+
+        The targets (optionally narrowed to one ``device_type`` and/or a list
+        of string ``device_ids``) are resolved in one query and all their
+        commands are written with one multi-row INSERT, in one transaction,
+        instead of one transaction per device.
+
+        Args:
+            site_id: Database ID of the site.
+            command_type: Command to queue.
+            payload: Command payload, shared by every command.
+            device_type: Only target devices of this type.
+            device_ids: Only target these devices.
+            required_permissions: ``device_permissions`` grants a device must
+                have to be targeted.
+
+        Returns:
+            The queued commands keyed by device ID, and the IDs of the
+            devices skipped for missing permissions.
+        """
+        conditions = [Device.site_id == site_id, Device.is_active.is_(True)]
+        if device_type is not None:
+            conditions.append(Device.device_type == device_type)
+        if device_ids is not None:
+            conditions.append(Device.device_id.in_(device_ids))
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        targeted: List[str] = []
+        skipped: List[str] = []
+        commands: List[DeviceCommand] = []
+        async with self.get_session() as session:
+            targets = await session.execute(
+                select(Device.id, Device.device_id, Device.device_permissions)
+                .where(*conditions)
+                .order_by(Device.id)
+            )
+            rows = []
+            for pk, string_id, permissions in targets:
+                granted = permissions if isinstance(permissions, dict) else {}
+                if not all(granted.get(key, False) for key in required_permissions):
+                    skipped.append(string_id)
+                    continue
+                targeted.append(string_id)
+                rows.append(
+                    {
+                        "command_id": str(uuid.uuid4()),
+                        "device_id": pk,
+                        "command_type": command_type,
+                        "payload": payload,
+                        "status": CommandStatus.PENDING,
+                        "created_at": now,
+                    }
+                )
+            if rows:
+                result = await session.scalars(
+                    insert(DeviceCommand).returning(
+                        DeviceCommand, sort_by_parameter_order=True
+                    ),
+                    rows,
+                )
+                commands = list(result)
+            await session.commit()
+
+        hub = get_notification_hub()
+        for command in commands:
+            hub.notify(COMMANDS_CHANNEL, command.device_id)
+        # RETURNING rows follow the order of ``rows`` (sort_by_parameter_order).
+        return dict(zip(targeted, commands)), skipped
 
     async def get_pending_commands_for_device(
         self, device_id: int
@@ -876,6 +1052,50 @@ class DatabaseService:
             )
             return list(result.scalars().all())
 
+    async def claim_pending_commands_for_device(
+        self, device_id: int
+    ) -> List[DeviceCommand]:
+        """Return a device's pending commands, marking them SENT as they are read.
+
+        One ``UPDATE ... RETURNING`` both flips the commands to SENT (stamping
+        ``sent_at``) and returns them, so the agent needs no separate ack per
+        command and two concurrent polls never receive the same command.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        claim = (
+            update(DeviceCommand)
+            .where(
+                DeviceCommand.device_id == device_id,
+                DeviceCommand.status == CommandStatus.PENDING,
+            )
+            .values(status=CommandStatus.SENT, sent_at=now)
+        )
+        async with self.get_session() as session:
+            if session.get_bind().dialect.update_returning:
+                result = await session.scalars(
+                    claim.returning(DeviceCommand),
+                    execution_options={"synchronize_session": False},
+                )
+                commands = list(result)
+            else:
+                result = await session.scalars(
+                    select(DeviceCommand)
+                    .where(
+                        DeviceCommand.device_id == device_id,
+                        DeviceCommand.status == CommandStatus.PENDING,
+                    )
+                    .with_for_update(skip_locked=True)
+                )
+                commands = list(result)
+                await session.execute(
+                    claim.where(
+                        DeviceCommand.id.in_([command.id for command in commands])
+                    ),
+                    execution_options={"synchronize_session": "evaluate"},
+                )
+            await session.commit()
+        return sorted(commands, key=lambda command: command.created_at)
+
     async def update_command_status(
         self,
         command_id: str,
@@ -937,29 +1157,29 @@ class DatabaseService:
     async def expire_stale_commands(self, ttl_seconds: int = 300) -> int:
         """Mark PENDING and SENT commands older than ttl_seconds as EXPIRED.
 
+        A single ``UPDATE`` expires every stale command, however many there
+        are, and stamps ``executed_at`` where it is still unset.
+
         Returns the number of commands expired.
         """
-        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
-            seconds=ttl_seconds
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cutoff = now - datetime.timedelta(seconds=ttl_seconds)
+        expire = (
+            update(DeviceCommand)
+            .where(
+                DeviceCommand.status.in_([CommandStatus.PENDING, CommandStatus.SENT]),
+                DeviceCommand.created_at < cutoff,
+            )
+            .values(
+                status=CommandStatus.EXPIRED,
+                executed_at=func.coalesce(DeviceCommand.executed_at, now),
+            )
+            .execution_options(synchronize_session=False)
         )
         async with self.get_session() as session:
-            result = await session.execute(
-                select(DeviceCommand).where(
-                    DeviceCommand.status.in_(
-                        [CommandStatus.PENDING, CommandStatus.SENT]
-                    ),
-                    DeviceCommand.created_at < cutoff,
-                )
-            )
-            commands = list(result.scalars().all())
-            for cmd in commands:
-                cmd.status = CommandStatus.EXPIRED  # type: ignore[assignment]
-                if cmd.executed_at is None:
-                    cmd.executed_at = datetime.datetime.now(  # type: ignore
-                        datetime.timezone.utc
-                    )
+            result = await session.execute(expire)
             await session.commit()
-            return len(commands)
+            return result.rowcount or 0
 
     # Health check operations
     async def create_health_check(
@@ -1213,94 +1433,94 @@ class DatabaseService:
     ) -> Dict[str, Any]:
         """Atomically claim an enrolment intent and create the device.
 
-        Uses ``select_for_update`` to lock the intent row, preventing
-        duplicate or concurrent claims.  Validates token hash, expiry,
-        scope (expected_device_identity) and unused state.  On success
-        creates the device, records a lifecycle epoch, and marks the
-        intent as consumed — all in a single transaction.
+        The claim is a single conditional ``UPDATE ... WHERE status =
+        'approved' ... RETURNING``: of any number of concurrent claims exactly
+        one matches the row and the rest update nothing and fail, with no
+        separate lock-then-check round trips. Token, expiry and scope
+        (expected_device_identity) are checked beforehand, outside the
+        transaction, and the UPDATE only matches the token hash that was
+        verified, so a token regenerated in between is not honoured.
+        The device, its lifecycle epoch and credential are created in the
+        claim's transaction; a device name already used by a live device of
+        the site is rejected by the ``uq_devices_site_live_name`` index.
         """
-        import secrets as _secrets
+        import secrets
 
-        from passlib.context import CryptContext as _CryptContext
+        from homepot.app.auth_utils import hash_password
 
-        _pwd = _CryptContext(schemes=["bcrypt"], deprecated="auto")
+        intent = _verify_enrolment_claim(
+            await self.get_enrolment_intent_by_id(intent_id),
+            claim_token,
+            expected_device_identity,
+        )
 
-        async with self.get_session() as session:
-            # Lock the intent row for the duration of this transaction
-            result = await session.execute(
-                select(EnrolmentIntent)
-                .where(EnrolmentIntent.intent_id == intent_id)
-                .with_for_update()
-            )
-            intent = result.scalar_one_or_none()
-            if not intent:
-                raise ValueError("Enrolment intent not found")
+        # Hash before taking any write lock: bcrypt dominates the claim.
+        api_key = secrets.token_urlsafe(32)
+        api_key_hash = hash_password(api_key)
+        new_device_id = generate_device_id()
+        now = datetime.datetime.now(datetime.timezone.utc)
 
-            # Validate unused state
-            if intent.status != EnrolmentIntentStatus.APPROVED:
-                raise ValueError(
-                    f"Intent must be approved before claiming (current: {intent.status})"
+        async with self.get_session() as session:
+            claimed = (
+                await session.execute(
+                    update(EnrolmentIntent)
+                    .where(
+                        EnrolmentIntent.intent_id == intent_id,
+                        EnrolmentIntent.status == EnrolmentIntentStatus.APPROVED,
+                        EnrolmentIntent.claim_token_hash == intent.claim_token_hash,
+                        EnrolmentIntent.expires_at >= now,
+                    )
+                    .values(
+                        status=EnrolmentIntentStatus.CONSUMED.value, consumed_at=now
+                    )
+                    .returning(
+                        EnrolmentIntent.site_id,
+                        EnrolmentIntent.tenant_id,
+                        EnrolmentIntent.enrolment_method,
+                        EnrolmentIntent.claim_token_hash,
+                    )
+                    .execution_options(synchronize_session=False)
                 )
-
-            # Validate expiry
-            if intent.expires_at:
-                now = datetime.datetime.now(datetime.timezone.utc)
-                expires_at = intent.expires_at
-                if expires_at.tzinfo is None:
-                    expires_at = expires_at.replace(tzinfo=datetime.timezone.utc)
-                if expires_at < now:
-                    raise ValueError("Enrolment intent has expired")
-
-            # Validate token hash
-            if not intent.claim_token_hash or not _pwd.verify(
-                claim_token, intent.claim_token_hash  # type: ignore[arg-type]
-            ):
-                raise ValueError("Invalid claim token")
-
-            # Validate expected device identity if set
-            if (
-                intent.expected_device_identity
-                and expected_device_identity != intent.expected_device_identity
-            ):
-                raise ValueError(
-                    f"Expected device identity '{intent.expected_device_identity}' "
-                    f"does not match provided '{expected_device_identity}'"
+            ).one_or_none()
+            if claimed is None:
+                # Claimed, revoked, expired or re-tokened since it was read.
+                current = await session.scalar(
+                    select(EnrolmentIntent).where(
+                        EnrolmentIntent.intent_id == intent_id
+                    )
                 )
-
-            # Create the device with a canonical, server-generated device ID.
-            new_device_id = generate_device_id()
-            # Keep trying until we land on an unused id (collision is
-            # astronomically unlikely, but stay safe).
-            while await session.scalar(
-                select(Device.id).where(Device.device_id == new_device_id)
-            ):
-                new_device_id = generate_device_id()
-            api_key = _secrets.token_urlsafe(32)
-            api_key_hash = _pwd.hash(api_key)
+                _verify_enrolment_claim(current, claim_token, expected_device_identity)
+                raise ValueError("Enrolment intent is no longer claimable")
 
             device = Device(
                 device_id=new_device_id,
                 name=device_name or new_device_id,
                 device_type=device_type,
-                site_id=intent.site_id,
+                site_id=claimed.site_id,
                 api_key_hash=api_key_hash,
                 os_details=os_details,
-                enrollment_method=intent.enrolment_method,
+                enrollment_method=claimed.enrolment_method,
                 lifecycle_state=LifecycleState.PENDING.value,
             )
             session.add(device)
-            await session.flush()
+            try:
+                await session.flush()
+            except IntegrityError as e:
+                if is_device_name_conflict(e):
+                    raise ValueError(
+                        f"Device name '{device_name}' is already in use in this site"
+                    )
+                raise
 
-            # Create lifecycle epoch
             epoch_id = str(uuid.uuid4())
             epoch = LifecycleEpoch(
                 epoch_id=epoch_id,
                 device_id=device.id,
-                site_id=intent.site_id,
-                tenant_id=intent.tenant_id,
-                claimed_at=datetime.datetime.now(datetime.timezone.utc),
-                claim_token_hash=intent.claim_token_hash,
-                enrolment_method=intent.enrolment_method,
+                site_id=claimed.site_id,
+                tenant_id=claimed.tenant_id,
+                claimed_at=now,
+                claim_token_hash=claimed.claim_token_hash,
+                enrolment_method=claimed.enrolment_method,
             )
             session.add(epoch)
             await session.flush()
@@ -1308,28 +1528,19 @@ class DatabaseService:
             # Link device to its current lifecycle epoch
             device.lifecycle_epoch_id = epoch.id  # type: ignore[assignment]
 
-            # Create tracked credential record
-            credential_id = str(uuid.uuid4())
-            credential = DeviceCredential(
-                credential_id=credential_id,
-                device_id=device.id,
-                key_hash=api_key_hash,
-                is_active=True,
+            session.add(
+                DeviceCredential(
+                    credential_id=str(uuid.uuid4()),
+                    device_id=device.id,
+                    key_hash=api_key_hash,
+                    is_active=True,
+                )
             )
-            session.add(credential)
-
-            # Mark intent as consumed
-            intent.status = EnrolmentIntentStatus.CONSUMED.value  # type: ignore[assignment]
-            intent.consumed_at = datetime.datetime.now(datetime.timezone.utc)  # type: ignore[assignment]
-
-            await session.flush()
-            await session.refresh(device)
-            await session.refresh(epoch)
 
         return {
             "device_id": new_device_id,
             "api_key": api_key,
-            "site_id": intent.site_id,
+            "site_id": claimed.site_id,
             "epoch_id": epoch_id,
         }
 
@@ -1339,38 +1550,48 @@ class DatabaseService:
     ) -> Dict[str, str]:
         """Regenerate a claim token for an existing pending enrolment intent.
 
-        Returns the new token and its expiry.  Only works on intents
-        that are still in PENDING or APPROVED status.
+        Returns the new token.  Only works on intents that are still in
+        PENDING or APPROVED status; the status check and the token swap are
+        one conditional UPDATE, so a concurrent claim either wins first or
+        finds the old token no longer matches.
         """
-        import secrets as _secrets
-
-        from passlib.context import CryptContext as _CryptContext
+        import secrets
 
-        _pwd = _CryptContext(schemes=["bcrypt"], deprecated="auto")
+        from homepot.app.auth_utils import hash_password
 
+        new_token = secrets.token_urlsafe(32)
+        token_hash = hash_password(new_token)
         async with self.get_session() as session:
-            result = await session.execute(
-                select(EnrolmentIntent)
-                .where(EnrolmentIntent.intent_id == intent_id)
-                .with_for_update()
-            )
-            intent = result.scalar_one_or_none()
-            if not intent:
-                raise ValueError("Enrolment intent not found")
-
-            if intent.status not in (
-                EnrolmentIntentStatus.PENDING,
-                EnrolmentIntentStatus.APPROVED,
-            ):
+            updated = (
+                await session.execute(
+                    update(EnrolmentIntent)
+                    .where(
+                        EnrolmentIntent.intent_id == intent_id,
+                        EnrolmentIntent.status.in_(
+                            [
+                                EnrolmentIntentStatus.PENDING,
+                                EnrolmentIntentStatus.APPROVED,
+                            ]
+                        ),
+                    )
+                    .values(claim_token_hash=token_hash)
+                    .returning(EnrolmentIntent.id)
+                    .execution_options(synchronize_session=False)
+                )
+            ).scalar_one_or_none()
+            if updated is None:
+                status = await session.scalar(
+                    select(EnrolmentIntent.status).where(
+                        EnrolmentIntent.intent_id == intent_id
+                    )
+                )
+                if status is None:
+                    raise ValueError("Enrolment intent not found")
                 raise ValueError(
-                    f"Cannot regenerate token for intent in status '{intent.status}'"
+                    f"Cannot regenerate token for intent in status '{status}'"
                 )
 
-            new_token = _secrets.token_urlsafe(32)
-            intent.claim_token_hash = _pwd.hash(new_token)  # type: ignore[assignment]
-            await session.flush()
-
-            return {"claim_token": new_token}
+        return {"claim_token": new_token}
 
     async def get_dashboard_summary(
         self,
@@ -7,7 +7,7 @@ exposing REST API endpoints for device management and monitoring.
 
 import asyncio
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import logging
 import time
 from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
@@ -16,6 +16,7 @@ from fastapi import (
     Depends,
     FastAPI,
     HTTPException,
+    Query,
     Request,
     Response,
     WebSocket,
@@ -28,6 +29,8 @@ from pydantic import BaseModel, ConfigDict
 from homepot.agents import get_agent_manager, stop_agent_manager
 from homepot.app.api.API_v1.Api import api_v1_router
 from homepot.app.api.API_v1.Endpoints.SitesEndpoint import generate_site_id
+from homepot.app.utils.mobivisor_client import close_mobivisor_client
+from homepot.app.utils.pagination import ndjson_response
 from homepot.audit import AuditEventType, get_audit_logger
 from homepot.client import HomepotClient
 from homepot.config import get_settings
@@ -35,6 +38,7 @@ from homepot.database import close_database_service, get_database_service
 from homepot.models import JobPriority
 from homepot.orchestrator import get_job_orchestrator, stop_job_orchestrator
 from homepot.request_metrics import increment_request_count
+from homepot.retention import RetentionManager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -46,6 +50,8 @@ client_instance: Optional[HomepotClient] = None
 # Background task for command expiry
 _command_expiry_task: Optional[asyncio.Task[None]] = None
 _intent_expiry_task: Optional[asyncio.Task[None]] = None
+_anomaly_state_task: Optional[asyncio.Task[None]] = None
+_retention_task: Optional[asyncio.Task[None]] = None
 
 
 async def _run_command_expiry_loop() -> None:
@@ -77,10 +83,43 @@ async def _run_intent_expiry_loop() -> None:
         await asyncio.sleep(POLL_INTERVAL_SECONDS)
 
 
+async def _run_anomaly_state_loop() -> None:
+    """Fold new telemetry and health checks into device_anomaly_state."""
+    # ``ai`` is importable once the AI endpoints have been loaded.
+    from ai.anomaly_state import AnomalyStateUpdater
+
+    updater = AnomalyStateUpdater()
+    while True:
+        try:
+            db = await get_database_service()
+            async with db.get_session() as session:
+                processed = await updater.process_pending(session)
+            if processed:
+                logger.debug(f"Folded {processed} row(s) into anomaly state")
+        except Exception as e:
+            logger.error(f"Anomaly state update error: {e}", exc_info=True)
+        await asyncio.sleep(updater.interval)
+
+
+async def _run_retention_loop() -> None:
+    """Periodically roll up and expire old log rows (see homepot.retention)."""
+    interval = get_settings().retention.interval_seconds
+    while True:
+        try:
+            db = await get_database_service()
+            expired = await RetentionManager(db).run()
+            if any(expired.values()):
+                logger.info(f"Expired old log rows: {expired}")
+        except Exception as e:
+            logger.error(f"Retention error: {e}", exc_info=True)
+        await asyncio.sleep(interval)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Manage application lifespan events."""
     global client_instance, _command_expiry_task, _intent_expiry_task
+    global _anomaly_state_task, _retention_task
 
     # Startup
     logger.info("Starting HOMEPOT Client application...")
@@ -101,6 +140,15 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     _intent_expiry_task = asyncio.create_task(_run_intent_expiry_loop())
     logger.info("Enrolment intent expiry background task started")
 
+    # Start background anomaly state consumer
+    _anomaly_state_task = asyncio.create_task(_run_anomaly_state_loop())
+    logger.info("Anomaly state background task started")
+
+    # Start background log retention task
+    if get_settings().retention.enabled:
+        _retention_task = asyncio.create_task(_run_retention_loop())
+        logger.info("Log retention background task started")
+
     # Initialize job orchestrator
     try:
         await get_job_orchestrator()
@@ -169,6 +217,8 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
             "HOMEPOT Client application shutting down",
             metadata={"shutdown_reason": "normal"},
         )
+        # Write batched audit events (e.g. API access) still in memory
+        await audit_logger.drain()
     except Exception as e:
         logger.error(f"Error logging shutdown event: {e}")
 
@@ -207,6 +257,26 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         _intent_expiry_task = None
         logger.info("Enrolment intent expiry background task stopped")
 
+    # Cancel background anomaly state consumer
+    if _anomaly_state_task is not None:
+        _anomaly_state_task.cancel()
+        try:
+            await _anomaly_state_task
+        except asyncio.CancelledError:
+            pass
+        _anomaly_state_task = None
+        logger.info("Anomaly state background task stopped")
+
+    # Cancel background log retention task
+    if _retention_task is not None:
+        _retention_task.cancel()
+        try:
+            await _retention_task
+        except asyncio.CancelledError:
+            pass
+        _retention_task = None
+        logger.info("Log retention background task stopped")
+
     # Shutdown database
     try:
         await close_database_service()
@@ -214,6 +284,12 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     except Exception as e:
         logger.error(f"Error closing database: {e}")
 
+    # Close pooled Mobivisor connections
+    try:
+        await close_mobivisor_client()
+    except Exception as e:
+        logger.error(f"Error closing Mobivisor client: {e}")
+
     # Disconnect client
     if client_instance and client_instance.is_connected():
         await client_instance.disconnect()
@@ -1039,9 +1115,24 @@ async def restart_device(device_id: str) -> Dict[str, Any]:
 @app.get("/audit/events", tags=["Audit"])
 @app.get("/api/v1/audit/events", tags=["Audit"])
 async def get_audit_events(
-    limit: int = 50, event_type: Optional[str] = None, hours: Optional[int] = None
-) -> Dict[str, Any]:
-    """Get recent audit events with optional filtering."""
+    limit: int = 50,
+    event_type: Optional[str] = None,
+    hours: Optional[int] = None,
+    cursor: Optional[str] = None,
+    device_id: Optional[str] = None,
+    site_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+) -> Any:
+    """Get audit events, newest first, with optional filtering.
+
+    Pages are keyset-paginated: pass ``next_cursor`` back as ``cursor`` for
+    the next page. ``event_type`` accepts a comma-separated list, ``fields``
+    a comma-separated projection. With ``format=ndjson`` every matching event
+    is streamed as newline-delimited JSON, ignoring ``limit`` and ``cursor``.
+    """
     try:
         audit_logger = get_audit_logger()
 
@@ -1049,24 +1140,51 @@ async def get_audit_events(
         event_types = None
         if event_type:
             try:
-                event_types = [AuditEventType(event_type)]
+                event_types = [
+                    AuditEventType(value.strip()) for value in event_type.split(",")
+                ]
             except ValueError:
                 raise HTTPException(
                     status_code=400, detail=f"Invalid event type: {event_type}"
                 )
 
-        events = await audit_logger.get_recent_events(
-            limit=min(limit, 200),  # Cap at 200 for performance
-            event_types=event_types,
-        )
+        if hours and since is None:
+            since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        filters: Dict[str, Any] = {
+            "event_types": event_types,
+            "device_id": device_id,
+            "site_id": site_id,
+            "since": since,
+            "until": until,
+        }
+
+        if format == "ndjson":
+            try:
+                rows = audit_logger.stream_events(fields=fields, **filters)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return ndjson_response(rows, filename="audit-events.ndjson")
+
+        limit = min(limit, 200)  # Cap at 200 for performance
+        try:
+            events, next_cursor = await audit_logger.get_events_page(
+                limit=limit, cursor=cursor, fields=fields, **filters
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         return {
             "events": events,
             "total_returned": len(events),
             "limit": limit,
+            "next_cursor": next_cursor,
             "filters": {
                 "event_type": event_type,
                 "hours": hours,
+                "device_id": device_id,
+                "site_id": site_id,
+                "since": since.isoformat() if since else None,
+                "until": until.isoformat() if until else None,
             },
         }
 
@@ -1520,6 +1638,7 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail, "status_code": exc.status_code},
+        headers=exc.headers,
     )
 
 
@@ -0,0 +1,47 @@
+"""Add device_anomaly_state table for incremental anomaly scoring.
+
+Revision ID: 20261018_add_device_anomaly_state
+Revises: 20260817_add_site_lifecycle_state
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_add_device_anomaly_state"
+down_revision = "20260817_add_site_lifecycle_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the device_anomaly_state table and its score index."""
+    op.create_table(
+        "device_anomaly_state",
+        sa.Column(
+            "device_id",
+            sa.Integer(),
+            sa.ForeignKey("devices.id"),
+            primary_key=True,
+        ),
+        sa.Column("score", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("severity", sa.String(length=20), nullable=True),
+        sa.Column("reasons", sa.JSON(), nullable=True),
+        sa.Column("metrics", sa.JSON(), nullable=True),
+        sa.Column(
+            "consecutive_failures", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column("flapping_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_healthy", sa.Boolean(), nullable=True),
+        sa.Column("transitions", sa.JSON(), nullable=True),
+        sa.Column("last_metric_id", sa.Integer(), nullable=True),
+        sa.Column("last_health_check_id", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("idx_device_anomaly_state_score", "device_anomaly_state", ["score"])
+
+
+def downgrade() -> None:
+    """Drop the device_anomaly_state table."""
+    op.drop_index("idx_device_anomaly_state_score", table_name="device_anomaly_state")
+    op.drop_table("device_anomaly_state")
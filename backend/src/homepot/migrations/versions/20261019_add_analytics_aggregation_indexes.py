@@ -0,0 +1,43 @@
+"""Add composite indexes for grouped analytics queries.
+
+Revision ID: 20261019_add_analytics_aggregation_indexes
+Revises: 20261018_add_device_anomaly_state
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+revision = "20261019_add_analytics_aggregation_indexes"
+down_revision = "20261018_add_device_anomaly_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index the time-window and device filters of the AI analytics queries.
+
+    ``job_outcomes(timestamp, status)`` already exists as
+    ``idx_timestamp_status``.
+    """
+    op.create_index(
+        "idx_job_outcome_device_timestamp",
+        "job_outcomes",
+        ["device_id", "timestamp"],
+    )
+    op.create_index(
+        "idx_push_sent_at_status",
+        "push_notification_logs",
+        ["sent_at", "status"],
+    )
+    op.create_index(
+        "idx_push_device_sent_at",
+        "push_notification_logs",
+        ["device_id", "sent_at"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the analytics aggregation indexes."""
+    op.drop_index("idx_push_device_sent_at", table_name="push_notification_logs")
+    op.drop_index("idx_push_sent_at_status", table_name="push_notification_logs")
+    op.drop_index("idx_job_outcome_device_timestamp", table_name="job_outcomes")
@@ -0,0 +1,61 @@
+"""Add composite indexes for the device, command, job and health-check hot paths.
+
+Revision ID: 20261020_add_hot_path_indexes
+Revises: 20261019_add_analytics_aggregation_indexes
+Create Date: 2026-10-20
+"""
+
+from alembic import op
+
+revision = "20261020_add_hot_path_indexes"
+down_revision = "20261019_add_analytics_aggregation_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index the predicates of the most frequent device/command/job queries.
+
+    - ``devices(site_id, is_active, device_type)``: site and segment listings.
+    - ``device_commands(device_id, status, created_at)``: pending-command
+      polling, already in ``created_at`` order.
+    - ``device_commands(status, created_at)``: the stale-command expiry sweep.
+    - ``jobs(status, priority, created_at)``: pending-job dispatch.
+    - ``health_checks(device_id, timestamp)``: latest health check per device.
+    """
+    op.create_index(
+        "idx_devices_site_active_type",
+        "devices",
+        ["site_id", "is_active", "device_type"],
+    )
+    op.create_index(
+        "idx_device_commands_device_status_created",
+        "device_commands",
+        ["device_id", "status", "created_at"],
+    )
+    op.create_index(
+        "idx_device_commands_status_created",
+        "device_commands",
+        ["status", "created_at"],
+    )
+    op.create_index(
+        "idx_jobs_status_priority_created",
+        "jobs",
+        ["status", "priority", "created_at"],
+    )
+    op.create_index(
+        "idx_health_checks_device_timestamp",
+        "health_checks",
+        ["device_id", "timestamp"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the hot-path indexes."""
+    op.drop_index("idx_health_checks_device_timestamp", table_name="health_checks")
+    op.drop_index("idx_jobs_status_priority_created", table_name="jobs")
+    op.drop_index("idx_device_commands_status_created", table_name="device_commands")
+    op.drop_index(
+        "idx_device_commands_device_status_created", table_name="device_commands"
+    )
+    op.drop_index("idx_devices_site_active_type", table_name="devices")
@@ -0,0 +1,43 @@
+"""Add audit_event_hourly_counts for incrementally maintained audit statistics.
+
+Revision ID: 20261021_add_audit_event_hourly_counts
+Revises: 20261020_add_hot_path_indexes
+Create Date: 2026-10-21
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261021_add_audit_event_hourly_counts"
+down_revision = "20261020_add_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the hourly count table and backfill it from audit_logs."""
+    op.create_table(
+        "audit_event_hourly_counts",
+        sa.Column("hour_start", sa.DateTime(), primary_key=True),
+        sa.Column("event_type", sa.String(length=50), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        hour = "date_trunc('hour', created_at AT TIME ZONE 'UTC')"
+    else:
+        # The format SQLAlchemy's DateTime stores, so backfilled buckets and
+        # those written by the ORM compare and conflict as the same hour.
+        hour = "strftime('%Y-%m-%d %H:00:00.000000', created_at)"
+    op.execute(f"""
+        INSERT INTO audit_event_hourly_counts (hour_start, event_type, count)
+        SELECT {hour}, event_type, COUNT(*)
+        FROM audit_logs
+        WHERE created_at IS NOT NULL
+        GROUP BY 1, 2
+        """)
+
+
+def downgrade() -> None:
+    """Drop the audit_event_hourly_counts table."""
+    op.drop_table("audit_event_hourly_counts")
@@ -0,0 +1,38 @@
+"""Add telemetry_filter_state for smart filtering shared across workers.
+
+Revision ID: 20261022_add_telemetry_filter_state
+Revises: 20261021_add_audit_event_hourly_counts
+Create Date: 2026-10-22
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261022_add_telemetry_filter_state"
+down_revision = "20261021_add_audit_event_hourly_counts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the telemetry_filter_state table."""
+    op.create_table(
+        "telemetry_filter_state",
+        sa.Column("state_key", sa.String(length=512), primary_key=True),
+        sa.Column("sample_time", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.Column("metric_values", sa.JSON(), nullable=True),
+    )
+    op.create_index(
+        "ix_telemetry_filter_state_updated_at",
+        "telemetry_filter_state",
+        ["updated_at"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the telemetry_filter_state table."""
+    op.drop_index(
+        "ix_telemetry_filter_state_updated_at", table_name="telemetry_filter_state"
+    )
+    op.drop_table("telemetry_filter_state")
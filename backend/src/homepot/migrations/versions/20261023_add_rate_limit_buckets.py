@@ -0,0 +1,33 @@
+"""Add rate_limit_buckets for agent rate limits shared across workers.
+
+Revision ID: 20261023_add_rate_limit_buckets
+Revises: 20261022_add_telemetry_filter_state
+Create Date: 2026-10-23
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261023_add_rate_limit_buckets"
+down_revision = "20261022_add_telemetry_filter_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the rate_limit_buckets table."""
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("bucket_key", sa.String(length=255), primary_key=True),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+    )
+    op.create_index(
+        "ix_rate_limit_buckets_updated_at", "rate_limit_buckets", ["updated_at"]
+    )
+
+
+def downgrade() -> None:
+    """Drop the rate_limit_buckets table."""
+    op.drop_index("ix_rate_limit_buckets_updated_at", table_name="rate_limit_buckets")
+    op.drop_table("rate_limit_buckets")
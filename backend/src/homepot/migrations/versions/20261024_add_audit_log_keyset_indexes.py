@@ -0,0 +1,36 @@
+"""Add audit_logs indexes for newest-first keyset pagination.
+
+Revision ID: 20261024_add_audit_log_keyset_indexes
+Revises: 20261023_add_rate_limit_buckets
+Create Date: 2026-10-24
+"""
+
+from alembic import op
+
+revision = "20261024_add_audit_log_keyset_indexes"
+down_revision = "20261023_add_rate_limit_buckets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Index the ``(created_at, id)`` cursor, alone and behind the common filters.
+
+    - ``audit_logs(created_at, id)``: unfiltered pages and time ranges.
+    - ``audit_logs(device_id, created_at)``: per-device audit history.
+    - ``audit_logs(event_type, created_at)``: per-event-type queries.
+    """
+    op.create_index("idx_audit_logs_created_id", "audit_logs", ["created_at", "id"])
+    op.create_index(
+        "idx_audit_logs_device_created", "audit_logs", ["device_id", "created_at"]
+    )
+    op.create_index(
+        "idx_audit_logs_type_created", "audit_logs", ["event_type", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    """Drop the keyset pagination indexes."""
+    op.drop_index("idx_audit_logs_type_created", table_name="audit_logs")
+    op.drop_index("idx_audit_logs_device_created", table_name="audit_logs")
+    op.drop_index("idx_audit_logs_created_id", table_name="audit_logs")
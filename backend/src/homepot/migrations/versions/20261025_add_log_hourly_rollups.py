@@ -0,0 +1,60 @@
+"""Add hourly rollup tables written before old log rows expire.
+
+Revision ID: 20261025_add_log_hourly_rollups
+Revises: 20261024_add_audit_log_keyset_indexes
+Create Date: 2026-10-25
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261025_add_log_hourly_rollups"
+down_revision = "20261024_add_audit_log_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the api_request, error_log, job_outcome and device_state rollups."""
+    op.create_table(
+        "api_request_hourly",
+        sa.Column("hour_start", sa.DateTime(), primary_key=True),
+        sa.Column("endpoint", sa.String(length=255), primary_key=True),
+        sa.Column("method", sa.String(length=10), primary_key=True),
+        sa.Column("request_count", sa.Integer(), nullable=False),
+        sa.Column("error_count", sa.Integer(), nullable=False),
+        sa.Column("total_response_time_ms", sa.Float(), nullable=False),
+        sa.Column("min_response_time_ms", sa.Float(), nullable=True),
+        sa.Column("max_response_time_ms", sa.Float(), nullable=True),
+    )
+    op.create_table(
+        "error_log_hourly",
+        sa.Column("hour_start", sa.DateTime(), primary_key=True),
+        sa.Column("category", sa.String(length=50), primary_key=True),
+        sa.Column("severity", sa.String(length=20), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "job_outcome_hourly",
+        sa.Column("hour_start", sa.DateTime(), primary_key=True),
+        sa.Column("job_type", sa.String(length=100), primary_key=True),
+        sa.Column("status", sa.String(length=50), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("timed_count", sa.Integer(), nullable=False),
+        sa.Column("total_duration_ms", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "device_state_hourly",
+        sa.Column("hour_start", sa.DateTime(), primary_key=True),
+        sa.Column("device_id", sa.Integer(), primary_key=True),
+        sa.Column("new_state", sa.String(length=50), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop the hourly rollup tables."""
+    op.drop_table("device_state_hourly")
+    op.drop_table("job_outcome_hourly")
+    op.drop_table("error_log_hourly")
+    op.drop_table("api_request_hourly")
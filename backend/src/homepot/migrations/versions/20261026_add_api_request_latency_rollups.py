@@ -0,0 +1,78 @@
+"""Add per-minute request rollups and latency bins to the hourly rollup.
+
+Revision ID: 20261026_add_api_request_latency_rollups
+Revises: 20261025_add_log_hourly_rollups
+Create Date: 2026-10-26
+"""
+
+from typing import Any, List
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261026_add_api_request_latency_rollups"
+down_revision = "20261025_add_log_hourly_rollups"
+branch_labels = None
+depends_on = None
+
+_MEASURES = (
+    "request_count",
+    "error_count",
+    "total_response_time_ms",
+    "min_response_time_ms",
+    "max_response_time_ms",
+)
+
+
+def _request_rollup(name: str, bucket_column: str, binned: bool = True) -> None:
+    """Create a request rollup table keyed by ``bucket_column``."""
+    columns: List[sa.Column[Any]] = [
+        sa.Column(bucket_column, sa.DateTime(), primary_key=True),
+        sa.Column("endpoint", sa.String(length=255), primary_key=True),
+        sa.Column("method", sa.String(length=10), primary_key=True),
+    ]
+    if binned:
+        columns.append(sa.Column("latency_bin", sa.Integer(), primary_key=True))
+    op.create_table(
+        name,
+        *columns,
+        sa.Column("request_count", sa.Integer(), nullable=False),
+        sa.Column("error_count", sa.Integer(), nullable=False),
+        sa.Column("total_response_time_ms", sa.Float(), nullable=False),
+        sa.Column("min_response_time_ms", sa.Float(), nullable=True),
+        sa.Column("max_response_time_ms", sa.Float(), nullable=True),
+    )
+
+
+def upgrade() -> None:
+    """Create api_request_minutely and key api_request_hourly by latency bin."""
+    _request_rollup("api_request_minutely", "minute_start")
+
+    # Rows rolled up before latencies were binned keep bin -1.
+    _request_rollup("api_request_hourly_binned", "hour_start")
+    measures = ", ".join(_MEASURES)
+    op.execute(
+        "INSERT INTO api_request_hourly_binned "
+        f"(hour_start, endpoint, method, latency_bin, {measures}) "
+        f"SELECT hour_start, endpoint, method, -1, {measures} "
+        "FROM api_request_hourly"
+    )
+    op.drop_table("api_request_hourly")
+    op.rename_table("api_request_hourly_binned", "api_request_hourly")
+
+
+def downgrade() -> None:
+    """Drop api_request_minutely and merge the latency bins of each hour."""
+    _request_rollup("api_request_hourly_unbinned", "hour_start", binned=False)
+    op.execute(
+        "INSERT INTO api_request_hourly_unbinned "
+        "(hour_start, endpoint, method, request_count, error_count, "
+        "total_response_time_ms, min_response_time_ms, max_response_time_ms) "
+        "SELECT hour_start, endpoint, method, SUM(request_count), "
+        "SUM(error_count), SUM(total_response_time_ms), "
+        "MIN(min_response_time_ms), MAX(max_response_time_ms) "
+        "FROM api_request_hourly GROUP BY hour_start, endpoint, method"
+    )
+    op.drop_table("api_request_hourly")
+    op.rename_table("api_request_hourly_unbinned", "api_request_hourly")
+    op.drop_table("api_request_minutely")
@@ -0,0 +1,52 @@
+"""Enforce unique live device names per site with a partial unique index.
+
+Revision ID: 20261027_add_device_live_name_unique_index
+Revises: 20261026_add_api_request_latency_rollups
+Create Date: 2026-10-27
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261027_add_device_live_name_unique_index"
+down_revision = "20261026_add_api_request_latency_rollups"
+branch_labels = None
+depends_on = None
+
+_LIVE = "lifecycle_state IN ('pending', 'active', 'suspended')"
+
+
+def upgrade() -> None:
+    """Index ``devices(site_id, lower(name))`` over live devices.
+
+    Only bootstrap provisioning used to check names, so a site may already
+    hold live devices sharing a name. All but the oldest of each such group
+    get their device ID appended to the name first, or the index could not
+    be built.
+    """
+    op.execute("""
+        UPDATE devices
+        SET name = substr(name, 1, 97 - length(device_id))
+            || ' (' || device_id || ')'
+        WHERE lifecycle_state IN ('pending', 'active', 'suspended')
+          AND EXISTS (
+            SELECT 1 FROM devices AS earlier
+            WHERE earlier.site_id = devices.site_id
+              AND lower(earlier.name) = lower(devices.name)
+              AND earlier.id < devices.id
+              AND earlier.lifecycle_state IN ('pending', 'active', 'suspended')
+          )
+        """)
+    op.create_index(
+        "uq_devices_site_live_name",
+        "devices",
+        ["site_id", sa.text("lower(name)")],
+        unique=True,
+        sqlite_where=sa.text(_LIVE),
+        postgresql_where=sa.text(_LIVE),
+    )
+
+
+def downgrade() -> None:
+    """Drop the index; renamed duplicates keep their new names."""
+    op.drop_index("uq_devices_site_live_name", table_name="devices")
@@ -15,11 +15,13 @@ from sqlalchemy import (
     Engine,
     Float,
     ForeignKey,
+    Index,
     Integer,
     Sequence,
     String,
     Text,
     create_engine,
+    func,
 )
 from sqlalchemy.orm import DeclarativeBase, relationship, sessionmaker
 
@@ -97,6 +99,15 @@ class LifecycleState(str, Enum):
     UNPAIRED = "unpaired"
 
 
+# States in which a device holds its name: names are unique per site among
+# these and can be reused once a device is unpaired.
+LIVE_LIFECYCLE_STATES = (
+    LifecycleState.PENDING.value,
+    LifecycleState.ACTIVE.value,
+    LifecycleState.SUSPENDED.value,
+)
+
+
 class SiteLifecycleState(str, Enum):
     """Site lifecycle state — the administrative management phase."""
 
@@ -578,6 +589,19 @@ class Device(Base):
         cascade="all, delete-orphan",
     )
 
+    # Site listings filter on site, activity and (per segment) device type
+    __table_args__ = (
+        Index("idx_devices_site_active_type", "site_id", "is_active", "device_type"),
+        Index(
+            "uq_devices_site_live_name",
+            "site_id",
+            func.lower(name),
+            unique=True,
+            sqlite_where=lifecycle_state.in_(LIVE_LIFECYCLE_STATES),
+            postgresql_where=lifecycle_state.in_(LIVE_LIFECYCLE_STATES),
+        ),
+    )
+
 
 class DeviceCommand(Base):
     """Command queue for specific devices."""
@@ -603,6 +627,17 @@ class DeviceCommand(Base):
     # Relationships
     device = relationship("Device", back_populates="commands")
 
+    # Pending-command polling (per device) and the stale-command expiry sweep
+    __table_args__ = (
+        Index(
+            "idx_device_commands_device_status_created",
+            "device_id",
+            "status",
+            "created_at",
+        ),
+        Index("idx_device_commands_status_created", "status", "created_at"),
+    )
+
 
 class Job(Base):
     """Job model for tracking device management tasks."""
@@ -652,6 +687,11 @@ class Job(Base):
     created_by_user = relationship("User", back_populates="jobs")
     logs = relationship("AuditLog", back_populates="job")
 
+    # Pending-job dispatch: filter on status, ordered by priority then age
+    __table_args__ = (
+        Index("idx_jobs_status_priority_created", "status", "priority", "created_at"),
+    )
+
 
 class HealthCheck(Base):
     """Health check model for device monitoring.
@@ -687,6 +727,11 @@ class HealthCheck(Base):
     # Relationships
     device = relationship("Device", back_populates="health_checks")
 
+    # Latest / windowed health checks per device
+    __table_args__ = (
+        Index("idx_health_checks_device_timestamp", "device_id", "timestamp"),
+    )
+
 
 class AuditLog(Base):
     """Audit log model for tracking system events."""
@@ -725,6 +770,56 @@ class AuditLog(Base):
     job = relationship("Job", back_populates="logs")
     device = relationship("Device", back_populates="audit_logs")
 
+    # Newest-first keyset pagination, overall and per device or event type
+    __table_args__ = (
+        Index("idx_audit_logs_created_id", "created_at", "id"),
+        Index("idx_audit_logs_device_created", "device_id", "created_at"),
+        Index("idx_audit_logs_type_created", "event_type", "created_at"),
+    )
+
+
+class AuditEventHourlyCount(Base):
+    """Number of audit events per type and UTC hour.
+
+    Maintained in the same transaction as the audit rows it counts (see
+    ``homepot.audit``), so dashboard statistics never scan ``audit_logs``.
+    """
+
+    __tablename__ = "audit_event_hourly_counts"
+
+    hour_start = Column(DateTime, primary_key=True)  # naive UTC, on the hour
+    event_type = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class TelemetryFilterState(Base):
+    """Last stored telemetry sample per device, and recent error signatures.
+
+    Shared state of ``SmartDataFilter`` when several workers must agree on
+    what was stored (see ``homepot.app.utils.smart_filter.SqlFilterStore``).
+    """
+
+    __tablename__ = "telemetry_filter_state"
+
+    state_key = Column(String(512), primary_key=True)
+    sample_time = Column(Float, nullable=False)  # epoch seconds
+    updated_at = Column(Float, nullable=False, index=True)  # epoch seconds
+    metric_values = Column(JSON, nullable=True)
+
+
+class RateLimitBucket(Base):
+    """Token bucket of one rate-limited client and route class.
+
+    Shared by all API workers when agent rate limits use the database
+    backend (see ``homepot.app.utils.limiter.SqlBucketStore``).
+    """
+
+    __tablename__ = "rate_limit_buckets"
+
+    bucket_key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False, index=True)  # epoch seconds
+
 
 class DeviceAssignment(Base):
     """Assignment history: records which site a device belonged to.
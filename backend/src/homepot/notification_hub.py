@@ -0,0 +1,113 @@
+"""In-process notification hub for agent long-poll delivery.
+
+Agents used to learn about new work only by polling ``/devices/pending`` and
+``/push/pending`` on a fixed interval. The hub lets the long-poll endpoints
+park a request until the write path (``create_device_command``, push log
+persistence) signals that something new exists for the device, so commands
+are delivered immediately and idle fleets generate almost no traffic.
+
+The hub only carries wake-ups, never data: waiters always re-read the
+database after waking. It is per-process, so with several workers a signal
+raised in one worker does not reach waiters in another; those waiters fall
+back to re-checking when their long-poll timeout expires, which bounds the
+latency at the long-poll timeout (no worse than classic polling).
+"""
+
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+import logging
+import threading
+from typing import Dict, Generator, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+COMMANDS_CHANNEL = "commands"
+PUSH_CHANNEL = "push"
+
+# Upper bound for a single long-poll hold; keeps requests under common
+# reverse-proxy idle timeouts (typically 60s).
+MAX_LONG_POLL_SECONDS = 55.0
+
+_Key = Tuple[str, Hashable]
+_Waiter = Tuple[asyncio.AbstractEventLoop, asyncio.Event]
+
+
+class DeviceNotificationHub:
+    """Wake parked long-poll requests when new work exists for a device."""
+
+    def __init__(self) -> None:
+        """Initialize an empty hub."""
+        self._waiters: Dict[_Key, Set[_Waiter]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def subscribe(
+        self, channel: str, device_key: Hashable
+    ) -> Generator[asyncio.Event, None, None]:
+        """Register a waiter for ``(channel, device_key)``.
+
+        ``device_key`` is whatever the channel's table uses to identify the
+        device (``DeviceCommand.device_id`` is the integer primary key,
+        ``PushNotificationLog.device_id`` the string device ID).
+
+        Subscribe *before* checking the database for pending work so a
+        signal raised between the check and the wait is not lost.
+        """
+        waiter: _Waiter = (asyncio.get_running_loop(), asyncio.Event())
+        key = (channel, device_key)
+        with self._lock:
+            self._waiters[key].add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+
+    async def wait(self, event: asyncio.Event, timeout: float) -> bool:
+        """Wait for ``event`` up to ``timeout`` seconds; return True if signalled."""
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def notify(self, channel: str, device_key: Hashable) -> int:
+        """Wake every waiter parked on ``(channel, device_key)``.
+
+        Safe to call from any thread. Returns the number of waiters woken.
+        """
+        with self._lock:
+            waiters = list(self._waiters.get((channel, device_key), ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The waiter's loop has already been closed.
+                pass
+        return len(waiters)
+
+    def waiter_count(self, channel: Optional[str] = None) -> int:
+        """Return the number of parked waiters, optionally for one channel."""
+        with self._lock:
+            return sum(
+                len(waiters)
+                for (key_channel, _), waiters in self._waiters.items()
+                if channel is None or key_channel == channel
+            )
+
+
+# Global hub instance
+_hub: Optional[DeviceNotificationHub] = None
+
+
+def get_notification_hub() -> DeviceNotificationHub:
+    """Get the notification hub singleton."""
+    global _hub
+    if _hub is None:
+        _hub = DeviceNotificationHub()
+    return _hub
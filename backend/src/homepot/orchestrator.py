@@ -11,6 +11,7 @@ from typing import Any, Dict, List, Optional
 import uuid
 
 from homepot.app.models.AnalyticsModel import JobOutcome
+from homepot.audit import AuditEventType, get_audit_logger
 from homepot.config import get_settings
 from homepot.database import get_database_service
 from homepot.error_logger import log_error
@@ -165,50 +166,54 @@ class JobOrchestrator:
             or f"https://config.homepot.local/{site_id}/pos/{config_version}.json"
         )
 
-        # Create job in database
-        job = await db_service.create_job(
-            job_id=job_id,
-            action=action,
-            description=description
-            or f"Update POS payment configuration for {site_id}",
-            site_id=int(site.id),
-            device_id=device_pk,
-            segment=segment,  # Target POS terminals segment if no device_id
-            config_url=config_url,
-            config_version=config_version,
-            ttl_seconds=self.settings.push.default_ttl,
-            collapse_key=f"pos-gateway-{site_id}",
-            priority=priority,
-            created_by=user_id,
-            payload={
-                "action": action,
-                "site_id": site_id,
-                "device_id": device_id,
-                "segment": segment,
-                "config_type": "payment_gateway",
-                "restart_required": True,
-            },
-        )
+        # Create the job and its audit row in one transaction
+        async with db_service.get_session() as session:
+            job = Job(
+                job_id=job_id,
+                action=action,
+                description=description
+                or f"Update POS payment configuration for {site_id}",
+                site_id=int(site.id),
+                device_id=device_pk,
+                segment=segment,  # Target POS terminals segment if no device_id
+                config_url=config_url,
+                config_version=config_version,
+                ttl_seconds=self.settings.push.default_ttl,
+                collapse_key=f"pos-gateway-{site_id}",
+                priority=priority,
+                created_by=user_id,
+                status=JobStatus.PENDING,
+                payload={
+                    "action": action,
+                    "site_id": site_id,
+                    "device_id": device_id,
+                    "segment": segment,
+                    "config_type": "payment_gateway",
+                    "restart_required": True,
+                },
+            )
+            session.add(job)
+            await session.flush()
+
+            await get_audit_logger().log_event(
+                AuditEventType.JOB_CREATED,
+                f"Created job {job_id} for {action} at {site_id}",
+                user_id=user_id,
+                job_id=int(job.id),
+                site_id=int(site.id),
+                event_metadata={
+                    "job_id": job_id,
+                    "action": action,
+                    "site_id": site_id,
+                    "segment": "pos-terminals",
+                    "priority": priority,
+                },
+                session=session,
+            )
 
-        # Add job to queue for processing
+        # Queue the job only once it is committed
         await self._job_queue.put(job)
 
-        # Create audit log
-        await db_service.create_audit_log(
-            event_type="job_created",
-            description=f"Created job {job_id} for {action} at {site_id}",
-            user_id=user_id,
-            job_id=int(job.id),
-            site_id=int(site.id),
-            event_metadata={
-                "job_id": job_id,
-                "action": action,
-                "site_id": site_id,
-                "segment": "pos-terminals",
-                "priority": priority,
-            },
-        )
-
         logger.info(f"Created POS config update job {job_id} for site {site_id}")
         return job_id
 
@@ -0,0 +1,340 @@
+"""Retention of the append-only log tables, with hourly rollups.
+
+``api_request_logs``, ``error_logs``, ``job_outcomes``,
+``device_state_history`` and ``audit_logs`` gain a row for every request,
+error, job and state change, and nothing used to remove them, so every
+analytics query over them got slower as they grew. Each table now keeps
+raw rows for a configurable number of days (``settings.retention.days``).
+
+Older rows are expired oldest first in chunks of ``chunk_minutes`` that
+never cross an hour, each deleted in its own transaction. Most tables'
+hourly rollups are already kept up to date as rows are written
+(``homepot.analytics_rollups`` for requests, errors and jobs,
+``homepot.audit`` for audit events), so their rows are simply deleted;
+``api_request_minutely`` is only needed for the last few days.
+``device_state_history`` is rolled up on expiry instead: each chunk is
+aggregated into ``device_state_hourly`` and deleted in one transaction, so
+an interrupted pass neither loses nor double-counts rows and the next pass
+resumes where it stopped. Rollup rows merge (sums add), so rows that arrive
+late for an hour already rolled up are folded in correctly.
+
+On PostgreSQL with TimescaleDB, ``RetentionManager.partition`` turns the
+tables into hypertables with daily chunks. A pass then also drops the chunks
+it has emptied, which returns their space at once instead of leaving it to
+vacuum. TimescaleDB's own retention policy is not used for these tables
+because it would drop chunks before they are rolled up. Elsewhere (SQLite,
+plain PostgreSQL) the chunked deletes are the whole mechanism.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, cast
+
+from sqlalchemy import Table, and_, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from homepot.analytics_rollups import upsert_merge
+from homepot.app.models.AnalyticsModel import (
+    APIRequestLog,
+    APIRequestMinutely,
+    DeviceStateHistory,
+    DeviceStateHourly,
+    ErrorLog,
+    JobOutcome,
+)
+from homepot.config import get_settings
+from homepot.models import AuditLog
+from homepot.timescale import TimescaleDBManager
+
+logger = logging.getLogger(__name__)
+
+# (rollup column, merge: "sum" | "min" | "max", aggregate over the source table)
+Measure = Tuple[str, str, Callable[[Table], Any]]
+
+
+@dataclass(frozen=True)
+class RetentionTable:
+    """How one log table is expired and what it rolls up into."""
+
+    table: Table
+    time_column: str = "timestamp"
+    rollup: Optional[Table] = None
+    # Rollup key columns besides hour_start, as (rollup column, source column)
+    dimensions: Tuple[Tuple[str, str], ...] = ()
+    measures: Tuple[Measure, ...] = ()
+
+
+def _count(t: Table) -> Any:
+    """Return the row count aggregate."""
+    return func.count()
+
+
+def _table(model: Any) -> Table:
+    """Return the Core table of an ORM ``model``."""
+    return cast(Table, model.__table__)
+
+
+RETENTION_TABLES: Dict[str, RetentionTable] = {
+    "api_request_logs": RetentionTable(table=_table(APIRequestLog)),
+    "api_request_minutely": RetentionTable(
+        table=_table(APIRequestMinutely), time_column="minute_start"
+    ),
+    "error_logs": RetentionTable(table=_table(ErrorLog)),
+    "job_outcomes": RetentionTable(table=_table(JobOutcome)),
+    "device_state_history": RetentionTable(
+        table=_table(DeviceStateHistory),
+        rollup=_table(DeviceStateHourly),
+        dimensions=(("device_id", "device_id"), ("new_state", "new_state")),
+        measures=(("count", "sum", _count),),
+    ),
+    "audit_logs": RetentionTable(table=_table(AuditLog), time_column="created_at"),
+}
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Return ``value`` as a naive UTC datetime."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _bind_time(column: Any, value: datetime) -> datetime:
+    """Return naive-UTC ``value`` in the form ``column`` is compared with."""
+    if getattr(column.type, "timezone", False):
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class RetentionManager:
+    """Roll up and expire old rows of the tables in ``RETENTION_TABLES``."""
+
+    def __init__(
+        self,
+        db_service: Any,
+        days: Optional[Dict[str, int]] = None,
+        chunk_minutes: Optional[int] = None,
+    ) -> None:
+        """Initialize the manager.
+
+        Args:
+            db_service: Provides ``get_session()`` (a ``DatabaseService``).
+            days: Days of raw rows kept per table; defaults to the settings.
+                Tables without an entry are never expired.
+            chunk_minutes: Minutes of rows handled per transaction (1-60).
+        """
+        settings = get_settings().retention
+        self._db = db_service
+        self.days = dict(settings.days if days is None else days)
+        chunk_minutes = chunk_minutes or settings.chunk_minutes
+        self.chunk = timedelta(minutes=min(60, max(1, chunk_minutes)))
+
+    def cutoff(self, name: str, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Return the naive-UTC hour before which rows of ``name`` expire."""
+        days = self.days.get(name)
+        if days is None or name not in RETENTION_TABLES:
+            return None
+        expiry = _naive_utc(now or datetime.now(timezone.utc)) - timedelta(days=days)
+        return expiry.replace(minute=0, second=0, microsecond=0)
+
+    async def _oldest(
+        self, session: AsyncSession, spec: RetentionTable, before: datetime
+    ) -> Optional[datetime]:
+        """Return the time of the oldest row of ``spec`` before ``before``."""
+        column = spec.table.c[spec.time_column]
+        oldest = (
+            await session.execute(
+                select(func.min(column)).where(column < _bind_time(column, before))
+            )
+        ).scalar()
+        return _naive_utc(oldest) if oldest is not None else None
+
+    async def _expire_chunk(
+        self, session: AsyncSession, spec: RetentionTable, start: datetime
+    ) -> int:
+        """Roll up and delete the rows of the chunk starting at ``start``."""
+        hour = start.replace(minute=0, second=0, microsecond=0)
+        end = min(start + self.chunk, hour + timedelta(hours=1))
+        column = spec.table.c[spec.time_column]
+        in_chunk = and_(
+            column >= _bind_time(column, start), column < _bind_time(column, end)
+        )
+
+        if spec.rollup is not None:
+            dimensions = [spec.table.c[source] for _, source in spec.dimensions]
+            result = await session.execute(
+                select(
+                    *[
+                        source.label(name)
+                        for (name, _), source in zip(spec.dimensions, dimensions)
+                    ],
+                    *[
+                        aggregate(spec.table).label(name)
+                        for name, _, aggregate in spec.measures
+                    ],
+                )
+                .where(in_chunk)
+                .group_by(*dimensions)
+            )
+            rows = [{"hour_start": hour, **row._mapping} for row in result]
+            if rows:
+                keys = ["hour_start"] + [name for name, _ in spec.dimensions]
+                measures = {name: how for name, how, _ in spec.measures}
+                await session.run_sync(
+                    lambda sync_session: upsert_merge(
+                        sync_session.connection(), spec.rollup, keys, rows, measures
+                    )
+                )
+
+        result = await session.execute(delete(spec.table).where(in_chunk))
+        return getattr(result, "rowcount", 0) or 0
+
+    async def expire_table(self, name: str, now: Optional[datetime] = None) -> int:
+        """Roll up and delete the rows of ``name`` past its retention window.
+
+        Returns:
+            Number of rows deleted.
+        """
+        cutoff = self.cutoff(name, now)
+        if cutoff is None:
+            return 0
+        spec = RETENTION_TABLES[name]
+        expired = 0
+        while True:
+            # One transaction per chunk: the rollup and the delete commit
+            # together or not at all.
+            async with self._db.get_session() as session:
+                oldest = await self._oldest(session, spec, cutoff)
+                if oldest is None:
+                    break
+                start = oldest.replace(
+                    minute=oldest.minute
+                    - oldest.minute % int(self.chunk.total_seconds() // 60),
+                    second=0,
+                    microsecond=0,
+                )
+                expired += await self._expire_chunk(session, spec, start)
+
+        if expired:
+            logger.info(f"Expired {expired} row(s) of {name} older than {cutoff}")
+        await self._drop_chunks(name, spec, cutoff)
+        return expired
+
+    async def _drop_chunks(
+        self, name: str, spec: RetentionTable, cutoff: datetime
+    ) -> None:
+        """Drop the TimescaleDB chunks of ``name`` emptied by a pass."""
+        async with self._db.get_session() as session:
+            if session.bind.dialect.name != "postgresql":
+                return
+            ts_manager = TimescaleDBManager(session)
+            if not await ts_manager.is_timescaledb_available():
+                return
+            if await ts_manager.get_hypertable_stats(name) is None:
+                return
+            column = spec.table.c[spec.time_column]
+            await ts_manager.drop_chunks(name, _bind_time(column, cutoff))
+
+    async def run(
+        self, tables: Optional[Sequence[str]] = None, now: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """Expire every table (or ``tables``) that has a retention window.
+
+        Returns:
+            Rows deleted per table.
+        """
+        names = tables if tables is not None else list(RETENTION_TABLES)
+        expired: Dict[str, int] = {}
+        for name in names:
+            if name not in RETENTION_TABLES:
+                raise ValueError(f"Unknown retention table '{name}'")
+            if self.cutoff(name, now) is not None:
+                expired[name] = await self.expire_table(name, now)
+        return expired
+
+    async def status(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Describe the retention state of every table.
+
+        Returns:
+            One dict per table with its window, cutoff, row counts, oldest
+            row, rollup size and whether it is a hypertable.
+        """
+        report = []
+        async with self._db.get_session() as session:
+            is_postgres = session.bind.dialect.name == "postgresql"
+            ts_manager = TimescaleDBManager(session) if is_postgres else None
+            for name, spec in RETENTION_TABLES.items():
+                column = spec.table.c[spec.time_column]
+                cutoff = self.cutoff(name, now)
+                total, oldest = (
+                    await session.execute(select(func.count(), func.min(column)))
+                ).one()
+                due = 0
+                if cutoff is not None:
+                    due = (
+                        await session.execute(
+                            select(func.count()).where(
+                                column < _bind_time(column, cutoff)
+                            )
+                        )
+                    ).scalar()
+                rollup_rows = None
+                if spec.rollup is not None:
+                    rollup_rows = (
+                        await session.execute(
+                            select(func.count()).select_from(spec.rollup)
+                        )
+                    ).scalar()
+                hypertable = bool(
+                    ts_manager and await ts_manager.get_hypertable_stats(name)
+                )
+                report.append(
+                    {
+                        "table": name,
+                        "retention_days": self.days.get(name),
+                        "cutoff": cutoff,
+                        "rows": total,
+                        "rows_due": due,
+                        "oldest": _naive_utc(oldest) if oldest is not None else None,
+                        "rollup": spec.rollup.name if spec.rollup is not None else None,
+                        "rollup_rows": rollup_rows,
+                        "hypertable": hypertable,
+                    }
+                )
+        return report
+
+    async def partition(self, chunk_time_interval: str = "1 day") -> Dict[str, bool]:
+        """Convert the tables into TimescaleDB hypertables.
+
+        Tables keyed on ``id`` are first keyed on ``(id, <time column>)``, as
+        TimescaleDB requires. Existing rows are moved into chunks, which
+        locks the table while they are copied.
+
+        Returns:
+            Whether each table is a hypertable afterwards; empty if
+            TimescaleDB is not available.
+        """
+        results: Dict[str, bool] = {}
+        async with self._db.get_session() as session:
+            ts_manager = TimescaleDBManager(session)
+            if session.bind.dialect.name != "postgresql":
+                return results
+            if not await ts_manager.is_timescaledb_available():
+                return results
+            for name, spec in RETENTION_TABLES.items():
+                if await ts_manager.get_hypertable_stats(name) is not None:
+                    results[name] = True
+                    continue
+                if "id" in spec.table.c:
+                    if not await ts_manager.include_time_in_primary_key(
+                        name, spec.time_column
+                    ):
+                        results[name] = False
+                        continue
+                results[name] = await ts_manager.create_hypertable(
+                    table_name=name,
+                    time_column=spec.time_column,
+                    chunk_time_interval=chunk_time_interval,
+                    migrate_data=True,
+                )
+        return results
@@ -24,7 +24,9 @@ from sqlalchemy.orm import Session
 from homepot.canonical_ids import generate_device_id
 from homepot.models import (
     AuditLog,
+    CommandStatus,
     Device,
+    DeviceCommand,
     DeviceCredential,
     DeviceLifecycleEvent,
     DeviceType,
@@ -213,14 +215,20 @@ def create_site_membership_sync(session: Session, **kwargs: Any) -> SiteMembersh
 def build_device(
     *,
     device_id: str | None = None,
-    name: str = "Default Device",
+    name: str | None = None,
     device_type: str = DeviceType.UNKNOWN,
     site_id: int,
     **kwargs: Any,
 ) -> Device:
-    """Build an unsaved Device instance."""
+    """Build an unsaved Device instance.
+
+    The default name is derived from the device ID, as live devices of a
+    site must have distinct names.
+    """
     if device_id is None:
         device_id = generate_device_id()
+    if name is None:
+        name = f"Device {device_id}"
     kwargs.setdefault("lifecycle_state", LifecycleState.PENDING.value)
     kwargs.setdefault("health_state", HealthState.UNKNOWN.value)
     return Device(
@@ -353,6 +361,46 @@ def create_job_sync(session: Session, **kwargs: Any) -> Job:
     return job
 
 
+# ---------------------------------------------------------------------------
+# DeviceCommand
+# ---------------------------------------------------------------------------
+
+
+def build_device_command(
+    *,
+    command_id: str | None = None,
+    device_id: int,
+    command_type: str = "ping",
+    **kwargs: Any,
+) -> DeviceCommand:
+    """Build an unsaved DeviceCommand instance."""
+    if command_id is None:
+        command_id = str(uuid4())
+    kwargs.setdefault("status", CommandStatus.PENDING)
+    return DeviceCommand(
+        command_id=command_id,
+        device_id=device_id,
+        command_type=command_type,
+        **kwargs,
+    )
+
+
+async def create_device_command(session: AsyncSession, **kwargs: Any) -> DeviceCommand:
+    """Create and persist a DeviceCommand using an async session."""
+    command = build_device_command(**kwargs)
+    session.add(command)
+    await session.flush()
+    return command
+
+
+def create_device_command_sync(session: Session, **kwargs: Any) -> DeviceCommand:
+    """Create and persist a DeviceCommand using a sync session."""
+    command = build_device_command(**kwargs)
+    session.add(command)
+    session.flush()
+    return command
+
+
 # ---------------------------------------------------------------------------
 # HealthCheck
 # ---------------------------------------------------------------------------
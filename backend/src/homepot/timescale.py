@@ -10,6 +10,7 @@ TimescaleDB is a PostgreSQL extension that provides:
 - Full PostgreSQL compatibility (falls back gracefully if not installed)
 """
 
+from datetime import datetime
 import logging
 from typing import Any, Dict, List, Optional
 
@@ -88,6 +89,7 @@ class TimescaleDBManager:
         time_column: str = "timestamp",
         if_not_exists: bool = True,
         chunk_time_interval: str = "1 week",
+        migrate_data: bool = False,
     ) -> bool:
         """Convert a regular table to a TimescaleDB hypertable.
 
@@ -96,6 +98,8 @@ class TimescaleDBManager:
             time_column: Name of the timestamp column for partitioning
             if_not_exists: Skip if hypertable already exists
             chunk_time_interval: Time range for each partition chunk
+            migrate_data: Move existing rows into chunks (required if the
+                table is not empty; locks it while they are copied)
 
         Returns:
             True if hypertable was created successfully
@@ -116,7 +120,8 @@ class TimescaleDBManager:
             query = text(
                 f"SELECT create_hypertable('{table_name}', '{time_column}', "
                 f"chunk_time_interval => INTERVAL '{chunk_time_interval}', "
-                f"if_not_exists => {if_not_exists})"
+                f"if_not_exists => {if_not_exists}, "
+                f"migrate_data => {migrate_data})"
             )
             await self.session.execute(query)
             await self.session.commit()
@@ -127,6 +132,70 @@ class TimescaleDBManager:
             await self.session.rollback()
             return False
 
+    async def include_time_in_primary_key(
+        self, table_name: str, time_column: str = "timestamp"
+    ) -> bool:
+        """Make ``(id, time_column)`` the primary key of ``table_name``.
+
+        TimescaleDB only partitions tables whose unique constraints include
+        the time column, and the log tables are keyed on ``id`` alone.
+
+        Args:
+            table_name: Name of the table (with an ``id`` column)
+            time_column: Name of the timestamp column used for partitioning
+
+        Returns:
+            True if the primary key was replaced successfully
+        """
+        try:
+            await self.session.execute(
+                text(
+                    f"ALTER TABLE {table_name} "
+                    f"DROP CONSTRAINT IF EXISTS {table_name}_pkey, "
+                    f"ADD PRIMARY KEY (id, {time_column})"
+                )
+            )
+            await self.session.commit()
+            logger.info(f"Primary key of {table_name} is now (id, {time_column})")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to change primary key of {table_name}: {e}")
+            await self.session.rollback()
+            return False
+
+    async def drop_chunks(self, hypertable: str, older_than: datetime) -> int:
+        """Drop the chunks of a hypertable whose rows are all before a time.
+
+        Args:
+            hypertable: Name of the hypertable
+            older_than: Chunks ending at or before this time are dropped;
+                timezone-aware for ``timestamptz`` time columns, naive otherwise
+
+        Returns:
+            Number of chunks dropped
+        """
+        if not await self.is_timescaledb_available():
+            return 0
+
+        cast = "timestamptz" if older_than.tzinfo is not None else "timestamp"
+        try:
+            result = await self.session.execute(
+                text(
+                    f"SELECT drop_chunks(CAST(:hypertable AS regclass), "
+                    f"older_than => CAST(:older_than AS {cast}))"
+                ),
+                {"hypertable": hypertable, "older_than": older_than},
+            )
+            dropped = len(result.fetchall())
+            await self.session.commit()
+            if dropped:
+                logger.info(f"Dropped {dropped} chunk(s) of {hypertable}")
+            return dropped
+        except Exception as e:
+            logger.error(f"Failed to drop chunks of {hypertable}: {e}")
+            await self.session.rollback()
+            return 0
+
     async def _is_hypertable(self, table_name: str) -> bool:
         """Check if a table is already a hypertable.
 
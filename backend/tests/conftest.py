@@ -75,6 +75,29 @@ async def reset_db_service():
     await close_database_service()
 
 
+@pytest.fixture(autouse=True)
+def reset_smart_filter():
+    """Give each test a fresh telemetry filter with no remembered devices."""
+    from homepot.app.utils.smart_filter import reset_smart_filter
+
+    reset_smart_filter()
+    yield
+    reset_smart_filter()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Give each test full agent rate limit buckets."""
+    from homepot.agent.utils.rate_limit_backoff import rate_limit_backoff
+    from homepot.app.utils.limiter import reset_bucket_store
+
+    reset_bucket_store()
+    rate_limit_backoff.reset()
+    yield
+    reset_bucket_store()
+    rate_limit_backoff.reset()
+
+
 @pytest.fixture
 def sample_config() -> Dict[str, Any]:
     """Provide a sample configuration for testing."""
@@ -13,7 +13,7 @@ from sqlalchemy.orm import sessionmaker
 from homepot.app.auth_utils import create_access_token, hash_password
 from homepot.app.models.AnalyticsModel import DeviceMetrics
 from homepot.canonical_ids import _DEVICE_ID_PATTERN
-from homepot.config import reload_settings
+from homepot.config import get_settings, reload_settings
 import homepot.database
 from homepot.models import Base, Device, LifecycleState, Site, User
 
@@ -74,7 +74,7 @@ def _create_device(device_id: str, site_pk: int, api_key: str = "test-api-key")
     try:
         device = Device(
             device_id=device_id,
-            name="Agent Device",
+            name=f"Agent Device {device_id}",
             device_type="pos_terminal",
             site_id=site_pk,
             api_key_hash=hash_password(api_key),
@@ -196,6 +196,58 @@ def test_telemetry_bulk_is_saved(client: TestClient):
     assert response.json()["data"]["saved_count"] == 2
 
 
+def test_telemetry_from_stable_device_is_filtered(client: TestClient, monkeypatch):
+    """POST /api/v1/agent/telemetry should skip samples with no significant change."""
+    monkeypatch.setattr(get_settings().telemetry_filter, "agent_telemetry", True)
+    site = _create_site("site-telemetry-stable")
+    api_key = _create_device("telemetry-device-3", int(site.id))
+
+    now = datetime.now(timezone.utc)
+    response = client.post(
+        "/api/v1/agent/telemetry",
+        json=[
+            {
+                "device_id": "telemetry-device-3",
+                "cpu_usage": 21.0 + (n % 2) * 0.2,
+                "memory_usage": 56.0,
+                "disk_usage": 45.0,
+                "timestamp": (now + timedelta(seconds=5 * n)).isoformat(),
+            }
+            for n in range(12)
+        ],
+        headers=_device_headers("telemetry-device-3", api_key),
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["saved_count"] == 1
+    assert data["filtered_count"] == 11
+
+
+def test_agent_rate_limit_is_per_device(client: TestClient, monkeypatch):
+    """Agent budgets are kept per device, and exhausted ones return Retry-After."""
+    monkeypatch.setitem(get_settings().rate_limit.budgets, "heartbeat", "2/minute")
+    site = _create_site("site-rate-limit")
+    devices = {
+        device_id: _create_device(device_id, int(site.id))
+        for device_id in ("limited-device-1", "limited-device-2")
+    }
+
+    def heartbeat(device_id: str):
+        return client.post(
+            "/api/v1/agent/heartbeat",
+            json={"device_id": device_id, "status": "ONLINE"},
+            headers=_device_headers(device_id, devices[device_id]),
+        )
+
+    assert [heartbeat("limited-device-1").status_code for _ in range(2)] == [200, 200]
+    limited = heartbeat("limited-device-1")
+    assert limited.status_code == 429
+    assert 1 <= int(limited.headers["Retry-After"]) <= 30
+    # Same client address, different device: its own budget.
+    assert heartbeat("limited-device-2").status_code == 200
+
+
 def test_metrics_returns_latest_telemetry(client: TestClient):
     """GET /api/v1/agent/{device_id}/metrics should return the latest entry."""
     site = _create_site("site-metrics-latest")
@@ -0,0 +1,169 @@
+"""Tests for the grouped-SQL analyses in ai/analytics_service.py."""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.analytics_service import AIAnalyticsService  # noqa: E402
+
+from homepot.app.models.AnalyticsModel import (  # noqa: E402
+    ErrorLog,
+    JobOutcome,
+    PushNotificationLog,
+)
+from homepot.models import Base  # noqa: E402
+from homepot.seed_factories import (  # noqa: E402
+    create_device,
+    create_job,
+    create_site,
+    create_user,
+)
+
+
+@pytest.fixture
+async def session():
+    """Yield a session on a private in-memory database used by the service."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as s:
+
+        @asynccontextmanager
+        async def get_session():
+            yield s
+
+        db_service = MagicMock(get_session=get_session)
+        with patch(
+            "ai.analytics_service.get_database_service",
+            AsyncMock(return_value=db_service),
+        ):
+            yield s
+    await engine.dispose()
+
+
+def _outcome(device_id, status, hour, job_id="job", error_message=None):
+    timestamp = (datetime.utcnow() - timedelta(days=1)).replace(
+        hour=hour, minute=0, second=0, microsecond=0
+    )
+    return JobOutcome(
+        timestamp=timestamp,
+        job_id=job_id,
+        job_type="config_update",
+        device_id=device_id,
+        status=status,
+        error_message=error_message,
+    )
+
+
+@pytest.mark.asyncio
+async def test_job_outcome_patterns_group_by_hour_and_site(session):
+    """Test hourly success buckets, failure reasons and site scoping."""
+    site = await create_site(session)
+    other = await create_site(session)
+    device = await create_device(session, site_id=site.id)
+    foreign = await create_device(session, site_id=other.id)
+    user = await create_user(session)
+    await create_job(session, job_id="site-job", site_id=site.id, created_by=user.id)
+    for _ in range(5):
+        session.add(_outcome(device.device_id, "completed", hour=3))
+    session.add(_outcome(device.device_id, "failed", 14, error_message="timeout"))
+    session.add(_outcome(device.device_id, "failed", 14, error_message="timeout"))
+    # Orchestrator outcome without a device, attributed through its job.
+    session.add(_outcome(None, "failed", 14, job_id="site-job"))
+    session.add(_outcome(foreign.device_id, "failed", 9, error_message="other"))
+    session.add(
+        JobOutcome(
+            timestamp=datetime.utcnow() - timedelta(days=60),
+            job_id="old",
+            job_type="config_update",
+            device_id=device.device_id,
+            status="failed",
+        )
+    )
+    await session.commit()
+
+    result = await AIAnalyticsService.get_job_outcome_patterns(site.site_id, days=30)
+
+    assert result["summary"] == {
+        "total_jobs": 8,
+        "successful": 5,
+        "failed": 3,
+        "success_rate": 62.5,
+    }
+    assert result["optimal_hours"] == [
+        {"hour": 3, "success_rate": 100.0, "sample_size": 5}
+    ]
+    assert result["failure_patterns"] == {"timeout": 2, "unknown": 1}
+
+    fleet = await AIAnalyticsService.get_job_outcome_patterns(days=30)
+    assert fleet["summary"]["total_jobs"] == 9
+    assert fleet["failure_patterns"]["other"] == 1
+
+    empty = await AIAnalyticsService.get_job_outcome_patterns("missing", days=30)
+    assert empty["status"] == "no_data"
+
+
+@pytest.mark.asyncio
+async def test_error_frequency_counts_device_errors_in_sql(session):
+    """Test the per-device error count in SQL."""
+    now = datetime.utcnow()
+    for i in range(6):
+        session.add(
+            ErrorLog(
+                timestamp=now - timedelta(hours=i),
+                category="api",
+                severity="error",
+                error_message="boom",
+                context={"original_device_id": "pos-1" if i % 3 else "pos-2"},
+            )
+        )
+    await session.commit()
+
+    result = await AIAnalyticsService.get_error_frequency_analysis("pos-1", days=2)
+    assert result == {"error_rate_per_day": 2.0, "total_errors": 4, "period_days": 2}
+
+    everything = await AIAnalyticsService.get_error_frequency_analysis("", days=2)
+    assert everything["total_errors"] == 6
+    none = await AIAnalyticsService.get_error_frequency_analysis("pos-9", days=2)
+    assert none == {"status": "no_errors", "error_rate_per_day": 0}
+
+
+@pytest.mark.asyncio
+async def test_push_notification_analytics_filters_by_device(session):
+    """Test that the device filter on push analytics is applied."""
+    now = datetime.utcnow()
+    for i, (device_id, status) in enumerate(
+        [("pos-1", "delivered"), ("pos-1", "failed"), ("pos-2", "delivered")]
+    ):
+        session.add(
+            PushNotificationLog(
+                message_id=f"m{i}",
+                device_id=device_id,
+                provider="web_push",
+                sent_at=now,
+                status=status,
+                error_code="expired" if status == "failed" else None,
+                latency_ms=100,
+            )
+        )
+    await session.commit()
+
+    result = await AIAnalyticsService.get_push_notification_analytics("pos-1")
+    assert result["summary"]["total_sent"] == 2
+    assert result["summary"]["delivery_rate_percent"] == 50.0
+    assert result["failure_reasons"] == {"expired": 1}
+
+    fleet = await AIAnalyticsService.get_push_notification_analytics()
+    assert fleet["summary"]["total_sent"] == 3
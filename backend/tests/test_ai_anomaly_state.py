@@ -0,0 +1,203 @@
+"""Tests for the incremental device anomaly state (ai/anomaly_state.py)."""
+
+from datetime import datetime, timedelta
+import os
+import sys
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.anomaly_state import AnomalyStateUpdater, top_anomalies  # noqa: E402
+
+from homepot.app.models.AnalyticsModel import (  # noqa: E402
+    Alert,
+    DeviceAnomalyState,
+    DeviceMetrics,
+)
+from homepot.models import Base, Device, HealthCheck  # noqa: E402
+from homepot.seed_factories import create_device, create_site  # noqa: E402
+
+
+@pytest.fixture
+async def session():
+    """Yield a session on a private in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as s:
+        yield s
+    await engine.dispose()
+
+
+class _Feed:
+    """Append telemetry and health checks with increasing ids."""
+
+    def __init__(self, session):
+        self.session = session
+        self.health_id = 0
+        self.now = datetime.utcnow() - timedelta(minutes=30)
+
+    async def devices(self, count, **kwargs):
+        site = await create_site(self.session)
+        devices = [
+            await create_device(
+                self.session,
+                site_id=site.id,
+                name=f"pos-{i}",
+                is_monitored=True,
+                status="online",
+                **kwargs,
+            )
+            for i in range(count)
+        ]
+        await self.session.commit()
+        return devices
+
+    def metrics(self, device, **values):
+        self.now += timedelta(seconds=1)
+        self.session.add(
+            DeviceMetrics(device_id=device.id, timestamp=self.now, **values)
+        )
+
+    def health(self, device, *results):
+        for healthy in results:
+            self.health_id += 1
+            self.now += timedelta(seconds=1)
+            self.session.add(
+                HealthCheck(
+                    id=self.health_id,
+                    device_id=device.id,
+                    is_healthy=healthy,
+                    timestamp=self.now,
+                )
+            )
+
+
+async def _state(session, device):
+    return await session.get(DeviceAnomalyState, device.id, populate_existing=True)
+
+
+@pytest.mark.asyncio
+async def test_state_tracks_metrics_failures_and_device_status(session):
+    """Test scoring, consecutive failures and the offline/online sync."""
+    feed = _Feed(session)
+    (device,) = await feed.devices(1)
+    feed.metrics(device, cpu_percent=50.0)
+    feed.metrics(device, cpu_percent=95.0, error_rate=0.2)
+    feed.health(device, True, False, False, False)
+    await session.commit()
+
+    updater = AnomalyStateUpdater(flapping_window_seconds=3600)
+    assert await updater.process_pending(session) == 4
+
+    state = await _state(session, device)
+    assert state.consecutive_failures == 3
+    assert state.flapping_count == 1
+    assert state.metrics["cpu_percent"] == 95.0
+    assert "System Failure: 3.0 consecutive health check failures" in state.reasons
+    assert "High CPU: 95.0%" in state.reasons
+    assert state.severity == "critical"
+    assert (await session.get(Device, device.id, populate_existing=True)).status == (
+        "offline"
+    )
+
+    feed.health(device, True)
+    await session.commit()
+    assert await updater.process_pending(session) == 1
+
+    state = await _state(session, device)
+    assert state.consecutive_failures == 0
+    assert state.flapping_count == 2
+    assert "High CPU: 95.0%" in state.reasons
+    assert (await session.get(Device, device.id, populate_existing=True)).status == (
+        "online"
+    )
+
+
+@pytest.mark.asyncio
+async def test_flapping_counts_transitions_in_window(session):
+    """Test that flapping_count counts recent health transitions only."""
+    feed = _Feed(session)
+    (device,) = await feed.devices(1)
+    feed.health(device, *([True, False] * 4))  # 7 transitions
+    await session.commit()
+
+    updater = AnomalyStateUpdater(flapping_window_seconds=3600)
+    await updater.process_pending(session)
+    state = await _state(session, device)
+    assert state.flapping_count == 7
+    assert any(r.startswith("High Instability") for r in state.reasons)
+
+    # Outside a short window, only the newest transitions count.
+    feed.now += timedelta(seconds=30)
+    feed.health(device, True)
+    await session.commit()
+    short = AnomalyStateUpdater(flapping_window_seconds=10)
+    await short.process_pending(session)
+    assert (await _state(session, device)).flapping_count == 1
+
+
+@pytest.mark.asyncio
+async def test_consumer_is_incremental_and_resumable(session):
+    """Test that rows are applied once, across batches and restarts."""
+    feed = _Feed(session)
+    devices = await feed.devices(3)
+    for device in devices:
+        feed.health(device, False, False)
+        feed.metrics(device, memory_percent=20.0)
+    await session.commit()
+
+    updater = AnomalyStateUpdater(batch_size=2)
+    assert await updater.process_pending(session) == 6
+    # Re-reading the overlap below the cursor does not re-apply rows.
+    assert await updater.process_pending(session) == 0
+    assert (await _state(session, devices[0])).consecutive_failures == 2
+
+    feed.health(devices[0], False)
+    await session.commit()
+    restarted = AnomalyStateUpdater()
+    assert await restarted.process_pending(session) == 1
+
+    states = (await session.execute(select(DeviceAnomalyState))).scalars().all()
+    assert sorted(s.consecutive_failures for s in states) == [2, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_top_anomalies_reads_state_and_alerts(session):
+    """Test the /anomalies read: ranking, alert dedup and monitored filter."""
+    feed = _Feed(session)
+    quiet, busy, alerted, unmonitored = await feed.devices(4)
+    unmonitored.is_monitored = False
+    feed.metrics(quiet, cpu_percent=10.0)
+    feed.metrics(busy, cpu_percent=99.0)
+    feed.metrics(alerted, cpu_percent=99.0, error_rate=0.5)
+    feed.metrics(unmonitored, cpu_percent=99.0)
+    session.add(
+        Alert(
+            device_id=alerted.device_id,
+            title="High Error Rate",
+            description="From analyze",
+            severity="error",
+            category="software",
+            status="active",
+            ai_confidence=0.55,
+        )
+    )
+    await session.commit()
+    await AnomalyStateUpdater().process_pending(session)
+
+    anomalies = await top_anomalies(session)
+
+    assert [a["device_id"] for a in anomalies] == [alerted.device_id, busy.device_id]
+    assert anomalies[0]["metrics"]["source"] == "persistent_alert"
+    assert anomalies[0]["device_name"] == "pos-2"
+    assert anomalies[1]["reasons"] == ["High CPU: 99.0%"]
+    assert anomalies[1]["severity"] == "warning"
@@ -0,0 +1,164 @@
+"""Tests for bounded-concurrency AI context assembly."""
+
+import asyncio
+from contextlib import asynccontextmanager
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.context_assembly import ContextAssembler, ContextSection  # noqa: E402
+from ai.context_builder import ContextBuilder  # noqa: E402
+
+
+class _SessionPool:
+    """Fake session factory that hands out a distinct session per section."""
+
+    def __init__(self, checkout_delay=0.0):
+        self.checkout_delay = checkout_delay
+        self.opened = 0
+        self.active = 0
+        self.peak = 0
+
+    @asynccontextmanager
+    async def __call__(self):
+        await asyncio.sleep(self.checkout_delay)
+        self.opened += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            yield object()
+        finally:
+            self.active -= 1
+
+
+def _section(name, delay, text=None, seen=None):
+    async def build(session):
+        if seen is not None:
+            seen.append(session)
+        await asyncio.sleep(delay)
+        return text if text is not None else f"[{name}]"
+
+    return ContextSection(name, build)
+
+
+@pytest.mark.asyncio
+async def test_sections_run_concurrently_on_separate_sessions():
+    """Test that latency tracks the slowest section, not the sum."""
+    pool = _SessionPool()
+    seen: list = []
+    assembler = ContextAssembler(
+        session_factory=pool, max_concurrency=10, section_timeout=5, budget=5
+    )
+    sections = [_section(f"s{i}", 0.1, seen=seen) for i in range(8)]
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    texts, report = await assembler.assemble(sections)
+    elapsed = loop.time() - started
+
+    assert texts == {f"s{i}": f"[s{i}]" for i in range(8)}
+    assert elapsed < 0.5  # serial would be >= 0.8s
+    assert len({id(s) for s in seen}) == 8
+    assert all(o.status == "ok" for o in report.values())
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    """Test that no more than max_concurrency sessions are open at once."""
+    pool = _SessionPool()
+    assembler = ContextAssembler(
+        session_factory=pool, max_concurrency=3, section_timeout=5, budget=5
+    )
+
+    await assembler.assemble([_section(f"s{i}", 0.02) for i in range(10)])
+
+    assert pool.opened == 10
+    assert pool.peak == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_and_failing_sections_are_dropped():
+    """Test that timeouts and errors yield empty text instead of stalling."""
+
+    async def boom(session):
+        raise RuntimeError("db down")
+
+    assembler = ContextAssembler(
+        session_factory=_SessionPool(),
+        max_concurrency=4,
+        section_timeout=0.1,
+        budget=5,
+    )
+    texts, report = await assembler.assemble(
+        [
+            _section("fast", 0),
+            _section("slow", 2),
+            ContextSection("broken", boom),
+            ContextSection("patient", _section("p", 0.2).build, timeout=1),
+        ]
+    )
+
+    assert texts == {"fast": "[fast]", "slow": "", "broken": "", "patient": "[p]"}
+    assert report["slow"].status == "timeout"
+    assert report["slow"].latency_ms < 1000
+    assert report["broken"].status == "error"
+    assert report["patient"].as_dict()["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_session_counts_against_the_timeout():
+    """Test that a stalled connection checkout is cut off like a slow build."""
+    assembler = ContextAssembler(
+        session_factory=_SessionPool(checkout_delay=2),
+        max_concurrency=4,
+        section_timeout=0.1,
+        budget=5,
+    )
+    texts, report = await assembler.assemble([_section("s", 0)])
+
+    assert texts == {"s": ""}
+    assert report["s"].status == "timeout"
+    assert report["s"].latency_ms < 1000
+
+
+@pytest.mark.asyncio
+async def test_budget_drops_queued_sections():
+    """Test that sections still queued when the budget runs out are dropped."""
+    assembler = ContextAssembler(
+        session_factory=_SessionPool(),
+        max_concurrency=1,
+        section_timeout=1,
+        budget=0.15,
+    )
+    texts, report = await assembler.assemble(
+        [_section("first", 0.1), _section("second", 0.1), _section("third", 0.1)]
+    )
+
+    assert texts["first"] == "[first]"
+    assert texts["third"] == ""
+    assert report["third"].status == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_builders_skip_lookup_with_resolved_device_id():
+    """Test that device-scoped builders reuse a pre-resolved integer ID."""
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    session = AsyncMock()
+    session.execute.return_value = result
+
+    text = await ContextBuilder.get_device_command_context(
+        device_id="dev-1", session=session, device_int_id=42
+    )
+
+    assert text == "No device commands found."
+    # Only the command query itself; no Device.id lookup.
+    assert session.execute.await_count == 1
@@ -0,0 +1,90 @@
+"""Tests for token-budgeted prompt packing (ai/context_packer.py)."""
+
+import os
+import sys
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.context_packer import ContextPacker  # noqa: E402
+from ai.prompts import PromptManager  # noqa: E402
+
+
+def _lines(label, n):
+    return "\n".join(f"{label} line {i:02d}" for i in range(n))
+
+
+def test_rank_boosts_sections_named_in_query():
+    """Test that query keywords and the focus device reorder sections."""
+    packer = ContextPacker(max_tokens=1000)
+    sections = [
+        packer.section("audit", "audit"),
+        packer.section("metrics", "metrics"),
+        packer.section("push", "push for pos-7"),
+    ]
+
+    ranked = packer.rank(sections, query="Who changed the config?")
+    assert [s.name for s in ranked] == ["audit", "metrics", "push"]
+
+    ranked = packer.rank(sections, query="Any notifications?", device_id="pos-7")
+    assert [s.name for s in ranked] == ["push", "metrics", "audit"]
+
+
+def test_pack_truncates_then_drops_lowest_ranked_sections():
+    """Test that packing fits the budget, cutting the lowest ranks first."""
+    packer = ContextPacker(max_tokens=150, chars_per_token=4, min_section_tokens=20)
+    sections = [
+        packer.section("audit", _lines("audit", 40)),
+        packer.section("error", _lines("error", 10)),
+        packer.section("push", _lines("push", 40)),
+        packer.section("metrics", ""),
+    ]
+
+    packed, report = packer.pack(sections, query="why did it fail?", fixed_tokens=20)
+
+    assert list(packed) == ["audit", "error", "push", "metrics"]
+    assert report["error"].status == "full"
+    assert packed["error"] == sections[1].text
+    assert report["audit"].status == "truncated"
+    assert packed["audit"].startswith("audit line 00\n")
+    assert packed["audit"].endswith("to fit the context budget]")
+    assert report["push"].status == "dropped" and packed["push"] == ""
+    assert report["metrics"].status == "empty"
+    assert sum(r.tokens for r in report.values()) <= 150 - 20
+
+    # Unchanged sections reuse their cached truncation.
+    assert packer.pack(sections, query="why did it fail?", fixed_tokens=20)[0] == packed
+    assert packer.cache_hits == 1
+
+
+def test_build_packed_prompt_stays_within_budget():
+    """Test the packed prompt keeps its header and fits the token budget."""
+    packer = ContextPacker(max_tokens=400)
+    context_data = {
+        "alert": "[ALERTS]\nNo active alerts.",
+        "metrics": _lines("cpu", 200),
+        "device_command": "[COMMANDS]\nreboot queued",
+    }
+
+    prompt, report = PromptManager.build_packed_prompt(
+        "pos-1",
+        {"risk_level": "HIGH", "failure_probability": 0.7},
+        ["High CPU Usage"],
+        [],
+        context_data,
+        long_term_context=_lines("memory", 200),
+        short_term_context="user: is pos-1 ok?",
+        query="Why is the CPU high?",
+        packer=packer,
+    )
+
+    assert "Device ID: pos-1" in prompt
+    assert "Risk Level: HIGH" in prompt
+    assert "user: is pos-1 ok?" in prompt
+    assert "[COMMANDS]" in prompt  # sections outside the legacy layout render too
+    assert report["sections"]["metrics"]["status"] == "truncated"
+    assert report["sections"]["long_term"]["status"] == "dropped"
+    assert report["estimated_tokens"] <= 400
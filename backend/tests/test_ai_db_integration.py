@@ -1,28 +1,35 @@
 """Tests for EventStore database integration."""
 
+from collections import deque
 import os
 import sys
 from unittest.mock import MagicMock, patch
 
+import pytest
+from sqlalchemy import text
+import yaml
+
 # Add ai directory to path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
 ai_dir = os.path.join(workspace_root, "ai")
 if ai_dir not in sys.path:
     sys.path.insert(0, ai_dir)
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
 
-from event_store import EventStore  # noqa: E402
+from ai.event_store import EventStore  # noqa: E402
 
 
-def test_persist_event_sql_generation():
-    """Test that _persist_event generates correct SQL."""
+def test_persist_events_sql_generation():
+    """Test that _persist_events writes a batch with one executemany call."""
     # Mock engine and connection
     mock_engine = MagicMock()
     mock_conn = MagicMock()
-    mock_engine.connect.return_value.__enter__.return_value = mock_conn
+    mock_engine.begin.return_value.__enter__.return_value = mock_conn
 
     # Initialize store with mock engine
-    with patch("event_store.create_engine", return_value=mock_engine):
+    with patch("ai.event_store.create_engine", return_value=mock_engine):
         store = EventStore(config_path="non_existent.yaml")
         store.engine = mock_engine  # Force engine assignment
 
@@ -39,17 +46,17 @@ def test_persist_event_sql_generation():
             },
         }
 
-        store._persist_event(event)
+        assert store._persist_events([event, {**event, "device_id": "dev2"}])
 
-        # Verify execute was called
-        assert mock_conn.execute.called
+        # Verify execute was called once for the whole batch
+        assert mock_conn.execute.call_count == 1
         args, kwargs = mock_conn.execute.call_args
 
         # Check parameters
         params = args[1]
-        assert params["device_id"] == "dev1"
-        assert params["cpu"] == 50.0
-        assert params["memory"] == 60.0
+        assert [p["device_id"] for p in params] == ["dev1", "dev2"]
+        assert params[0]["cpu"] == 50.0
+        assert params[0]["memory"] == 60.0
 
 
 def test_get_recent_events_db_fallback():
@@ -71,7 +78,7 @@ def test_get_recent_events_db_fallback():
 
     mock_conn.execute.return_value = [MockRow]
 
-    with patch("event_store.create_engine", return_value=mock_engine):
+    with patch("ai.event_store.create_engine", return_value=mock_engine):
         store = EventStore(config_path="non_existent.yaml")
         store.engine = mock_engine
 
@@ -84,3 +91,89 @@ def test_get_recent_events_db_fallback():
         assert events[0]["device_id"] == "dev1"
         assert events[0]["value"]["cpu_percent"] == 50.0
         assert mock_conn.execute.called
+
+
+def _sqlite_store(tmp_path, **settings):
+    config = tmp_path / "config.yaml"
+    config.write_text(
+        yaml.safe_dump(
+            {
+                "database": {"url": f"sqlite:///{tmp_path / 'events.db'}"},
+                "event_store": settings,
+            }
+        )
+    )
+    return EventStore(config_path=str(config))
+
+
+def _metrics(device_id, i):
+    return {
+        "device_id": device_id,
+        "timestamp": f"2025-01-01T12:00:{i:02d}",
+        "event": "metrics_update",
+        "value": {"cpu_percent": float(i)},
+    }
+
+
+def _stored_count(store):
+    with store.engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM device_metrics")).scalar()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_batches_inserts(tmp_path):
+    """Test that events are queued on the loop and inserted in batches."""
+    store = _sqlite_store(tmp_path, batch_size=3, flush_interval_seconds=60)
+    with patch.object(store, "_persist_events", wraps=store._persist_events) as spy:
+        for i in range(7):
+            store.add_event(_metrics("dev1", i))
+        # Nothing is written inline by add_event
+        assert _stored_count(store) == 0
+
+        await store.drain()
+
+    assert _stored_count(store) == 7
+    assert [len(call.args[0]) for call in spy.call_args_list] == [3, 3, 1]
+
+
+def test_recent_events_merge_cache_and_db(tmp_path):
+    """Test that the DB is only read when the cache is short of the limit."""
+    store = _sqlite_store(tmp_path)
+    for i in range(6):
+        store.add_event(_metrics("dev1", i))  # no loop: written immediately
+
+    # A restarted service only has the newest events cached
+    store.cache.clear()
+    store.add_event(_metrics("dev1", 6))
+    assert _stored_count(store) == 7
+
+    with patch.object(
+        store, "_fetch_recent_events", wraps=store._fetch_recent_events
+    ) as fetch:
+        events = store.get_recent_events("dev1", limit=4)
+        assert [e["value"]["cpu_percent"] for e in events] == [3.0, 4.0, 5.0, 6.0]
+        assert fetch.call_count == 1
+
+        assert len(store.get_recent_events("dev1", limit=1)) == 1
+        assert fetch.call_count == 1
+
+
+def test_recent_events_merge_database_timestamp_format(tmp_path):
+    """Test that rows stored as 'YYYY-MM-DD HH:MM:SS' merge with cached events."""
+    store = _sqlite_store(tmp_path)
+    with store.engine.begin() as conn:
+        for i in range(4):
+            conn.execute(
+                text(
+                    "INSERT INTO device_metrics (device_id, timestamp, cpu_percent) "
+                    "VALUES ('dev1', :ts, :cpu)"
+                ),
+                {"ts": f"2025-01-01 12:00:{i:02d}", "cpu": float(i)},
+            )
+    # The newest stored event is also cached, with an isoformat timestamp
+    store.cache["dev1"] = deque([_metrics("dev1", 3)])
+    store.add_event(_metrics("dev1", 4))
+
+    events = store.get_recent_events("dev1", limit=5)
+
+    assert [e["value"]["cpu_percent"] for e in events] == [0.0, 1.0, 2.0, 3.0, 4.0]
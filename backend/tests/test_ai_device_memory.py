@@ -0,0 +1,102 @@
+"""Tests for batched writes and the query cache of ai/device_memory.py."""
+
+import hashlib
+import os
+import sys
+
+import pytest
+import yaml
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.device_memory import DeviceMemory  # noqa: E402
+
+
+class _FakeEmbedder:
+    """Deterministic 8-dimensional embeddings that record each model call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        if "unembeddable" in texts:
+            raise ValueError("cannot embed")
+        return [
+            [b / 255 for b in hashlib.sha256(t.encode()).digest()[:8]] for t in texts
+        ]
+
+
+@pytest.fixture
+def memory(tmp_path):
+    """Build a DeviceMemory on a temporary Chroma store."""
+    config = tmp_path / "config.yaml"
+    config.write_text(
+        yaml.safe_dump(
+            {
+                "memory": {
+                    "chroma_path": "chroma",
+                    "collection_name": "test_memories",
+                    "batch_size": 4,
+                    "flush_interval_seconds": 60,
+                }
+            }
+        )
+    )
+    return DeviceMemory(config_path=str(config), embedding_function=_FakeEmbedder())
+
+
+@pytest.mark.asyncio
+async def test_add_memory_batches_embedding_and_writes(memory):
+    """Test that queued memories are embedded and added a batch at a time."""
+    for i in range(10):
+        memory.add_memory(f"Analysis {i}", {"device_id": f"pos-{i}"}, f"m{i}")
+    # add_memory does not embed or write on the caller's path
+    assert memory.embed.calls == []
+
+    await memory.drain()
+
+    assert [len(c) for c in memory.embed.calls] == [4, 4, 2]
+    stats = memory.get_memory_stats()
+    assert stats["total_memories"] == 10
+    assert stats["pending_writes"] == 0
+    assert stats["ingest"]["count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_single_adds(memory):
+    """Test that one bad memory does not lose the rest of its batch."""
+    for i, text in enumerate(["ok 0", "unembeddable", "ok 2", "ok 3"]):
+        memory.add_memory(text, {"device_id": "pos-1"}, f"m{i}")
+
+    await memory.drain()
+
+    stats = memory.get_memory_stats()
+    assert stats["total_memories"] == 3
+    assert stats["failed_writes"] == 1
+
+
+def test_query_cache_by_normalized_text(memory):
+    """Test embedding and result caching, and invalidation on new writes."""
+    memory.add_memory("CPU spike on pos-1", {"device_id": "pos-1"}, "m1")
+    memory.embed.calls.clear()
+
+    first = memory.query_similar("  Why is CPU high? ", n_results=1)
+    assert first[0]["content"] == "CPU spike on pos-1"
+    assert memory.query_similar("why is  cpu HIGH?", n_results=1) == first
+    assert memory.embed.calls == [["why is cpu high?"]]
+
+    # A new memory invalidates results but not the query embedding
+    memory.add_memory("Disk full on pos-2", {"device_id": "pos-2"}, "m2")
+    memory.embed.calls.clear()
+    assert len(memory.query_similar("why is cpu high?", n_results=2)) == 2
+    assert memory.embed.calls == []
+
+    search = memory.get_memory_stats()["search"]
+    assert search["count"] == 2
+    assert search["result_cache_hits"] == 1
+    assert search["embedding_cache_hits"] == 1
@@ -0,0 +1,280 @@
+"""Tests for the fleet-wide failure risk sweep (ai/fleet_risk.py)."""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.failure_predictor import FailurePredictor  # noqa: E402
+from ai.fleet_risk import FleetRiskSweep, score_fleet  # noqa: E402
+
+from homepot.app.models.AnalyticsModel import (  # noqa: E402
+    DeviceMetrics,
+    DeviceStateHistory,
+    ErrorLog,
+)
+from homepot.models import Base, HealthCheck  # noqa: E402
+from homepot.seed_factories import (  # noqa: E402
+    create_device,
+    create_site,
+    create_tenant,
+)
+
+
+@pytest.fixture
+async def session():
+    """Yield a session on a private in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as s:
+        yield s
+    await engine.dispose()
+
+
+def _columns(**values):
+    names = (
+        "avg_cpu_percent",
+        "avg_memory_percent",
+        "error_count",
+        "state_changes",
+        "health_checks",
+        "health_failures",
+        "recent_health_checks",
+        "recent_health_failures",
+    )
+    size = max(len(v) for v in values.values())
+    return {
+        name: np.asarray(values.get(name, [0.0] * size), dtype=float) for name in names
+    }
+
+
+async def _seed_fleet(session):
+    """Two sites of one tenant plus a site of another; one device each risk."""
+    tenant = await create_tenant(session)
+    other_tenant = await create_tenant(session, name="Other", slug="other")
+    site = await create_site(session, tenant_id=tenant.id)
+    sibling = await create_site(session, tenant_id=tenant.id)
+    foreign = await create_site(session, tenant_id=other_tenant.id)
+
+    def device(site, name):
+        return create_device(session, site_id=site.id, name=name)
+
+    healthy = await device(site, "healthy")
+    hot = await device(site, "hot")
+    failing = await device(site, "failing")
+    sibling_dev = await device(sibling, "sibling")
+    foreign_dev = await device(foreign, "foreign")
+    retired = await device(site, "retired")
+    retired.is_active = False
+
+    now = datetime.utcnow()
+    for minutes in range(5):
+        at = now - timedelta(minutes=minutes)
+        for d, cpu, mem in ((healthy, 20.0, 30.0), (hot, 95.0, 90.0)):
+            session.add(
+                DeviceMetrics(
+                    device_id=d.id, timestamp=at, cpu_percent=cpu, memory_percent=mem
+                )
+            )
+    # Old samples fall outside the three-day window.
+    session.add(
+        DeviceMetrics(
+            device_id=healthy.id,
+            timestamp=now - timedelta(days=10),
+            cpu_percent=100.0,
+            memory_percent=100.0,
+        )
+    )
+    for i in range(40):
+        session.add(
+            ErrorLog(
+                timestamp=now - timedelta(hours=i),
+                category="api",
+                severity="error",
+                error_message="boom",
+                context={"original_device_id": failing.device_id},
+            )
+        )
+    for i in range(40):
+        session.add(
+            DeviceStateHistory(
+                device_id=failing.id,
+                timestamp=now - timedelta(hours=i),
+                previous_state="online",
+                new_state="offline",
+            )
+        )
+    for i in range(10):
+        session.add(
+            HealthCheck(
+                id=i + 1,
+                device_id=failing.id,
+                is_healthy=i >= 8,
+                timestamp=now - timedelta(hours=i * 6),
+            )
+        )
+    for d in (sibling_dev, foreign_dev, retired):
+        session.add(DeviceMetrics(device_id=d.id, timestamp=now, cpu_percent=99.0))
+    await session.commit()
+    return {
+        "tenant": tenant,
+        "site": site,
+        "healthy": healthy,
+        "hot": hot,
+        "failing": failing,
+        "sibling": sibling_dev,
+        "foreign": foreign_dev,
+    }
+
+
+def test_score_fleet_thresholds_and_levels():
+    """Test that vectorized scoring matches the per-device thresholds."""
+    probability, levels, flags = score_fleet(
+        _columns(
+            avg_cpu_percent=[0, 95, 95, 95, 0],
+            avg_memory_percent=[0, 0, 90, 90, 0],
+            error_count=[0, 0, 0, 31, 16],
+            state_changes=[0, 0, 0, 40, 0],
+            health_checks=[0, 0, 0, 10, 10],
+            health_failures=[0, 0, 0, 8, 4],
+            recent_health_checks=[0, 0, 0, 4, 4],
+            recent_health_failures=[0, 0, 0, 4, 4],
+        ),
+        window_days=3,
+    )
+
+    np.testing.assert_allclose(probability, [0.0, 0.175, 0.35, 1.0, 0.3])
+    assert levels.tolist() == [0, 0, 1, 3, 1]
+    assert flags[0] == 0
+    # Device 4: high (not critical) errors, degraded and worsening health.
+    assert bin(int(flags[4])).count("1") == 3
+
+
+@pytest.mark.asyncio
+async def test_sweep_scores_scope_with_grouped_queries(session):
+    """Test scoping by site and tenant and the factors found per device."""
+    fleet = await _seed_fleet(session)
+    sweep = FleetRiskSweep(window_days=3, cache_ttl_seconds=0)
+
+    result = await sweep.sweep(session, site_id=fleet["site"].site_id)
+    assert sorted(result.device_names) == ["failing", "healthy", "hot"]
+
+    by_name = {name: i for i, name in enumerate(result.device_names)}
+    assert result.probabilities[by_name["healthy"]] == 0.0
+    assert [f["name"] for f in result.factors(by_name["hot"])] == [
+        "High Memory Usage",
+        "High CPU Usage",
+    ]
+    assert {f["name"] for f in result.factors(by_name["failing"])} == {
+        "Critical Error Rate",
+        "Unstable State",
+        "Failing Health Checks",
+        "Worsening Health Trend",
+    }
+    ranked = [result.device_names[i] for i in result.at_or_above("medium")]
+    assert ranked == ["failing", "hot"]
+    assert result.distribution() == {"low": 1, "medium": 1, "high": 1, "critical": 0}
+
+    tenant = await sweep.sweep(session, tenant_id=fleet["tenant"].id)
+    assert sorted(tenant.device_names) == ["failing", "healthy", "hot", "sibling"]
+    everything = await sweep.sweep(session)
+    assert len(everything) == 5
+
+
+@pytest.mark.asyncio
+async def test_sweep_cache_is_per_scope(session):
+    """Test that a fresh cached sweep is reused until cleared."""
+    fleet = await _seed_fleet(session)
+    sweep = FleetRiskSweep(cache_ttl_seconds=60)
+    site_id = fleet["site"].site_id
+
+    first = await sweep.sweep(session, site_id=site_id)
+    assert await sweep.sweep(session, site_id=site_id) is first
+    assert await sweep.sweep(session, tenant_id=fleet["tenant"].id) is not first
+
+    sweep.clear_cache()
+    assert await sweep.sweep(session, site_id=site_id) is not first
+
+
+@pytest.mark.asyncio
+async def test_identify_at_risk_devices_uses_sweep(session):
+    """Test the predictor's at-risk report built from the sweep."""
+    fleet = await _seed_fleet(session)
+
+    @asynccontextmanager
+    async def get_session():
+        yield session
+
+    db_service = MagicMock(get_session=get_session)
+    with (
+        patch(
+            "ai.failure_predictor.get_database_service",
+            AsyncMock(return_value=db_service),
+        ),
+        patch(
+            "ai.failure_predictor.get_fleet_risk_sweep",
+            return_value=FleetRiskSweep(cache_ttl_seconds=0),
+        ),
+    ):
+        report = await FailurePredictor().identify_at_risk_devices(
+            site_id=fleet["site"].site_id, min_risk_level="medium"
+        )
+
+    assert report["total_devices_analyzed"] == 3
+    assert report["at_risk_count"] == 2
+    assert report["risk_distribution"]["high"] == 1
+    top = report["devices"][0]
+    assert top["device_id"] == fleet["failing"].device_id
+    assert top["risk_level"] == "high"
+    assert top["failure_probability"] == 0.65
+    assert "Schedule inspection within 24 hours" in top["recommendations"]
+    assert report["devices"][1]["risk_level"] == "medium"
+
+
+@pytest.mark.asyncio
+async def test_device_prediction_scores_state_and_health_like_the_sweep(session):
+    """Test that per-device state and health factors agree with the sweep."""
+    fleet = await _seed_fleet(session)
+    sweep = FleetRiskSweep(window_days=3, cache_ttl_seconds=0)
+    result = await sweep.sweep(session, site_id=fleet["site"].site_id)
+
+    @asynccontextmanager
+    async def get_session():
+        yield session
+
+    db_service = MagicMock(get_session=get_session)
+    predictor = FailurePredictor()
+    scores = {}
+    with (
+        patch(
+            "ai.failure_predictor.get_database_service",
+            AsyncMock(return_value=db_service),
+        ),
+        patch("ai.failure_predictor.get_fleet_risk_sweep", return_value=sweep),
+    ):
+        for name in ("failing", "healthy"):
+            device_id = fleet[name].device_id
+            state = await predictor._analyze_state_stability(device_id)
+            health = await predictor._analyze_health_trend(device_id)
+            scores[name] = (state["score"], health["score"])
+
+            swept = result.factors(result.device_ids.index(device_id))
+            assert sorted(f["name"] for f in state["factors"] + health["factors"]) == (
+                sorted(f["name"] for f in swept if f["type"] in ("state", "health"))
+            )
+
+    # 40 transitions in three days, 8 of 10 checks failing and worse lately.
+    assert scores == {"failing": (1.0, 1.0), "healthy": (0.0, 0.0)}
@@ -9,9 +9,11 @@ workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
 ai_dir = os.path.join(workspace_root, "ai")
 if ai_dir not in sys.path:
     sys.path.insert(0, ai_dir)
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
 
+from ai.event_store import EventStore  # noqa: E402
 from analysis_modes import AnalysisMode, ModeManager  # noqa: E402
-from event_store import EventStore  # noqa: E402
 
 
 def test_event_store_caching():
@@ -0,0 +1,189 @@
+"""Tests for the precomputed site scheduling model (ai/schedule_model.py)."""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, time, timedelta
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.job_scheduler import PredictiveJobScheduler  # noqa: E402
+from ai.schedule_model import ScheduleModelStore, smooth_success  # noqa: E402
+
+from homepot.app.models.AnalyticsModel import (  # noqa: E402
+    JobOutcome,
+    SiteOperatingSchedule,
+)
+from homepot.models import Base  # noqa: E402
+from homepot.seed_factories import create_device, create_site  # noqa: E402
+
+# A Monday, 07:30.
+MONDAY = datetime(2026, 10, 12, 7, 30)
+
+
+@pytest.fixture
+async def session():
+    """Yield a session on a private in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as s:
+        yield s
+    await engine.dispose()
+
+
+async def _seed_site(session):
+    """Open 08-20 on weekdays (peak 12-14), maintenance Saturday, shut Sunday.
+
+    Jobs at 09:00 on Mondays mostly failed; 15:00 on Mondays always worked.
+    """
+    site = await create_site(session)
+    device = await create_device(session, site_id=site.id)
+    for day in range(7):
+        session.add(
+            SiteOperatingSchedule(
+                site_id=site.id,
+                day_of_week=day,
+                open_time=time(8),
+                close_time=time(20),
+                peak_hours_start=time(12),
+                peak_hours_end=time(14),
+                is_closed=day == 6,
+                is_maintenance_window=day == 5,
+            )
+        )
+
+    now = datetime.utcnow()
+    monday = (now - timedelta(days=now.weekday())).replace(
+        minute=0, second=0, microsecond=0
+    )
+    if monday > now - timedelta(hours=16):
+        monday -= timedelta(days=7)
+    for i in range(10):
+        for hour, status in (
+            (9, "failed" if i < 8 else "completed"),
+            (15, "completed"),
+        ):
+            session.add(
+                JobOutcome(
+                    timestamp=monday.replace(hour=hour, minute=i),
+                    job_id=f"job-{hour}-{i}",
+                    job_type="update",
+                    device_id=device.device_id,
+                    status=status,
+                )
+            )
+    await session.commit()
+    return site
+
+
+def _patch_db(session):
+    @asynccontextmanager
+    async def get_session():
+        yield session
+
+    db = MagicMock(get_session=get_session)
+    return patch("ai.job_scheduler.get_database_service", AsyncMock(return_value=db))
+
+
+def test_smooth_success_shrinks_sparse_slots_towards_their_hour():
+    """Test hierarchical smoothing of hour-of-week success counts."""
+    totals = np.zeros((7, 24))
+    successes = np.zeros((7, 24))
+    totals[0, 9], successes[0, 9] = 100, 10  # well observed, poor
+    totals[1, 9], successes[1, 9] = 1, 1  # one lucky job
+    totals[0, 15], successes[0, 15] = 100, 100
+
+    rates = smooth_success(successes, totals, prior_success=0.85, prior_strength=5)
+
+    assert rates.shape == (7, 24)
+    assert rates[0, 9] < 0.2
+    # A single success at Tuesday 09:00 barely lifts it above Monday's 09:00.
+    assert rates[1, 9] < 0.3
+    assert rates[0, 15] > 0.95
+    # Unobserved hours fall back to the site-wide rate.
+    overall = (111 + 5 * 0.85) / (201 + 5)
+    assert rates[3, 3] == pytest.approx(overall)
+
+
+@pytest.mark.asyncio
+async def test_model_arrays_and_refresh(session):
+    """Test the model built from schedules and outcomes, and its cache."""
+    site = await _seed_site(session)
+    store = ScheduleModelStore(refresh_seconds=60)
+
+    model = await store.get(session, site.site_id)
+    assert model.open_mask.shape == (7, 24)
+    assert model.open_mask[0, 8] and not model.open_mask[0, 20]
+    assert not model.open_mask[6].any()
+    assert model.peak_mask[2, 12] and not model.peak_mask[2, 14]
+    assert model.samples[0, 9] == 10 and model.samples[0, 15] == 10
+    assert model.success[0, 9] < model.success[3, 9] < model.success[0, 15]
+    assert model.schedule_factor[5, 10] == 0.5
+    assert model.schedule_factor[6, 10] == 0.3
+    assert model.load[1, 13] > model.load[1, 10] > model.load[1, 21] == 0
+    assert model.day_status(6)["status"] == "closed"
+
+    assert await store.get(session, site.site_id) is model
+    assert store.builds == 1
+    store.invalidate(site.site_id)
+    await store.get(session, site.site_id)
+    assert store.builds == 2
+
+
+@pytest.mark.asyncio
+async def test_recommendations_use_model_slots(session):
+    """Test priority horizons, real alternatives and lookup-based scoring."""
+    site = await _seed_site(session)
+    store = ScheduleModelStore(refresh_seconds=60)
+    scheduler = PredictiveJobScheduler(models=store)
+
+    with _patch_db(session):
+        critical = await scheduler.recommend_execution_time(
+            site.site_id, "critical", MONDAY
+        )
+        medium = await scheduler.recommend_execution_time(
+            site.site_id, "medium", MONDAY
+        )
+        sunday = MONDAY + timedelta(days=6, hours=3)
+        high = await scheduler.recommend_execution_time(site.site_id, "high", sunday)
+
+    # Closed at 07:30, so the first open hour.
+    assert critical["recommended_time"] == "2026-10-12T08:00:00"
+    # Monday 15:00 has the best record and is off-peak.
+    assert medium["recommended_time"] == "2026-10-12T15:00:00"
+    assert medium["site_status"]["status"] == "open"
+    alternatives = [datetime.fromisoformat(t) for t in medium["alternative_times"]]
+    assert len(alternatives) == 3
+    for t in alternatives:
+        assert 8 <= t.hour < 20 and t.weekday() < 5
+        assert not 12 <= t.hour < 14
+        assert abs(t - datetime(2026, 10, 12, 15)) >= timedelta(hours=3)
+    # The site is shut all Sunday: the next open hour is Monday 08:00.
+    assert high["recommended_time"] == "2026-10-19T08:00:00"
+    assert "closed for the next 4 hours" in high["reasoning"]
+    assert store.builds == 1
+
+    scheduler.analytics = MagicMock(
+        get_device_performance_trends=AsyncMock(return_value={"health_score": 100}),
+        get_error_frequency_analysis=AsyncMock(return_value={}),
+    )
+    good = await scheduler.calculate_success_probability(
+        site.site_id, "pos-1", datetime(2026, 10, 12, 15)
+    )
+    closed = await scheduler.calculate_success_probability(
+        site.site_id, "pos-1", datetime(2026, 10, 18, 15)
+    )
+    assert good["probability"] > closed["probability"]
+    notes = {f["factor"]: f.get("note") for f in closed["factors"]}
+    assert notes["site_schedule"] == "Site is closed"
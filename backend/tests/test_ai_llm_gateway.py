@@ -0,0 +1,214 @@
+"""Tests for the non-blocking LLM gateway (ai/llm_gateway.py)."""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+import pytest
+
+# Add the workspace root to sys.path so we can import 'ai' as a package
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.llm import LLM_UNAVAILABLE_MESSAGE  # noqa: E402
+from ai.llm_gateway import LLMGateway, LLMGatewayBusy  # noqa: E402
+
+
+class _SlowService:
+    """Blocking stand-in for LLMService that records its calls."""
+
+    model = "fake"
+
+    def __init__(self, delay=0.2, chunks=("Hello", " ", "world")):
+        self.delay = delay
+        self.chunks = chunks
+        self.calls = 0
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def generate_response(self, prompt, context=None, system_prompt=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            return LLM_UNAVAILABLE_MESSAGE
+        return f"answer to {prompt}"
+
+    def stream_response(self, prompt, context=None, system_prompt=None):
+        with self._lock:
+            self.calls += 1
+        if self.fail:
+            raise ConnectionError("ollama down")
+        for chunk in self.chunks:
+            time.sleep(self.delay / len(self.chunks))
+            yield chunk
+
+    def check_health(self):
+        return True
+
+
+def _gateway(service, **kwargs):
+    kwargs.setdefault("workers", 2)
+    kwargs.setdefault("max_queue", 8)
+    kwargs.setdefault("cache_ttl_seconds", 60)
+    kwargs.setdefault("cache_max_entries", 16)
+    return LLMGateway(lambda: service, **kwargs)
+
+
+async def _max_loop_lag(coro):
+    """Run ``coro`` while measuring the worst event-loop stall."""
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - before - 0.01)
+
+    tick = asyncio.ensure_future(ticker())
+    result = await coro
+    done = True
+    await tick
+    return result, lag
+
+
+@pytest.mark.asyncio
+async def test_generation_does_not_block_event_loop():
+    """Test that a slow generation leaves the event loop responsive."""
+    gateway = _gateway(_SlowService(delay=0.3))
+
+    text, lag = await _max_loop_lag(gateway.generate("q"))
+
+    assert text == "answer to q"
+    assert lag < 0.1
+
+
+@pytest.mark.asyncio
+async def test_identical_inflight_requests_are_coalesced():
+    """Test that concurrent identical prompts share one generation."""
+    service = _SlowService(delay=0.1)
+    gateway = _gateway(service)
+
+    results = await asyncio.gather(
+        *(gateway.generate("same", context="ctx") for _ in range(5)),
+        gateway.generate("same", context="other ctx"),
+    )
+
+    assert results[:5] == ["answer to same"] * 5
+    assert service.calls == 2
+    assert gateway.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_responses_are_cached_until_ttl_expires():
+    """Test that repeats hit the cache and expire after the TTL."""
+    service = _SlowService(delay=0)
+    gateway = _gateway(service, cache_ttl_seconds=0.1)
+
+    await gateway.generate("q", system_prompt="sys")
+    await gateway.generate("q", system_prompt="sys")
+    assert service.calls == 1
+    assert gateway.stats()["cache_hits"] == 1
+
+    await asyncio.sleep(0.15)
+    await gateway.generate("q", system_prompt="sys")
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_unavailable_fallback_is_not_cached():
+    """Test that the Ollama-unavailable message is never served from cache."""
+    service = _SlowService(delay=0)
+    service.fail = True
+    gateway = _gateway(service)
+
+    assert await gateway.generate("q") == LLM_UNAVAILABLE_MESSAGE
+    service.fail = False
+    assert await gateway.generate("q") == "answer to q"
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected():
+    """Test admission control once workers and queue slots are taken."""
+    gateway = _gateway(_SlowService(delay=0.2), workers=1, max_queue=1)
+
+    first = asyncio.ensure_future(gateway.generate("a"))
+    second = asyncio.ensure_future(gateway.generate("b"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(LLMGatewayBusy):
+        await gateway.generate("c")
+    # Coalesced requests take no extra slot.
+    assert await gateway.generate("a") == "answer to a"
+    await asyncio.gather(first, second)
+
+    assert gateway.stats()["rejected"] == 1
+    assert gateway.stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_chunks_and_fills_cache():
+    """Test that streamed chunks arrive in order and are cached on completion."""
+    service = _SlowService(delay=0.06)
+    gateway = _gateway(service)
+
+    chunks, lag = await _max_loop_lag(_collect(gateway.stream("q")))
+
+    assert chunks == ["Hello", " ", "world"]
+    assert lag < 0.1
+    assert await gateway.generate("q") == "Hello world"
+    assert service.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_failure_yields_fallback():
+    """Test that a stream that fails before any output yields the fallback."""
+    service = _SlowService(delay=0)
+    service.fail = True
+    gateway = _gateway(service)
+
+    assert await _collect(gateway.stream("q")) == [LLM_UNAVAILABLE_MESSAGE]
+    assert gateway.stats()["cache_entries"] == 0
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_query_stream_endpoint_emits_sse_events():
+    """Test that /api/ai/query/stream emits context, token and done events."""
+    from ai import api
+
+    context_used = {"live_context_injected": False}
+    with (
+        patch.object(api, "_ensure_services"),
+        patch.object(api, "mode_manager", MagicMock()),
+        patch.object(api, "llm_gateway", _gateway(_SlowService(delay=0))),
+        patch.object(
+            api,
+            "_build_query_context",
+            AsyncMock(return_value=("ctx", context_used)),
+        ),
+    ):
+        response = TestClient(api.app).post(
+            "/api/ai/query/stream", json={"query": "status?"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        line.split(": ", 1)[1]
+        for line in response.text.splitlines()
+        if line.startswith("event: ")
+    ]
+    assert events == ["context", "token", "token", "token", "done"]
+    assert '"text": "world"' in response.text
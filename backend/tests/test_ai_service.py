@@ -9,6 +9,7 @@ import os
 import sys
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 
 # Add the workspace root to sys.path so we can import 'ai' as a package
@@ -18,7 +19,12 @@ if workspace_root not in sys.path:
     sys.path.insert(0, workspace_root)
 
 # Now we can import from the ai package
-from ai.anomaly_detection import AnomalyDetector  # noqa: E402
+from ai.anomaly_detection import (  # noqa: E402
+    FLAG_CPU,
+    FLAG_ERROR_RATE,
+    FLAG_NETWORK_LATENCY,
+    AnomalyDetector,
+)
 
 # ==========================================
 # 1. Test Anomaly Detector (Pure Logic)
@@ -80,6 +86,65 @@ def test_anomaly_detector_capped_score():
     assert score == 1.0
 
 
+def test_anomaly_detector_batch_matches_scalar():
+    """Test that batch scoring agrees with check_anomaly sample by sample."""
+    detector = AnomalyDetector(sensitivity=0.8)
+    rng = np.random.default_rng(7)
+    n = 2000
+    columns = {
+        "cpu_percent": rng.uniform(0, 100, n).round(1),
+        "memory_percent": rng.uniform(0, 100, n).round(1),
+        "disk_percent": rng.uniform(0, 100, n).round(1),
+        "error_rate": rng.uniform(0, 0.2, n),
+        "network_latency_ms": rng.uniform(0, 400, n).round(),
+        "flapping_count": rng.integers(0, 10, n),
+        "consecutive_failures": rng.integers(0, 6, n),
+    }
+    # Unreported values must be skipped exactly like missing dict keys.
+    columns["cpu_percent"][::13] = np.nan
+
+    result = detector.check_anomaly_batch(columns)
+
+    assert len(result) == n
+    for i in range(n):
+        sample = {k: v[i].item() for k, v in columns.items() if not np.isnan(v[i])}
+        score, reasons = detector.check_anomaly(sample)
+        assert result.scores[i] == score
+        assert result.descriptions(i) == reasons
+        assert result.counts[i] == len(reasons)
+
+
+def test_anomaly_detector_batch_structured_array_and_flags():
+    """Test batch scoring on a structured array with a missing column."""
+    detector = AnomalyDetector(sensitivity=1.0)
+    samples = np.array(
+        [(50.0, 0.01, 20.0), (95.0, 0.5, 2000.0), (99.0, 0.01, 20.0)],
+        dtype=[
+            ("cpu_percent", "f8"),
+            ("error_rate", "f8"),
+            ("network_latency_ms", "f8"),
+        ],
+    )
+
+    result = detector.check_anomaly_batch(samples)
+
+    assert result.scores.tolist() == [0.0, 1.0, 0.2]
+    assert result.flags.tolist() == [
+        0,
+        FLAG_CPU | FLAG_ERROR_RATE | FLAG_NETWORK_LATENCY,
+        FLAG_CPU,
+    ]
+    assert result.descriptions(2) == ["High CPU: 99.0%"]
+
+
+def test_anomaly_detector_batch_rejects_ragged_columns():
+    """Test that columns of different lengths are rejected."""
+    with pytest.raises(ValueError):
+        AnomalyDetector().check_anomaly_batch(
+            {"cpu_percent": [1.0, 2.0], "memory_percent": [1.0]}
+        )
+
+
 # ==========================================
 # 2. Test AI API (With Mocks)
 # ==========================================
@@ -177,3 +177,22 @@ class TestErrorLogContract:
                 db.delete(log)
                 db.commit()
             db.close()
+
+    def test_repeated_device_error_is_stored_once(self, client) -> None:
+        """The same device error within the snapshot interval is deduplicated."""
+        self._ensure_tables()
+
+        payload = {
+            **self.PAYLOAD,
+            "device_id": "analytics-dedup-device",
+            "error_code": "GW_TIMEOUT",
+        }
+        first = client.post(
+            "/api/v1/analytics/error", json=payload, headers=self._auth_header()
+        )
+        second = client.post(
+            "/api/v1/analytics/error", json=payload, headers=self._auth_header()
+        )
+
+        assert first.json()["message"] == "Error logged"
+        assert second.json()["message"] == "Error filtered (duplicate)"
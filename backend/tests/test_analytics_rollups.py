@@ -0,0 +1,325 @@
+"""Tests for the incrementally maintained request, error and job rollups."""
+
+from datetime import datetime, timedelta
+import random
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from homepot.analytics_rollups import (
+    GROWTH,
+    api_performance,
+    delete_logs,
+    error_trends,
+    job_outcomes,
+    latency_bin,
+    percentiles,
+    rebuild_rollups,
+)
+from homepot.app.models.AnalyticsModel import (
+    APIRequestHourly,
+    APIRequestLog,
+    APIRequestMinutely,
+    ErrorLog,
+    ErrorLogHourly,
+    JobOutcome,
+    JobOutcomeHourly,
+)
+from homepot.models import Base
+
+NOW = datetime(2026, 10, 18, 12, 30)
+
+
+@pytest.fixture
+def session():
+    """Yield a session on a private in-memory database."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
+
+
+def test_percentiles_are_within_one_bin_of_exact():
+    """Test histogram percentiles against exact ones for skewed latencies."""
+    rng = random.Random(7)
+    latencies = sorted(rng.lognormvariate(3, 1) for _ in range(5000))
+    bins = {}
+    for ms in latencies:
+        bins[latency_bin(ms)] = bins.get(latency_bin(ms), 0) + 1
+
+    estimates = percentiles(bins, lowest=latencies[0], highest=latencies[-1])
+
+    for q in (0.5, 0.95, 0.99):
+        exact = latencies[int(q * len(latencies)) - 1]
+        assert exact <= estimates[q] <= exact * GROWTH
+    assert percentiles({}) == {0.5: None, 0.95: None, 0.99: None}
+
+
+def test_logged_requests_are_counted_into_both_resolutions(session):
+    """Test the flush hook writes minute and hour buckets per latency bin."""
+    session.add_all(
+        [
+            APIRequestLog(
+                timestamp=NOW,
+                endpoint="/a",
+                method="GET",
+                status_code=200,
+                response_time_ms=10.0,
+            ),
+            APIRequestLog(
+                timestamp=NOW,
+                endpoint="/a",
+                method="GET",
+                status_code=503,
+                response_time_ms=10.2,
+            ),
+            APIRequestLog(
+                timestamp=NOW,
+                endpoint="/a",
+                method="GET",
+                status_code=200,
+                response_time_ms=400.0,
+            ),
+        ]
+    )
+    session.commit()
+
+    hourly = (
+        session.execute(select(APIRequestHourly).order_by(APIRequestHourly.latency_bin))
+        .scalars()
+        .all()
+    )
+    assert [(h.hour_start, h.request_count, h.error_count) for h in hourly] == [
+        (NOW.replace(minute=0), 2, 1),
+        (NOW.replace(minute=0), 1, 0),
+    ]
+    assert hourly[0].min_response_time_ms == 10.0
+    assert hourly[0].max_response_time_ms == 10.2
+    minutes = session.execute(
+        select(
+            APIRequestMinutely.minute_start, func.sum(APIRequestMinutely.request_count)
+        ).group_by(APIRequestMinutely.minute_start)
+    ).all()
+    assert minutes == [(NOW, 3)]
+
+    session.rollback()
+    session.add(
+        APIRequestLog(
+            timestamp=NOW,
+            endpoint="/a",
+            method="GET",
+            status_code=200,
+            response_time_ms=1.0,
+        )
+    )
+    session.flush()
+    session.rollback()
+    assert (
+        session.execute(select(func.sum(APIRequestHourly.request_count))).scalar() == 3
+    )
+
+
+def test_api_performance_matches_raw_rows(session):
+    """Test a window combining minute and hour buckets against the raw rows."""
+    rng = random.Random(3)
+    start = NOW - timedelta(hours=5)
+    for n in range(600):
+        session.add(
+            APIRequestLog(
+                timestamp=start + timedelta(seconds=30 * n),
+                endpoint=rng.choice(["/a", "/b"]),
+                method="GET",
+                status_code=rng.choice([200, 200, 200, 500]),
+                response_time_ms=rng.lognormvariate(4, 0.8),
+            )
+        )
+    session.commit()
+
+    since = NOW - timedelta(hours=3)
+    metrics = {m["endpoint"]: m for m in api_performance(session, 3, now=NOW)}
+    for endpoint in ("/a", "/b"):
+        # The leading partial hour is read per minute, so the minute holding
+        # ``since`` counts whole.
+        raw = (
+            session.execute(
+                select(APIRequestLog).where(
+                    APIRequestLog.endpoint == endpoint,
+                    APIRequestLog.timestamp >= since.replace(second=0),
+                )
+            )
+            .scalars()
+            .all()
+        )
+        latencies = sorted(r.response_time_ms for r in raw)
+        m = metrics[endpoint]
+        assert m["request_count"] == len(raw)
+        assert m["error_count"] == sum(r.status_code >= 400 for r in raw)
+        assert m["avg_response_time_ms"] == pytest.approx(
+            sum(latencies) / len(latencies), abs=0.01
+        )
+        assert (m["min_response_time_ms"], m["max_response_time_ms"]) == (
+            latencies[0],
+            latencies[-1],
+        )
+        exact = latencies[-(-95 * len(latencies) // 100) - 1]
+        assert exact <= m["p95_response_time_ms"] <= exact * GROWTH
+
+    only_a = api_performance(session, 3, endpoint="/a", now=NOW)
+    assert [m["endpoint"] for m in only_a] == ["/a"]
+
+
+def test_error_and_job_windows_combine_raw_and_hourly_rows(session):
+    """Test the leading partial hour is read from raw rows, the rest rolled up."""
+    since = NOW - timedelta(hours=2)
+    for timestamp in (since - timedelta(minutes=1), since, NOW):
+        session.add(
+            ErrorLog(
+                timestamp=timestamp,
+                category="api",
+                severity="error",
+                error_message="boom",
+            )
+        )
+        session.add(
+            JobOutcome(
+                timestamp=timestamp,
+                job_id="j",
+                job_type="restart",
+                status="success",
+                duration_ms=100,
+            )
+        )
+    session.add(
+        JobOutcome(timestamp=NOW, job_id="k", job_type="restart", status="success")
+    )
+    session.commit()
+
+    assert error_trends(session, 2, now=NOW) == [
+        {"category": "api", "severity": "error", "count": 2}
+    ]
+    assert error_trends(session, 2, category="db", now=NOW) == []
+    assert job_outcomes(session, 2, now=NOW) == [
+        {
+            "job_type": "restart",
+            "status": "success",
+            "count": 3,
+            "avg_duration_ms": 100.0,
+        }
+    ]
+
+
+def test_rebuild_recomputes_closed_hours(session):
+    """Test rollups rebuilt from raw rows match the incrementally kept ones."""
+    for hours_ago in (1, 2, 30):
+        timestamp = NOW - timedelta(hours=hours_ago)
+        session.add(
+            APIRequestLog(
+                timestamp=timestamp,
+                endpoint="/a",
+                method="GET",
+                status_code=200,
+                response_time_ms=12.0,
+            )
+        )
+        session.add(
+            ErrorLog(
+                timestamp=timestamp,
+                category="api",
+                severity="error",
+                error_message="boom",
+            )
+        )
+        session.add(
+            JobOutcome(
+                timestamp=timestamp, job_id="j", job_type="restart", status="failed"
+            )
+        )
+    session.commit()
+    before = (api_performance(session, 24, now=NOW), error_trends(session, 24, now=NOW))
+
+    for table in (
+        APIRequestHourly,
+        APIRequestMinutely,
+        ErrorLogHourly,
+        JobOutcomeHourly,
+    ):
+        session.execute(delete(table))
+    counted = rebuild_rollups(session, 24, now=NOW)
+    session.commit()
+
+    assert counted == {"api_request_logs": 2, "error_logs": 2, "job_outcomes": 2}
+    assert (
+        api_performance(session, 24, now=NOW),
+        error_trends(session, 24, now=NOW),
+    ) == before
+    assert job_outcomes(session, 24, now=NOW)[0]["count"] == 2
+
+
+def test_deleted_logs_are_taken_out_of_the_rollups(session):
+    """Test purged request and job rows no longer count, and kept ones do."""
+    for endpoint, ms in (("/sites/s1", 10.0), ("/sites/s1", 20.0), ("/sites/s2", 10.0)):
+        session.add(
+            APIRequestLog(
+                timestamp=NOW,
+                endpoint=endpoint,
+                method="GET",
+                status_code=500,
+                response_time_ms=ms,
+            )
+        )
+    for device_id in ("d1", "d1", "d2"):
+        session.add(
+            JobOutcome(
+                timestamp=NOW - timedelta(hours=2),
+                job_id="j",
+                job_type="restart",
+                device_id=device_id,
+                status="failed",
+                duration_ms=100,
+            )
+        )
+    # An hour rolled up before latencies were binned keeps its counts in bin -1.
+    old = NOW - timedelta(hours=3, minutes=30)
+    session.add(
+        APIRequestLog(
+            timestamp=old,
+            endpoint="/sites/s1",
+            method="GET",
+            status_code=200,
+            response_time_ms=15.0,
+        )
+    )
+    session.commit()
+    session.execute(
+        APIRequestHourly.__table__.update()
+        .where(APIRequestHourly.hour_start == old.replace(minute=0))
+        .values(latency_bin=-1)
+    )
+
+    deleted = delete_logs(
+        session, APIRequestLog, APIRequestLog.endpoint.like("%/s1%")
+    ) + delete_logs(session, JobOutcome, JobOutcome.device_id == "d1")
+    session.commit()
+
+    assert deleted == 5
+    (kept,) = api_performance(session, 24, now=NOW)
+    assert (kept["endpoint"], kept["request_count"], kept["error_count"]) == (
+        "/sites/s2",
+        1,
+        1,
+    )
+    assert kept["avg_response_time_ms"] == 10.0
+    # Emptied buckets are deleted rather than left at zero.
+    assert session.scalar(select(func.count()).select_from(APIRequestHourly)) == 1
+    assert session.scalar(select(func.count()).select_from(APIRequestMinutely)) == 1
+    assert job_outcomes(session, 24, now=NOW) == [
+        {
+            "job_type": "restart",
+            "status": "failed",
+            "count": 1,
+            "avg_duration_ms": 100.0,
+        }
+    ]
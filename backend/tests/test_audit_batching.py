@@ -0,0 +1,140 @@
+"""Tests for transaction-scoped and batched audit logging (homepot.audit)."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from homepot.audit import AuditEventType, AuditLogger
+from homepot.models import AuditEventHourlyCount, AuditLog, Base, utc_now
+
+
+@pytest.fixture
+async def db():
+    """Yield a DatabaseService stand-in on a private in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    commits = []
+
+    @asynccontextmanager
+    async def get_session():
+        async with maker() as session:
+            yield session
+            await session.commit()
+            commits.append(session)
+
+    service = MagicMock(get_session=get_session, maker=maker, commits=commits)
+    with patch("homepot.audit.get_database_service", AsyncMock(return_value=service)):
+        yield service
+    await engine.dispose()
+
+
+async def _counts(db):
+    async with db.maker() as session:
+        rows = await session.execute(
+            select(AuditEventHourlyCount.event_type, AuditEventHourlyCount.count)
+        )
+        logs = await session.scalar(select(func.count(AuditLog.id)))
+        return dict(rows.all()), logs
+
+
+@pytest.mark.asyncio
+async def test_enlisted_event_commits_and_rolls_back_with_caller(db):
+    """Test that an enlisted audit row and its count share the caller's fate."""
+    audit = AuditLogger(batched_event_types=[])
+
+    async with db.maker() as session:
+        await audit.log_event(
+            AuditEventType.DEVICE_SUSPENDED, "rolled back", session=session
+        )
+        await session.rollback()
+    assert await _counts(db) == ({}, 0)
+
+    async with db.maker() as session:
+        row = await audit.log_event(
+            AuditEventType.DEVICE_SUSPENDED, "kept", session=session
+        )
+        assert row.id is not None
+        await session.commit()
+    assert await _counts(db) == ({"device_suspended": 1}, 1)
+
+
+@pytest.mark.asyncio
+async def test_batched_events_are_written_in_few_commits(db):
+    """Test that batched types are queued and flushed one commit per batch."""
+    audit = AuditLogger(
+        batched_event_types=["api_access"], batch_size=2, flush_interval_seconds=0.05
+    )
+
+    for n in range(5):
+        await audit.log_api_access(f"/api/v1/x/{n}", "GET", 200)
+    assert db.commits == []
+
+    # Two full batches go at once; the last event waits for the interval.
+    for _ in range(100):
+        if len(db.commits) == 3:
+            break
+        await asyncio.sleep(0.05)
+    assert await _counts(db) == ({"api_access": 5}, 5)
+    assert len(db.commits) == 3
+
+    await audit.log_api_access("/api/v1/late", "GET", 200)
+    assert await audit.drain() == 1
+    assert await _counts(db) == ({"api_access": 6}, 6)
+
+
+@pytest.mark.asyncio
+async def test_drain_keeps_the_batch_being_written(db):
+    """Test that draining mid-write waits for the batch instead of losing it."""
+    audit = AuditLogger(
+        batched_event_types=["api_access"], batch_size=2, flush_interval_seconds=10
+    )
+    get_session = db.get_session
+
+    @asynccontextmanager
+    async def slow_session():
+        async with get_session() as session:
+            yield session
+            await asyncio.sleep(0.1)
+
+    db.get_session = slow_session
+    for n in range(3):
+        await audit.log_api_access(f"/api/v1/x/{n}", "GET", 200)
+    await asyncio.sleep(0.02)  # the flusher is now inside its first write
+
+    assert await audit.drain() == 3
+    assert audit.dropped == 0
+    assert await _counts(db) == ({"api_access": 3}, 3)
+
+
+@pytest.mark.asyncio
+async def test_statistics_read_hourly_counts(db):
+    """Test that statistics sum hourly buckets inside the requested window."""
+    now = utc_now()
+    async with db.maker() as session:
+        for event_type, created_at in (
+            ("api_access", now),
+            ("api_access", now),
+            ("job_created", now - timedelta(hours=1)),
+            ("job_created", now - timedelta(hours=30)),
+        ):
+            session.add(
+                AuditLog(event_type=event_type, description="x", created_at=created_at)
+            )
+            # Separate flushes increment the same hourly bucket.
+            await session.flush()
+        await session.commit()
+
+    stats = await AuditLogger().get_event_statistics(hours=24)
+
+    assert stats["total_events"] == 3
+    assert stats["events_by_type"] == {"api_access": 2, "job_created": 1}
+    assert stats["api_access_count"] == 2
+    assert stats["since"] < now.replace(tzinfo=None).isoformat()
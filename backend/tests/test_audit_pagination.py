@@ -0,0 +1,130 @@
+"""Tests for keyset-paginated, projected and streamed audit event queries."""
+
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from homepot.app.utils.pagination import decode_cursor, encode_cursor
+from homepot.audit import AuditEventType, AuditLogger
+from homepot.models import AuditLog, Base, Device, Site, utc_now
+
+
+@pytest.fixture
+async def db():
+    """Yield a DatabaseService stand-in with 25 audit events on two devices."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with maker() as session:
+        site = Site(site_id="site-a", name="Site A")
+        session.add(site)
+        await session.flush()
+        devices = [
+            Device(
+                device_id=f"dev-{n}",
+                name=f"dev-{n}",
+                device_type="pos_terminal",
+                site_id=site.id,
+            )
+            for n in range(2)
+        ]
+        session.add_all(devices)
+        await session.flush()
+        start = utc_now() - timedelta(hours=1)
+        for n in range(25):
+            session.add(
+                AuditLog(
+                    event_type="device_updated" if n % 2 else "job_created",
+                    description=f"event {n}",
+                    device_id=devices[n % 2].id,
+                    site_id=site.id,
+                    # Pairs of events share a timestamp, so ids break ties.
+                    created_at=start + timedelta(seconds=n // 2),
+                )
+            )
+        await session.commit()
+
+    @asynccontextmanager
+    async def get_session():
+        async with maker() as session:
+            yield session
+            await session.commit()
+
+    service = MagicMock(get_session=get_session)
+    with patch("homepot.audit.get_database_service", AsyncMock(return_value=service)):
+        yield service
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pages_cover_every_event_once_newest_first(db):
+    """Test that following next_cursor visits each event exactly once."""
+    audit = AuditLogger()
+    seen, cursor = [], None
+    while True:
+        events, cursor = await audit.get_events_page(limit=10, cursor=cursor)
+        seen.extend(events)
+        if cursor is None:
+            break
+
+    assert len(seen) == 25
+    assert [e["description"] for e in seen] == [f"event {n}" for n in range(24, -1, -1)]
+
+
+@pytest.mark.asyncio
+async def test_filters_and_projection_are_pushed_down(db):
+    """Test device/event type filters and that only requested fields return."""
+    events, cursor = await AuditLogger().get_events_page(
+        limit=50,
+        fields="description",
+        event_types=[AuditEventType.DEVICE_UPDATED],
+        device_id="dev-1",
+        site_id="site-a",
+    )
+
+    assert cursor is None
+    assert len(events) == 12
+    assert set(events[0]) == {"id", "description", "created_at"}
+
+    with pytest.raises(ValueError):
+        await AuditLogger().get_events_page(fields="password")
+    with pytest.raises(ValueError):
+        await AuditLogger().get_events_page(cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_stream_reads_in_pages(db):
+    """Test that streaming yields every event using fixed-size pages."""
+    rows = [
+        row
+        async for row in AuditLogger().stream_events(
+            fields="event_type", page_size=4, device_id="dev-0"
+        )
+    ]
+    assert len(rows) == 13
+    assert {row["event_type"] for row in rows} == {"job_created"}
+
+
+def test_cursor_round_trip():
+    """Test that cursors decode to the timestamp and id they encode."""
+    now = utc_now()
+    assert decode_cursor(encode_cursor(now, 42)) == (now, 42)
+
+
+def test_audit_events_endpoint_streams_ndjson(client):
+    """Test the NDJSON export of /api/v1/audit/events."""
+    response = client.get("/api/v1/audit/events?format=ndjson&fields=event_type")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    for line in response.text.splitlines():
+        assert set(json.loads(line)) == {"id", "event_type", "created_at"}
+
+    assert client.get("/api/v1/audit/events?cursor=bogus").status_code == 400
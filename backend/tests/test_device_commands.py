@@ -5,6 +5,8 @@ from datetime import datetime, timedelta, timezone
 import os
 import secrets
 import tempfile
+import threading
+import time
 from typing import Any, Dict
 
 from fastapi.testclient import TestClient
@@ -26,6 +28,7 @@ from homepot.models import (
     Site,
     User,
 )
+from homepot.notification_hub import COMMANDS_CHANNEL, get_notification_hub
 
 
 @pytest.fixture(autouse=True)
@@ -665,3 +668,195 @@ def test_command_expiry_records_executed_at(client: TestClient) -> None:
         assert cmd.executed_at is not None
     finally:
         db.close()
+
+
+def test_long_poll_returns_pending_commands_immediately(client: TestClient) -> None:
+    """The long-poll endpoint answers at once when commands are already pending."""
+    ctx = _setup_site_and_device(client)
+    device_headers = {"X-Device-ID": ctx["device_id"], "X-API-Key": ctx["api_key"]}
+    cmd_id = _queue_command(client, ctx["device_id"], ctx["auth_headers"])
+
+    started = time.monotonic()
+    resp = client.get(
+        "/api/v1/devices/pending/wait",
+        params={"timeout": 10},
+        headers=device_headers,
+    )
+    assert resp.status_code == 200
+    assert time.monotonic() - started < 5
+    assert cmd_id in [c["command_id"] for c in resp.json()]
+
+
+def test_long_poll_times_out_with_empty_list(client: TestClient) -> None:
+    """An idle long-poll returns an empty list once its timeout elapses."""
+    ctx = _setup_site_and_device(client)
+    device_headers = {"X-Device-ID": ctx["device_id"], "X-API-Key": ctx["api_key"]}
+
+    resp = client.get(
+        "/api/v1/devices/pending/wait",
+        params={"timeout": 0.2},
+        headers=device_headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json() == []
+
+
+def test_long_poll_wakes_when_command_is_queued(client: TestClient) -> None:
+    """A parked long-poll is released as soon as a command is queued."""
+    ctx = _setup_site_and_device(client)
+    device_headers = {"X-Device-ID": ctx["device_id"], "X-API-Key": ctx["api_key"]}
+    result: Dict[str, Any] = {}
+
+    def _wait() -> None:
+        started = time.monotonic()
+        resp = client.get(
+            "/api/v1/devices/pending/wait",
+            params={"timeout": 20},
+            headers=device_headers,
+        )
+        result["elapsed"] = time.monotonic() - started
+        result["response"] = resp
+
+    waiter = threading.Thread(target=_wait)
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while get_notification_hub().waiter_count(COMMANDS_CHANNEL) == 0:
+        assert time.monotonic() < deadline, "long-poll never parked"
+        time.sleep(0.05)
+
+    cmd_id = _queue_command(client, ctx["device_id"], ctx["auth_headers"])
+    waiter.join(timeout=15)
+
+    assert not waiter.is_alive()
+    assert result["response"].status_code == 200
+    assert result["elapsed"] < 15
+    assert cmd_id in [c["command_id"] for c in result["response"].json()]
+
+
+def test_long_poll_rejects_unauthenticated_device(client: TestClient) -> None:
+    """The long-poll endpoint uses the same device authentication."""
+    headers = {"X-Device-ID": "non-existent-device", "X-API-Key": "invalid-key"}
+    response = client.get("/api/v1/devices/pending/wait", headers=headers)
+    assert response.status_code == 401
+
+
+def _add_site_devices(site_id: str, devices: Dict[str, Dict[str, Any]]) -> None:
+    """Add devices (device_id -> extra columns) to an existing site."""
+    db = homepot.database.SessionLocal()
+    try:
+        site = db.query(Site).filter(Site.site_id == site_id).first()
+        assert site is not None
+        for device_id, columns in devices.items():
+            db.add(
+                Device(
+                    device_id=device_id,
+                    name=device_id,
+                    site_id=site.id,
+                    api_key_hash=hash_password("unused"),
+                    lifecycle_state=LifecycleState.ACTIVE.value,
+                    **{"device_type": "pos_terminal", "is_active": True, **columns},
+                )
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _pending_command_types(device_id: str) -> list:
+    """Return the types of the device's pending commands."""
+    db = homepot.database.SessionLocal()
+    try:
+        return [
+            cmd.command_type
+            for cmd in db.query(DeviceCommand)
+            .join(Device, Device.id == DeviceCommand.device_id)
+            .filter(
+                Device.device_id == device_id,
+                DeviceCommand.status == CommandStatus.PENDING,
+            )
+        ]
+    finally:
+        db.close()
+
+
+def test_bulk_command_queues_for_matching_site_devices(client: TestClient) -> None:
+    """A bulk command reaches every active device of the requested type."""
+    ctx = _setup_site_and_device(client)
+    _add_site_devices(
+        ctx["site_id"],
+        {
+            "bulk-pos-1": {},
+            "bulk-pos-2": {},
+            "bulk-kiosk": {"device_type": "kiosk"},
+            "bulk-pos-retired": {"is_active": False},
+        },
+    )
+
+    resp = client.post(
+        f"/api/v1/devices/sites/{ctx['site_id']}/commands",
+        json={"command_type": "ping", "device_type": "pos_terminal"},
+        headers=ctx["auth_headers"],
+    )
+
+    assert resp.status_code == 201, resp.text
+    body = resp.json()
+    assert body["queued"] == 3
+    assert set(body["commands"]) == {ctx["device_id"], "bulk-pos-1", "bulk-pos-2"}
+    assert all(cmd["status"] == "pending" for cmd in body["commands"].values())
+    assert _pending_command_types("bulk-pos-1") == ["ping"]
+    assert _pending_command_types("bulk-kiosk") == []
+    assert _pending_command_types("bulk-pos-retired") == []
+
+
+def test_bulk_command_skips_devices_without_grant(client: TestClient) -> None:
+    """Devices lacking the required grant, or outside the site, are reported."""
+    ctx = _setup_site_and_device(client)
+    _add_site_devices(
+        ctx["site_id"],
+        {
+            "bulk-granted": {"device_permissions": {"command_execution": True}},
+            "bulk-denied": {"device_permissions": {"command_execution": False}},
+        },
+    )
+
+    resp = client.post(
+        f"/api/v1/devices/sites/{ctx['site_id']}/commands",
+        json={
+            "command_type": "run_command",
+            "payload": {"data": {"command": "whoami"}},
+            "device_ids": ["bulk-granted", "bulk-denied", "bulk-elsewhere"],
+        },
+        headers=ctx["auth_headers"],
+    )
+
+    assert resp.status_code == 201, resp.text
+    body = resp.json()
+    assert list(body["commands"]) == ["bulk-granted"]
+    assert body["skipped_device_ids"] == ["bulk-denied"]
+    assert body["not_found_device_ids"] == ["bulk-elsewhere"]
+    assert _pending_command_types("bulk-denied") == []
+
+
+def test_pending_claim_marks_commands_sent(client: TestClient) -> None:
+    """GET /pending?claim=true delivers each command once, already SENT."""
+    ctx = _setup_site_and_device(client)
+    dheaders = _device_headers(ctx)
+    first = _queue_command(client, ctx["device_id"], ctx["auth_headers"])
+    second = _queue_command(client, ctx["device_id"], ctx["auth_headers"])
+
+    resp = client.get(
+        "/api/v1/devices/pending", params={"claim": "true"}, headers=dheaders
+    )
+    assert resp.status_code == 200
+    claimed = resp.json()
+    assert [c["command_id"] for c in claimed] == [first, second]
+    assert all(c["status"] == "sent" for c in claimed)
+
+    resp = client.get(
+        "/api/v1/devices/pending", params={"claim": "true"}, headers=dheaders
+    )
+    assert resp.json() == []
+
+    row = next(c for c in _history_for(client, ctx) if c["command_id"] == first)
+    assert row["status"] == "sent"
+    assert row["sent_at"] is not None
@@ -1,7 +1,8 @@
 """Tests for Mobivisor API endpoints.
 
 This module contains unit tests for the Mobivisor device integration endpoints.
-Tests mock the httpx client to avoid actual API calls during testing.
+Tests mock the httpx client to avoid actual API calls during testing; the
+proxy's shared client is created from the patched ``httpx.AsyncClient``.
 """
 
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -11,6 +12,13 @@ import httpx
 import pytest
 
 from homepot.app.main import app
+from homepot.app.utils import mobivisor_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_mobivisor_client(monkeypatch):
+    """Give each test its own pooled client and an empty response cache."""
+    monkeypatch.setattr(mobivisor_client, "_mobivisor_client", None)
 
 
 @pytest.fixture
@@ -38,6 +46,7 @@ def mock_httpx_response():
         response.json.return_value = json_data or {}
         response.text = text
         response.content = b"" if not json_data else b"{}"
+        response.headers = httpx.Headers()
         return response
 
     return _create_response
@@ -73,7 +82,7 @@ class TestMobivisorDevicesEndpoints:
         # Mock the async context manager
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         # Make request
         response = client.get("/api/v1/mobivisor/devices")
@@ -119,7 +128,7 @@ class TestMobivisorDeviceLoginsDelete:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/123/logins")
         assert response.status_code == 200
@@ -174,7 +183,7 @@ class TestMobivisorDeviceLoginsDelete:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/123/logins")
         assert response.status_code == 401
@@ -201,7 +210,7 @@ class TestMobivisorDeviceLoginsDelete:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/does-not-exist/logins")
         assert response.status_code == 404
@@ -226,7 +235,7 @@ class TestMobivisorDeviceLoginsDelete:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/123/logins")
         assert response.status_code == 504
@@ -252,7 +261,7 @@ class TestMobivisorDeviceLoginsDelete:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("boom", request=req)
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/123/logins")
         assert response.status_code == 502
@@ -300,7 +309,7 @@ class TestMobivisorDeviceMdmProfileUrl:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/mdmProfileUrl")
         assert response.status_code == 200
@@ -355,7 +364,7 @@ class TestMobivisorDeviceMdmProfileUrl:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/mdmProfileUrl")
         assert response.status_code == 403
@@ -382,7 +391,7 @@ class TestMobivisorDeviceMdmProfileUrl:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/does-not-exist/mdmProfileUrl")
         assert response.status_code == 404
@@ -407,7 +416,7 @@ class TestMobivisorDeviceMdmProfileUrl:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/mdmProfileUrl")
         assert response.status_code == 504
@@ -465,7 +474,7 @@ class TestMobivisorDeviceMdmProfileUrl:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices")
 
@@ -521,7 +530,7 @@ class TestMobivisorMobileAppsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = self._valid_mobile_app_payload()
         response = client.put(
@@ -608,7 +617,7 @@ class TestMobivisorMobileAppsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/mobileapps/app-1", json=self._valid_mobile_app_payload()
@@ -637,7 +646,7 @@ class TestMobivisorMobileAppsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/mobileapps/does-not-exist",
@@ -665,7 +674,7 @@ class TestMobivisorMobileAppsUpdate:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/mobileapps/app-1", json=self._valid_mobile_app_payload()
@@ -729,7 +738,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/imei", json={"imei": "234test"}
@@ -750,7 +759,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/imei", json={"imei": "234test"}
@@ -770,7 +779,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/imei", json={"imei": "234test"}
@@ -792,7 +801,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/imei", json={"imei": "234test"}
@@ -819,7 +828,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/featureControls", json=payload
@@ -869,7 +878,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/featureControls",
@@ -890,7 +899,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/featureControls",
@@ -912,7 +921,7 @@ class TestMobivisorDeviceIMEI:
         mock_response.status_code = 404
         mock_response.json = MagicMock(return_value={"error": "Not Found"})
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/unknown/featureControls",
@@ -939,7 +948,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices")
 
@@ -971,7 +980,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123")
 
@@ -999,7 +1008,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/999")
 
@@ -1032,7 +1041,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/applications")
 
@@ -1091,7 +1100,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/description", json={"description": "Test"}
@@ -1112,7 +1121,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/description", json={"description": "Test"}
@@ -1132,7 +1141,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/description", json={"description": "Test"}
@@ -1154,7 +1163,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/description", json={"description": "Test"}
@@ -1182,7 +1191,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/999/applications")
 
@@ -1203,7 +1212,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/applications")
 
@@ -1229,7 +1238,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/123")
 
@@ -1259,7 +1268,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/device_not_found")
 
@@ -1287,7 +1296,7 @@ class TestMobivisorDeviceIMEI:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/devices/123")
 
@@ -1309,7 +1318,7 @@ class TestMobivisorDeviceIMEI:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network error")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices")
 
@@ -1342,7 +1351,7 @@ class TestMobivisorGroupsCreate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.post("/api/v1/mobivisor/groups", json=payload)
 
@@ -1395,7 +1404,7 @@ class TestMobivisorGroupsCreate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.post("/api/v1/mobivisor/groups", json={"name": "x"})
 
@@ -1417,7 +1426,7 @@ class TestMobivisorGroupsCreate:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.post("/api/v1/mobivisor/groups", json={"name": "x"})
 
@@ -1450,7 +1459,7 @@ class TestMobivisorGroupsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/g1", json=payload)
 
@@ -1479,7 +1488,7 @@ class TestMobivisorGroupsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/g1", json=payload)
 
@@ -1508,7 +1517,7 @@ class TestMobivisorGroupsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/nonexistent", json=payload)
 
@@ -1537,7 +1546,7 @@ class TestMobivisorGroupsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/g1", json=payload)
 
@@ -1558,7 +1567,7 @@ class TestMobivisorGroupsUpdate:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {"name": "Timeout"}
         response = client.put("/api/v1/mobivisor/groups/g1", json=payload)
@@ -1587,7 +1596,7 @@ class TestMobivisorGroupsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices")
 
@@ -1632,7 +1641,7 @@ class TestMobivisorGroupsUpdate:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             f"/api/v1/mobivisor/devices/{device_id}/actions",
@@ -1730,7 +1739,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users")
 
@@ -1758,7 +1767,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users")
 
@@ -1785,7 +1794,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users/u1")
 
@@ -1813,7 +1822,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users/unknown")
 
@@ -1839,7 +1848,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/users/u1")
 
@@ -1869,7 +1878,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/users/unknown")
 
@@ -1909,7 +1918,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.post("/api/v1/mobivisor/users", json=payload)
 
@@ -1946,7 +1955,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.post("/api/v1/mobivisor/users", json=payload)
 
@@ -1973,7 +1982,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {
             "user": {
@@ -2027,7 +2036,7 @@ class TestMobivisorUserEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {
             "user": {
@@ -2145,7 +2154,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/users/6930491019a2fefab2e0b300", json=payload
@@ -2174,7 +2183,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {
             "user": {
@@ -2228,7 +2237,7 @@ class TestMobivisorUserEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {
             "user": {
@@ -2257,7 +2266,7 @@ class TestMobivisorUserEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network error")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {
             "user": {
@@ -2293,7 +2302,7 @@ class TestMobivisorUserEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {
             "user": {
@@ -2334,9 +2343,7 @@ class TestMobivisorUserEndpoints:
 
                 mock_client_instance = AsyncMock()
                 mock_client_instance.request = AsyncMock(return_value=mock_response)
-                mock_async_client.return_value.__aenter__.return_value = (
-                    mock_client_instance
-                )
+                mock_async_client.return_value = mock_client_instance
 
                 response = client.put("/api/v1/mobivisor/users/6930", json=payload)
 
@@ -2391,7 +2398,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/installed-packages")
 
@@ -2419,7 +2426,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete(
             "/api/v1/mobivisor/devices/123/delete-installed-package/p1"
@@ -2448,7 +2455,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/get-managed-apps")
 
@@ -2475,7 +2482,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/commands",
@@ -2531,7 +2538,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/commands",
@@ -2556,7 +2563,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/commands", params={"order": "timeCreated"}
@@ -2579,7 +2586,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/commands", params={"order": "timeCreated"}
@@ -2607,7 +2614,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/fetchSystemApps/model/SM-G998/version/1.2.3"
@@ -2653,7 +2660,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/fetchSystemApps/model/SM-G998/version/1.2.3"
@@ -2674,7 +2681,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/fetchSystemApps/model/SM-G998/version/1.2.3"
@@ -2696,7 +2703,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
         mock_response.status_code = 404
         mock_response.json = MagicMock(return_value={"error": "Not Found"})
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/fetchSystemApps/model/unknown/version/0"
@@ -2721,7 +2728,7 @@ class TestMobivisorDeviceAdditionalEndpoints:
         mock_response.status_code = 401
         mock_response.json = MagicMock(return_value={"error": "Unauthorized"})
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get(
             "/api/v1/mobivisor/devices/fetchSystemApps/model/SM-G998/version/1.2.3"
@@ -2746,7 +2753,7 @@ class TestMobivisorUserEndpointsExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users")
 
@@ -2766,7 +2773,7 @@ class TestMobivisorUserEndpointsExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network error")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users")
 
@@ -2786,7 +2793,7 @@ class TestMobivisorUserEndpointsExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users/u1")
 
@@ -2813,7 +2820,7 @@ class TestMobivisorUserEndpointsExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/users/u1")
 
@@ -2840,7 +2847,7 @@ class TestMobivisorUserEndpointsExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/users/u1")
 
@@ -2860,7 +2867,7 @@ class TestMobivisorUserEndpointsExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/users/u1")
 
@@ -2906,7 +2913,7 @@ class TestMobivisorDevicePackagesExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/999/installed-packages")
 
@@ -2926,7 +2933,7 @@ class TestMobivisorDevicePackagesExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/installed-packages")
 
@@ -2953,7 +2960,7 @@ class TestMobivisorDevicePackagesExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/installed-packages")
 
@@ -2980,7 +2987,7 @@ class TestMobivisorDevicePackagesExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete(
             "/api/v1/mobivisor/devices/999/delete-installed-package/p1"
@@ -3009,7 +3016,7 @@ class TestMobivisorDevicePackagesExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete(
             "/api/v1/mobivisor/devices/123/delete-installed-package/p1"
@@ -3031,7 +3038,7 @@ class TestMobivisorDevicePackagesExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete(
             "/api/v1/mobivisor/devices/123/delete-installed-package/p1"
@@ -3060,7 +3067,7 @@ class TestMobivisorDevicePackagesExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/999/get-managed-apps")
 
@@ -3080,7 +3087,7 @@ class TestMobivisorDevicePackagesExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/get-managed-apps")
 
@@ -3107,7 +3114,7 @@ class TestMobivisorDevicePackagesExtended:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/get-managed-apps")
 
@@ -3127,7 +3134,7 @@ class TestMobivisorDevicePackagesExtended:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network error")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/get-managed-apps")
 
@@ -3174,7 +3181,7 @@ class TestMobivisorLogs:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/debuglogs")
         assert response.status_code == 200
@@ -3196,7 +3203,7 @@ class TestMobivisorLogs:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/debuglogs")
         assert response.status_code == 504
@@ -3217,7 +3224,7 @@ class TestMobivisorLogs:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/debuglogs")
         assert response.status_code == 502
@@ -3240,7 +3247,7 @@ class TestMobivisorLogs:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/debuglogs")
         assert response.status_code == 401
@@ -3275,7 +3282,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups")
 
@@ -3335,7 +3342,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups")
 
@@ -3360,7 +3367,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Request timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups")
 
@@ -3381,7 +3388,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network error")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups")
 
@@ -3407,7 +3414,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/groups/g1")
 
@@ -3466,7 +3473,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/groups/g1")
 
@@ -3494,7 +3501,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/groups/g1")
 
@@ -3522,7 +3529,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/groups/g1")
 
@@ -3547,7 +3554,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Request timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/groups/g1")
 
@@ -3568,7 +3575,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network error")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.delete("/api/v1/mobivisor/groups/g1")
 
@@ -3595,7 +3602,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups/g1")
 
@@ -3623,7 +3630,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups/nonexistent")
 
@@ -3650,7 +3657,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/g1/applications", json=payload)
 
@@ -3697,7 +3704,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/g1/applications", json=payload)
 
@@ -3719,7 +3726,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {"appIds": ["6895b52aefdcda141d3a8da5"], "appConfigs": []}
         response = client.put("/api/v1/mobivisor/groups/g1/applications", json=payload)
@@ -3741,7 +3748,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {"appIds": ["6895b52aefdcda141d3a8da5"], "appConfigs": []}
         response = client.put("/api/v1/mobivisor/groups/g1/applications", json=payload)
@@ -3774,7 +3781,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/g1/users", json=payload)
 
@@ -3821,7 +3828,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put("/api/v1/mobivisor/groups/g1/users", json=payload)
 
@@ -3843,7 +3850,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {"users": ["6807a5836415f4ed1ee081ea"]}
         response = client.put("/api/v1/mobivisor/groups/g1/users", json=payload)
@@ -3865,7 +3872,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         payload = {"users": ["6807a5836415f4ed1ee081ea"]}
         response = client.put("/api/v1/mobivisor/groups/g1/users", json=payload)
@@ -3894,7 +3901,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups/g1")
 
@@ -3922,7 +3929,7 @@ class TestMobivisorGroupsEndpoints:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups/g1")
 
@@ -3944,7 +3951,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Request timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups/g1")
 
@@ -3965,7 +3972,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network error")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/groups/g1")
 
@@ -3987,7 +3994,7 @@ class TestMobivisorGroupsEndpoints:
         mock_response.status_code = 200
         mock_response.json = MagicMock(return_value={"policies": [{"id": "p1"}]})
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/policies")
 
@@ -4027,7 +4034,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/policies")
         assert response.status_code == 504
@@ -4046,7 +4053,7 @@ class TestMobivisorGroupsEndpoints:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/policies")
         assert response.status_code == 502
@@ -4066,7 +4073,7 @@ class TestMobivisorGroupsEndpoints:
         mock_response.status_code = 404
         mock_response.json = MagicMock(return_value={"error": "Not Found"})
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/unknown/policies")
         assert response.status_code == 404
@@ -4089,7 +4096,7 @@ class TestMobivisorGroupsEndpoints:
         mock_response.status_code = 401
         mock_response.json = MagicMock(return_value={"error": "Unauthorized"})
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.get("/api/v1/mobivisor/devices/123/policies")
         assert response.status_code == 401
@@ -4162,7 +4169,7 @@ class TestMobivisorDeviceExtraVariables:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/extraVariables",
@@ -4184,7 +4191,7 @@ class TestMobivisorDeviceExtraVariables:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.TimeoutException("Timeout")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/extraVariables",
@@ -4205,7 +4212,7 @@ class TestMobivisorDeviceExtraVariables:
         mock_client_instance.request = AsyncMock(
             side_effect=httpx.RequestError("Network")
         )
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/extraVariables",
@@ -4228,7 +4235,7 @@ class TestMobivisorDeviceExtraVariables:
 
         mock_client_instance = AsyncMock()
         mock_client_instance.request = AsyncMock(return_value=mock_response)
-        mock_async_client.return_value.__aenter__.return_value = mock_client_instance
+        mock_async_client.return_value = mock_client_instance
 
         response = client.put(
             "/api/v1/mobivisor/devices/123/extraVariables",
@@ -0,0 +1,124 @@
+"""Tests for the pooled, caching Mobivisor client against a local fake Mobivisor."""
+
+import asyncio
+from collections import Counter
+
+from fastapi import FastAPI, Request, Response
+import httpx
+import pytest
+
+from homepot.app.utils import mobivisor_client
+from homepot.app.utils.mobivisor_client import MobivisorClient, classify
+from homepot.app.utils.mobivisor_request import _make_mobivisor_request
+from homepot.config import MobivisorClientSettings
+
+CONFIG = {
+    "mobivisor_api_url": "http://mobivisor.test/",
+    "mobivisor_api_token": "test-token",
+}
+
+
+def _fake_mobivisor():
+    """Build a fake Mobivisor app that counts the requests it serves."""
+    app = FastAPI()
+    app.state.hits = Counter()
+    devices = {"1": {"id": "1", "description": "till"}}
+
+    @app.get("/devices/{device_id}")
+    async def device(device_id: str):
+        app.state.hits[f"devices/{device_id}"] += 1
+        await asyncio.sleep(0.05)
+        return devices[device_id]
+
+    @app.put("/devices/{device_id}/description")
+    async def describe(device_id: str, request: Request):
+        app.state.hits["write"] += 1
+        devices[device_id]["description"] = (await request.json())["description"]
+        return devices[device_id]
+
+    @app.get("/devices/{device_id}/policies")
+    async def policies(device_id: str, request: Request):
+        app.state.hits["policies"] += 1
+        headers = {"ETag": '"v1"', "Cache-Control": "max-age=0"}
+        if request.headers.get("if-none-match") == '"v1"':
+            return Response(status_code=304, headers=headers)
+        return Response(content=b'[{"policy": "kiosk"}]', headers=headers)
+
+    return app
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    """Route the shared Mobivisor client to a fresh fake Mobivisor."""
+    app = _fake_mobivisor()
+    client = MobivisorClient(
+        settings=MobivisorClientSettings(), transport=httpx.ASGITransport(app=app)
+    )
+    monkeypatch.setattr(mobivisor_client, "_mobivisor_client", client)
+    return app, client
+
+
+def test_classify_endpoint_paths():
+    """Test that read-mostly GETs map to classes and live data is uncached."""
+    assert classify("devices") == "device_list"
+    assert classify("devices/42") == "device_details"
+    assert classify("devices/42/allInstalledPackages") == "device_apps"
+    assert classify("devices/fetchSystemApps/model/A1/version/13") == "system_apps"
+    assert classify("devicescommands") is None
+    assert classify("debuglogs") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_and_write_invalidation(fake):
+    """Test that repeat GETs are cached until a write to the device."""
+    app, client = fake
+
+    first = await _make_mobivisor_request("GET", "devices/1", config=CONFIG)
+    second = await _make_mobivisor_request("GET", "devices/1", config=CONFIG)
+    assert first.json() == second.json() == {"id": "1", "description": "till"}
+    assert app.state.hits["devices/1"] == 1
+
+    await _make_mobivisor_request(
+        "PUT", "devices/1/description", json={"description": "kiosk"}, config=CONFIG
+    )
+    third = await _make_mobivisor_request("GET", "devices/1", config=CONFIG)
+    assert third.json()["description"] == "kiosk"
+    assert app.state.hits["devices/1"] == 2
+
+    stats = client.stats()
+    assert stats["cache"]["device_details"]["hits"] == 1
+    assert stats["cache"]["device_details"]["misses"] == 2
+    assert stats["upstream"]["device_details"]["requests"] == 2
+    assert stats["upstream"]["write"]["requests"] == 1
+    assert stats["upstream"]["device_details"]["max_ms"] >= 50
+
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_are_coalesced(fake):
+    """Test that identical concurrent GETs share one upstream request."""
+    app, client = fake
+
+    responses = await asyncio.gather(
+        *(_make_mobivisor_request("GET", "devices/1", config=CONFIG) for _ in range(10))
+    )
+
+    assert {r.json()["id"] for r in responses} == {"1"}
+    assert app.state.hits["devices/1"] == 1
+    assert client.stats()["cache"]["device_details"]["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_revalidate_with_etag(fake):
+    """Test that an expired entry with an ETag is renewed by a 304."""
+    app, client = fake
+
+    for _ in range(3):
+        response = await _make_mobivisor_request(
+            "GET", "devices/1/policies", config=CONFIG
+        )
+        assert response.json() == [{"policy": "kiosk"}]
+
+    assert app.state.hits["policies"] == 3
+    counters = client.stats()["cache"]["device_policies"]
+    assert counters["misses"] == 1
+    assert counters["revalidated"] == 2
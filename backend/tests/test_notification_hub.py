@@ -0,0 +1,63 @@
+"""Tests for the in-process device notification hub used by long-poll endpoints."""
+
+import asyncio
+import threading
+
+from homepot.notification_hub import (
+    COMMANDS_CHANNEL,
+    PUSH_CHANNEL,
+    DeviceNotificationHub,
+)
+
+
+async def test_notify_wakes_subscribed_waiter():
+    """A notification for the subscribed device releases the waiter."""
+    hub = DeviceNotificationHub()
+    with hub.subscribe(COMMANDS_CHANNEL, 42) as woken:
+        asyncio.get_running_loop().call_later(0.05, hub.notify, COMMANDS_CHANNEL, 42)
+        assert await hub.wait(woken, timeout=2) is True
+
+
+async def test_wait_times_out_without_notification():
+    """Waiting without a notification returns False after the timeout."""
+    hub = DeviceNotificationHub()
+    with hub.subscribe(COMMANDS_CHANNEL, 42) as woken:
+        assert await hub.wait(woken, timeout=0.05) is False
+
+
+async def test_notify_is_scoped_to_channel_and_device():
+    """Other devices and channels do not wake the waiter."""
+    hub = DeviceNotificationHub()
+    with hub.subscribe(COMMANDS_CHANNEL, 42) as woken:
+        assert hub.notify(COMMANDS_CHANNEL, 7) == 0
+        assert hub.notify(PUSH_CHANNEL, 42) == 0
+        assert await hub.wait(woken, timeout=0.05) is False
+
+
+async def test_signal_before_wait_is_not_lost():
+    """A notification raised after subscribing but before waiting is kept."""
+    hub = DeviceNotificationHub()
+    with hub.subscribe(PUSH_CHANNEL, "dev-1") as woken:
+        assert hub.notify(PUSH_CHANNEL, "dev-1") == 1
+        assert await hub.wait(woken, timeout=1) is True
+
+
+async def test_subscription_is_removed_on_exit():
+    """Leaving the subscription context unregisters the waiter."""
+    hub = DeviceNotificationHub()
+    with hub.subscribe(COMMANDS_CHANNEL, 1):
+        with hub.subscribe(PUSH_CHANNEL, "dev-1"):
+            assert hub.waiter_count() == 2
+            assert hub.waiter_count(COMMANDS_CHANNEL) == 1
+    assert hub.waiter_count() == 0
+    assert hub.notify(COMMANDS_CHANNEL, 1) == 0
+
+
+async def test_notify_from_another_thread():
+    """Notifications raised from a worker thread reach the event loop."""
+    hub = DeviceNotificationHub()
+    with hub.subscribe(COMMANDS_CHANNEL, 42) as woken:
+        thread = threading.Thread(target=hub.notify, args=(COMMANDS_CHANNEL, 42))
+        thread.start()
+        assert await hub.wait(woken, timeout=2) is True
+        thread.join()
@@ -0,0 +1,170 @@
+"""Tests for the POS emulator fleet mode used for load testing.
+
+Covered:
+- per-device config derivation (unique, deterministic identities)
+- seeded per-device randomness (reproducible runs)
+- route labelling and latency/error aggregation
+- a short FleetRunner run against a mock backend on a shared client
+"""
+
+import asyncio
+import json
+from pathlib import Path
+import random
+import sys
+
+import httpx
+import pytest
+
+EMULATORS_DIR = Path(__file__).resolve().parents[2] / "emulators"
+sys.path.insert(0, str(EMULATORS_DIR))
+
+import pos_engine as emu  # noqa: E402
+
+
+def _base_config(**overrides):
+    values = {
+        "backend_url": "http://backend.test",
+        "site_id": "site-fleet",
+        "bootstrap_key": "key",
+        "device_name": "fleet-pos",
+    }
+    values.update(overrides)
+    return emu.EmulatorConfig(**values)
+
+
+def test_fleet_device_configs_are_unique_and_deterministic():
+    """Each virtual device gets a unique identity derived from its index."""
+    base = _base_config()
+    configs = [emu.fleet_device_config(base, i) for i in range(300)]
+
+    for attr in ("device_name", "mock_hostname", "mock_mac", "mock_ip"):
+        assert len({getattr(c, attr) for c in configs}) == 300
+    assert configs[0].device_name == "fleet-pos-00001"
+    assert emu.fleet_device_config(base, 7) == configs[7]
+    # The template itself is left untouched.
+    assert base.device_name == "fleet-pos"
+
+
+def test_seeded_metrics_are_reproducible():
+    """The same seed yields the same metric stream."""
+    first = emu.SimulatedMetrics(random.Random("0-3"))
+    second = emu.SimulatedMetrics(random.Random("0-3"))
+    other = emu.SimulatedMetrics(random.Random("0-4"))
+
+    a = [first.sample() for _ in range(5)]
+    assert a == [second.sample() for _ in range(5)]
+    assert a != [other.sample() for _ in range(5)]
+
+
+@pytest.mark.parametrize(
+    "method,path,expected",
+    [
+        (
+            "GET",
+            "/api/v1/devices/pending/wait",
+            "GET /devices/pending/wait",
+        ),
+        (
+            "POST",
+            "/api/v1/devices/commands/17/ack",
+            "POST /devices/commands/{id}/ack",
+        ),
+        (
+            "PATCH",
+            "/api/v1/devices/DEVICE-AB12-CD34-EF56/permissions",
+            "PATCH /devices/{id}/permissions",
+        ),
+        (
+            "POST",
+            "/api/v1/push/3f2b8c1e-9a4d-4c3e-8f6a-2b1c0d9e8f7a/ack",
+            "POST /push/{id}/ack",
+        ),
+    ],
+)
+def test_route_label_collapses_ids(method, path, expected):
+    """Request path IDs are collapsed so routes aggregate."""
+    assert emu.route_label(method, path) == expected
+
+
+def test_fleet_stats_percentiles_and_error_rate():
+    """Percentiles and error rate are computed per route and overall."""
+    stats = emu.FleetStats()
+    for ms in range(1, 101):
+        stats.record("POST /agent/heartbeat", float(ms), ok=ms <= 95)
+    stats.record("GET /devices/pending/wait", 25_000.0, ok=True)
+
+    snap = stats.snapshot()
+    heartbeat = snap["routes"]["POST /agent/heartbeat"]
+    assert heartbeat["p50_ms"] == 50.0
+    assert heartbeat["p95_ms"] == 95.0
+    assert heartbeat["p99_ms"] == 99.0
+    assert heartbeat["error_rate"] == 0.05
+    assert snap["requests"] == 101
+    # Long-poll hold time does not skew the overall latency figures.
+    assert snap["overall"]["requests"] == 100
+    assert snap["overall"]["max_ms"] == 100.0
+
+
+def test_fleet_stats_reservoir_is_bounded():
+    """Latency samples stay bounded while counters keep counting."""
+    stats = emu.FleetStats(reservoir_size=10)
+    for ms in range(1000):
+        stats.record("GET /x", float(ms), ok=True)
+
+    snap = stats.snapshot()["routes"]["GET /x"]
+    assert snap["requests"] == 1000
+    assert snap["max_ms"] == 999.0
+    assert len(stats._routes["GET /x"].samples) == 10
+
+
+async def test_fleet_runner_drives_devices_over_shared_client(tmp_path, monkeypatch):
+    """A short run provisions every device and writes a JSON report."""
+    monkeypatch.setattr(emu, "CREDENTIALS_DIR", tmp_path / "creds")
+    provisioned = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/devices/bootstrap-provision"):
+            name = json.loads(request.content)["device_name"]
+            provisioned.append(name)
+            return httpx.Response(
+                201,
+                json={
+                    "data": {
+                        "device_id": f"dev-{len(provisioned)}",
+                        "api_key": "secret",
+                        "site_id": "site-fleet",
+                    }
+                },
+            )
+        if path.endswith("/wait"):
+            return httpx.Response(404, json={"detail": "Not Found"})
+        if request.method == "GET":
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json={})
+
+    report = tmp_path / "fleet.json"
+    runner = emu.FleetRunner(
+        _base_config(heartbeat_interval=0.05, telemetry_interval=0.05),
+        size=5,
+        seed=1,
+        ramp_seconds=0.1,
+        report_interval=60,
+        report_json=report,
+        transport=httpx.MockTransport(handler),
+    )
+
+    task = asyncio.ensure_future(runner.start())
+    await asyncio.sleep(0.5)
+    runner.stop()
+    await asyncio.wait_for(task, timeout=10)
+
+    assert sorted(provisioned) == [f"fleet-pos-{i:05d}" for i in range(1, 6)]
+    assert runner.failed_devices == {}
+
+    data = json.loads(report.read_text())
+    assert data["devices"] == 5
+    assert data["routes"]["POST /devices/bootstrap-provision"]["requests"] == 5
+    assert data["routes"]["POST /agent/heartbeat"]["requests"] >= 5
+    assert data["routes"]["GET /devices/pending/wait"]["error_rate"] == 1.0
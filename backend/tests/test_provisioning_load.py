@@ -0,0 +1,233 @@
+"""Concurrent provisioning against SQLite and, when configured, PostgreSQL.
+
+A store opening bootstraps hundreds of terminals at once. These tests provision
+1000 devices concurrently, through enrolment intent claims and through
+bootstrap-key provisioning, and check that every request succeeds on its first
+attempt, that no name is used by two live devices of a site, and that racing
+claims of one intent have exactly one winner.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from passlib.context import CryptContext
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import homepot.app.auth_utils as auth_utils
+from homepot.app.schemas.bootstrap import BootstrapProvisionRequest
+from homepot.app.services.agent_service import AgentService
+from homepot.config import get_settings
+from homepot.database import DatabaseService
+from homepot.models import (
+    Base,
+    Device,
+    EnrolmentIntent,
+    EnrolmentIntentStatus,
+    LifecycleState,
+)
+from homepot.seed_factories import build_enrolment_intent, create_site, create_user
+
+DEVICES = 1000
+CLAIM_TOKEN = "load-test-claim-token"
+_PG_SCHEMA = "provisioning_load"
+
+
+def _postgres_url() -> str:
+    url = get_settings().database.url
+    return url if url.startswith(("postgresql://", "postgresql+")) else ""
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+async def fleet_db(request, tmp_path, monkeypatch):
+    """Yield a DatabaseService, a sync sessionmaker and ids of a seeded site."""
+    # Hashing at the production cost would dominate the run; the contention
+    # under test is in the database.
+    monkeypatch.setattr(
+        auth_utils, "pwd_context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    )
+
+    # All claims queue for the pool at once; waiting for a connection is not
+    # a retry, so the checkout timeout only has to outlast the queue.
+    pool = {"pool_timeout": 300}
+    if request.param == "sqlite":
+        path = tmp_path / "provisioning.db"
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 60}, **pool
+        )
+        sync_engine = create_engine(
+            f"sqlite:///{path}",
+            connect_args={"timeout": 60, "check_same_thread": False},
+        )
+    else:
+        url = _postgres_url()
+        if not url:
+            pytest.skip("PostgreSQL is not the configured database")
+        base = url.split("://", 1)[1]
+        engine = create_async_engine(
+            f"postgresql+asyncpg://{base}",
+            connect_args={"server_settings": {"search_path": _PG_SCHEMA}},
+            **pool,
+        )
+        sync_engine = create_engine(
+            f"postgresql://{base}",
+            connect_args={"options": f"-csearch_path={_PG_SCHEMA}"},
+        )
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {_PG_SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {_PG_SCHEMA}"))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        user = await create_user(session)
+        site = await create_site(session, name="Opening Store")
+        await session.commit()
+        ids = {"user": user.id, "site": site.id, "site_id": site.site_id}
+
+    service = DatabaseService.__new__(DatabaseService)
+    service.engine = engine
+    service.session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    yield service, sessionmaker(bind=sync_engine), ids
+
+    if request.param == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {_PG_SCHEMA} CASCADE"))
+    sync_engine.dispose()
+    await engine.dispose()
+
+
+async def _approved_intents(
+    service: DatabaseService, ids: Dict[str, Any], count: int
+) -> list:
+    """Create ``count`` approved intents sharing one claim token."""
+    token_hash = auth_utils.hash_password(CLAIM_TOKEN)
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    intents = [
+        build_enrolment_intent(
+            site_id=ids["site"],
+            creator_id=ids["user"],
+            claim_token_hash=token_hash,
+            expires_at=expires_at,
+            status=EnrolmentIntentStatus.APPROVED.value,
+        )
+        for _ in range(count)
+    ]
+    async with service.get_session() as session:
+        session.add_all(intents)
+    return [intent.intent_id for intent in intents]
+
+
+async def _live_names(service: DatabaseService, site_pk: int) -> list:
+    """Return the lower-cased names of the site's live devices."""
+    async with service.get_session() as session:
+        result = await session.execute(
+            select(func.lower(Device.name)).where(
+                Device.site_id == site_pk,
+                Device.lifecycle_state.in_(
+                    [LifecycleState.PENDING.value, LifecycleState.ACTIVE.value]
+                ),
+            )
+        )
+        return list(result.scalars())
+
+
+async def test_concurrent_claims_provision_every_device(fleet_db):
+    """Test that 1000 concurrent claims all succeed with distinct devices."""
+    service, _, ids = fleet_db
+    intent_ids = await _approved_intents(service, ids, DEVICES)
+
+    results = await asyncio.gather(
+        *(
+            service.claim_enrolment_intent_atomic(
+                intent_id=intent_id,
+                claim_token=CLAIM_TOKEN,
+                device_name=f"Till {n:04d}",
+                device_type="pos_terminal",
+                os_details="Linux",
+            )
+            for n, intent_id in enumerate(intent_ids)
+        ),
+        return_exceptions=True,
+    )
+
+    failures = [r for r in results if isinstance(r, BaseException)]
+    assert failures == []
+    assert len({r["device_id"] for r in results}) == DEVICES
+    names = await _live_names(service, ids["site"])
+    assert len(names) == len(set(names)) == DEVICES
+    async with service.get_session() as session:
+        consumed = await session.scalar(
+            select(func.count()).where(
+                EnrolmentIntent.status == EnrolmentIntentStatus.CONSUMED.value
+            )
+        )
+    assert consumed == DEVICES
+
+
+async def test_racing_claims_of_one_intent_have_one_winner(fleet_db):
+    """Test that concurrent claims of the same intent create one device."""
+    service, _, ids = fleet_db
+    (intent_id,) = await _approved_intents(service, ids, 1)
+
+    results = await asyncio.gather(
+        *(
+            service.claim_enrolment_intent_atomic(
+                intent_id=intent_id,
+                claim_token=CLAIM_TOKEN,
+                device_name=f"Racer {n}",
+                device_type="pos_terminal",
+                os_details="Linux",
+            )
+            for n in range(50)
+        ),
+        return_exceptions=True,
+    )
+
+    winners = [r for r in results if isinstance(r, dict)]
+    assert len(winners) == 1
+    assert all(isinstance(r, ValueError) for r in results if r not in winners)
+    assert len(await _live_names(service, ids["site"])) == 1
+
+
+async def test_concurrent_bootstrap_provisioning_keeps_names_unique(fleet_db):
+    """Test that bootstrap provisioning of 1000 devices yields unique names.
+
+    Every name is requested twice at once: exactly one request per name wins,
+    and the other is rejected by the index rather than by a prior probe.
+    """
+    service, session_factory, ids = fleet_db
+    names = [f"Kiosk {n:04d}" for n in range(DEVICES // 2)] * 2
+
+    def provision(name: str) -> Any:
+        with session_factory() as db:
+            try:
+                return AgentService(db).bootstrap_provision_device(
+                    BootstrapProvisionRequest(
+                        site_id=ids["site_id"],
+                        bootstrap_key="unused",
+                        device_name=name,
+                        device_type="pos_terminal",
+                        os_details="Linux",
+                    )
+                )
+            except ValueError as e:
+                return e
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(pool.map(provision, names))
+        )
+
+    provisioned = [r for r in results if isinstance(r, dict)]
+    rejected = [r for r in results if isinstance(r, ValueError)]
+    assert len(provisioned) == DEVICES // 2
+    assert len(rejected) == DEVICES // 2
+    assert all("already in use" in str(e) for e in rejected)
+    live = await _live_names(service, ids["site"])
+    assert sorted(live) == sorted({name.lower() for name in names})
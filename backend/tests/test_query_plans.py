@@ -0,0 +1,254 @@
+"""Query-plan regression suite for the hot device/command/job/health queries.
+
+Seeds a synthetic fleet with ``homepot.seed_factories``, runs the real
+``DatabaseService`` methods and records the plan of every statement they
+issue. Each query must use its composite index and stay within a latency
+budget, so dropping or reshaping an index fails here instead of in
+production.
+
+Runs on SQLite always, and on PostgreSQL when the configured database URL is
+PostgreSQL (in a throwaway ``query_plans`` schema).
+"""
+
+from datetime import datetime, timedelta, timezone
+import json
+import time
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import desc, event, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from homepot.config import get_settings
+from homepot.database import DatabaseService
+from homepot.models import (
+    Base,
+    CommandStatus,
+    DeviceType,
+    HealthCheck,
+    JobPriority,
+    JobStatus,
+)
+from homepot.seed_factories import (
+    build_device,
+    build_device_command,
+    build_health_check,
+    build_job,
+    build_site,
+    create_user,
+)
+
+SITES = 10
+DEVICES_PER_SITE = 200
+COMMANDS_PER_DEVICE = 3
+HEALTH_CHECKS_PER_DEVICE = 4
+JOBS_PER_SITE = 200
+
+# Generous wall-clock budgets: the plan assertions catch regressions, the
+# budgets catch pathological plans that still name the index.
+LATENCY_BUDGET_MS = {"sqlite": 250.0, "postgresql": 500.0}
+
+_PG_SCHEMA = "query_plans"
+
+
+def _postgres_url() -> str:
+    url = get_settings().database.url
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://")
+    return url if url.startswith("postgresql+asyncpg://") else ""
+
+
+class PlanRecorder:
+    """Capture the plan of every SELECT/UPDATE run on an engine."""
+
+    def __init__(self, engine: Any, dialect: str) -> None:
+        """Listen on ``engine`` for statements to explain."""
+        self.dialect = dialect
+        self.plans: List[Any] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._explain)
+
+    def _explain(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(
+            ("SELECT", "UPDATE")
+        ):
+            return
+        explain = conn.connection.cursor()
+        if self.dialect == "sqlite":
+            explain.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            self.plans.append(" | ".join(row[3] for row in explain.fetchall()))
+        else:
+            # Index usability, not cost: tiny CI tables would otherwise
+            # legitimately prefer sequential scans.
+            explain.execute("SET LOCAL enable_seqscan = off")
+            explain.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = explain.fetchall()[0][0]
+            self.plans.append(json.loads(plan) if isinstance(plan, str) else plan)
+        explain.close()
+
+    def indexes(self) -> List[str]:
+        """Return the index names used by the recorded statements."""
+        names: List[str] = []
+        for plan in self.plans:
+            if self.dialect == "sqlite":
+                names += [
+                    part.split(" INDEX ")[1].split(" ")[0]
+                    for part in plan.split(" | ")
+                    if " INDEX " in part
+                ]
+            else:
+                stack = [plan[0]["Plan"]]
+                while stack:
+                    node = stack.pop()
+                    if "Index Name" in node:
+                        names.append(node["Index Name"])
+                    stack.extend(node.get("Plans", []))
+        return names
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+async def fleet(request, tmp_path):
+    """Yield a DatabaseService on a seeded fleet, its recorder and sample ids."""
+    dialect = request.param
+    if dialect == "sqlite":
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/plans.db")
+    else:
+        url = _postgres_url()
+        if not url:
+            pytest.skip("PostgreSQL is not the configured database")
+        engine = create_async_engine(
+            url, connect_args={"server_settings": {"search_path": _PG_SCHEMA}}
+        )
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {_PG_SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {_PG_SCHEMA}"))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    now = datetime.now(timezone.utc)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        user = await create_user(session)
+        sites = [build_site(name=f"Site {i}") for i in range(SITES)]
+        session.add_all(sites)
+        await session.flush()
+
+        devices = [
+            build_device(
+                site_id=site.id,
+                name=f"dev-{site.id}-{n}",
+                device_type=(
+                    DeviceType.POS_TERMINAL if n % 2 else DeviceType.IOT_SENSOR
+                ),
+                is_active=n % 10 != 0,
+            )
+            for site in sites
+            for n in range(DEVICES_PER_SITE)
+        ]
+        session.add_all(devices)
+        await session.flush()
+
+        statuses = list(CommandStatus)
+        session.add_all(
+            build_device_command(
+                device_id=device.id,
+                status=statuses[(device.id + n) % len(statuses)],
+                created_at=now - timedelta(minutes=device.id % 600 + n),
+            )
+            for device in devices
+            for n in range(COMMANDS_PER_DEVICE)
+        )
+        session.add_all(
+            build_health_check(
+                # SQLite cannot autoincrement the composite (id, timestamp) key
+                id=device.id * HEALTH_CHECKS_PER_DEVICE + n,
+                device_id=device.id,
+                timestamp=now - timedelta(minutes=5 * n),
+                is_healthy=n != 2,
+            )
+            for device in devices
+            for n in range(HEALTH_CHECKS_PER_DEVICE)
+        )
+        priorities = list(JobPriority)
+        job_statuses = list(JobStatus)
+        session.add_all(
+            build_job(
+                site_id=site.id,
+                created_by=user.id,
+                status=job_statuses[n % len(job_statuses)],
+                priority=priorities[n % len(priorities)],
+                created_at=now - timedelta(minutes=n),
+            )
+            for site in sites
+            for n in range(JOBS_PER_SITE)
+        )
+        await session.commit()
+        sample = {"site_id": sites[3].site_id, "device_pk": devices[417].id}
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+    service = DatabaseService.__new__(DatabaseService)
+    service.engine = engine
+    service.session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    recorder = PlanRecorder(engine, dialect)
+    yield service, recorder, sample
+
+    if dialect == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {_PG_SCHEMA} CASCADE"))
+    await engine.dispose()
+
+
+async def _latest_health_check(service: DatabaseService, device_pk: int) -> Any:
+    """Latest health check of a device, as the agents endpoints query it."""
+    async with service.get_session() as session:
+        result = await session.execute(
+            select(HealthCheck)
+            .where(HealthCheck.device_id == device_pk)
+            .order_by(desc(HealthCheck.timestamp))
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+
+HOT_QUERIES: Dict[str, Any] = {
+    "devices_by_site_segment": (
+        lambda s, ids: s.get_devices_by_site_and_segment_paginated(
+            ids["site_id"], "pos-terminals", limit=50
+        ),
+        "idx_devices_site_active_type",
+    ),
+    "pending_commands": (
+        lambda s, ids: s.get_pending_commands_for_device(ids["device_pk"]),
+        "idx_device_commands_device_status_created",
+    ),
+    "pending_jobs": (
+        lambda s, ids: s.get_pending_jobs(limit=10),
+        "idx_jobs_status_priority_created",
+    ),
+    "latest_health_check": (
+        lambda s, ids: _latest_health_check(s, ids["device_pk"]),
+        "idx_health_checks_device_timestamp",
+    ),
+    # Last: it expires commands the other queries read.
+    "expire_stale_commands": (
+        lambda s, ids: s.expire_stale_commands(ttl_seconds=3600),
+        "idx_device_commands_status_created",
+    ),
+}
+
+
+async def test_hot_queries_use_their_indexes_within_budget(fleet):
+    """Test that each hot query is planned on its index and is fast enough."""
+    service, recorder, sample = fleet
+    budget = LATENCY_BUDGET_MS[recorder.dialect]
+
+    for name, (run, index) in HOT_QUERIES.items():
+        recorder.plans.clear()
+        started = time.perf_counter()
+        await run(service, sample)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        assert recorder.plans, f"{name} issued no statement"
+        assert index in recorder.indexes(), f"{name} plan: {recorder.plans}"
+        assert elapsed_ms < budget, f"{name} took {elapsed_ms:.1f} ms"
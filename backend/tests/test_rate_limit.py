@@ -0,0 +1,91 @@
+"""Tests for device-keyed token-bucket rate limits and agent backoff."""
+
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from homepot.agent.real_device_agent import post_json
+from homepot.agent.utils.rate_limit_backoff import (
+    parse_retry_after,
+    rate_limit_backoff,
+)
+from homepot.app.utils.limiter import MemoryBucketStore, SqlBucketStore, parse_budget
+from homepot.models import Base, RateLimitBucket
+
+
+def test_parse_budget():
+    """Test that budgets parse into capacity and refill rate per second."""
+    assert parse_budget("120/minute") == (120.0, 2.0)
+    assert parse_budget("10/second") == (10.0, 10.0)
+    with pytest.raises(ValueError):
+        parse_budget("ten/minute")
+    with pytest.raises(ValueError):
+        parse_budget("10/fortnight")
+
+
+def test_memory_bucket_bursts_then_refills():
+    """Test that a bucket allows its burst, then one request per refill."""
+    store = MemoryBucketStore()
+    assert [store.acquire("k", 3, 1.0, now=0.0) for _ in range(3)] == [0, 0, 0]
+    assert store.acquire("k", 3, 1.0, now=0.0) == pytest.approx(1.0)
+    assert store.acquire("k", 3, 1.0, now=0.5) == pytest.approx(0.5)
+    assert store.acquire("k", 3, 1.0, now=1.0) == 0
+    # Other keys have their own bucket.
+    assert store.acquire("other", 3, 1.0, now=1.0) == 0
+
+
+def test_memory_bucket_store_is_bounded():
+    """Test that the least recently used buckets are evicted."""
+    store = MemoryBucketStore(max_entries=2)
+    for key in ("a", "b", "c"):
+        store.acquire(key, 1, 1.0, now=0.0)
+    assert len(store) == 2
+    # "a" was evicted and starts with a full bucket again.
+    assert store.acquire("a", 1, 1.0, now=0.0) == 0
+    assert store.acquire("c", 1, 1.0, now=0.0) > 0
+
+
+def test_sql_bucket_store_is_shared_between_workers():
+    """Test that two stores on one table spend the same bucket."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[RateLimitBucket.__table__])
+    session_factory = sessionmaker(bind=engine)
+    worker_a = SqlBucketStore(session_factory)
+    worker_b = SqlBucketStore(session_factory)
+
+    assert worker_a.acquire("k", 2, 0.5, now=100.0) == 0
+    assert worker_b.acquire("k", 2, 0.5, now=100.0) == 0
+    assert worker_a.acquire("k", 2, 0.5, now=100.0) == pytest.approx(2.0)
+    assert worker_b.acquire("k", 2, 0.5, now=102.0) == 0
+    engine.dispose()
+
+
+def test_parse_retry_after():
+    """Test both Retry-After forms and invalid values."""
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_agent_defers_requests_after_429():
+    """Test that the agent stops posting until Retry-After has passed."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(429, headers={"Retry-After": "30"})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await post_json(client, "http://backend/api/v1/agent/x", {}, {})
+            second = await post_json(client, "http://backend/api/v1/agent/x", {}, {})
+            return first, second
+
+    assert asyncio.run(run()) == (False, False)
+    assert len(calls) == 1
+    assert 29 < rate_limit_backoff.remaining() <= 30
@@ -0,0 +1,227 @@
+"""Tests for retention and hourly rollup of the log tables."""
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from click.testing import CliRunner
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from homepot.app.models.AnalyticsModel import (
+    APIRequestHourly,
+    APIRequestLog,
+    DeviceStateHistory,
+    DeviceStateHourly,
+    ErrorLog,
+    ErrorLogHourly,
+    JobOutcome,
+    JobOutcomeHourly,
+)
+from homepot.cli_timescaledb import timescaledb
+from homepot.models import AuditEventHourlyCount, AuditLog, Base
+from homepot.retention import RetentionManager
+
+NOW = datetime(2026, 10, 18, 12, 30)
+OLD = datetime(2026, 9, 1, 10, 0)  # well past a 30 day window
+
+
+@pytest.fixture
+async def db():
+    """Yield a DatabaseService stand-in backed by a private in-memory database."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def get_session():
+        async with maker() as session:
+            yield session
+            await session.commit()
+
+    yield MagicMock(get_session=get_session, close=AsyncMock())
+    await engine.dispose()
+
+
+async def add(db, *rows):
+    """Insert ``rows``."""
+    async with db.get_session() as session:
+        session.add_all(rows)
+
+
+async def scalar(db, stmt):
+    """Return the scalar result of ``stmt``."""
+    async with db.get_session() as session:
+        return (await session.execute(stmt)).scalar()
+
+
+def request(minutes, status=200, ms=10.0, endpoint="/api/v1/sites"):
+    """Build an API request log ``minutes`` after OLD."""
+    return APIRequestLog(
+        timestamp=OLD + timedelta(minutes=minutes),
+        endpoint=endpoint,
+        method="GET",
+        status_code=status,
+        response_time_ms=ms,
+    )
+
+
+def transition(minutes, state="offline", device_id=1):
+    """Build a device state change ``minutes`` after OLD."""
+    return DeviceStateHistory(
+        timestamp=OLD + timedelta(minutes=minutes),
+        device_id=device_id,
+        new_state=state,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_minutes", [60, 7])
+async def test_state_changes_roll_up_before_they_expire(db, chunk_minutes):
+    """Test expired state changes land in hourly rollups, however chunked."""
+    await add(
+        db,
+        transition(0),
+        transition(20),
+        transition(59, state="online"),
+        transition(61),
+        DeviceStateHistory(timestamp=NOW, device_id=1, new_state="offline"),
+    )
+
+    manager = RetentionManager(
+        db, days={"device_state_history": 30}, chunk_minutes=chunk_minutes
+    )
+    assert await manager.run(now=NOW) == {"device_state_history": 4}
+
+    assert await scalar(db, select(func.count()).select_from(DeviceStateHistory)) == 1
+    async with db.get_session() as session:
+        rows = (
+            await session.execute(
+                select(
+                    DeviceStateHourly.hour_start,
+                    DeviceStateHourly.new_state,
+                    DeviceStateHourly.count,
+                ).order_by(DeviceStateHourly.hour_start, DeviceStateHourly.new_state)
+            )
+        ).all()
+    assert rows == [
+        (OLD, "offline", 2),
+        (OLD, "online", 1),
+        (OLD + timedelta(hours=1), "offline", 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_late_rows_merge_into_existing_rollup(db):
+    """Test a second pass adds to, rather than replaces, an hour's rollup."""
+    manager = RetentionManager(db, days={"device_state_history": 30})
+    await add(db, transition(0))
+    await manager.run(now=NOW)
+    await add(db, transition(30))
+    await manager.run(now=NOW)
+
+    assert await scalar(db, select(DeviceStateHourly.count)) == 2
+
+
+@pytest.mark.asyncio
+async def test_expiring_requests_keeps_their_live_rollups(db):
+    """Test request rows expire without being counted a second time."""
+    await add(db, request(0), request(1, status=500), request(90))
+
+    expired = await RetentionManager(db, days={"api_request_logs": 30}).run(now=NOW)
+
+    assert expired == {"api_request_logs": 3}
+    assert await scalar(db, select(func.sum(APIRequestHourly.request_count))) == 3
+    assert await scalar(db, select(func.sum(APIRequestHourly.error_count))) == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_jobs_and_audit_expire_per_their_windows(db):
+    """Test per-table windows, rollups and that audit rows only expire."""
+    await add(
+        db,
+        ErrorLog(timestamp=OLD, category="api", severity="error", error_message="x"),
+        ErrorLog(timestamp=OLD, category="api", severity="error", error_message="y"),
+        JobOutcome(
+            timestamp=OLD,
+            job_id="j1",
+            job_type="restart",
+            status="success",
+            duration_ms=100,
+        ),
+        JobOutcome(timestamp=OLD, job_id="j2", job_type="restart", status="success"),
+        AuditLog(event_type="api_access", description="old", created_at=OLD),
+    )
+    hourly_audit_counts = await scalar(
+        db, select(func.sum(AuditEventHourlyCount.count))
+    )
+
+    manager = RetentionManager(
+        db, days={"error_logs": 30, "job_outcomes": 60, "audit_logs": 30}
+    )
+    assert await manager.run(now=NOW) == {
+        "error_logs": 2,
+        "job_outcomes": 0,
+        "audit_logs": 1,
+    }
+    assert await scalar(db, select(ErrorLogHourly.count)) == 2
+    assert await scalar(db, select(func.count()).select_from(JobOutcome)) == 2
+    assert await scalar(db, select(func.count()).select_from(AuditLog)) == 0
+    assert (
+        await scalar(db, select(func.sum(AuditEventHourlyCount.count)))
+        == hourly_audit_counts
+    )
+
+    await RetentionManager(db, days={"job_outcomes": 30}).run(now=NOW)
+    async with db.get_session() as session:
+        jobs = (await session.execute(select(JobOutcomeHourly))).scalar_one()
+    assert (jobs.count, jobs.timed_count, jobs.total_duration_ms) == (2, 1, 100.0)
+
+    with pytest.raises(ValueError):
+        await manager.run(["health_checks"])
+
+
+@pytest.mark.asyncio
+async def test_audit_events_are_kept_by_default(db):
+    """Test that audit rows only expire once a window is configured for them."""
+    years_old = NOW - timedelta(days=3 * 365)
+    await add(
+        db, AuditLog(event_type="api_access", description="old", created_at=years_old)
+    )
+
+    report = await RetentionManager(db).run(now=NOW)
+
+    assert "audit_logs" not in report
+    assert await scalar(db, select(func.count()).select_from(AuditLog)) == 1
+
+
+@pytest.mark.asyncio
+async def test_status_reports_rows_due(db):
+    """Test the status report of a table with expired rows."""
+    await add(db, request(0), request(60 * 24 * 40))
+    report = await RetentionManager(db, days={"api_request_logs": 30}).status(now=NOW)
+    entry = next(e for e in report if e["table"] == "api_request_logs")
+
+    assert (entry["rows"], entry["rows_due"]) == (2, 1)
+    assert entry["oldest"] == OLD
+    states = next(e for e in report if e["table"] == "device_state_history")
+    assert states["rollup"] == "device_state_hourly"
+    assert entry["hypertable"] is False
+    audit = next(e for e in report if e["table"] == "audit_logs")
+    assert audit["retention_days"] is None and audit["rows_due"] == 0
+
+
+def test_cli_retention_run(db):
+    """Test ``cli_timescaledb retention run`` for a single table."""
+    with patch(
+        "homepot.cli_timescaledb.get_database_service", AsyncMock(return_value=db)
+    ):
+        result = CliRunner().invoke(
+            timescaledb, ["retention", "run", "--table", "error_logs"]
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "error_logs: 0 row(s) expired" in result.output
@@ -18,12 +18,20 @@ from sqlalchemy.orm import sessionmaker
 
 from homepot.app.auth_utils import create_access_token, hash_password
 from homepot.app.main import app
+from homepot.app.models.AnalyticsModel import (
+    APIRequestHourly,
+    APIRequestLog,
+    JobOutcome,
+    JobOutcomeHourly,
+)
 from homepot.config import reload_settings
 import homepot.database
 from homepot.models import (
     AuditLog,
     Base,
     Device,
+    DeviceAssignment,
+    DeviceCredential,
     DeviceStatus,
     LifecycleEpoch,
     Site,
@@ -412,6 +420,76 @@ def test_site_purge_with_confirm_deletes_everything(file_db: Any) -> None:
         sync_db.close()
 
 
+def _log_site_and_device_activity(site_id: str, device_id: str) -> datetime:
+    """Log a request to the site, one elsewhere and a job on the device."""
+    at = datetime(2026, 1, 1, 9, 15)
+    sync_db = homepot.database.SessionLocal()
+    try:
+        for endpoint in (f"/api/v1/sites/{site_id}/devices", "/api/v1/health"):
+            sync_db.add(
+                APIRequestLog(
+                    timestamp=at,
+                    endpoint=endpoint,
+                    method="GET",
+                    status_code=200,
+                    response_time_ms=5.0,
+                )
+            )
+        sync_db.add(
+            JobOutcome(
+                timestamp=at,
+                job_id="job-purge",
+                job_type="purge_check",
+                device_id=device_id,
+                status="success",
+            )
+        )
+        sync_db.commit()
+    finally:
+        sync_db.close()
+    return at.replace(minute=0)
+
+
+def _rollup_keys(hour: datetime) -> tuple[list, list]:
+    """Return the request endpoints and job types rolled up in ``hour``."""
+    sync_db = homepot.database.SessionLocal()
+    try:
+        endpoints = sorted(
+            row.endpoint
+            for row in sync_db.query(APIRequestHourly).filter(
+                APIRequestHourly.hour_start == hour
+            )
+        )
+        job_types = [
+            row.job_type
+            for row in sync_db.query(JobOutcomeHourly).filter(
+                JobOutcomeHourly.hour_start == hour
+            )
+        ]
+        return endpoints, job_types
+    finally:
+        sync_db.close()
+
+
+def test_site_purge_takes_purged_logs_out_of_the_rollups(file_db: Any) -> None:
+    """Purged request logs and job outcomes no longer count in the rollups."""
+    site_id, device_id, _ = _seed_site_device_admin()
+    hour = _log_site_and_device_activity(site_id, device_id)
+    assert _rollup_keys(hour) == (
+        ["/api/v1/health", f"/api/v1/sites/{site_id}/devices"],
+        ["purge_check"],
+    )
+
+    response = TestClient(app).delete(
+        f"/api/v1/sites/{site_id}",
+        params={"mode": "purge", "confirm": "true"},
+        headers=_headers(),
+    )
+
+    assert response.status_code == 200
+    assert _rollup_keys(hour) == (["/api/v1/health"], [])
+
+
 # --------------------------------------------------------------------------
 # Device
 # --------------------------------------------------------------------------
@@ -469,6 +547,21 @@ def test_device_purge_with_confirm_deletes(file_db: Any) -> None:
         sync_db.close()
 
 
+def test_device_purge_takes_job_outcomes_out_of_the_rollups(file_db: Any) -> None:
+    """Purging a device drops its job outcomes from the job rollups."""
+    site_id, device_id, _ = _seed_site_device_admin()
+    hour = _log_site_and_device_activity(site_id, device_id)
+
+    response = TestClient(app).delete(
+        f"/api/v1/devices/device/{device_id}",
+        params={"mode": "purge", "confirm": "true"},
+        headers=_headers(),
+    )
+
+    assert response.status_code == 200
+    assert _rollup_keys(hour)[1] == []
+
+
 def test_device_purge_creates_audit_tombstone(file_db: Any) -> None:
     """Purging a device leaves a 'device_deleted' audit tombstone."""
     _, device_id, site_pk = _seed_site_device_admin()
@@ -697,3 +790,169 @@ def test_ai_site_insights_scoped_to_user_access(file_db: Any) -> None:
     # The admin still has access.
     allowed = client.get(f"/api/v1/ai/insights/site/{site_id}", headers=_headers())
     assert allowed.status_code in (200, 500)
+
+
+# --------------------------------------------------------------------------
+# Live device name conflicts
+# --------------------------------------------------------------------------
+
+
+def _seed_name_holder(site_id: str = "test-name-holder") -> str:
+    """Create a site whose live device is named like the seeded 'Test POS'."""
+    sync_db = homepot.database.SessionLocal()
+    try:
+        site = Site(site_id=site_id, name="Name Holder Co", is_active=True)
+        sync_db.add(site)
+        sync_db.commit()
+        sync_db.add(
+            Device(
+                device_id="dev-holder-001",
+                name="test pos",
+                device_type="pos_terminal",
+                site_id=site.id,
+                is_active=True,
+                status=DeviceStatus.ONLINE,
+            )
+        )
+        sync_db.commit()
+        return site_id
+    finally:
+        sync_db.close()
+
+
+def _lifecycle_rows(device_id: str) -> tuple[Any, int, int, int]:
+    """Return (site pk, lifecycle state) and assignment/epoch/credential counts."""
+    sync_db = homepot.database.SessionLocal()
+    try:
+        device = sync_db.query(Device).filter(Device.device_id == device_id).one()
+        counts = [
+            sync_db.query(model).filter(model.device_id == device.id).count()
+            for model in (DeviceAssignment, LifecycleEpoch, DeviceCredential)
+        ]
+        return ((device.site_id, device.lifecycle_state), *counts)
+    finally:
+        sync_db.close()
+
+
+def test_device_transfer_to_site_with_same_live_name_conflicts(file_db: Any) -> None:
+    """A transfer onto a live name answers 409 and changes nothing."""
+    _, device_id, _ = _seed_site_device_admin()
+    target_site_id = _seed_name_holder()
+    sync_db = homepot.database.SessionLocal()
+    try:
+        sync_db.query(Device).filter(Device.device_id == device_id).update(
+            {"lifecycle_state": "active"}
+        )
+        sync_db.commit()
+    finally:
+        sync_db.close()
+    before = _lifecycle_rows(device_id)
+
+    response = TestClient(app).post(
+        f"/api/v1/devices/device/{device_id}/transfer",
+        headers=_headers(),
+        json={"target_site_id": target_site_id},
+    )
+
+    assert response.status_code == 409
+    assert "already in use" in response.json()["detail"]
+    assert _lifecycle_rows(device_id) == before
+
+
+def test_device_reenrol_into_site_with_same_live_name_conflicts(file_db: Any) -> None:
+    """Re-enrolling onto a live name answers 409 and leaves the device unpaired."""
+    _, device_id, _ = _seed_site_device_admin()
+    target_site_id = _seed_name_holder()
+    client = TestClient(app)
+    archived = client.delete(f"/api/v1/devices/device/{device_id}", headers=_headers())
+    assert archived.status_code == 200
+    before = _lifecycle_rows(device_id)
+
+    response = client.post(
+        f"/api/v1/devices/device/{device_id}/reenrol",
+        headers=_headers(),
+        json={"site_id": target_site_id},
+    )
+
+    assert response.status_code == 409
+    assert _lifecycle_rows(device_id) == before
+    assert before[0][1] == "unpaired"
+
+    renamed = client.post(
+        f"/api/v1/devices/device/{device_id}/reenrol",
+        headers=_headers(),
+        json={"site_id": target_site_id, "device_name": "Test POS 2"},
+    )
+    assert renamed.status_code == 200
+
+
+def test_device_rename_to_live_name_conflicts(file_db: Any) -> None:
+    """Renaming a device to a name live in its site answers 409."""
+    site_id, device_id, site_pk = _seed_site_device_admin()
+    sync_db = homepot.database.SessionLocal()
+    try:
+        sync_db.add(
+            Device(
+                device_id="dev-ap-002",
+                name="Back Office",
+                device_type="pos_terminal",
+                site_id=site_pk,
+                is_active=True,
+            )
+        )
+        sync_db.commit()
+    finally:
+        sync_db.close()
+
+    response = TestClient(app).put(
+        "/api/v1/devices/device/dev-ap-002",
+        headers=_headers(),
+        json={"name": "TEST POS"},
+    )
+
+    assert response.status_code == 409
+    sync_db = homepot.database.SessionLocal()
+    try:
+        device = sync_db.query(Device).filter(Device.device_id == "dev-ap-002").one()
+        assert device.name == "Back Office"
+    finally:
+        sync_db.close()
+
+
+def test_device_create_with_live_name_conflicts(file_db: Any) -> None:
+    """Creating a device under a name live in the site answers 409."""
+    site_id, _, _ = _seed_site_device_admin()
+
+    response = TestClient(app).post(
+        "/api/v1/devices/device",
+        headers=_headers(),
+        json={
+            "site_id": site_id,
+            "device_id": "ignored",
+            "name": "test pos",
+            "device_type": "pos_terminal",
+        },
+    )
+
+    assert response.status_code == 409
+    assert "already in use" in response.json()["detail"]
+
+
+def test_device_provision_with_live_name_is_rejected(file_db: Any) -> None:
+    """Provisioning under a live name is refused without leaking the SQL error."""
+    site_id, _, site_pk = _seed_site_device_admin()
+
+    response = TestClient(app).post(
+        "/api/v1/devices/provision",
+        headers=_headers(),
+        json={"site_id": site_id, "device_name": "Test POS"},
+    )
+
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert "already in use" in detail and "INSERT" not in detail
+    sync_db = homepot.database.SessionLocal()
+    try:
+        assert sync_db.query(Device).filter(Device.site_id == site_pk).count() == 1
+    finally:
+        sync_db.close()
@@ -1,8 +1,18 @@
 """Tests for the SmartDataFilter utility."""
 
+from concurrent.futures import ThreadPoolExecutor
 import time
 
-from homepot.app.utils.smart_filter import SmartDataFilter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from homepot.app.utils.smart_filter import (
+    MemoryFilterStore,
+    SmartDataFilter,
+    SqlFilterStore,
+)
+from homepot.models import Base, TelemetryFilterState
 
 
 def test_smart_filter_initial_store():
@@ -84,3 +94,90 @@ def test_smart_filter_error_deduplication():
     # Wait > 1s -> Store again
     time.sleep(1.1)
     assert data_filter.should_store_error(device_id, code, msg) is True
+
+
+def test_smart_filter_batch_matches_sequential_decisions():
+    """Test that a batch decides like the same samples sent one by one."""
+    samples = [
+        ("device-1", {"cpu_percent": 10.0}),
+        ("device-2", {"cpu_percent": 0.0, "error_rate": 0.0}),
+        ("device-1", {"cpu_percent": 10.2}),
+        ("device-2", {"cpu_percent": 0.5, "error_rate": 0.02}),
+        ("device-1", {"cpu_percent": 11.0}),
+        ("device-1", {"cpu_percent": 11.0, "network_latency_ms": 5.0}),
+        ("device-2", {"cpu_percent": 2.0, "error_rate": 0.02}),
+    ]
+    sequential = SmartDataFilter()
+    expected = [sequential.should_store(d, m) for d, m in samples]
+
+    batch = SmartDataFilter().should_store_batch(
+        [d for d, _ in samples], [m for _, m in samples]
+    )
+
+    assert batch.tolist() == expected == [True, True, False, True, True, True, True]
+
+
+def test_smart_filter_stable_device_volume():
+    """Test that a stable device sampled every 5s stores only snapshots."""
+    data_filter = SmartDataFilter(snapshot_interval=300)
+    start = time.time()
+    times = [start + 5 * n for n in range(720)]  # one hour
+    metrics = [{"cpu_percent": 20.0 + (n % 3) * 0.1} for n in range(720)]
+
+    keep = data_filter.should_store_batch(["device-1"] * 720, metrics, times)
+
+    assert keep.sum() == 12
+    assert data_filter.stats() == {"stored": 12, "filtered": 708}
+
+
+def test_memory_store_is_bounded():
+    """Test that the in-memory store evicts the least recently used devices."""
+    store = MemoryFilterStore(max_entries=2)
+    data_filter = SmartDataFilter(store=store)
+    for device_id in ("device-1", "device-2", "device-1", "device-3"):
+        data_filter.should_store(device_id, {"cpu_percent": 10.0})
+
+    assert len(store) == 2
+    # device-2 was evicted, so its next sample counts as a first data point.
+    assert data_filter.should_store("device-1", {"cpu_percent": 10.0}) is False
+    assert data_filter.should_store("device-2", {"cpu_percent": 10.0}) is True
+
+
+def test_memory_store_is_safe_across_threads():
+    """Test that threadpool callers can share the store while it evicts."""
+    store = MemoryFilterStore(max_entries=16)
+    data_filter = SmartDataFilter(store=store)
+
+    def report(worker: int) -> None:
+        for n in range(500):
+            device_id = f"device-{(worker * 7 + n) % 40}"
+            data_filter.should_store(device_id, {"cpu_percent": float(n % 3)})
+            data_filter.should_store_error(device_id, "E1", "boom")
+            if n % 10 == 0:
+                data_filter.forget([device_id])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(report, range(8)))
+
+    assert len(store) <= 16
+
+
+def test_sql_store_is_shared_between_filters():
+    """Test that two workers on the same table agree on what was stored."""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[TelemetryFilterState.__table__])
+    session_factory = sessionmaker(bind=engine)
+    worker_a = SmartDataFilter(store=SqlFilterStore(session_factory))
+    worker_b = SmartDataFilter(store=SqlFilterStore(session_factory))
+
+    assert worker_a.should_store("device-1", {"cpu_percent": 10.0}) is True
+    assert worker_b.should_store("device-1", {"cpu_percent": 10.1}) is False
+    assert worker_b.should_store("device-1", {"cpu_percent": 20.0}) is True
+    assert worker_a.should_store("device-1", {"cpu_percent": 20.0}) is False
+
+    assert worker_a.should_store_error("device-1", "ERR_001", "boom") is True
+    assert worker_b.should_store_error("device-1", "ERR_001", "boom") is False
+
+    worker_a.forget(["device-1"])
+    assert worker_b.should_store("device-1", {"cpu_percent": 20.0}) is True
+    engine.dispose()
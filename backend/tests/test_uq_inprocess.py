@@ -0,0 +1,116 @@
+"""Tests for the in-process EasyVVUQ execution backend in ``uq/``.
+
+EasyVVUQ itself is not needed: the action is driven through the same
+``start(previous)`` protocol the library uses.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+workspace_root = os.path.abspath(os.path.join(current_dir, "../../"))
+if workspace_root not in sys.path:
+    sys.path.insert(0, workspace_root)
+
+from ai.anomaly_detection import AnomalyDetector  # noqa: E402
+from uq.inprocess import (  # noqa: E402
+    ExecuteInProcess,
+    InProcessModel,
+    ResultCache,
+    param_hash,
+)
+from uq.models import ANOMALY_MODEL, PUSH_MODEL  # noqa: E402
+
+CALLS = []
+
+
+def _square_batch(samples):
+    CALLS.append(len(samples))
+    return [{"y": s["x"] ** 2} for s in samples]
+
+
+SQUARE_MODEL = InProcessModel("square", _square_batch)
+
+
+@pytest.fixture(autouse=True)
+def _reset_calls():
+    CALLS.clear()
+
+
+def test_param_hash_ignores_outfile_and_key_order():
+    """Test that bookkeeping keys and ordering do not change the cache key."""
+    a = param_hash("m", {"x": 1.5, "z": 2, "outfile": "output.json"})
+    b = param_hash("m", {"z": 2, "x": 1.5})
+    assert a == b
+    assert a != param_hash("other", {"z": 2, "x": 1.5})
+
+
+def test_start_attaches_collated_result():
+    """Test the EasyVVUQ action contract used by Campaign.execute()."""
+    action = ExecuteInProcess(SQUARE_MODEL)
+    previous = action.start({"run_info": {"params": {"x": 3.0, "outfile": "o"}}})
+
+    assert previous["result"] == {"y": 9.0}
+    assert previous["collated"] is True
+    assert action.finished() and action.succeeded()
+
+
+def test_prefill_is_batched_and_incremental(tmp_path):
+    """Test that prefill evaluates in chunks and reruns only new samples."""
+    path = str(tmp_path / "cache.sqlite")
+    action = ExecuteInProcess(SQUARE_MODEL, cache=ResultCache(path), chunk_size=4)
+
+    assert action.prefill({"x": float(i)} for i in range(10)) == 10
+    assert CALLS == [4, 4, 2]
+
+    # A fresh action on the same cache file (a re-run) only evaluates new points.
+    rerun = ExecuteInProcess(SQUARE_MODEL, cache=ResultCache(path))
+    assert rerun.prefill({"x": float(i)} for i in range(12)) == 2
+    assert rerun.start({"run_info": {"params": {"x": 11.0}}})["result"] == {"y": 121.0}
+    assert rerun.cache.hits >= 10
+
+
+def test_anomaly_model_matches_runner_semantics():
+    """Test that the batch model reproduces anomaly_runner.py's QoIs."""
+    rng = np.random.default_rng(3)
+    samples = [
+        {
+            "cpu_percent": rng.uniform(5, 100),
+            "memory_percent": rng.uniform(10, 100),
+            "disk_percent": rng.uniform(10, 100),
+            "error_rate": rng.uniform(0, 0.5),
+            "network_latency_ms": rng.uniform(10, 1000),
+            "flapping_count": rng.uniform(0, 10),
+            "consecutive_failures": rng.uniform(0, 15),
+            "outfile": "output.json",
+        }
+        for _ in range(500)
+    ]
+    detector = AnomalyDetector()
+
+    results = ExecuteInProcess(ANOMALY_MODEL).evaluate(samples)
+
+    for sample, result in zip(samples, results):
+        metrics = {k: float(v) for k, v in sample.items() if k != "outfile"}
+        for k in ("flapping_count", "consecutive_failures"):
+            metrics[k] = int(round(metrics[k]))
+        score, anomalies = detector.check_anomaly(metrics)
+        assert result == {"anomaly_score": score, "num_anomalies": len(anomalies)}
+
+
+def test_push_model_expected_values():
+    """Test the push expected-value model, including clamping."""
+    results = ExecuteInProcess(PUSH_MODEL).evaluate(
+        [
+            {"success_rate": 0.9, "num_devices": 9.6},
+            {"success_rate": 1.2, "num_devices": 0},
+        ]
+    )
+
+    assert results[0]["expected_failures"] == pytest.approx(1.0)
+    assert results[0]["campaign_time_ms"] == pytest.approx(100 + 400 * 10 / 11)
+    assert results[1]["failure_rate"] == pytest.approx(1e-9)
+    assert results[1]["campaign_time_ms"] == pytest.approx(300.0)
@@ -35,9 +35,11 @@ from ai.gates import (  # noqa: E402
     Gate,
     GateContext,
     GateResult,
+    GateResultCache,
     GateStatus,
     ValidationEnvelope,
     build_default_envelope,
+    get_gate_result_cache,
 )
 
 
@@ -134,6 +136,55 @@ async def test_envelope_fail_closed_on_exception():
     assert result.gate_results[0].error == "boom"
 
 
+class _CountingGate(_FakeGate):
+    """Cacheable fake gate that counts its evaluations."""
+
+    cache_topics = ("telemetry",)
+
+    def __init__(self, gate_id):
+        super().__init__(gate_id, GateStatus.PASS, MODE_BEST_EFFORT, score=1.0)
+        self.evaluations = 0
+
+    def cache_key(self, context):
+        return (context.device_int_id,)
+
+    async def evaluate(self, context):
+        self.evaluations += 1
+        return await super().evaluate(context)
+
+
+@pytest.mark.asyncio
+async def test_envelope_reuses_cached_results_until_invalidated():
+    """Test per-gate caching, timing, and per-device topic invalidation."""
+    cache = GateResultCache(ttl_seconds={"A": 60})
+    gate_a = _CountingGate("A")
+    gate_b = _CountingGate("B")  # no TTL configured: never cached
+    envelope = ValidationEnvelope([gate_a, gate_b], cache=cache)
+    device_1 = GateContext(device_int_id=1)
+
+    await envelope.run(device_1)
+    result = await envelope.run(device_1)
+    assert (gate_a.evaluations, gate_b.evaluations) == (1, 2)
+    assert [g.cached for g in result.gate_results] == [True, False]
+    assert result.to_dict()["gates"][0]["cached"] is True
+    assert result.trace()[0]["gate_cached"] is True
+
+    # Another device's telemetry leaves device 1's result alone, but not the
+    # fleet-wide result.
+    await envelope.run(GateContext())
+    cache.invalidate("telemetry", 2)
+    await envelope.run(device_1)
+    await envelope.run(GateContext())
+    assert gate_a.evaluations == 3
+
+    cache.invalidate("telemetry", 1)
+    await envelope.run(device_1)
+    cache.invalidate("telemetry")
+    await envelope.run(device_1)
+    assert gate_a.evaluations == 5
+    assert cache.stats()["hits"] == 2
+
+
 def test_envelope_is_extensible_with_add_gate():
     """Test that a new gate can be appended to the envelope via add_gate."""
     envelope = ValidationEnvelope([_FakeGate("A", GateStatus.PASS, MODE_STATUS_ONLY)])
@@ -604,3 +655,111 @@ async def test_gate_b_fails_on_stale_and_invalid_readings():
     failed_ids = {c.check_id for c in result.checks if not c.passed}
     assert "B.freshness" in failed_ids
     assert "B.validity" in failed_ids
+
+
+@pytest.mark.asyncio
+async def test_gate_b_continuity_is_measured_per_device():
+    """Test that another device's reports cannot mask a device's outage."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    from homepot.models import Base, HealthCheck
+    from homepot.seed_factories import create_device, create_site
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        site = await create_site(session)
+        steady = await create_device(session, site_id=site.id)
+        flaky = await create_device(session, site_id=site.id)
+
+        # Both report every 30s for 30 minutes, but flaky is silent for 12
+        # minutes in the middle; merged, the fleet never goes 30s quiet.
+        start = datetime.utcnow() - timedelta(minutes=30)
+        for i in range(60):
+            ts = start + timedelta(seconds=i * 30)
+            session.add(
+                HealthCheck(
+                    id=2 * i + 1, device_id=steady.id, is_healthy=True, timestamp=ts
+                )
+            )
+            if not 20 <= i < 44:
+                session.add(
+                    HealthCheck(
+                        id=2 * i + 2,
+                        device_id=flaky.id,
+                        is_healthy=True,
+                        timestamp=ts + timedelta(seconds=15),
+                    )
+                )
+        await session.commit()
+
+        gate = DataIntegrityGate(continuity_gap_seconds=60, sustained_gap_seconds=600)
+        fleet = await gate._check_continuity_and_gaps(
+            session,
+            HealthCheck,
+            start - timedelta(seconds=1),
+            None,
+            [steady.id, flaky.id],
+        )
+        steady_only = await gate._check_continuity_and_gaps(
+            session, HealthCheck, start - timedelta(seconds=1), steady.id, [steady.id]
+        )
+    await engine.dispose()
+
+    continuity, gap_checks = fleet
+    assert not continuity.passed
+    assert continuity.evidence[0].observed == 750.0
+    assert continuity.evidence[0].extra["worst_device_pk"] == flaky.id
+    assert continuity.evidence[0].extra["devices_over_threshold"] == 1
+    expected_at = start + timedelta(seconds=44 * 30 + 15)
+    assert continuity.evidence[0].extra["worst_gap_at"] == expected_at.isoformat()
+    assert not gap_checks.passed
+    assert gap_checks.evidence[0].observed == 1
+
+    assert all(c.passed for c in steady_only)
+    assert steady_only[0].evidence[0].observed == 30.0
+
+
+@pytest.mark.asyncio
+async def test_gate_cache_dropped_on_committed_telemetry():
+    """Test that committing a health check invalidates that device's Gate B result."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import StaticPool
+
+    from homepot.models import Base, HealthCheck
+    from homepot.seed_factories import create_device, create_site
+
+    cache = get_gate_result_cache()
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        site = await create_site(session)
+        device = await create_device(session, site_id=site.id)
+        other = await create_device(session, site_id=site.id)
+        await session.commit()
+        device_pk, other_pk = device.id, other.id
+        envelope = ValidationEnvelope([DataIntegrityGate()], cache=cache)
+        context = GateContext(session=session, device_int_id=device_pk)
+
+        first = await envelope.run(context)
+        assert not first.gate_results[0].cached
+        assert (await envelope.run(context)).gate_results[0].cached
+
+        session.add(HealthCheck(id=1, device_id=other_pk, is_healthy=True))
+        await session.commit()
+        assert (await envelope.run(context)).gate_results[0].cached
+
+        session.add(HealthCheck(id=2, device_id=device_pk, is_healthy=True))
+        await session.flush()
+        await session.rollback()
+        assert (await envelope.run(context)).gate_results[0].cached
+
+        session.add(HealthCheck(id=3, device_id=device_pk, is_healthy=True))
+        await session.commit()
+        assert not (await envelope.run(context)).gate_results[0].cached
+    await engine.dispose()
@@ -21,7 +21,8 @@ then runs four concurrent loops:
 - **Heartbeat** — ``POST /agent/heartbeat`` at a configurable interval
 - **Telemetry** — ``POST /agent/telemetry`` with simulated CPU/memory/disk
   metrics, network latency, plus runtime uptime (``uptime_seconds``)
-- **Command polling** — ``GET /devices/pending``, ACK, and respond with mock results;
+- **Command polling** — long-polls ``GET /devices/pending/wait`` (falling back to
+  interval polling of ``GET /devices/pending``), ACK, and respond with mock results;
   a ``status_request`` command returns a live device-status snapshot and posts it
   to the Dashboard's Live Logs tab; composed push commands (``update_pos_payment_config``,
   ``restart_pos_app``, ``health_check``, or custom actions) are applied/acknowledged,
@@ -40,18 +41,28 @@ then runs four concurrent loops:
 
 Credentials are persisted to ``~/.homepot/emulators/<device_name>.json``
 so the emulator survives restarts without re-provisioning.
+
+Fleet mode
+----------
+    python emulators/pos_engine.py --site-id site-it-demo1 --bootstrap-key abc123 --fleet-size 1000
+
+``--fleet-size N`` runs N virtual devices (``<device_name>-00001`` ...) in one
+event loop over a shared, pooled HTTP client, with per-device RNGs seeded from
+``--fleet-seed``. Per-device console output is suppressed; aggregate request
+rate, error rate and p50/p95/p99 latency per route are reported periodically.
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
 import json
 import os
 from pathlib import Path
 import random
+import re
 import signal
 import sys
 import time
@@ -186,6 +197,7 @@ class EmulatorConfig:
     telemetry_interval: float = 15.0
     command_poll_interval: float = 15.0
     push_poll_interval: float = 15.0
+    long_poll_timeout: float = 25.0
     logs_interval: float = 15.0
     audit_interval: float = 60.0
     jobs_interval: float = 30.0
@@ -211,6 +223,7 @@ class EmulatorConfig:
             telemetry_interval=float(d.get("telemetry_interval_seconds", 15)),
             command_poll_interval=float(d.get("command_poll_interval_seconds", 15)),
             push_poll_interval=float(d.get("push_poll_interval_seconds", 15)),
+            long_poll_timeout=float(d.get("long_poll_timeout_seconds", 25)),
             logs_interval=float(d.get("logs_interval_seconds", 15)),
             audit_interval=float(d.get("audit_interval_seconds", 60)),
             jobs_interval=float(d.get("jobs_interval_seconds", 30)),
@@ -245,30 +258,31 @@ class EmulatorConfig:
 class SimulatedMetrics:
     """Generates realistic-looking system metrics that vary over time."""
 
-    def __init__(self) -> None:
-        self._cpu_baseline = random.uniform(15, 35)
-        self._mem_baseline = random.uniform(40, 55)
-        self._disk_baseline = random.uniform(30, 45)
-        self._latency_baseline = random.uniform(3, 12)
+    def __init__(self, rng: random.Random | None = None) -> None:
+        self._rng = rng or random.Random()
+        self._cpu_baseline = self._rng.uniform(15, 35)
+        self._mem_baseline = self._rng.uniform(40, 55)
+        self._disk_baseline = self._rng.uniform(30, 45)
+        self._latency_baseline = self._rng.uniform(3, 12)
         self._tick = 0
 
     def sample(self) -> dict[str, float]:
         self._tick += 1
 
-        cpu = self._cpu_baseline + random.gauss(0, 8)
-        if self._tick % random.randint(15, 30) == 0:
-            cpu += random.uniform(30, 55)
+        cpu = self._cpu_baseline + self._rng.gauss(0, 8)
+        if self._tick % self._rng.randint(15, 30) == 0:
+            cpu += self._rng.uniform(30, 55)
         cpu = max(0, min(100, cpu))
 
-        mem = self._mem_baseline + random.gauss(0, 3)
+        mem = self._mem_baseline + self._rng.gauss(0, 3)
         mem = max(0, min(100, mem))
 
-        disk = self._disk_baseline + random.gauss(0, 1.5)
+        disk = self._disk_baseline + self._rng.gauss(0, 1.5)
         disk = max(0, min(100, disk))
 
-        latency = self._latency_baseline + random.gauss(0, 2.5)
-        if self._tick % random.randint(30, 60) == 0:
-            latency += random.uniform(20, 80)
+        latency = self._latency_baseline + self._rng.gauss(0, 2.5)
+        if self._tick % self._rng.randint(30, 60) == 0:
+            latency += self._rng.uniform(20, 80)
         latency = max(1, latency)
 
         return {
@@ -317,13 +331,26 @@ class POSEmulator:
         self,
         config: EmulatorConfig,
         banner: str = "HOMEPOT POS Emulator",
+        *,
+        rng: random.Random | None = None,
+        http: httpx.AsyncClient | None = None,
+        quiet: bool = False,
     ) -> None:
+        """Create an emulator.
+
+        ``rng``, ``http`` and ``quiet`` exist for fleet mode: a seeded RNG makes
+        the device's behaviour reproducible, a shared client pools connections
+        across devices, and ``quiet`` suppresses the per-tick console output.
+        """
         self.config = config
         self._banner = banner
+        self._rng = rng or random.Random()
+        self._quiet = quiet
+        self._owns_http = http is None
         self._device_id: str | None = None
         self._api_key: str | None = None
         self._shutdown_event = asyncio.Event()
-        self._metrics = SimulatedMetrics()
+        self._metrics = SimulatedMetrics(self._rng)
         self._started = time.monotonic()
         self._config_version: str = "1.0.1"
         self._applied_config: dict[str, object] = {}
@@ -335,6 +362,8 @@ class POSEmulator:
         )
         self._granted: dict[str, bool] = {k: False for k in ALL_PERMISSION_KEYS}
         self._http: httpx.AsyncClient
+        if http is not None:
+            self._http = http
 
     @property
     def device_id(self) -> str:
@@ -353,6 +382,10 @@ class POSEmulator:
     def _headers(self) -> dict[str, str]:
         return {"X-Device-ID": self.device_id, "X-API-Key": self.api_key}
 
+    def _print(self, *args: object) -> None:
+        if not self._quiet:
+            print(*args)
+
     # --
     # OS-specific behavior hooks
     # --
@@ -375,7 +408,7 @@ class POSEmulator:
             "wns": "https://wns.notify.windows.com/?token=emulator",
             "apns": "apns://emulator",
         }.get(channel, "push:emulator")
-        suffix = hex(random.getrandbits(64))[2:]
+        suffix = hex(self._rng.getrandbits(64))[2:]
         return f"{prefix}:{suffix}"
 
     def _push_delivery_note(self, command_type: str) -> str | None:
@@ -411,7 +444,7 @@ class POSEmulator:
                 headers=self._headers(),
             )
             if resp.status_code >= 400:
-                print(f"  [permissions] refresh error: {resp.status_code}")
+                self._print(f"  [permissions] refresh error: {resp.status_code}")
                 return False
             data = resp.json().get("data", {})
             permissions = data.get("permissions", {})
@@ -422,7 +455,7 @@ class POSEmulator:
             }
             return True
         except httpx.RequestError as exc:
-            print(f"  [permissions] refresh connection error: {exc}")
+            self._print(f"  [permissions] refresh connection error: {exc}")
             return False
 
     def _permission_denial(self, command_type: str, payload: object) -> str | None:
@@ -449,7 +482,7 @@ class POSEmulator:
         if self.config.permission_consent_mode == "fixed":
             return True
         # ``auto``: mostly consent, occasionally deny to exercise the prompt path.
-        return random.random() < 0.8
+        return self._rng.random() < 0.8
 
     async def _update_device_permissions(self, changes: dict[str, bool]) -> None:
         """PATCH the device's permission grants to the backend (device-cred auth)."""
@@ -460,13 +493,13 @@ class POSEmulator:
                 headers=self._headers(),
             )
             if resp.status_code >= 400:
-                print(
+                self._print(
                     f"  [permissions] update error: {resp.status_code} {resp.text[:120]}"
                 )
             else:
-                print(f"  [permissions] synced: {changes}")
+                self._print(f"  [permissions] synced: {changes}")
         except httpx.RequestError as exc:
-            print(f"  [permissions] update connection error: {exc}")
+            self._print(f"  [permissions] update connection error: {exc}")
 
     async def _report_permission_audit(
         self, permission: str, granted: bool, actor: str, action: str
@@ -486,13 +519,13 @@ class POSEmulator:
                 headers=self._headers(),
             )
             if resp.status_code >= 400:
-                print(
+                self._print(
                     f"  [permissions] audit error: {resp.status_code} {resp.text[:120]}"
                 )
             else:
-                print(f"  [permissions] {description}")
+                self._print(f"  [permissions] {description}")
         except httpx.RequestError as exc:
-            print(f"  [permissions] audit connection error: {exc}")
+            self._print(f"  [permissions] audit connection error: {exc}")
 
     async def _apply_permission_result(
         self, result: dict, payload: dict | None
@@ -517,11 +550,11 @@ class POSEmulator:
     async def _apply_default_consent(self) -> None:
         if self.config.permission_consent_mode == "external":
             await self._refresh_device_permissions()
-            print("  [permissions] consent managed by User App")
+            self._print("  [permissions] consent managed by User App")
             return
         self._granted = self._default_permission_grants()
         await self._update_device_permissions(dict(self._granted))
-        print(
+        self._print(
             "  [permissions] consent: "
             + " ".join(f"{k}={v}" for k, v in self._granted.items())
         )
@@ -534,16 +567,16 @@ class POSEmulator:
                     supported = [
                         k for k in ALL_PERMISSION_KEYS if self._capabilities.get(k)
                     ]
-                    if supported and random.random() < 0.6:
-                        key = random.choice(supported)
-                        grant = random.random() < 0.6
+                    if supported and self._rng.random() < 0.6:
+                        key = self._rng.choice(supported)
+                        grant = self._rng.random() < 0.6
                         if self._granted.get(key, False) != grant:
                             self._granted[key] = grant
                             await self._update_device_permissions({key: grant})
                             verb = "granted" if grant else "revoked"
-                            print(f"  [permissions] device {verb} {key}")
+                            self._print(f"  [permissions] device {verb} {key}")
             except httpx.RequestError as exc:
-                print(f"  [permissions] connection error: {exc}")
+                self._print(f"  [permissions] connection error: {exc}")
 
             await self._wait_or_shutdown(self.config.permission_sync_interval)
 
@@ -557,12 +590,12 @@ class POSEmulator:
             self._device_id = creds["device_id"]
             self._api_key = creds["api_key"]
             self.config.site_id = creds.get("site_id", self.config.site_id)
-            print(f"  Restored credentials for device {self._device_id}")
+            self._print(f"  Restored credentials for device {self._device_id}")
             return True
         return False
 
     async def _provision(self) -> None:
-        print("  Provisioning via bootstrap-provision ...")
+        self._print("  Provisioning via bootstrap-provision ...")
         payload = {
             "site_id": self.config.site_id,
             "bootstrap_key": self.config.bootstrap_key,
@@ -588,12 +621,12 @@ class POSEmulator:
             self.config.device_name,
             self.config.to_credentials(self._device_id, self._api_key),
         )
-        print(f"  Provisioned device {self._device_id}")
+        self._print(f"  Provisioned device {self._device_id}")
 
         await self._register_dna()
 
     async def _register_dna(self) -> None:
-        print("  Registering device DNA ...")
+        self._print("  Registering device DNA ...")
         payload = {
             "device_id": self.device_id,
             "mac_address": self.config.mock_mac,
@@ -610,11 +643,11 @@ class POSEmulator:
             f"{self._backend}/agent/device-dna", json=payload, headers=self._headers()
         )
         if resp.status_code >= 400:
-            print(
+            self._print(
                 f"  [dna] warning: registration returned {resp.status_code}: {resp.text[:120]}"
             )
         else:
-            print(
+            self._print(
                 "  Registered DNA:"
                 f" hostname={self.config.mock_hostname}"
                 f", MAC={self.config.mock_mac}, IP={self.config.mock_ip}"
@@ -637,13 +670,15 @@ class POSEmulator:
                     headers=self._headers(),
                 )
                 if resp.status_code >= 400:
-                    print(f"  [heartbeat] error: {resp.status_code} {resp.text[:120]}")
+                    self._print(
+                        f"  [heartbeat] error: {resp.status_code} {resp.text[:120]}"
+                    )
                 else:
-                    print(
+                    self._print(
                         f"  [heartbeat] OK  ({datetime.now(timezone.utc).strftime('%H:%M:%S')})"
                     )
             except httpx.RequestError as exc:
-                print(f"  [heartbeat] connection error: {exc}")
+                self._print(f"  [heartbeat] connection error: {exc}")
 
             await self._wait_or_shutdown(self.config.heartbeat_interval)
 
@@ -665,9 +700,11 @@ class POSEmulator:
                     headers=self._headers(),
                 )
                 if resp.status_code >= 400:
-                    print(f"  [telemetry] error: {resp.status_code} {resp.text[:120]}")
+                    self._print(
+                        f"  [telemetry] error: {resp.status_code} {resp.text[:120]}"
+                    )
                 else:
-                    print(
+                    self._print(
                         "  [telemetry] OK"
                         f" cpu={metrics['cpu_usage']}%"
                         f" mem={metrics['memory_usage']}%"
@@ -676,7 +713,7 @@ class POSEmulator:
                         f" uptime={uptime_seconds}s"
                     )
             except httpx.RequestError as exc:
-                print(f"  [telemetry] connection error: {exc}")
+                self._print(f"  [telemetry] connection error: {exc}")
 
             await self._wait_or_shutdown(self.config.telemetry_interval)
 
@@ -712,11 +749,11 @@ class POSEmulator:
             ("error", "device", "Unhandled exception in checkout service"),
         ]
 
-        if tick > 0 and tick % random.randint(10, 20) == 0:
-            return random.choice(error_entries)
-        if tick % random.randint(4, 8) == 0:
-            return random.choice(warning_entries)
-        return random.choice(info_entries)
+        if tick > 0 and tick % self._rng.randint(10, 20) == 0:
+            return self._rng.choice(error_entries)
+        if tick % self._rng.randint(4, 8) == 0:
+            return self._rng.choice(warning_entries)
+        return self._rng.choice(info_entries)
 
     async def _logs_loop(self) -> None:
         tick = 0
@@ -736,11 +773,11 @@ class POSEmulator:
                     headers=self._headers(),
                 )
                 if resp.status_code >= 400:
-                    print(f"  [logs] error: {resp.status_code} {resp.text[:120]}")
+                    self._print(f"  [logs] error: {resp.status_code} {resp.text[:120]}")
                 else:
-                    print(f"  [logs] {level}: {message[:60]}")
+                    self._print(f"  [logs] {level}: {message[:60]}")
             except httpx.RequestError as exc:
-                print(f"  [logs] connection error: {exc}")
+                self._print(f"  [logs] connection error: {exc}")
 
             tick += 1
             await self._wait_or_shutdown(self.config.logs_interval)
@@ -768,9 +805,9 @@ class POSEmulator:
             ("error_occurred", "Payment gateway timeout during card authorisation"),
             ("error_occurred", "Connection to backend lost and recovered"),
         ]
-        if tick % random.randint(8, 15) == 0:
-            return random.choice(anomalies)
-        return random.choice(routine)
+        if tick % self._rng.randint(8, 15) == 0:
+            return self._rng.choice(anomalies)
+        return self._rng.choice(routine)
 
     async def _audit_loop(self) -> None:
         tick = 0
@@ -789,17 +826,19 @@ class POSEmulator:
                     headers=self._headers(),
                 )
                 if resp.status_code >= 400:
-                    print(f"  [audit] error: {resp.status_code} {resp.text[:120]}")
+                    self._print(
+                        f"  [audit] error: {resp.status_code} {resp.text[:120]}"
+                    )
                 else:
-                    print(f"  [audit] {event_type}: {description[:60]}")
+                    self._print(f"  [audit] {event_type}: {description[:60]}")
             except httpx.RequestError as exc:
-                print(f"  [audit] connection error: {exc}")
+                self._print(f"  [audit] connection error: {exc}")
 
             tick += 1
             await self._wait_or_shutdown(self.config.audit_interval)
 
     def _next_job_action(self) -> str:
-        return random.choice(
+        return self._rng.choice(
             [
                 "Update POS payment config",
                 "Rotate API credentials",
@@ -813,7 +852,7 @@ class POSEmulator:
         )
 
     def _next_job_outcome(self) -> tuple[str, dict | None, str | None]:
-        if random.random() < 0.8:
+        if self._rng.random() < 0.8:
             return (
                 "completed",
                 {"message": "Job executed successfully", "exit_code": 0},
@@ -839,11 +878,11 @@ class POSEmulator:
             headers=self._headers(),
         )
         if resp.status_code >= 400:
-            print(f"  [jobs] create error: {resp.status_code} {resp.text[:120]}")
+            self._print(f"  [jobs] create error: {resp.status_code} {resp.text[:120]}")
             return None
         data = resp.json().get("data", {})
         job_id = data.get("job_id")
-        print(f"  [jobs] queued '{action}' ({str(job_id)[:8]}...)")
+        self._print(f"  [jobs] queued '{action}' ({str(job_id)[:8]}...)")
         return str(job_id) if job_id is not None else None
 
     async def _update_job(
@@ -865,9 +904,9 @@ class POSEmulator:
             headers=self._headers(),
         )
         if resp.status_code >= 400:
-            print(f"  [jobs] update error: {resp.status_code} {resp.text[:120]}")
+            self._print(f"  [jobs] update error: {resp.status_code} {resp.text[:120]}")
         else:
-            print(f"  [jobs] {str(job_id)[:8]} -> {status}")
+            self._print(f"  [jobs] {str(job_id)[:8]} -> {status}")
 
     async def _jobs_loop(self) -> None:
         current_job: str | None = None
@@ -878,15 +917,15 @@ class POSEmulator:
                     await self._update_job(current_job, status, result, error)
                 current_job = await self._create_job()
             except httpx.RequestError as exc:
-                print(f"  [jobs] connection error: {exc}")
+                self._print(f"  [jobs] connection error: {exc}")
 
             await self._wait_or_shutdown(self.config.jobs_interval)
 
     async def _alerts_loop(self) -> None:
         while not self._shutdown_event.is_set():
             try:
-                if random.random() < 0.4:
-                    latency = round(random.uniform(250, 900), 1)
+                if self._rng.random() < 0.4:
+                    latency = round(self._rng.uniform(250, 900), 1)
                     severity = "critical" if latency > 500 else "warning"
                     payload = {
                         "device_id": self.device_id,
@@ -905,79 +944,144 @@ class POSEmulator:
                         headers=self._headers(),
                     )
                     if resp.status_code >= 400:
-                        print(f"  [alerts] error: {resp.status_code} {resp.text[:120]}")
+                        self._print(
+                            f"  [alerts] error: {resp.status_code} {resp.text[:120]}"
+                        )
                     else:
-                        print(
+                        self._print(
                             f"  [alerts] injected '{payload['title']}'" f" ({severity})"
                         )
                 else:
-                    print("  [alerts] no anomaly this cycle")
+                    self._print("  [alerts] no anomaly this cycle")
             except httpx.RequestError as exc:
-                print(f"  [alerts] connection error: {exc}")
+                self._print(f"  [alerts] connection error: {exc}")
 
             await self._wait_or_shutdown(self.config.alerts_interval)
 
+    async def _long_poll(self, path: str) -> httpx.Response | None:
+        """Hold a long-poll ``GET`` on ``path``, abandoning it on shutdown."""
+        wait = self.config.long_poll_timeout
+        request = asyncio.ensure_future(
+            self._http.get(
+                f"{self._backend}{path}",
+                params={"timeout": wait},
+                headers=self._headers(),
+                timeout=wait + 10.0,
+            )
+        )
+        shutdown = asyncio.ensure_future(self._shutdown_event.wait())
+        try:
+            await asyncio.wait({request, shutdown}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            shutdown.cancel()
+        if not request.done():
+            request.cancel()
+            return None
+        return request.result()
+
     async def _command_poll_loop(self) -> None:
+        long_poll = self.config.long_poll_timeout > 0
         while not self._shutdown_event.is_set():
+            settled = False
             try:
-                resp = await self._http.get(
-                    f"{self._backend}/devices/pending", headers=self._headers()
-                )
+                if long_poll:
+                    resp = await self._long_poll("/devices/pending/wait")
+                    if resp is None:
+                        break
+                    if resp.status_code == 404:
+                        self._print(
+                            "  [commands] backend has no long-poll endpoint;"
+                            f" polling every {self.config.command_poll_interval}s"
+                        )
+                        long_poll = False
+                        continue
+                else:
+                    resp = await self._http.get(
+                        f"{self._backend}/devices/pending", headers=self._headers()
+                    )
                 if resp.status_code >= 400:
-                    print(
+                    self._print(
                         f"  [commands] poll error: {resp.status_code} {resp.text[:120]}"
                     )
                     await self._wait_or_shutdown(self.config.command_poll_interval)
                     continue
 
                 commands = resp.json()
+                settled = True
                 if not commands:
-                    print(
+                    self._print(
                         f"  [commands] none pending ({datetime.now(timezone.utc).strftime('%H:%M:%S')})"
                     )
                 else:
-                    print(f"  [commands] {len(commands)} pending")
+                    self._print(f"  [commands] {len(commands)} pending")
                     for cmd in commands:
-                        await self._handle_command(cmd)
+                        if not await self._handle_command(cmd):
+                            settled = False
             except httpx.RequestError as exc:
-                print(f"  [commands] connection error: {exc}")
+                self._print(f"  [commands] connection error: {exc}")
 
+            # A held long-poll already paced this cycle; re-arm immediately
+            # unless a command was left pending (it would return straight away).
+            if long_poll and settled:
+                continue
             await self._wait_or_shutdown(self.config.command_poll_interval)
 
     async def _push_loop(self) -> None:
-        """Poll undelivered push notifications and model the delivery lifecycle.
+        """Fetch undelivered push notifications and model the delivery lifecycle.
 
         The dashboard sends non-executable notifications via the backend, which
-        persists them as ``sent``. This loop picks them up and acks them so the
-        lifecycle advances to ``delivered`` (with latency) exactly like a real
+        persists them as ``sent``. This loop picks them up (long-polling
+        ``/push/pending/wait`` when available) and acks them so the lifecycle
+        advances to ``delivered`` (with latency) exactly like a real
         push-capable agent.
         """
+        long_poll = self.config.long_poll_timeout > 0
         while not self._shutdown_event.is_set():
+            settled = False
             try:
-                resp = await self._http.get(
-                    f"{self._backend}/push/pending", headers=self._headers()
-                )
+                if long_poll:
+                    resp = await self._long_poll("/push/pending/wait")
+                    if resp is None:
+                        break
+                    if resp.status_code == 404:
+                        self._print(
+                            "  [push] backend has no long-poll endpoint;"
+                            f" polling every {self.config.push_poll_interval}s"
+                        )
+                        long_poll = False
+                        continue
+                else:
+                    resp = await self._http.get(
+                        f"{self._backend}/push/pending", headers=self._headers()
+                    )
                 if resp.status_code >= 400:
-                    print(f"  [push] poll error: {resp.status_code} {resp.text[:120]}")
+                    self._print(
+                        f"  [push] poll error: {resp.status_code} {resp.text[:120]}"
+                    )
                     await self._wait_or_shutdown(self.config.push_poll_interval)
                     continue
 
                 body = resp.json()
                 pushes = body.get("pushes", []) if isinstance(body, dict) else []
+                settled = True
                 if not pushes:
-                    print(
+                    self._print(
                         f"  [push] none pending ({datetime.now(timezone.utc).strftime('%H:%M:%S')})"
                     )
                 else:
-                    print(f"  [push] {len(pushes)} pending")
+                    self._print(f"  [push] {len(pushes)} pending")
                     for push in pushes:
-                        await self._deliver_push(push)
+                        if not await self._deliver_push(push):
+                            settled = False
             except httpx.RequestError as exc:
-                print(f"  [push] connection error: {exc}")
+                self._print(f"  [push] connection error: {exc}")
 
+            if long_poll and settled:
+                continue
             await self._wait_or_shutdown(self.config.push_poll_interval)
 
-    async def _deliver_push(self, push: dict) -> None:
+    async def _deliver_push(self, push: dict) -> bool:
+        """Simulate receipt of one push and ack it; return True once acked."""
         message_id = push.get("message_id", "")
         payload = push.get("payload")
         payload = payload if isinstance(payload, dict) else {}
@@ -985,7 +1089,7 @@ class POSEmulator:
         body = payload.get("body") or ""
         channel = self._push_delivery_note("push")
 
-        await asyncio.sleep(random.uniform(0.2, 1.5))
+        await asyncio.sleep(self._rng.uniform(0.2, 1.5))
         failed = self._command_should_fail()
         received_at = datetime.now(timezone.utc).isoformat()
         ack = {
@@ -996,7 +1100,7 @@ class POSEmulator:
         if not failed:
             ack["received_at"] = received_at
         else:
-            ack["error_message"] = random.choice(
+            ack["error_message"] = self._rng.choice(
                 [
                     "Client connection lost before delivery",
                     "Message dropped by push service",
@@ -1009,20 +1113,21 @@ class POSEmulator:
             headers=self._headers(),
         )
         if resp.status_code >= 400:
-            print(
+            self._print(
                 f"  [push] ack failed for {message_id}: {resp.status_code} {resp.text[:120]}"
             )
-            return
+            return False
 
         note = f" [{channel}]" if channel else ""
         if failed:
-            print(
+            self._print(
                 f"  [push] delivery FAILED for {message_id}{note}: {ack['error_message']}"
             )
         else:
-            print(f"  [push] delivered {title!r}{note} ({message_id[:8]})")
+            self._print(f"  [push] delivered {title!r}{note} ({message_id[:8]})")
 
         await self._report_push_log(payload, title, body, failed)
+        return True
 
     async def _report_push_log(
         self, payload: dict, title: str, body: str, failed: bool
@@ -1050,15 +1155,16 @@ class POSEmulator:
             headers=self._headers(),
         )
         if resp.status_code >= 400:
-            print(f"  [push] log failed: {resp.status_code} {resp.text[:120]}")
+            self._print(f"  [push] log failed: {resp.status_code} {resp.text[:120]}")
         else:
-            print("  [push] delivery logged to Live Logs")
+            self._print("  [push] delivery logged to Live Logs")
 
-    async def _handle_command(self, cmd: dict) -> None:
+    async def _handle_command(self, cmd: dict) -> bool:
+        """Process one command; return True once it has left the pending state."""
         cid = cmd["command_id"]
         ctype = cmd["command_type"]
         note = self._push_delivery_note(ctype)
-        print(
+        self._print(
             f"  [commands] processing {ctype} ({cid})" + (f" [{note}]" if note else "")
         )
 
@@ -1067,7 +1173,7 @@ class POSEmulator:
                 ctype == "request_permission"
                 and self.config.permission_consent_mode == "external"
             ):
-                return
+                return False
 
             payload = cmd.get("payload")
             denial: str | None
@@ -1081,20 +1187,23 @@ class POSEmulator:
                     json={"status": "failed", "result": {"error": denial}},
                     headers=self._headers(),
                 )
-                print(f"  [commands] rejected {ctype}: {denial}")
+                self._print(f"  [commands] rejected {ctype}: {denial}")
                 if status_resp.status_code >= 400:
-                    print(
+                    self._print(
                         f"  [commands] rejection update failed: {status_resp.status_code}"
                     )
-                return
+                    return False
+                return True
 
             ack_resp = await self._http.post(
                 f"{self._backend}/devices/{self.device_id}/commands/{cid}/ack",
                 headers=self._headers(),
             )
             if ack_resp.status_code >= 400:
-                print(f"  [commands] ack failed for {cid}: {ack_resp.status_code}")
-                return
+                self._print(
+                    f"  [commands] ack failed for {cid}: {ack_resp.status_code}"
+                )
+                return False
 
             status_report = None
             if ctype == "status_request":
@@ -1122,15 +1231,19 @@ class POSEmulator:
                 headers=self._headers(),
             )
             if status_resp.status_code >= 400:
-                print(
+                self._print(
                     "  [commands] status update failed"
                     f" for {cid}: {status_resp.status_code} {status_resp.text[:120]}"
                 )
             else:
                 status = simulated_result.get("status", "completed")
-                print(f"  [commands] {ctype} -> {status} ({cid})")
+                self._print(f"  [commands] {ctype} -> {status} ({cid})")
+            # Once ACKed the command is no longer pending, even if the final
+            # status update failed.
+            return True
         except httpx.RequestError as exc:
-            print(f"  [commands] error processing {cid}: {exc}")
+            self._print(f"  [commands] error processing {cid}: {exc}")
+            return False
 
     def _format_uptime(self, seconds: float) -> str:
         total = int(seconds)
@@ -1186,11 +1299,11 @@ class POSEmulator:
             headers=self._headers(),
         )
         if resp.status_code >= 400:
-            print(
+            self._print(
                 f"  [commands] status log failed: {resp.status_code} {resp.text[:120]}"
             )
         else:
-            print("  [commands] status report sent to Live Logs")
+            self._print("  [commands] status report sent to Live Logs")
 
     async def _report_command_log(
         self, command_type: str, payload: dict[str, object], result: dict
@@ -1228,11 +1341,11 @@ class POSEmulator:
             headers=self._headers(),
         )
         if resp.status_code >= 400:
-            print(
+            self._print(
                 f"  [commands] command log failed: {resp.status_code} {resp.text[:120]}"
             )
         else:
-            print("  [commands] command log sent to Live Logs")
+            self._print("  [commands] command log sent to Live Logs")
 
     async def _record_push_history(
         self, command_type: str, payload: dict[str, object], result: dict
@@ -1265,12 +1378,12 @@ class POSEmulator:
             headers=self._headers(),
         )
         if resp.status_code >= 400:
-            print(
+            self._print(
                 "  [commands] push history record failed:"
                 f" {resp.status_code} {resp.text[:120]}"
             )
         else:
-            print("  [commands] push history recorded")
+            self._print("  [commands] push history recorded")
 
     def _simulate_command_result(
         self,
@@ -1333,7 +1446,7 @@ class POSEmulator:
             if self._command_should_fail():
                 return self._fail_result(
                     "Configuration update failed",
-                    random.choice(
+                    self._rng.choice(
                         [
                             "Configuration download failed: Connection timeout",
                             "Configuration validation failed: "
@@ -1380,11 +1493,11 @@ class POSEmulator:
             test_results: dict[str, object] = {}
             for test in tests if isinstance(tests, list) else [tests]:
                 name = str(test)
-                passed = random.random() < 0.9
+                passed = self._rng.random() < 0.9
                 test_results[name] = (
                     "pass"
                     if passed
-                    else f"fail: {random.choice(['timeout', 'resource exhausted', 'io error'])}"
+                    else f"fail: {self._rng.choice(['timeout', 'resource exhausted', 'io error'])}"
                 )
             healthy = all(v == "pass" for v in test_results.values())
             if not healthy:
@@ -1440,7 +1553,7 @@ class POSEmulator:
                 "status": "completed",
                 "result": {
                     "message": "pong",
-                    "latency_ms": round(random.uniform(5, 50), 1),
+                    "latency_ms": round(self._rng.uniform(5, 50), 1),
                 },
             },
         }
@@ -1455,7 +1568,7 @@ class POSEmulator:
         )
 
     def _command_should_fail(self) -> bool:
-        return random.random() < self.config.command_failure_rate
+        return self._rng.random() < self.config.command_failure_rate
 
     def _fail_result(
         self, summary: str, reason: str, details: dict[str, object] | None = None
@@ -1476,17 +1589,18 @@ class POSEmulator:
     # --
 
     async def start(self) -> None:
-        print(f"\n{'=' * 60}")
-        print(f"  {self._banner}")
-        print(f"  Device:  {self.config.device_name}")
-        print(f"  Backend: {self.config.backend_url}")
-        print(
+        self._print(f"\n{'=' * 60}")
+        self._print(f"  {self._banner}")
+        self._print(f"  Device:  {self.config.device_name}")
+        self._print(f"  Backend: {self.config.backend_url}")
+        self._print(
             f"  Mock DNA: hostname={self.config.mock_hostname}"
             f", MAC={self.config.mock_mac}, IP={self.config.mock_ip}"
         )
-        print(f"{'=' * 60}\n")
+        self._print(f"{'=' * 60}\n")
 
-        self._http = httpx.AsyncClient(timeout=30.0)
+        if self._owns_http:
+            self._http = httpx.AsyncClient(timeout=30.0)
         try:
             if not self._try_restore():
                 await self._provision()
@@ -1495,26 +1609,27 @@ class POSEmulator:
 
             await self._apply_default_consent()
 
-            print(f"\n  Device ID: {self.device_id}")
-            print(f"  Site ID:   {self.config.site_id}")
+            self._print(f"\n  Device ID: {self.device_id}")
+            self._print(f"  Site ID:   {self.config.site_id}")
             if self._push_channel:
-                print(
+                self._print(
                     f"  Push:      channel={self._push_channel}"
                     f", token={self._push_token}"
                 )
-            print(
+            self._print(
                 "\n  Starting loops"
                 f" (heartbeat={self.config.heartbeat_interval}s"
                 f", telemetry={self.config.telemetry_interval}s"
                 f", commands={self.config.command_poll_interval}s"
                 f", pushes={self.config.push_poll_interval}s"
+                f", long-poll={self.config.long_poll_timeout}s"
                 f", logs={self.config.logs_interval}s"
                 f", audits={self.config.audit_interval}s"
                 f", jobs={self.config.jobs_interval}s"
                 f", alerts={self.config.alerts_interval}s"
                 f", permissions={self.config.permission_sync_interval}s)"
             )
-            print("  Press Ctrl+C to stop.\n")
+            self._print("  Press Ctrl+C to stop.\n")
 
             await asyncio.gather(
                 self._heartbeat_loop(),
@@ -1528,10 +1643,305 @@ class POSEmulator:
                 self._consent_loop(),
             )
         finally:
-            await self._http.aclose()
+            if self._owns_http:
+                await self._http.aclose()
+
+    def stop(self) -> None:
+        self._shutdown_event.set()
+
+
+# ---------------------------------------------------------------------------
+# Fleet mode
+# ---------------------------------------------------------------------------
+
+# Path segments that identify a device, command or message rather than a
+# route: canonical IDs (``DEVICE-XXXX-XXXX-XXXX``), UUIDs and anything with a
+# digit in it other than an API version (``v1``).
+_ID_SEGMENT = re.compile(
+    r"^(?!v\d+$)(?:[A-Z]+(?:-[A-Z0-9]{4}){2,}|[0-9a-fA-F-]{32,36}|.*\d.*)$"
+)
+
+# Connections reserved per device in fleet mode: one for each long-poll loop
+# (commands, pushes) that holds its connection while parked.
+_LONG_POLL_CONNECTIONS_PER_DEVICE = 2
+
+
+def route_label(method: str, path: str) -> str:
+    """Collapse a request path into a route label (``GET /devices/{id}/...``)."""
+    if path.startswith(API_BASE_PATH):
+        path = path[len(API_BASE_PATH) :]
+    segments = [
+        "{id}" if segment and _ID_SEGMENT.match(segment) else segment
+        for segment in path.split("/")
+    ]
+    return f"{method} {'/'.join(segments)}"
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+@dataclass
+class _RouteStats:
+    count: int = 0
+    errors: int = 0
+    max_ms: float = 0.0
+    samples: list[float] = field(default_factory=list)
+
+
+class FleetStats:
+    """Aggregate request latency and error counters across a fleet.
+
+    Latencies are kept in a fixed-size reservoir sample per route so memory
+    stays flat over long load runs; percentiles are exact until a route has
+    seen more than ``reservoir_size`` requests. Long-poll routes (``.../wait``)
+    are reported per route but excluded from the overall latency figures,
+    since their latency is the hold time rather than server work.
+    """
+
+    def __init__(self, seed: int = 0, reservoir_size: int = 50_000) -> None:
+        self._rng = random.Random(seed)
+        self._reservoir_size = reservoir_size
+        self._routes: dict[str, _RouteStats] = {}
+        self._started = time.monotonic()
+
+    def record(self, route: str, latency_ms: float, ok: bool) -> None:
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = _RouteStats()
+        stats.count += 1
+        if not ok:
+            stats.errors += 1
+        stats.max_ms = max(stats.max_ms, latency_ms)
+        if len(stats.samples) < self._reservoir_size:
+            stats.samples.append(latency_ms)
+        else:
+            slot = self._rng.randrange(stats.count)
+            if slot < self._reservoir_size:
+                stats.samples[slot] = latency_ms
+
+    @staticmethod
+    def _summarise(
+        count: int, errors: int, samples: list[float], max_ms: float
+    ) -> dict:
+        ordered = sorted(samples)
+        return {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "p50_ms": round(_percentile(ordered, 50), 1),
+            "p95_ms": round(_percentile(ordered, 95), 1),
+            "p99_ms": round(_percentile(ordered, 99), 1),
+            "max_ms": round(max_ms, 1),
+        }
+
+    def snapshot(self) -> dict:
+        """Return overall and per-route counters and latency percentiles."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        routes = {
+            route: self._summarise(st.count, st.errors, st.samples, st.max_ms)
+            for route, st in sorted(self._routes.items())
+        }
+        work = [st for route, st in self._routes.items() if not route.endswith("/wait")]
+        overall = self._summarise(
+            sum(st.count for st in work),
+            sum(st.errors for st in work),
+            [v for st in work for v in st.samples],
+            max((st.max_ms for st in work), default=0.0),
+        )
+        total = sum(st.count for st in self._routes.values())
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "requests": total,
+            "errors": sum(st.errors for st in self._routes.values()),
+            "requests_per_s": round(total / elapsed, 1),
+            "overall": overall,
+            "routes": routes,
+        }
+
+    def format_report(self, per_route: bool = False) -> str:
+        snap = self.snapshot()
+        o = snap["overall"]
+        lines = [
+            f"  [fleet] t={snap['elapsed_s']}s requests={snap['requests']}"
+            f" ({snap['requests_per_s']}/s) errors={snap['errors']}"
+            f" | p50={o['p50_ms']}ms p95={o['p95_ms']}ms p99={o['p99_ms']}ms"
+            f" err={o['error_rate']:.2%}"
+        ]
+        if per_route:
+            for route, r in snap["routes"].items():
+                lines.append(
+                    f"    {route:<55} n={r['requests']:<7} err={r['error_rate']:.2%}"
+                    f" p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms"
+                )
+        return "\n".join(lines)
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """httpx transport wrapper that records per-route latency into FleetStats."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, stats: FleetStats) -> None:
+        self._inner = inner
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        route = route_label(request.method, request.url.path)
+        started = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception:
+            self._stats.record(route, (time.perf_counter() - started) * 1000, False)
+            raise
+        self._stats.record(
+            route, (time.perf_counter() - started) * 1000, response.status_code < 400
+        )
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def fleet_device_config(base: EmulatorConfig, index: int) -> EmulatorConfig:
+    """Derive the config of virtual device ``index`` from the fleet template.
+
+    Names, MACs, IPs and hostnames are a pure function of the index, so a
+    fleet restarted with the same size reuses its saved credentials.
+    """
+    n = index + 1
+    return replace(
+        base,
+        device_name=f"{base.device_name}-{n:05d}",
+        mock_hostname=f"{base.mock_hostname}-{n:05d}",
+        mock_mac=f"02:42:ac:{(n >> 16) & 0xFF:02x}:{(n >> 8) & 0xFF:02x}:{n & 0xFF:02x}",
+        mock_ip=f"10.{(n >> 16) & 0xFF}.{(n >> 8) & 0xFF}.{n & 0xFF}",
+    )
+
+
+class FleetRunner:
+    """Run N virtual POS devices in one event loop for load testing.
+
+    All devices share one pooled ``httpx.AsyncClient``, start staggered over
+    ``ramp_seconds``, and draw from per-device RNGs seeded from ``seed`` so a
+    run is reproducible. Per-tick console output is suppressed; instead an
+    aggregate latency/error report is printed every ``report_interval``
+    seconds and once more (per route) at shutdown.
+    """
+
+    def __init__(
+        self,
+        base_config: EmulatorConfig,
+        size: int,
+        *,
+        seed: int = 0,
+        ramp_seconds: float = 60.0,
+        max_connections: int = 0,
+        report_interval: float = 30.0,
+        report_json: Path | None = None,
+        emulator_class: type[POSEmulator] = POSEmulator,
+        banner: str = "HOMEPOT POS Emulator",
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.base_config = base_config
+        self.size = size
+        self.seed = seed
+        self.ramp_seconds = ramp_seconds
+        self.max_connections = max_connections or (
+            size * _LONG_POLL_CONNECTIONS_PER_DEVICE + 50
+        )
+        self.report_interval = report_interval
+        self.report_json = report_json
+        self.stats = FleetStats(seed=seed)
+        self.failed_devices: dict[str, str] = {}
+        self._emulator_class = emulator_class
+        self._banner = banner
+        self._transport = transport
+        self._emulators: list[POSEmulator] = []
+        self._shutdown_event = asyncio.Event()
+
+    async def _run_device(self, index: int, emulator: POSEmulator) -> None:
+        delay = self.ramp_seconds * index / max(self.size, 1)
+        try:
+            await asyncio.wait_for(self._shutdown_event.wait(), timeout=delay)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await emulator.start()
+        except Exception as exc:
+            self.failed_devices[emulator.config.device_name] = str(exc)
+            if len(self.failed_devices) <= 5:
+                print(f"  [fleet] {emulator.config.device_name} failed: {exc}")
+
+    async def _report_loop(self) -> None:
+        while not self._shutdown_event.is_set():
+            try:
+                await asyncio.wait_for(
+                    self._shutdown_event.wait(), timeout=self.report_interval
+                )
+            except asyncio.TimeoutError:
+                running = self.size - len(self.failed_devices)
+                print(f"{self.stats.format_report()} devices={running}/{self.size}")
+
+    async def start(self) -> None:
+        print(f"\n{'=' * 60}")
+        print(f"  {self._banner} (fleet mode)")
+        print(f"  Devices: {self.size} x {self.base_config.device_name}-NNNNN")
+        print(f"  Backend: {self.base_config.backend_url}")
+        print(
+            f"  Seed: {self.seed}  Ramp: {self.ramp_seconds}s"
+            f"  Pool: {self.max_connections} connections"
+        )
+        print(f"{'=' * 60}\n")
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        inner = self._transport or httpx.AsyncHTTPTransport(limits=limits)
+        async with httpx.AsyncClient(
+            transport=MeteredTransport(inner, self.stats), timeout=30.0
+        ) as http:
+            self._emulators = [
+                self._emulator_class(
+                    fleet_device_config(self.base_config, i),
+                    banner=self._banner,
+                    rng=random.Random(f"{self.seed}-{i}"),
+                    http=http,
+                    quiet=True,
+                )
+                for i in range(self.size)
+            ]
+            reporter = asyncio.ensure_future(self._report_loop())
+            try:
+                await asyncio.gather(
+                    *(self._run_device(i, e) for i, e in enumerate(self._emulators))
+                )
+            finally:
+                self.stop()
+                await reporter
+
+        print(self.stats.format_report(per_route=True))
+        if self.failed_devices:
+            print(f"  [fleet] {len(self.failed_devices)} device(s) failed to start")
+        if self.report_json is not None:
+            report = {
+                "devices": self.size,
+                "seed": self.seed,
+                "failed_devices": self.failed_devices,
+                **self.stats.snapshot(),
+            }
+            self.report_json.write_text(json.dumps(report, indent=2))
+            print(f"  [fleet] report written to {self.report_json}")
 
     def stop(self) -> None:
         self._shutdown_event.set()
+        for emulator in self._emulators:
+            emulator.stop()
 
 
 # ---------------------------------------------------------------------------
@@ -1620,6 +2030,15 @@ def parse_args(
         default=15.0,
         help="Push notification poll interval (seconds)",
     )
+    parser.add_argument(
+        "--long-poll-timeout",
+        type=float,
+        default=25.0,
+        help=(
+            "Seconds the backend may hold a command/push long-poll request "
+            "(0 disables long-polling and uses the poll intervals)"
+        ),
+    )
     parser.add_argument(
         "--logs-interval",
         type=float,
@@ -1667,6 +2086,45 @@ def parse_args(
         default=None,
         help="Seconds between device-initiated consent syncs",
     )
+    fleet = parser.add_argument_group(
+        "fleet mode", "Run many virtual devices in one process for load testing"
+    )
+    fleet.add_argument(
+        "--fleet-size",
+        type=int,
+        default=1,
+        help="Number of virtual devices to run (1 = single-device mode)",
+    )
+    fleet.add_argument(
+        "--fleet-seed",
+        type=int,
+        default=0,
+        help="Seed for per-device randomness, for reproducible load runs",
+    )
+    fleet.add_argument(
+        "--fleet-ramp-seconds",
+        type=float,
+        default=60.0,
+        help="Spread device start-up over this many seconds",
+    )
+    fleet.add_argument(
+        "--fleet-max-connections",
+        type=int,
+        default=0,
+        help="HTTP connection pool size (0 = 2 per device + 50)",
+    )
+    fleet.add_argument(
+        "--fleet-report-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between aggregate latency/error reports",
+    )
+    fleet.add_argument(
+        "--fleet-report-json",
+        type=str,
+        default=None,
+        help="Write the final fleet report to this JSON file",
+    )
     return parser.parse_args(argv)
 
 
@@ -1712,6 +2170,7 @@ def build_config(
         telemetry_interval=args.telemetry_interval,
         command_poll_interval=args.command_poll_interval,
         push_poll_interval=args.push_poll_interval,
+        long_poll_timeout=args.long_poll_timeout,
         logs_interval=args.logs_interval,
         audit_interval=args.audit_interval,
         jobs_interval=args.jobs_interval,
@@ -1738,11 +2197,27 @@ def main(
         )
         sys.exit(1)
 
-    emulator = emulator_class(config, banner=banner)
+    runner: POSEmulator | FleetRunner
+    if args.fleet_size > 1:
+        runner = FleetRunner(
+            config,
+            args.fleet_size,
+            seed=args.fleet_seed,
+            ramp_seconds=args.fleet_ramp_seconds,
+            max_connections=args.fleet_max_connections,
+            report_interval=args.fleet_report_interval,
+            report_json=(
+                Path(args.fleet_report_json) if args.fleet_report_json else None
+            ),
+            emulator_class=emulator_class,
+            banner=banner,
+        )
+    else:
+        runner = emulator_class(config, banner=banner)
 
     def _signal_handler() -> None:
         print("\n  Shutting down ...")
-        emulator.stop()
+        runner.stop()
 
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
@@ -1756,7 +2231,7 @@ def main(
     )
 
     try:
-        loop.run_until_complete(emulator.start())
+        loop.run_until_complete(runner.start())
     except KeyboardInterrupt:
         pass
     finally:
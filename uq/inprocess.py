@@ -0,0 +1,238 @@
+"""In-process EasyVVUQ execution backend for the uq/ studies.
+
+The studies originally ran every sample through ``ExecuteLocal``: render a
+template into a fresh run directory, start a Python interpreter for the runner
+script, and parse ``output.json`` back. For models that take microseconds,
+nearly all of the wall time went on interpreter start-up and file I/O.
+
+:class:`ExecuteInProcess` is a drop-in EasyVVUQ action that calls the model
+directly. It follows the same contract as EasyVVUQ's own ``ExecutePython``:
+it puts the QoI dict in ``previous["result"]`` and marks the run as collated,
+so no run directory, encoder or decoder is needed.
+
+Typical use::
+
+    execute = ExecuteInProcess(ANOMALY_MODEL, cache=ResultCache(path))
+    campaign = uq.Campaign(..., actions=uq.actions.Actions(execute))
+    campaign.draw_samples()
+    execute.prefill(campaign_samples(campaign))  # one vectorized pass
+    campaign.execute().collate()                 # per-run cache lookups
+
+``prefill`` evaluates every uncached sample in vectorized batches, optionally
+sharded across a process pool for CPU-bound models. Results are cached by a
+hash of the model fingerprint and the sample parameters. Re-running a
+campaign, or raising the PCE order (whose sample set largely overlaps the
+lower-order one), only evaluates the new points.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+# Keys EasyVVUQ adds to a run's params that are not model inputs.
+_NON_MODEL_KEYS = frozenset({"outfile"})
+
+Params = Mapping[str, Any]
+BatchFn = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class InProcessModel:
+    """A model that the in-process backend can evaluate.
+
+    Attributes:
+        name: Stable identifier, part of the cache key.
+        batch_fn: Module-level function (picklable, for the process pool)
+            mapping a list of parameter dicts to a list of QoI dicts.
+        fingerprint: Callable returning a string that changes whenever the
+            model's behaviour changes (e.g. thresholds read from config), so
+            cached results are not reused across incompatible runs.
+    """
+
+    name: str
+    batch_fn: BatchFn
+    fingerprint: Callable[[], str] = lambda: ""
+
+
+def model_params(params: Params) -> Dict[str, Any]:
+    """Strip EasyVVUQ bookkeeping keys from a run's params."""
+    return {k: v for k, v in params.items() if k not in _NON_MODEL_KEYS}
+
+
+def param_hash(model_key: str, params: Params) -> str:
+    """Return the cache key for one sample of a model."""
+    payload = json.dumps(
+        [model_key, model_params(params)], sort_keys=True, default=float
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Persistent QoI cache keyed by :func:`param_hash`.
+
+    Backed by SQLite so a cache file can be shared by successive runs of a
+    study (``path=None`` keeps it in memory for a single run).
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Open (creating if needed) the cache at ``path``."""
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, qoi TEXT NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the cached QoIs for whichever of ``keys`` are present."""
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = list(keys[start : start + 500])
+                rows = self._conn.execute(
+                    "SELECT key, qoi FROM results WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update((key, json.loads(qoi)) for key, qoi in rows)
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: Mapping[str, Dict[str, Any]]) -> None:
+        """Store QoIs for the given keys."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (key, qoi) VALUES (?, ?)",
+                [(key, json.dumps(qoi)) for key, qoi in items.items()],
+            )
+
+    def __len__(self) -> int:
+        """Return the number of cached samples."""
+        with self._lock:
+            count: int = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[
+                0
+            ]
+            return count
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+
+class ExecuteInProcess:
+    """EasyVVUQ action that evaluates a model in the calling process."""
+
+    def __init__(
+        self,
+        model: InProcessModel,
+        cache: Optional[ResultCache] = None,
+        workers: int = 0,
+        chunk_size: int = 10_000,
+    ) -> None:
+        """Create the action.
+
+        Args:
+            model: The model to evaluate.
+            cache: Result cache; defaults to a fresh in-memory cache.
+            workers: Process-pool size used by :meth:`prefill` for CPU-bound
+                models. ``0`` evaluates in the calling process.
+            chunk_size: Samples per model call (and per pool task).
+        """
+        self.model = model
+        self.cache = cache if cache is not None else ResultCache()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.evaluated = 0
+        self._model_key = f"{model.name}:{model.fingerprint()}"
+
+    def _chunks(self, samples: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        size = max(1, self.chunk_size)
+        return [samples[i : i + size] for i in range(0, len(samples), size)]
+
+    def evaluate(self, samples: Iterable[Params]) -> List[Dict[str, Any]]:
+        """Return the QoIs for ``samples``, evaluating only uncached ones."""
+        params = [model_params(s) for s in samples]
+        keys = [param_hash(self._model_key, p) for p in params]
+        cached = self.cache.get_many(keys)
+
+        pending: Dict[str, Dict[str, Any]] = {}
+        for key, p in zip(keys, params):
+            if key not in cached:
+                pending.setdefault(key, p)
+
+        if pending:
+            chunks = self._chunks(list(pending.values()))
+            if self.workers > 0 and len(chunks) > 1:
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    outputs = list(pool.map(self.model.batch_fn, chunks))
+            else:
+                outputs = [self.model.batch_fn(chunk) for chunk in chunks]
+            fresh = dict(zip(pending, (qoi for out in outputs for qoi in out)))
+            self.cache.put_many(fresh)
+            cached.update(fresh)
+            self.evaluated += len(fresh)
+
+        return [cached[key] for key in keys]
+
+    def prefill(self, samples: Iterable[Params]) -> int:
+        """Evaluate all uncached ``samples`` ahead of ``campaign.execute()``.
+
+        Returns the number of samples that had to be evaluated.
+        """
+        before = self.evaluated
+        self.evaluate(samples)
+        return self.evaluated - before
+
+    # -- EasyVVUQ action protocol ------------------------------------------
+
+    def start(self, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Evaluate the run described by ``previous`` and attach its QoIs."""
+        previous = previous if previous is not None else {}
+        run_info = previous.get("run_info", {})
+        params = run_info.get("params", run_info)
+        previous["result"] = self.evaluate([params])[0]
+        previous["collated"] = True
+        return previous
+
+    def finished(self) -> bool:
+        """Report completion; evaluation in :meth:`start` is synchronous."""
+        return True
+
+    def finalise(self) -> None:
+        """Nothing to clean up: results are attached in :meth:`start`."""
+
+    def succeeded(self) -> bool:
+        """Report success; model errors propagate from :meth:`start`."""
+        return True
+
+
+def campaign_samples(campaign: Any) -> List[Dict[str, Any]]:
+    """Return the params of every run drawn into an EasyVVUQ campaign."""
+    return [dict(info["params"]) for _, info in campaign.list_runs()]
+
+
+def execution_settings(study_dir: str, cache_name: str) -> Dict[str, Any]:
+    """Read the shared execution settings for a study from the environment.
+
+    ``UQ_EXECUTION``  ``inprocess`` (default) or ``subprocess`` (legacy runner
+                      scripts, one interpreter per sample).
+    ``UQ_WORKERS``    Process-pool size for in-process prefill (default 0).
+    ``UQ_CACHE``      Cache file; ``off`` disables persistence. Defaults to
+                      ``<study_dir>/<cache_name>``.
+    """
+    cache = os.environ.get("UQ_CACHE", os.path.join(study_dir, cache_name))
+    return {
+        "inprocess": os.environ.get("UQ_EXECUTION", "inprocess") != "subprocess",
+        "workers": int(os.environ.get("UQ_WORKERS", "0")),
+        "cache_path": None if cache.lower() == "off" else cache,
+    }
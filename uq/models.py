@@ -0,0 +1,96 @@
+"""Vectorized model functions for in-process UQ execution.
+
+Each ``*_batch`` function takes a list of sample parameter dicts and returns
+a list of QoI dicts. The inputs are cast exactly as the corresponding runner
+script (``anomaly_runner.py``, ``push_runner.py``) casts them, so in-process
+and subprocess campaigns produce the same QoIs.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, List
+
+import numpy as np
+
+from .inprocess import InProcessModel
+
+# Process-pool workers started with "spawn" import this module afresh; make
+# sure the homepot-client root (for ``ai``) is importable there too.
+_HOMEPOT_PATH = os.environ.get(
+    "HOMEPOT_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+if _HOMEPOT_PATH not in sys.path:
+    sys.path.insert(0, _HOMEPOT_PATH)
+
+ANOMALY_FLOAT_KEYS = (
+    "cpu_percent",
+    "memory_percent",
+    "disk_percent",
+    "error_rate",
+    "network_latency_ms",
+)
+ANOMALY_INT_KEYS = ("flapping_count", "consecutive_failures")
+ANOMALY_QOIS = ("anomaly_score", "num_anomalies")
+PUSH_QOIS = ("expected_failures", "failure_rate", "campaign_time_ms")
+
+
+@lru_cache(maxsize=1)
+def _detector() -> Any:
+    from ai.anomaly_detection import AnomalyDetector
+
+    return AnomalyDetector()
+
+
+def _column(samples: List[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array(
+        [math.nan if s.get(key) is None else float(s[key]) for s in samples],
+        dtype=np.float64,
+    )
+
+
+def anomaly_batch(samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Score anomaly-detector samples with ``check_anomaly_batch``."""
+    columns = {key: _column(samples, key) for key in ANOMALY_FLOAT_KEYS}
+    for key in ANOMALY_INT_KEYS:
+        # int(round(x)) in the runner: round-half-to-even, like np.rint.
+        columns[key] = np.rint(_column(samples, key))
+    result = _detector().check_anomaly_batch(columns)
+    return [
+        {"anomaly_score": float(score), "num_anomalies": int(count)}
+        for score, count in zip(result.scores, result.counts)
+    ]
+
+
+def anomaly_fingerprint() -> str:
+    """Identify the detector configuration the scores depend on."""
+    detector = _detector()
+    return json.dumps(
+        {"thresholds": detector.thresholds, "sensitivity": detector.sensitivity},
+        sort_keys=True,
+    )
+
+
+def push_batch(samples: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Evaluate the push-delivery expected-value model (see push_runner.py)."""
+    success = np.clip(_column(samples, "success_rate"), 0.0, 1.0 - 1e-9)
+    devices = np.maximum(1, np.rint(_column(samples, "num_devices")))
+    expected_failures = devices * (1.0 - success)
+    failure_rate = 1.0 - success
+    campaign_time = 100.0 + 400.0 * devices / (devices + 1.0)
+    return [
+        {
+            "expected_failures": float(ef),
+            "failure_rate": float(fr),
+            "campaign_time_ms": float(ct),
+        }
+        for ef, fr, ct in zip(expected_failures, failure_rate, campaign_time)
+    ]
+
+
+ANOMALY_MODEL = InProcessModel("anomaly", anomaly_batch, anomaly_fingerprint)
+PUSH_MODEL = InProcessModel("push", push_batch)
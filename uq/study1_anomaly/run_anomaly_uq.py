@@ -31,6 +31,12 @@ Run
 
 Results are printed to stdout and (if matplotlib is available) saved as PNG
 files inside uq/study1_anomaly/figs/.
+
+Samples are evaluated in-process in one vectorized pass and cached in
+``uq/study1_anomaly/.uq_cache.sqlite``, so re-runs (or a higher PCE order)
+only evaluate new sample points. Set ``UQ_EXECUTION=subprocess`` to use the
+original one-interpreter-per-sample runner; see ``uq/inprocess.py`` for the
+other ``UQ_*`` settings.
 """
 
 import os
@@ -62,6 +68,19 @@ HOMEPOT_ROOT = os.environ.get(
     ),  # script is uq/study1_anomaly/ → root is two levels up
 )
 
+if HOMEPOT_ROOT not in sys.path:
+    sys.path.insert(0, HOMEPOT_ROOT)
+
+from uq.inprocess import (  # noqa: E402
+    ExecuteInProcess,
+    ResultCache,
+    campaign_samples,
+    execution_settings,
+)
+from uq.models import ANOMALY_MODEL  # noqa: E402
+
+EXECUTION = execution_settings(UQ_DIR, ".uq_cache.sqlite")
+
 CAMPAIGN_WORK_DIR = os.path.join(UQ_DIR, "campaign_anomaly_uq")
 FIGS_DIR = os.path.join(UQ_DIR, "figs")
 TEMPLATE_FILE = os.path.join(UQ_DIR, "anomaly_runner.template")
@@ -121,30 +140,39 @@ vary = {
 # ---------------------------------------------------------------------------
 # Encoder / Decoder / Execute
 # ---------------------------------------------------------------------------
-encoder = uq.encoders.GenericEncoder(
-    template_fname=TEMPLATE_FILE,
-    delimiter="$",
-    target_filename="input.json",
-)
+in_process = None
+if EXECUTION["inprocess"]:
+    in_process = ExecuteInProcess(
+        ANOMALY_MODEL,
+        cache=ResultCache(EXECUTION["cache_path"]),
+        workers=EXECUTION["workers"],
+    )
+    actions = uq.actions.Actions(in_process)
+else:
+    encoder = uq.encoders.GenericEncoder(
+        template_fname=TEMPLATE_FILE,
+        delimiter="$",
+        target_filename="input.json",
+    )
 
-decoder = uq.decoders.JSONDecoder(
-    target_filename="output.json",
-    output_columns=["anomaly_score", "num_anomalies"],
-)
+    decoder = uq.decoders.JSONDecoder(
+        target_filename="output.json",
+        output_columns=["anomaly_score", "num_anomalies"],
+    )
 
-# Pass HOMEPOT_PATH so the runner can find ai/anomaly_detection.py.
-# The HOMEPOT_PATH env var is inherited by child processes automatically,
-# but we set it explicitly here for clarity.
-os.environ.setdefault("HOMEPOT_PATH", HOMEPOT_ROOT)
+    # Pass HOMEPOT_PATH so the runner can find ai/anomaly_detection.py.
+    # The HOMEPOT_PATH env var is inherited by child processes automatically,
+    # but we set it explicitly here for clarity.
+    os.environ.setdefault("HOMEPOT_PATH", HOMEPOT_ROOT)
 
-execute = uq.actions.ExecuteLocal(f"{sys.executable} {RUNNER_SCRIPT}")
+    execute = uq.actions.ExecuteLocal(f"{sys.executable} {RUNNER_SCRIPT}")
 
-actions = uq.actions.Actions(
-    uq.actions.CreateRunDirectory(root=CAMPAIGN_WORK_DIR, flatten=True),
-    uq.actions.Encode(encoder),
-    execute,
-    uq.actions.Decode(decoder),
-)
+    actions = uq.actions.Actions(
+        uq.actions.CreateRunDirectory(root=CAMPAIGN_WORK_DIR, flatten=True),
+        uq.actions.Encode(encoder),
+        execute,
+        uq.actions.Decode(decoder),
+    )
 
 # ---------------------------------------------------------------------------
 # Campaign
@@ -173,6 +201,9 @@ print(f"[INFO] PCE order {POLY_ORDER} → {n_samples} samples drawn")
 # Execute & collate
 # ---------------------------------------------------------------------------
 print("[INFO] Running model evaluations ...")
+if in_process is not None:
+    evaluated = in_process.prefill(campaign_samples(campaign))
+    print(f"[INFO] Evaluated {evaluated} new samples ({n_samples - evaluated} cached)")
 campaign.execute().collate()
 print("[INFO] All samples complete.")
 
@@ -31,6 +31,11 @@ Run
 Output is printed to stdout.  Three plots are saved to
 ``uq/study2_simulator/figs/``.  Campaign working directories are removed
 automatically after each scenario's analysis completes.
+
+Samples are evaluated in-process in vectorized batches and cached in
+``uq/study2_simulator/.uq_cache.sqlite``. Set ``UQ_EXECUTION=subprocess`` to
+use the bundled runner script instead; see ``uq/inprocess.py`` for the other
+``UQ_*`` settings.
 """
 
 from concurrent.futures import ThreadPoolExecutor
@@ -66,6 +71,18 @@ TEMPLATE_FILE = os.path.join(STUDY_DIR, "anomaly_runner.template")
 os.makedirs(FIGS_DIR, exist_ok=True)
 
 os.environ.setdefault("HOMEPOT_PATH", HOMEPOT_ROOT)
+if HOMEPOT_ROOT not in sys.path:
+    sys.path.insert(0, HOMEPOT_ROOT)
+
+from uq.inprocess import (  # noqa: E402
+    ExecuteInProcess,
+    ResultCache,
+    campaign_samples,
+    execution_settings,
+)
+from uq.models import ANOMALY_MODEL  # noqa: E402
+
+EXECUTION = execution_settings(STUDY_DIR, ".uq_cache.sqlite")
 
 print(f"[INFO] Homepot root:   {HOMEPOT_ROOT}")
 print(f"[INFO] Runner:         {RUNNER_SCRIPT}")
@@ -188,6 +205,15 @@ decoder = uq.decoders.JSONDecoder(
     output_columns=["anomaly_score", "num_anomalies"],
 )
 
+# One action (and cache) shared by all scenarios in in-process mode.
+in_process = None
+if EXECUTION["inprocess"]:
+    in_process = ExecuteInProcess(
+        ANOMALY_MODEL,
+        cache=ResultCache(EXECUTION["cache_path"]),
+        workers=EXECUTION["workers"],
+    )
+
 # ---------------------------------------------------------------------------
 # Run one EasyVVUQ campaign per scenario
 # ---------------------------------------------------------------------------
@@ -200,13 +226,16 @@ for scenario_name in SCENARIO_ORDER:
         rmtree(work_dir)
     os.makedirs(work_dir)
 
-    execute = uq.actions.ExecuteLocal(f"{sys.executable} {RUNNER_SCRIPT}")
-    actions = uq.actions.Actions(
-        uq.actions.CreateRunDirectory(root=work_dir, flatten=True),
-        uq.actions.Encode(encoder),
-        execute,
-        uq.actions.Decode(decoder),
-    )
+    if in_process is not None:
+        actions = uq.actions.Actions(in_process)
+    else:
+        execute = uq.actions.ExecuteLocal(f"{sys.executable} {RUNNER_SCRIPT}")
+        actions = uq.actions.Actions(
+            uq.actions.CreateRunDirectory(root=work_dir, flatten=True),
+            uq.actions.Encode(encoder),
+            execute,
+            uq.actions.Decode(decoder),
+        )
 
     campaign = uq.Campaign(
         name=f"sim2_{scenario_name}",
@@ -230,10 +259,16 @@ for scenario_name in SCENARIO_ORDER:
         f"(N_MC={N_MC_PER_SCENARIO})"
     )
 
-    # Run up to 4 subprocesses concurrently — enough parallelism to be fast
-    # without spawning thousands of Python processes simultaneously.
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        campaign.execute(pool=pool).collate()
+    if in_process is not None:
+        # One vectorized pass over the Saltelli plan; execute() then only
+        # looks results up in the cache.
+        in_process.prefill(campaign_samples(campaign))
+        campaign.execute().collate()
+    else:
+        # Run up to 4 subprocesses concurrently — enough parallelism to be fast
+        # without spawning thousands of Python processes simultaneously.
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            campaign.execute(pool=pool).collate()
 
     analysis = uq.analysis.QMCAnalysis(
         sampler=sampler,
@@ -35,6 +35,11 @@ Run
 
 Results are printed to stdout.  Four plots are saved to
 ``uq/study3_push/figs/``.
+
+The model is evaluated in-process in vectorized batches and cached in
+``uq/study3_push/.uq_cache.sqlite``. Set ``UQ_EXECUTION=subprocess`` to use
+``push_runner.py`` instead; see ``uq/inprocess.py`` for the other ``UQ_*``
+settings.
 """
 
 from concurrent.futures import ThreadPoolExecutor
@@ -70,6 +75,27 @@ TEMPLATE_FILE = os.path.join(STUDY_DIR, "push_runner.template")
 
 os.environ.setdefault("HOMEPOT_PATH", HOMEPOT_ROOT)
 print(f"[INFO] Homepot root: {HOMEPOT_ROOT}")
+if HOMEPOT_ROOT not in sys.path:
+    sys.path.insert(0, HOMEPOT_ROOT)
+
+from uq.inprocess import (  # noqa: E402
+    ExecuteInProcess,
+    ResultCache,
+    campaign_samples,
+    execution_settings,
+)
+from uq.models import PUSH_MODEL  # noqa: E402
+
+EXECUTION = execution_settings(STUDY_DIR, ".uq_cache.sqlite")
+IN_PROCESS = (
+    ExecuteInProcess(
+        PUSH_MODEL,
+        cache=ResultCache(EXECUTION["cache_path"]),
+        workers=EXECUTION["workers"],
+    )
+    if EXECUTION["inprocess"]
+    else None
+)
 
 # ---------------------------------------------------------------------------
 # EasyVVUQ parameter spec (must cover every template variable incl. outfile)
@@ -109,13 +135,16 @@ def run_campaign(vary: dict, n_mc: int, seed: int, name: str) -> tuple:
         rmtree(work_dir)
     os.makedirs(work_dir)
 
-    execute = uq.actions.ExecuteLocal(f"{sys.executable} {RUNNER_SCRIPT}")
-    actions = uq.actions.Actions(
-        uq.actions.CreateRunDirectory(root=work_dir, flatten=True),
-        uq.actions.Encode(encoder),
-        execute,
-        uq.actions.Decode(decoder),
-    )
+    if IN_PROCESS is not None:
+        actions = uq.actions.Actions(IN_PROCESS)
+    else:
+        execute = uq.actions.ExecuteLocal(f"{sys.executable} {RUNNER_SCRIPT}")
+        actions = uq.actions.Actions(
+            uq.actions.CreateRunDirectory(root=work_dir, flatten=True),
+            uq.actions.Encode(encoder),
+            execute,
+            uq.actions.Decode(decoder),
+        )
 
     campaign = uq.Campaign(
         name=name,
@@ -139,8 +168,12 @@ def run_campaign(vary: dict, n_mc: int, seed: int, name: str) -> tuple:
         f"(N_MC={n_mc}, {len(vary)} inputs)"
     )
 
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        campaign.execute(pool=pool).collate()
+    if IN_PROCESS is not None:
+        IN_PROCESS.prefill(campaign_samples(campaign))
+        campaign.execute().collate()
+    else:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            campaign.execute(pool=pool).collate()
 
     analysis = uq.analysis.QMCAnalysis(sampler=sampler, qoi_cols=QOI_COLS)
     campaign.apply_analysis(analysis)